@@ -4,6 +4,7 @@ from app.models.permissionsModel import Permissions
 from app.models.fileModel import File
 from app.models.logModel import Logger
 from app.models.eventsModel import Events
+from app.models.notificationLogModel import NotificationLog
 
 from typing import Any
 
@@ -14,6 +15,7 @@ models_mapping: dict[str, Any] = {
     "File": File,
     "Logger": Logger,
     "Events": Events,
+    "NotificationLog": NotificationLog,
     "*": None
 }
 
@@ -31,5 +33,6 @@ models_fields_mapping: dict[str, tuple] = {
     ),
     "File": ("filename", "originalname", "content_type", "file_path"),
     "Logger": ("action", "user_id", "entity", "data"),
+    "NotificationLog": ("user_id", "event_id", "channel", "status", "content", "is_read"),
     "*": ("", "")
 }
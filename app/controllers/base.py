@@ -1,10 +1,12 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Dict, Generic, List, Optional, Tuple, Type, TypeVar, Union
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from app.database.database import Base
 from app.utils import apply_filters_dynamic
+from app.utils.filter import apply_ordering
+from app.utils import aggregate as aggregation
 
 # Define tipos genéricos para o modelo e os esquemas
 ModelType = TypeVar("ModelType", bound=Base) # type: ignore
@@ -36,6 +38,16 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         )
         return result.scalars().all()
 
+    def filtered_query(self, filters: Optional[str] = None, visibility=None):
+        """select(model) com o predicado de visibilidade e os filtros do DSL, sem paginação."""
+        query = select(self.model)
+        if visibility is not None:
+            query = query.where(visibility)
+        if filters:
+            # Passa o nome do modelo para a função de filtro
+            query = apply_filters_dynamic(query, filters, self.model.__name__)
+        return query
+
     # NOVO: Método centralizado para obter múltiplos registros com filtros e ordenação
     async def get_multi_filtered(
         self, 
@@ -45,25 +57,46 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         limit: int = 100, 
         filters: Optional[str] = None,
         # Permite passar opções de carregamento (selectinload)
-        load_options: Optional[List] = None 
+        load_options: Optional[List] = None,
+        # Predicado de visibilidade por linha (app/services/visibility.py), aplicado no WHERE
+        visibility=None,
+        # Ex: "date+desc,title"; campos de SORTABLE_FIELDS (app/utils/filter.py), sempre com o id no fim
+        order_by: Optional[str] = None,
     ) -> List[ModelType]:
-        query = select(self.model)
+        query = self.filtered_query(filters, visibility)
+        query = apply_ordering(query, order_by, self.model.__name__, self.model)
 
         # Aplica o carregamento eager de relacionamentos se fornecido
         if load_options:
             query = query.options(*load_options)
 
-        # Aplica os filtros dinâmicos se existirem
-        if filters:
-            # Passa o nome do modelo para a função de filtro
-            query = apply_filters_dynamic(query, filters, self.model.__name__)
-
         query = query.offset(skip).limit(limit if limit > 0 else None)
         
         result = await db.execute(query)
         # Usa .unique() para evitar duplicatas ao usar joins
         return result.scalars().unique().all()
 
+    async def count_filtered(
+        self, db: AsyncSession, *, filters: Optional[str] = None, visibility=None,
+    ) -> Tuple[int, bool]:
+        """Total da lista filtrada e se é exato (acima de TOTAL_COUNT_EXACT_LIMIT é estimado)."""
+        return await aggregation.total_count(db, self.filtered_query(filters, visibility), self.model)
+
+    async def aggregate(
+        self,
+        db: AsyncSession,
+        *,
+        filters: Optional[str] = None,
+        group_by: Optional[str] = None,
+        aggregates: Optional[str] = None,
+        limit: Optional[int] = None,
+        visibility=None,
+    ) -> List[Dict[str, Any]]:
+        """Contagens/mín/máx por grupo, no SQL (sintaxe em app/utils/aggregate.py)."""
+        return await aggregation.aggregate(
+            db, self.filtered_query(filters, visibility), self.model, group_by, aggregates, limit
+        )
+
     async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
         obj_in_data = jsonable_encoder(obj_in.model_dump(exclude_unset=True, exclude_none=True))
         db_obj = self.model(**obj_in_data)
@@ -0,0 +1,228 @@
+# app/controllers/caldavController.py
+
+from datetime import datetime, date, time, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import icalendar
+from sqlalchemy import func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import noload
+
+from app.database.revision import cap_token, committed_horizon
+from app.models.calendarModel import Calendar
+from app.models.eventsModel import Events
+from app.models.tombstoneModel import Tombstone
+
+PRODID = "-//Risetec//Agenda Risetec//PT-BR"
+
+
+def make_etag(revision: int) -> str:
+    """ETag forte derivado da revisão global da linha."""
+    return f'"{revision}"'
+
+
+# --- Consultas ---
+# Todas usam noload nos relacionamentos 'selectin' dos modelos: o CalDAV só precisa
+# das colunas, e carregar Calendar.events aqui faria cada PROPFIND baixar a agenda inteira.
+# `visibility` é o predicado do usuário (app/services/visibility.py) para o modelo consultado.
+
+def _visible(query, visibility):
+    return query if visibility is None else query.where(visibility)
+
+
+async def get_calendars(db: AsyncSession, visibility=None) -> List[Calendar]:
+    query = select(Calendar).options(noload(Calendar.events)).order_by(Calendar.id)
+    result = await db.execute(_visible(query, visibility))
+    return result.scalars().all()
+
+
+async def get_calendar(db: AsyncSession, calendar_id: int, visibility=None) -> Optional[Calendar]:
+    query = select(Calendar).options(noload(Calendar.events)).filter(Calendar.id == calendar_id)
+    result = await db.execute(_visible(query, visibility))
+    return result.scalars().first()
+
+
+async def get_ctags(db: AsyncSession, calendar_ids: Iterable[int]) -> Dict[int, int]:
+    """
+    Calcula o ctag (= sync-token) de cada calendário: a maior revisão entre o próprio
+    calendário, seus eventos e os tombstones de eventos removidos, limitada ao horizonte
+    confirmado (ver app/database/revision.py), lido antes das agregações.
+    São três agregações indexadas, independente da quantidade de eventos.
+    """
+    calendar_ids = list(calendar_ids)
+    if not calendar_ids:
+        return {}
+
+    horizon = await committed_horizon(db)
+    ctags: Dict[int, int] = {}
+    queries = [
+        select(Calendar.id, Calendar.revision).where(Calendar.id.in_(calendar_ids)),
+        select(Events.calendar_id, func.max(Events.revision))
+        .where(Events.calendar_id.in_(calendar_ids))
+        .group_by(Events.calendar_id),
+        select(Tombstone.calendar_id, func.max(Tombstone.revision))
+        .where(Tombstone.entity == "Events", Tombstone.calendar_id.in_(calendar_ids))
+        .group_by(Tombstone.calendar_id),
+    ]
+    for query in queries:
+        for calendar_id, revision in (await db.execute(query)).all():
+            if revision is not None and revision > ctags.get(calendar_id, 0):
+                ctags[calendar_id] = revision
+    return {calendar_id: cap_token(ctag, horizon) for calendar_id, ctag in ctags.items()}
+
+
+async def get_event_etags(db: AsyncSession, calendar_id: int, visibility=None) -> List[Tuple[str, int]]:
+    """Retorna apenas (uid, revision) dos eventos, sem carregar as linhas completas."""
+    query = select(Events.uid, Events.revision).where(Events.calendar_id == calendar_id)
+    result = await db.execute(_visible(query, visibility))
+    return result.all()
+
+
+async def get_events(
+    db: AsyncSession,
+    *,
+    calendar_id: Optional[int] = None,
+    uids: Optional[List[str]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    since: Optional[int] = None,
+    visibility=None,
+) -> List[Events]:
+    query = _visible(select(Events).options(noload(Events.calendar), noload(Events.users)), visibility)
+    if calendar_id is not None:
+        query = query.where(Events.calendar_id == calendar_id)
+    if uids is not None:
+        query = query.where(Events.uid.in_(uids))
+    if start is not None:
+        # Eventos recorrentes podem ter ocorrências dentro da janela mesmo começando antes dela
+        query = query.where(or_(
+            Events.recurring_rule.isnot(None),
+            func.coalesce(Events.endDate, Events.date) >= start,
+        ))
+    if end is not None:
+        query = query.where(Events.date < end)
+    if since is not None:
+        query = query.where(Events.revision > since)
+
+    result = await db.execute(query)
+    return result.scalars().all()
+
+
+async def get_deleted_uids(db: AsyncSession, *, calendar_id: int, since: int, visibility=None) -> List[str]:
+    query = select(Tombstone.uid).where(
+        Tombstone.entity == "Events",
+        Tombstone.calendar_id == calendar_id,
+        Tombstone.revision > since,
+        # Evento que saiu e voltou para o calendário não conta como removido
+        ~select(Events.id).where(Events.uid == Tombstone.uid, Events.calendar_id == calendar_id).exists(),
+    )
+    result = await db.execute(_visible(query, visibility).distinct())
+    return [uid for uid in result.scalars().all() if uid]
+
+
+# --- Conversão iCalendar ---
+
+def _add_recurrence(vevent: icalendar.Event, recurring_rule: str):
+    """
+    `recurring_rule` pode estar no formato curto ("FREQ=WEEKLY;BYDAY=MO") ou no formato
+    de várias linhas gerado por `serialize_rruleset` (DTSTART/RRULE/EXDATE/RDATE).
+    """
+    for line in recurring_rule.splitlines():
+        name, sep, value = line.partition(":")
+        if not sep:
+            name, value = "RRULE", line
+        name = name.strip().upper()
+        value = value.strip()
+        if not value:
+            continue
+        try:
+            if name == "RRULE":
+                vevent.add("rrule", icalendar.vRecur.from_ical(value))
+            elif name in ("EXDATE", "RDATE"):
+                vevent.add(name.lower(), icalendar.vDDDTypes.from_ical(value))
+        except ValueError:
+            continue
+
+
+def event_to_ical(event: Events) -> bytes:
+    cal = icalendar.Calendar()
+    cal.add("prodid", PRODID)
+    cal.add("version", "2.0")
+
+    vevent = icalendar.Event()
+    vevent.add("uid", event.uid)
+    vevent.add("dtstamp", datetime.now(timezone.utc))
+    vevent.add("summary", event.title or "")
+    if event.description:
+        vevent.add("description", event.description)
+    if event.location:
+        vevent.add("location", event.location)
+    if event.status:
+        vevent.add("status", event.status.upper())
+
+    if event.isAllDay:
+        start = event.date.date()
+        end = event.endDate.date() if event.endDate else start
+        vevent.add("dtstart", start)
+        # DTEND de eventos de dia inteiro é exclusivo (RFC 5545)
+        vevent.add("dtend", end + timedelta(days=1))
+    else:
+        vevent.add("dtstart", event.date)
+        if event.endDate:
+            vevent.add("dtend", event.endDate)
+
+    if event.recurring_rule:
+        _add_recurrence(vevent, event.recurring_rule)
+
+    cal.add_component(vevent)
+    return cal.to_ical()
+
+
+def ical_to_event_fields(data: bytes) -> dict:
+    """
+    Converte o primeiro VEVENT de um objeto iCalendar nos campos de `EventBase`/`EventUpdate`.
+    Lança ValueError se o conteúdo não for um VEVENT válido.
+    """
+    cal = icalendar.Calendar.from_ical(data)
+    vevent = next(iter(cal.walk("VEVENT")), None)
+    if vevent is None or "DTSTART" not in vevent:
+        raise ValueError("VEVENT com DTSTART é obrigatório")
+
+    start = vevent.decoded("DTSTART")
+    end = vevent.decoded("DTEND") if "DTEND" in vevent else None
+    is_all_day = not isinstance(start, datetime)
+
+    fields = {
+        "title": str(vevent.get("SUMMARY", "")),
+        "description": str(vevent.get("DESCRIPTION", "")),
+        "location": str(vevent["LOCATION"]) if "LOCATION" in vevent else None,
+        "status": str(vevent.get("STATUS", "CONFIRMED")).lower(),
+        "isAllDay": is_all_day,
+    }
+
+    if is_all_day:
+        fields["date"] = datetime.combine(start, time.min)
+        # DTEND exclusivo -> endDate inclusivo
+        fields["endDate"] = datetime.combine(end - timedelta(days=1), time.min) if isinstance(end, date) else None
+        fields["startTime"] = None
+        fields["endTime"] = None
+    else:
+        fields["date"] = start
+        fields["endDate"] = end if isinstance(end, datetime) else None
+        fields["startTime"] = start.strftime("%H:%M")
+        fields["endTime"] = end.strftime("%H:%M") if isinstance(end, datetime) else None
+
+    rules = []
+    if "RRULE" in vevent:
+        rules.append(f"RRULE:{vevent['RRULE'].to_ical().decode()}")
+    exdates = vevent.get("EXDATE")
+    if exdates is not None:
+        for exdate in exdates if isinstance(exdates, list) else [exdates]:
+            rules.append(f"EXDATE:{exdate.to_ical().decode()}")
+    # Uma RRULE sozinha fica no formato curto usado pelo frontend
+    if len(rules) == 1 and rules[0].startswith("RRULE:"):
+        rules[0] = rules[0][len("RRULE:"):]
+    fields["recurring_rule"] = "\n".join(rules) if rules else None
+
+    return fields
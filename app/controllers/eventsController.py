@@ -5,6 +5,7 @@ from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
+from sqlalchemy.sql import func
 from datetime import datetime, timedelta
 from dateutil.rrule import rrulestr, rrule, rruleset
 
@@ -13,6 +14,7 @@ from app.models.eventsModel import Events
 from app.models.userModel import User
 from app.schemas.eventsSchema import EventCreate, EventBase, EventUpdate
 from app.utils import apply_filters_dynamic
+from app.utils.filter import apply_ordering
 from app.models.calendarModel import Calendar  # IMPORTANTE
 
 def serialize_rruleset(rs: rruleset, dtstart: datetime) -> str:
@@ -54,10 +56,13 @@ class CRUDEvent(CRUDBase[Events, EventCreate, EventUpdate]):
             if len(users) != len(user_ids):
                 raise HTTPException(status_code=404, detail="Um ou mais usuários não foram encontrados.")
             db_obj.users = users
+            # Mudar só a tabela de associação não gera UPDATE em 'events'; forçamos um
+            # para que revision/updated_at reflitam a troca de participantes.
+            db_obj.updated_at = func.now()
 
         return db_obj
 
-    async def create(self, db: AsyncSession, *, obj_in: EventBase) -> Events:
+    async def create(self, db: AsyncSession, *, obj_in: EventBase, uid: Optional[str] = None) -> Events:
         # Busca o calendário para herdar as configurações
         calendar_result = await db.execute(select(Calendar).filter(Calendar.id == obj_in.calendar_id))
         calendar = calendar_result.scalars().first()
@@ -66,6 +71,9 @@ class CRUDEvent(CRUDBase[Events, EventCreate, EventUpdate]):
 
         obj_in_data = obj_in.model_dump(exclude_unset=True, exclude_none=True)
         user_ids = obj_in_data.pop('user_ids', [])
+        # Clientes CalDAV definem o próprio UID do evento
+        if uid:
+            obj_in_data['uid'] = uid
         
         # --- ALTERAÇÃO PRINCIPAL AQUI ---
         # Define a cor do evento como a cor do calendário, se nenhuma cor for especificada.
@@ -120,6 +128,9 @@ class CRUDEvent(CRUDBase[Events, EventCreate, EventUpdate]):
         new_event_data.update(update_data)
         new_event_data.pop('id', None)
         new_event_data.pop('uid', None)
+        # Controle de versão é do servidor: o novo evento recebe sua própria revisão
+        new_event_data.pop('revision', None)
+        new_event_data.pop('updated_at', None)
         new_event_data['date'] = occurrence_date
         new_event_data['recurring_rule'] = None 
 
@@ -167,30 +178,54 @@ class CRUDEvent(CRUDBase[Events, EventCreate, EventUpdate]):
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
         return event
 
+    async def get_version(self, db: AsyncSession, *, id: int):
+        """
+        O que identifica a versão do detalhe do evento sem carregá-lo: a revision do evento
+        e, dos participantes, a maior revision, a quantidade e a soma dos ids (entrar ou sair
+        alguém não altera a linha do evento). None se o evento não existe.
+        """
+        result = await db.execute(
+            select(
+                self.model.revision,
+                func.max(User.revision),
+                func.count(User.id),
+                func.sum(User.id),
+            )
+            .select_from(self.model)
+            .outerjoin(self.model.users)
+            .where(self.model.id == id)
+            .group_by(self.model.id)
+        )
+        return result.first()
+
     async def get_multi_filtered(
-        self, db: AsyncSession, *, skip: int, limit: int, filters: Optional[str] = None, model: Optional[str] = "", load_options: Optional[List] = None
+        self, db: AsyncSession, *, skip: int, limit: int, filters: Optional[str] = None, model: Optional[str] = "", load_options: Optional[List] = None,
+        visibility=None, order_by: Optional[str] = None,
     ) -> List[Events]:
         query = select(self.model)
+        if visibility is not None:
+            query = query.where(visibility)
         if load_options:
             query = query.options(*load_options)
         
         if filters and model:
             query = apply_filters_dynamic(query, filters, model)
+        query = apply_ordering(query, order_by, "Events", self.model)
 
         result = await db.execute(query.offset(skip).limit(limit if limit > 0 else None))
         return result.scalars().unique().all()
     
     async def get_events_in_range(
-        self, db: AsyncSession, *, calendar_id: int, start_date: datetime, end_date: datetime
+        self, db: AsyncSession, *, calendar_id: int, start_date: datetime, end_date: datetime, visibility=None
     ) -> List[Events]:
-        result = await db.execute(
-            select(self.model)
-            .where(
-                (self.model.calendar_id == calendar_id) &
-                (self.model.date >= start_date) &
-                (self.model.date < end_date)
-            )
+        query = select(self.model).where(
+            (self.model.calendar_id == calendar_id) &
+            (self.model.date >= start_date) &
+            (self.model.date < end_date)
         )
+        if visibility is not None:
+            query = query.where(visibility)
+        result = await db.execute(query)
         return result.scalars().unique().all()
 
 event_controller = CRUDEvent(Events)
\ No newline at end of file
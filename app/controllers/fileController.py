@@ -1,10 +1,15 @@
 # crud.py
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
+from sqlalchemy import func, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.models.fileModel import File
+from app.models.fileModel import File, FileBlob
 from app.schemas.fileSchema import FileBase
+from app.database.database import dialect_insert
+from app.services.file_storage import file_storage
 from app.utils import apply_filters_dynamic
+from app.utils.cursor import decode_cursor, encode_cursor as encode_key
+from app.core.config import settings
 import os
 
 async def get_file(db: AsyncSession, file_id: int):
@@ -14,17 +19,65 @@ async def get_file(db: AsyncSession, file_id: int):
     )
     return result.scalars().unique().first()
 
-async def get_files(db: AsyncSession, skip: int = 0, limit: int = 10, filters: Optional[List[str]] = None,
-                    model: str = ""):
-    query = select(File)
+def _catalog_query(query, *, filters: Optional[str] = None, model: str = "", owner_id: Optional[int] = None,
+                   content_type: Optional[str] = None, event_id: Optional[int] = None):
     if filters and model:
         query = apply_filters_dynamic(query, filters, model)
-    result = await db.execute(
-        query
-        .offset(skip)
-        .limit(limit if limit > 0 else None)
+    if owner_id is not None:
+        query = query.where(File.owner_id == owner_id)
+    if event_id is not None:
+        query = query.where(File.event_id == event_id)
+    if content_type:
+        # "image/" ou "image/*" filtram pelo tipo principal
+        if content_type.endswith(("/", "/*")):
+            query = query.where(File.content_type.startswith(content_type.rstrip("*")))
+        else:
+            query = query.where(File.content_type == content_type)
+    # Mais recentes primeiro; o id desempata e mantém a ordem estável entre páginas
+    return query.order_by(File.created_at.desc(), File.id.desc())
+
+async def get_files(db: AsyncSession, skip: int = 0, limit: int = 10, filters: Optional[str] = None,
+                    model: str = "", owner_id: Optional[int] = None, content_type: Optional[str] = None,
+                    event_id: Optional[int] = None, cursor: Optional[str] = None) -> List[File]:
+    """
+    Catálogo de arquivos. Com `cursor` (ver encode_cursor) a página seguinte é uma busca
+    direta no índice (created_at, id), sem OFFSET; `skip` continua aceito para
+    compatibilidade. Lança ValueError se o cursor for inválido.
+    """
+    query = _catalog_query(select(File), filters=filters, model=model, owner_id=owner_id,
+                           content_type=content_type, event_id=event_id)
+    if cursor:
+        created_at, file_id = decode_cursor(cursor)
+        query = query.where(tuple_(File.created_at, File.id) < tuple_(created_at, file_id))
+    elif skip:
+        query = query.offset(skip)
+
+    result = await db.execute(query.limit(limit if limit > 0 else None))
+    return result.scalars().unique().all()
+
+def encode_cursor(file: File) -> str:
+    return encode_key(file.created_at, file.id)
+
+async def iter_files(db: AsyncSession, filters: Optional[str] = None, model: str = "", owner_id: Optional[int] = None,
+                     content_type: Optional[str] = None, event_id: Optional[int] = None) -> AsyncIterator[File]:
+    """Percorre o catálogo inteiro em streaming (cursor no servidor, lotes de FILES_STREAM_BATCH)."""
+    query = _catalog_query(select(File), filters=filters, model=model, owner_id=owner_id,
+                           content_type=content_type, event_id=event_id)
+    result = await db.stream(query.execution_options(yield_per=settings.FILES_STREAM_BATCH))
+    async for file in result.scalars():
+        yield file
+
+async def get_usage(db: AsyncSession, owner_id: Optional[int] = None) -> List[dict]:
+    """Quantidade de arquivos e bytes ocupados por usuário (pelos registros, sem descontar deduplicação)."""
+    query = (
+        select(File.owner_id, func.count(File.id).label("files"), func.coalesce(func.sum(File.size), 0).label("total_size"))
+        .group_by(File.owner_id)
+        .order_by(func.coalesce(func.sum(File.size), 0).desc())
     )
-    return result.scalars().unique().first()
+    if owner_id is not None:
+        query = query.where(File.owner_id == owner_id)
+    result = await db.execute(query)
+    return [dict(row) for row in result.mappings().all()]
 
 async def create_file(db: AsyncSession, file: FileBase):
     db_file = File(**file.model_dump(exclude_unset=True, exclude_none=True))
@@ -33,15 +86,63 @@ async def create_file(db: AsyncSession, file: FileBase):
     await db.refresh(db_file)
     return db_file
 
+async def store_file(db: AsyncSession, stored: dict, originalname: str, content_type: str,
+                     owner_id: Optional[int] = None, event_id: Optional[int] = None):
+    """
+    Registra um upload já gravado por file_storage.save: soma uma referência ao
+    conteúdo (criando o FileBlob se for novo), move o temporário para o caminho do
+    conteúdo e cria o File. O upsert trava a linha do FileBlob até o commit, então
+    um delete_file simultâneo do mesmo conteúdo não apaga o arquivo no meio do caminho.
+    """
+    try:
+        await db.execute(
+            dialect_insert(db)(FileBlob)
+            .values(sha256=stored["sha256"], size=stored["size"], ref_count=1)
+            .on_conflict_do_update(index_elements=["sha256"], set_={"ref_count": FileBlob.ref_count + 1})
+        )
+        path = await file_storage.place(stored["tmp_path"], stored["sha256"])
+
+        db_file = File(
+            filename=stored["filename"],
+            originalname=originalname,
+            content_type=content_type,
+            file_path=path,
+            size=stored["size"],
+            sha256=stored["sha256"],
+            owner_id=owner_id,
+            event_id=event_id,
+        )
+        db.add(db_file)
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        await file_storage.discard(stored["tmp_path"])
+        raise
+    await db.refresh(db_file)
+    return db_file
+
 async def delete_file(db: AsyncSession, file_id: int):
     result = await db.execute(select(File).where(File.id == file_id))
     file = result.scalars().first()
     if file is None:
         return None
-    
-    if os.path.exists(file.file_path):
-        os.unlink(file.file_path)
-        
+
+    blob = None
+    if file.sha256:
+        result = await db.execute(select(FileBlob).where(FileBlob.sha256 == file.sha256).with_for_update())
+        blob = result.scalars().first()
+
+    if blob is None:
+        # Upload anterior ao armazenamento por conteúdo: o arquivo é só deste registro
+        if file.file_path and os.path.exists(file.file_path):
+            os.unlink(file.file_path)
+    else:
+        blob.ref_count -= 1
+        if blob.ref_count <= 0:
+            # Apaga ainda com a linha travada, antes do commit (ver store_file)
+            await file_storage.discard(file_storage.blob_path(blob.sha256))
+            await db.delete(blob)
+
     await db.delete(file)
     await db.commit()
     return file
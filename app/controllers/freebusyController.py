@@ -0,0 +1,191 @@
+# app/controllers/freebusyController.py
+#
+# Disponibilidade (free/busy) dos participantes e detecção de conflitos.
+#
+# Uma única consulta traz os eventos dos usuários que tocam a janela (índices
+# events(date) e a PK de user_events, que começa por user_id); os recorrentes são
+# expandidos com dateutil só dentro da janela. Cada usuário fica com uma lista ordenada
+# de intervalos mesclados — o "índice de intervalos" — e as perguntas de sobreposição
+# viram busca binária nessa lista.
+#
+# Internamente tudo é datetime ingênuo em UTC (o SQLite devolve datas sem fuso); as
+# respostas voltam com tzinfo=UTC.
+
+from bisect import bisect_left
+from functools import lru_cache
+from datetime import datetime, time, timedelta, timezone
+from itertools import chain, islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from dateutil.rrule import rrulestr
+from sqlalchemy import func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.models.eventsModel import Events, user_events_association
+
+Interval = Tuple[datetime, datetime]
+
+
+def _utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _aware(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc)
+
+
+def event_span(event) -> Interval:
+    """
+    Início e fim da (primeira) ocorrência. Dia inteiro ocupa do começo do primeiro dia ao
+    fim do último; evento com horário e sem endDate dura FREEBUSY_DEFAULT_DURATION_MINUTES.
+    """
+    start = _utc(event.date)
+    if event.isAllDay:
+        last_day = _utc(event.endDate).date() if event.endDate else start.date()
+        return datetime.combine(start.date(), time.min), datetime.combine(last_day + timedelta(days=1), time.min)
+    end = _utc(event.endDate) if event.endDate else None
+    if end is None or end <= start:
+        end = start + timedelta(minutes=settings.FREEBUSY_DEFAULT_DURATION_MINUTES)
+    return start, end
+
+
+@lru_cache(maxsize=4096)
+def _rule_set(rule: str, start: datetime):
+    """
+    Regra já interpretada, reaproveitada entre consultas. `serialize_rruleset` grava o
+    DTSTART; o formato curto ("FREQ=WEEKLY;...") não, e passar o início como datetime evita
+    o parser de datas do dateutil, que é o mais caro aqui.
+    """
+    if rule.lstrip().upper().startswith("DTSTART"):
+        return rrulestr(rule, forceset=True, ignoretz=True)
+    return rrulestr(rule, dtstart=start, forceset=True, ignoretz=True)
+
+
+def occurrences(event, window_start: datetime, window_end: datetime) -> Iterator[Interval]:
+    """Ocorrências do evento que se sobrepõem à janela (já expandindo a recorrência)."""
+    start, end = event_span(event)
+    duration = end - start
+    if not event.recurring_rule:
+        if start < window_end and end > window_start:
+            yield start, end
+        return
+
+    try:
+        rule_set = _rule_set(event.recurring_rule, start)
+    except (ValueError, TypeError):
+        # Regra inválida: conta só a primeira ocorrência
+        if start < window_end and end > window_start:
+            yield start, end
+        return
+
+    for occurrence in islice(rule_set.xafter(window_start - duration, inc=True), settings.FREEBUSY_MAX_OCCURRENCES):
+        if occurrence >= window_end:
+            break
+        if occurrence + duration > window_start:
+            yield occurrence, occurrence + duration
+
+
+def merge(intervals: Iterable[Interval]) -> List[Interval]:
+    """Ordena e funde intervalos que se sobrepõem ou se encostam."""
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def overlaps(merged: List[Interval], start: datetime, end: datetime) -> bool:
+    """Busca binária numa lista mesclada: algum intervalo cruza [start, end)?"""
+    index = bisect_left(merged, (start, start))
+    if index > 0 and merged[index - 1][1] > start:
+        return True
+    return index < len(merged) and merged[index][0] < end
+
+
+async def _busy_events(
+    db: AsyncSession, user_ids: List[int], start: datetime, end: datetime, exclude_event_id: Optional[int] = None
+) -> List[Tuple[int, int, Interval]]:
+    """(user_id, event_id, intervalo) de cada ocorrência ocupada na janela."""
+    window_start, window_end = _utc(start), _utc(end)
+    # Eventos sem endDate não têm fim no banco: a margem cobre a duração padrão e o dia inteiro
+    margin = max(timedelta(days=1), timedelta(minutes=settings.FREEBUSY_DEFAULT_DURATION_MINUTES))
+    ue = user_events_association
+    query = (
+        select(ue.c.user_id, Events.id, Events.date, Events.endDate, Events.isAllDay, Events.recurring_rule)
+        .join(Events, Events.id == ue.c.event_id)
+        .where(
+            ue.c.user_id.in_(user_ids),
+            Events.date < end,
+            or_(Events.recurring_rule.isnot(None), func.coalesce(Events.endDate, Events.date) >= start - margin),
+            or_(Events.status.is_(None), Events.status != "cancelled"),
+        )
+    )
+    if exclude_event_id is not None:
+        query = query.where(Events.id != exclude_event_id)
+
+    result = await db.execute(query)
+    busy = []
+    for row in result.all():
+        for interval in occurrences(row, window_start, window_end):
+            busy.append((row.user_id, row.id, interval))
+    return busy
+
+
+async def get_busy(db: AsyncSession, user_ids: List[int], start: datetime, end: datetime) -> Dict[int, List[Interval]]:
+    """Intervalos ocupados de cada usuário na janela, mesclados e recortados nas bordas."""
+    window_start, window_end = _utc(start), _utc(end)
+    per_user: Dict[int, List[Interval]] = {user_id: [] for user_id in user_ids}
+    for user_id, _, interval in await _busy_events(db, user_ids, start, end):
+        per_user[user_id].append(interval)
+    return {
+        user_id: [(max(s, window_start), min(e, window_end)) for s, e in merge(intervals)]
+        for user_id, intervals in per_user.items()
+    }
+
+
+def to_response(busy: Dict[int, List[Interval]]) -> Dict[int, List[dict]]:
+    return {
+        user_id: [{"start": _aware(s), "end": _aware(e)} for s, e in intervals]
+        for user_id, intervals in busy.items()
+    }
+
+
+def find_free_slot(busy: Dict[int, List[Interval]], start: datetime, end: datetime, duration: timedelta) -> Optional[Interval]:
+    """Primeiro intervalo de `duration` livre para todos dentro da janela, ou None."""
+    cursor = _utc(start)
+    for busy_start, busy_end in merge(chain.from_iterable(busy.values())):
+        if busy_start - cursor >= duration:
+            break
+        cursor = max(cursor, busy_end)
+    if _utc(end) - cursor >= duration:
+        return _aware(cursor), _aware(cursor + duration)
+    return None
+
+
+async def find_conflicts(db: AsyncSession, user_ids: List[int], event, exclude_event_id: Optional[int] = None) -> List[dict]:
+    """
+    Compromissos dos participantes que se sobrepõem a `event` (qualquer objeto com date,
+    endDate, isAllDay e recurring_rule). Recorrentes são verificados nas ocorrências dos
+    próximos FREEBUSY_CONFLICT_HORIZON_DAYS.
+    """
+    if not user_ids:
+        return []
+    start, _ = event_span(event)
+    horizon = start + timedelta(days=settings.FREEBUSY_CONFLICT_HORIZON_DAYS)
+    candidate = merge(occurrences(event, start, horizon) if event.recurring_rule else [event_span(event)])
+    if not candidate:
+        return []
+
+    window_start, window_end = candidate[0][0], candidate[-1][1]
+    conflicts = []
+    for user_id, event_id, (s, e) in await _busy_events(db, user_ids, _aware(window_start), _aware(window_end), exclude_event_id):
+        if overlaps(candidate, s, e):
+            conflicts.append({"user_id": user_id, "event_id": event_id, "start": _aware(s), "end": _aware(e)})
+    return conflicts
@@ -1,11 +1,12 @@
 # app/controllers/genericController.py
 
-from typing import List, Optional, Set
+from typing import Any, Dict, List, Optional, Set, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from app.schemas.genericSchema import GenericCreate
 from app.Mapping import models_mapping, models_fields_mapping
-from app.utils.filter import apply_filters_dynamic
+from app.utils import aggregate as aggregation
+from app.utils.filter import apply_filters_dynamic, apply_ordering
 from app.database.database import Base
 from sqlalchemy.orm.collections import InstrumentedList
 
@@ -29,12 +30,18 @@ class GenericController:
             return None
         return db_obj
 
-    async def catch(self, db: AsyncSession, skip: int = 0, limit: int = 10, filters: Optional[List[str]] = None,
-                    model: str = ""):
+    def filtered_query(self, filters: Optional[str] = None, model: str = "", visibility=None):
         query = select(self.model)
+        if visibility is not None:
+            query = query.where(visibility)
 
         if filters and model:
             query = apply_filters_dynamic(query, filters, model)
+        return query
+
+    async def catch(self, db: AsyncSession, skip: int = 0, limit: int = 10, filters: Optional[List[str]] = None,
+                    model: str = "", visibility=None, order_by: Optional[str] = None):
+        query = apply_ordering(self.filtered_query(filters, model, visibility), order_by, model, self.model)
         result = await db.execute(
             query
             .offset(skip)
@@ -42,6 +49,15 @@ class GenericController:
         )
         return result.scalars().unique().all()
 
+    async def count(self, db: AsyncSession, filters: Optional[str] = None, model: str = "", visibility=None) -> Tuple[int, bool]:
+        return await aggregation.total_count(db, self.filtered_query(filters, model, visibility), self.model)
+
+    async def aggregate(self, db: AsyncSession, filters: Optional[str] = None, model: str = "", visibility=None,
+                        group_by: Optional[str] = None, aggregates: Optional[str] = None) -> List[Dict[str, Any]]:
+        return await aggregation.aggregate(
+            db, self.filtered_query(filters, model, visibility), self.model, group_by, aggregates
+        )
+
     async def update(self, db: AsyncSession, db_obj, obj_in: GenericCreate):
         aux = {}
         for key in self.fields:
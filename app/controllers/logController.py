@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import Any, Dict, List, Optional, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
@@ -7,7 +7,9 @@ from app.models.logModel import Logger
 from app.models.userModel import User
 from app.models.userProfileModel import UserProfile
 from app.schemas.logSchema import LoggerBase, LoggerCreate
+from app.utils import aggregate as aggregation
 from app.utils import apply_filters_dynamic
+from app.utils.filter import apply_ordering
 
 async def create_log(db: AsyncSession, log: LoggerBase):
     db_log = Logger(**log.model_dump(exclude_unset=True, exclude_none=True))
@@ -17,12 +19,16 @@ async def create_log(db: AsyncSession, log: LoggerBase):
     return db_log
 
 
-async def get_logs(db: AsyncSession, skip: int = 0, limit: int = 10, filters: Optional[List[str]] = None,
-                   model: str = ""):
+def _filtered_query(filters: Optional[str] = None, model: str = ""):
     query = select(Logger)
-
     if filters and model:
         query = apply_filters_dynamic(query, filters, model)
+    return query
+
+
+async def get_logs(db: AsyncSession, skip: int = 0, limit: int = 10, filters: Optional[List[str]] = None,
+                   model: str = "", order_by: Optional[str] = None):
+    query = apply_ordering(_filtered_query(filters, model), order_by, "Logger", Logger)
     result = await db.execute(
         query
         .options(selectinload(Logger.user).selectinload(User.profile).selectinload(UserProfile.permissions))
@@ -30,3 +36,13 @@ async def get_logs(db: AsyncSession, skip: int = 0, limit: int = 10, filters: Op
         .limit(limit if limit > 0 else None)
     )
     return result.scalars().unique().all()
+
+
+async def count_logs(db: AsyncSession, filters: Optional[str] = None, model: str = "") -> Tuple[int, bool]:
+    # A auditoria é a maior tabela: sem filtro seletivo o total sai da estimativa do planejador
+    return await aggregation.total_count(db, _filtered_query(filters, model), Logger)
+
+
+async def aggregate_logs(db: AsyncSession, filters: Optional[str] = None, group_by: Optional[str] = None,
+                         aggregates: Optional[str] = None) -> List[Dict[str, Any]]:
+    return await aggregation.aggregate(db, _filtered_query(filters, "Logger"), Logger, group_by, aggregates)
@@ -0,0 +1,171 @@
+# app/controllers/notificationController.py
+
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.models.notificationLogModel import NotificationLog, NotificationLogArchive
+from app.services.event_bus import event_bus, Message
+from app.utils import aggregate as aggregation
+from app.utils.cursor import decode_cursor, encode_cursor as encode_key
+from app.utils.filter import apply_filters_dynamic
+
+
+def encode_cursor(notification: NotificationLog) -> str:
+    return encode_key(notification.created_at, notification.id)
+
+
+async def get_user_notifications(
+    db: AsyncSession,
+    *,
+    user_id: int,
+    limit: int = 20,
+    unread_only: bool = False,
+    cursor: Optional[str] = None,
+) -> List[NotificationLog]:
+    """
+    Histórico do usuário, mais recentes primeiro, com paginação por chave (created_at, id):
+    cada página é uma busca direta no índice ix_notification_logs_user_created,
+    sem OFFSET, não importa o tamanho do histórico.
+    """
+    query = select(NotificationLog).filter(NotificationLog.user_id == user_id)
+    if unread_only:
+        query = query.filter(NotificationLog.is_read == False)
+    if cursor:
+        created_at, notification_id = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(NotificationLog.created_at, NotificationLog.id) < tuple_(created_at, notification_id)
+        )
+
+    query = query.order_by(NotificationLog.created_at.desc(), NotificationLog.id.desc()).limit(limit)
+    result = await db.execute(query)
+    return result.scalars().all()
+
+
+async def aggregate_notifications(
+    db: AsyncSession, *, filters: Optional[str] = None, group_by: Optional[str] = None, aggregates: Optional[str] = None,
+) -> List[Dict]:
+    """Notificações de todos os usuários por grupo, ex: enviadas x falhas por canal (group_by=channel,status)."""
+    query = select(NotificationLog)
+    if filters:
+        query = apply_filters_dynamic(query, filters, "NotificationLog")
+    return await aggregation.aggregate(db, query, NotificationLog, group_by, aggregates)
+
+
+async def mark_as_read(db: AsyncSession, *, user_id: int, up_to_id: Optional[int] = None) -> int:
+    """
+    Marca como lidas as notificações não lidas do usuário (todas, ou só até `up_to_id`,
+    para não marcar uma que chegou depois de o cliente carregar a lista).
+    Retorna a quantidade de linhas alteradas.
+    """
+    stmt = update(NotificationLog).where(
+        NotificationLog.user_id == user_id,
+        NotificationLog.is_read == False,
+    )
+    if up_to_id is not None:
+        stmt = stmt.where(NotificationLog.id <= up_to_id)
+
+    result = await db.execute(stmt.values(is_read=True).execution_options(synchronize_session=False))
+    await db.commit()
+
+    if result.rowcount:
+        # Atualiza o contador (deste e dos outros workers) e as outras abas do usuário
+        event_bus.publish("notifications_read", {"up_to_id": up_to_id, "count": result.rowcount}, [user_id])
+    return result.rowcount
+
+
+class UnreadCounter:
+    """
+    Contador de não lidas por usuário em memória.
+
+    Na primeira consulta faz um COUNT (coberto pelo índice parcial de não lidas); depois
+    é mantido incrementalmente pelas mensagens do event_bus: +1 a cada notificação
+    criada, -N a cada "marcar como lidas". As entradas expiram após
+    NOTIFICATION_UNREAD_CACHE_SECONDS para limitar qualquer desvio.
+    """
+
+    def __init__(self):
+        self._counts: Dict[int, Tuple[int, float]] = {}
+
+    async def get(self, db: AsyncSession, user_id: int) -> int:
+        cached = self._counts.get(user_id)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+
+        result = await db.execute(
+            select(func.count())
+            .select_from(NotificationLog)
+            .where(NotificationLog.user_id == user_id, NotificationLog.is_read == False)
+        )
+        count = result.scalar_one()
+        self._counts[user_id] = (count, time.monotonic() + settings.NOTIFICATION_UNREAD_CACHE_SECONDS)
+        return count
+
+    def _adjust(self, user_id: int, delta: int):
+        cached = self._counts.get(user_id)
+        if cached:
+            self._counts[user_id] = (max(0, cached[0] + delta), cached[1])
+
+    def on_notification(self, message: Message):
+        # Pelos destinatários, como on_read: o payload pode ter chegado cortado pelo NOTIFY
+        for user_id in message.user_ids or []:
+            self._adjust(user_id, 1)
+
+    def on_read(self, message: Message):
+        for user_id in message.user_ids or []:
+            self._adjust(user_id, -message.data["count"])
+
+    def clear(self):
+        self._counts.clear()
+
+
+unread_counter = UnreadCounter()
+event_bus.add_listener("notification", unread_counter.on_notification)
+event_bus.add_listener("notifications_read", unread_counter.on_read)
+
+
+async def archive_old_notifications(db: AsyncSession) -> int:
+    """
+    Move para notification_logs_archive as notificações mais antigas que
+    NOTIFICATION_RETENTION_DAYS, em lotes de NOTIFICATION_ARCHIVE_BATCH com um commit
+    por lote, para não segurar locks nem gerar uma transação gigante.
+    Retorna o total de linhas movidas.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS)
+    columns = ["id", "user_id", "event_id", "channel", "status", "content", "is_read", "created_at"]
+    total = 0
+
+    while True:
+        # Percorre pela PK (ids crescem com o tempo), então os mais antigos vêm primeiro
+        result = await db.execute(
+            select(NotificationLog.id)
+            .where(NotificationLog.created_at < cutoff)
+            .order_by(NotificationLog.id)
+            .limit(settings.NOTIFICATION_ARCHIVE_BATCH)
+        )
+        ids = result.scalars().all()
+        if not ids:
+            break
+
+        await db.execute(
+            insert(NotificationLogArchive).from_select(
+                columns,
+                select(*[getattr(NotificationLog, column) for column in columns]).where(NotificationLog.id.in_(ids)),
+            )
+        )
+        await db.execute(delete(NotificationLog).where(NotificationLog.id.in_(ids)))
+        await db.commit()
+        total += len(ids)
+
+        if len(ids) < settings.NOTIFICATION_ARCHIVE_BATCH:
+            break
+
+    if total:
+        # Notificações não lidas podem ter sido arquivadas
+        unread_counter.clear()
+    return total
@@ -0,0 +1,136 @@
+# app/controllers/outboxController.py
+
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.database.database import dialect_insert
+from app.models.notificationLogModel import NotificationLog, NotificationOutbox
+
+
+async def enqueue(
+    db: AsyncSession,
+    *,
+    idempotency_key: str,
+    channel: str,
+    recipient: str,
+    user_id: int,
+    content: str,
+    event_id: Optional[int] = None,
+    payload: Optional[dict] = None,
+    priority: int = 0,
+) -> bool:
+    """
+    Coloca uma mensagem na fila. Não faz commit: quem chama confirma junto com o resto
+    da transação (ex: o contador de lembretes do evento), então ou os dois ficam ou nenhum.
+    Retorna False se já existia uma mensagem com a mesma `idempotency_key`.
+    """
+    values = dict(
+        idempotency_key=idempotency_key, channel=channel, recipient=recipient, user_id=user_id,
+        event_id=event_id, content=content, payload=payload, priority=priority,
+        status='pending', attempts=0,
+    )
+    stmt = dialect_insert(db)(NotificationOutbox).values(**values).on_conflict_do_nothing(index_elements=["idempotency_key"])
+    result = await db.execute(stmt)
+    return bool(result.rowcount)
+
+
+async def claim_batch(db: AsyncSession, channel: str, limit: int) -> List[NotificationOutbox]:
+    """
+    Reserva até `limit` mensagens prontas do canal, da mais prioritária para a menos.
+    A reserva vale OUTBOX_LEASE_SECONDS: se o worker morrer no meio, elas voltam à fila.
+    No Postgres, SKIP LOCKED deixa vários workers drenarem sem pegar a mesma mensagem.
+    """
+    now = datetime.now(timezone.utc)
+    result = await db.execute(
+        select(NotificationOutbox)
+        .where(
+            NotificationOutbox.channel == channel,
+            NotificationOutbox.status.in_(['pending', 'sending']),
+            NotificationOutbox.next_attempt_at <= now,
+        )
+        .order_by(NotificationOutbox.priority, NotificationOutbox.next_attempt_at, NotificationOutbox.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    messages = result.scalars().all()
+    for message in messages:
+        message.status = 'sending'
+        message.next_attempt_at = now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+    await db.commit()
+    return messages
+
+
+def _log(message: NotificationOutbox, status: str) -> NotificationLog:
+    return NotificationLog(
+        user_id=message.user_id, event_id=message.event_id,
+        channel=message.channel, content=message.content, status=status,
+    )
+
+
+async def mark_sent(db: AsyncSession, message: NotificationOutbox):
+    message.status = 'sent'
+    message.attempts += 1
+    message.sent_at = datetime.now(timezone.utc)
+    message.last_error = None
+    db.add(_log(message, 'sent'))
+    await db.commit()
+
+
+def retry_delay(attempts: int) -> float:
+    """Backoff exponencial com jitter de ±20% para as falhas não voltarem todas juntas."""
+    delay = min(settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.OUTBOX_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+async def mark_failed(db: AsyncSession, message: NotificationOutbox, error: str):
+    """Agenda nova tentativa ou, esgotadas as OUTBOX_MAX_ATTEMPTS, manda para 'dead'."""
+    message.attempts += 1
+    message.last_error = error[:2000]
+    if message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        message.status = 'dead'
+        db.add(_log(message, 'failed'))
+    else:
+        message.status = 'pending'
+        message.next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=retry_delay(message.attempts))
+    await db.commit()
+
+
+async def get_stats(db: AsyncSession) -> Dict[str, Dict[str, int]]:
+    """Quantidade de mensagens por canal e status."""
+    result = await db.execute(
+        select(NotificationOutbox.channel, NotificationOutbox.status, func.count())
+        .group_by(NotificationOutbox.channel, NotificationOutbox.status)
+    )
+    stats: Dict[str, Dict[str, int]] = {}
+    for channel, status, count in result.all():
+        stats.setdefault(channel, {})[status] = count
+    return stats
+
+
+async def get_dead(db: AsyncSession, limit: int = 50) -> List[NotificationOutbox]:
+    result = await db.execute(
+        select(NotificationOutbox)
+        .where(NotificationOutbox.status == 'dead')
+        .order_by(NotificationOutbox.id.desc())
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
+async def requeue_dead(db: AsyncSession, ids: Optional[List[int]] = None) -> int:
+    """Devolve mensagens 'dead' (todas, ou só `ids`) para a fila, com as tentativas zeradas."""
+    stmt = update(NotificationOutbox).where(NotificationOutbox.status == 'dead')
+    if ids:
+        stmt = stmt.where(NotificationOutbox.id.in_(ids))
+    result = await db.execute(
+        stmt.values(status='pending', attempts=0, next_attempt_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount
@@ -0,0 +1,92 @@
+# app/controllers/syncController.py
+
+from typing import Dict, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import noload, selectinload
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.database.revision import cap_token, committed_horizon
+from app.models.calendarModel import Calendar
+from app.models.eventsModel import Events
+from app.models.tombstoneModel import Tombstone
+from app.models.userModel import User
+
+# Entidades com revisão/tombstone e as opções de carregamento usadas no sync.
+# Os relacionamentos 'selectin' são desligados para não trazer dados que não mudaram.
+SYNC_ENTITIES = {
+    "Events": (Events, [noload(Events.calendar), selectinload(Events.users)]),
+    "Calendar": (Calendar, [noload(Calendar.events), noload(Calendar.owner)]),
+    "User": (User, [noload(User.profile)]),
+}
+
+
+async def get_changes_since(
+    db: AsyncSession, *, since: int, limit: int = 500, entities: Optional[List[str]] = None,
+    # Predicados de visibilidade (app/services/visibility.py): por entidade e o dos tombstones
+    visibility: Optional[Dict[str, ColumnElement]] = None,
+    deleted_visibility: Optional[ColumnElement] = None,
+) -> dict:
+    """
+    Retorna as linhas alteradas e os IDs removidos com revisão maior que `since`.
+
+    Cada entidade traz no máximo `limit` alterações e `limit` remoções, em ordem de revisão.
+    Se algum limite for atingido, `has_more` é verdadeiro e `revision` aponta para a menor
+    revisão "cortada": a próxima chamada pode repetir algumas linhas (o cliente só faz upsert),
+    mas nunca pula nenhuma.
+
+    A revisão devolvida também não passa do horizonte confirmado (app/database/revision.py),
+    lido antes das consultas: uma transação ainda aberta com revisão menor que a de uma linha
+    já visível entra na próxima chamada em vez de se perder.
+    """
+    entities = entities or list(SYNC_ENTITIES.keys())
+    visibility = visibility or {}
+    horizon = await committed_horizon(db)
+
+    changes: Dict[str, list] = {}
+    deleted: Dict[str, List[int]] = {}
+    latest = since
+    cursor: Optional[int] = None
+
+    def track(revisions: List[int]):
+        nonlocal latest, cursor
+        if not revisions:
+            return
+        latest = max(latest, revisions[-1])
+        if len(revisions) >= limit:
+            cursor = revisions[-1] if cursor is None else min(cursor, revisions[-1])
+
+    for name in entities:
+        model, options = SYNC_ENTITIES[name]
+        query = select(model).options(*options).where(model.revision > since)
+        if visibility.get(name) is not None:
+            query = query.where(visibility[name])
+        result = await db.execute(query.order_by(model.revision).limit(limit))
+        rows = result.scalars().all()
+        changes[name] = rows
+        track([row.revision for row in rows])
+
+        query = select(Tombstone.entity_id, Tombstone.revision).where(
+            Tombstone.entity == name, Tombstone.revision > since
+        )
+        if deleted_visibility is not None:
+            query = query.where(deleted_visibility)
+        # Linha que ainda existe e o usuário vê (ex: evento que só mudou de calendário) não foi removida
+        alive = select(model.id).where(model.id == Tombstone.entity_id)
+        if visibility.get(name) is not None:
+            alive = alive.where(visibility[name])
+        query = query.where(~alive.exists())
+        result = await db.execute(query.order_by(Tombstone.revision).limit(limit))
+        tombstones = result.all()
+        # Um id pode ter mais de um tombstone (ex: evento que mudou de calendário duas vezes)
+        deleted[name] = list(dict.fromkeys(entity_id for entity_id, _ in tombstones))
+        track([revision for _, revision in tombstones])
+
+    revision = max(since, cap_token(cursor if cursor is not None else latest, horizon))
+    return {
+        "revision": revision,
+        # Parado atrás de uma transação aberta: o cliente tenta de novo depois, não em laço
+        "has_more": cursor is not None and revision > since,
+        "changes": changes,
+        "deleted": deleted,
+    }
@@ -85,12 +85,14 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         )
         return result.scalars().unique().all()
 
-    async def get_user_with_details(self, db: AsyncSession, user_id: int):
+    async def get_user_with_details(self, db: AsyncSession, user_id: int, visibility=None):
+        # `visibility`: predicado de Events de quem consulta (app/services/visibility.py)
+        events = User.events if visibility is None else User.events.and_(visibility)
         result = await db.execute(
             select(self.model)
             .options(
                 selectinload(User.profile).selectinload(UserProfile.permissions), 
-                selectinload(User.events)
+                selectinload(events)
             )
             .where(self.model.id == user_id)
         )
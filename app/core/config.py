@@ -1,6 +1,7 @@
 # agenda-risetec-backend/app/core/config.py
 from pydantic_settings import BaseSettings
 from pydantic import EmailStr
+from typing import Dict, List
 
 class Settings(BaseSettings):
     # Configurações do Banco de Dados
@@ -22,6 +23,145 @@ class Settings(BaseSettings):
     MAIL_STARTTLS: bool = True
     MAIL_SSL_TLS: bool = False
 
+    # Canal de push (/crud/stream)
+    # 'memory' atende um único worker; 'postgres' usa LISTEN/NOTIFY para vários workers.
+    EVENT_BUS_BACKEND: str = "memory"
+    STREAM_HEARTBEAT_SECONDS: int = 15
+    STREAM_BUFFER_SIZE: int = 100  # mensagens pendentes por conexão
+    STREAM_REPLAY_SIZE: int = 1000  # mensagens recentes guardadas para retomar via Last-Event-ID
+
+    # Caixa de notificações
+    NOTIFICATION_RETENTION_DAYS: int = 180  # mais antigas que isso vão para o arquivo
+    NOTIFICATION_ARCHIVE_BATCH: int = 5000
+    NOTIFICATION_UNREAD_CACHE_SECONDS: int = 300
+
+    # Cache das leituras quentes (app/services/cache.py)
+    CACHE_ENABLED: bool = True
+    CACHE_MAX_ENTRIES: int = 10000
+    CACHE_DEFAULT_TTL: int = 300  # segundos; a invalidação nos commits é o que mantém os dados em dia
+    CACHE_SHARED_BACKEND: str = ""  # "modulo:atributo" de um SharedCacheBackend (opcional)
+
+    # Permissões por perfil (app/services/permissions.py). As entidades são os nomes dos
+    # modelos (Events, Calendar, User, UserProfile, Permissions, File, Logger, NotificationLog) mais
+    # WhatsApp, Cache e Profiler; entity_name "*" dá acesso a tudo. Desligado, qualquer usuário autenticado passa.
+    PERMISSIONS_ENFORCED: bool = True
+    # Na inicialização, se nenhum perfil tem "*", este perfil (criado se não existir) recebe "*"
+    # com todas as ações; os usuários de PERMISSIONS_ADMIN_EMAILS são colocados nele. Sem isso,
+    # num banco novo ou recém-atualizado ninguém consegue criar a primeira permissão.
+    PERMISSIONS_ADMIN_PROFILE: str = "Administrador"
+    PERMISSIONS_ADMIN_EMAILS: List[str] = []
+
+    # Free/busy e conflitos (app/controllers/freebusyController.py)
+    FREEBUSY_DEFAULT_DURATION_MINUTES: int = 60  # eventos com horário e sem endDate
+    FREEBUSY_MAX_OCCURRENCES: int = 5000  # por evento recorrente, dentro da janela
+    FREEBUSY_MAX_WINDOW_DAYS: int = 366
+    FREEBUSY_CONFLICT_HORIZON_DAYS: int = 90  # ocorrências de um recorrente verificadas ao salvar
+
+    # Requisições condicionais (app/utils/conditional.py): o cliente pode guardar, mas revalida sempre
+    HTTP_CACHE_CONTROL: str = "private, no-cache"
+
+    # Fila de envio (notification_outbox)
+    OUTBOX_WHATSAPP_RATE_PER_MINUTE: float = 6  # o serviço de WhatsApp aguenta ~1 mensagem a cada 10 s
+    OUTBOX_WHATSAPP_BURST: int = 3
+    OUTBOX_EMAIL_RATE_PER_MINUTE: float = 60
+    OUTBOX_EMAIL_BURST: int = 10
+    OUTBOX_MAX_ATTEMPTS: int = 6
+    OUTBOX_RETRY_BASE_SECONDS: int = 30  # 30 s, 1 min, 2 min, ... até OUTBOX_RETRY_MAX_SECONDS
+    OUTBOX_RETRY_MAX_SECONDS: int = 3600
+    OUTBOX_LEASE_SECONDS: int = 120  # tempo até uma mensagem 'sending' de um worker morto voltar à fila
+    OUTBOX_BATCH_SIZE: int = 50
+
+    # Auditoria (tabela logger)
+    LOG_RETENTION_DAYS: int = 90  # partições/linhas mais antigas vão para arquivos compactados
+    LOG_ARCHIVE_DIR: str = "./archive/logs"
+    LOG_PARTITIONS_AHEAD: int = 2  # meses futuros com partição já criada
+    LOG_ARCHIVE_BATCH: int = 5000
+
+    # Upload de arquivos
+    UPLOAD_DIR: str = "./files"
+    UPLOAD_MAX_BYTES: int = 512 * 1024 * 1024
+    UPLOAD_CHUNK_BYTES: int = 1024 * 1024  # tamanho de cada escrita em disco (feita fora do event loop)
+    # Ex: "/protected-files" com um location internal no nginx apontando para UPLOAD_DIR;
+    # vazio serve o arquivo pela própria aplicação
+    FILES_ACCEL_REDIRECT_PREFIX: str = ""
+    FILES_STREAM_BATCH: int = 1000  # linhas por lote no /crud/files/export
+    # Prefixos aceitos de Content-Type; "*" libera qualquer tipo
+    UPLOAD_ALLOWED_CONTENT_TYPES: List[str] = [
+        "image/", "text/", "audio/", "video/",
+        "application/pdf", "application/zip", "application/json", "application/octet-stream",
+        "application/msword", "application/vnd.ms-", "application/vnd.openxmlformats-officedocument.",
+        "application/vnd.oasis.opendocument.",
+    ]
+
+    # Compressão das respostas (app/middleware/compression.py)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # abaixo disso o cabeçalho custa mais do que economiza
+    COMPRESSION_THREAD_SIZE: int = 256 * 1024  # blocos maiores são comprimidos fora do event loop
+    # Ordem de preferência quando o cliente aceita mais de uma; br/zstd só se o pacote estiver instalado
+    COMPRESSION_ENCODINGS: List[str] = ["zstd", "br", "gzip"]
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4  # 4-5 é o ponto bom para conteúdo dinâmico; 11 só para estáticos
+    COMPRESSION_ZSTD_LEVEL: int = 3
+    # Prefixos de Content-Type que nunca são comprimidos (já comprimidos ou streaming)
+    COMPRESSION_SKIP_CONTENT_TYPES: List[str] = [
+        "image/", "audio/", "video/", "font/woff",
+        "application/zip", "application/gzip", "application/x-gzip", "application/pdf",
+        "application/x-7z-compressed", "application/x-rar-compressed", "application/zstd",
+        "application/vnd.openxmlformats-officedocument.", "application/vnd.oasis.opendocument.",
+        "text/event-stream",
+    ]
+    OPENAPI_PATH: str = "openapi.json"
+
+    # Métricas no formato do Prometheus (GET /metrics, app/services/metrics.py)
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: str = ""  # se definido, o scraper precisa enviar "Authorization: Bearer <token>"
+    METRICS_LATENCY_BUCKETS: List[float] = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+    # Inspeção das consultas de cada requisição, para desenvolvimento e testes
+    # (app/services/query_inspector.py). Desligada, os hooks nem são registrados.
+    QUERY_INSPECTOR_ENABLED: bool = False
+    QUERY_INSPECTOR_MODE: str = "log"  # "log" só relata; "raise" troca a resposta por 500 quando o orçamento estoura
+    QUERY_INSPECTOR_DEFAULT_BUDGET: int = 0  # para rotas sem query_budget(); 0 = sem limite
+    QUERY_INSPECTOR_REPEAT_THRESHOLD: int = 5  # a mesma consulta repetida tantas vezes numa requisição é N+1
+
+    # Tracing (app/services/tracing.py): spans de rotas, consultas, SMTP, WhatsApp e rotinas agendadas
+    TRACING_ENABLED: bool = False
+    TRACING_SERVICE_NAME: str = "agenda-risetec-backend"
+    TRACING_SAMPLE_RATIO: float = 0.01  # fração das requisições sem traceparent que viram trace
+    TRACING_JOB_SAMPLE_RATIO: float = 0.1  # o mesmo para cada execução das rotinas agendadas
+    TRACING_EXPORTER: str = "file"  # "file" (OTLP/JSON, uma linha por lote) ou "console"
+    TRACING_FILE: str = "traces.jsonl"
+    TRACING_BATCH_SIZE: int = 512  # spans acumulados antes de gravar (o fim de um trace também grava)
+    TRACING_STATEMENT_MAX_LENGTH: int = 1000  # SQL além disso é cortado no atributo db.query.text
+
+    # Profiler por amostragem do próprio worker (app/services/profiler.py, /crud/profiler)
+    PROFILER_ENABLED: bool = True
+    PROFILER_MAX_SECONDS: int = 60
+    PROFILER_DEFAULT_INTERVAL_MS: float = 5.0
+    PROFILER_REQUEST_INTERVAL_MS: float = 1.0  # cabeçalho X-Profile: requisições curtas precisam de mais amostras
+    PROFILER_KEEP_REQUESTS: int = 20  # perfis por requisição guardados em memória para download
+    PROFILER_MAX_DEPTH: int = 128
+
+    # Busca textual (app/services/search.py, /crud/search). No Postgres exige a migration 011
+    SEARCH_MAX_TERMS: int = 8  # palavras além disso são ignoradas
+    SEARCH_FUZZY_FALLBACK: bool = True  # sem resultado exato, tenta por semelhança (trigramas no Postgres)
+    SEARCH_RANK_WINDOW: int = 1000  # ranqueia só as N ocorrências mais recentes; 0 = todas
+
+    # Agregações e totais do DSL de filtros (app/utils/aggregate.py)
+    AGGREGATE_MAX_GROUPS: int = 1000  # grupos por resposta de /aggregate
+    TOTAL_COUNT_EXACT_LIMIT: int = 10000  # X-Total-Count exato até aqui; acima, estimativa do planejador (Postgres)
+
+    # Logs estruturados (app/core/log.py): fila + thread escritora, uma linha JSON por registro
+    LOG_LEVEL: str = "INFO"
+    # Nível por logger, ex: {"app.services.notification_service": "DEBUG"}. O apscheduler loga cada
+    # execução e o httpx cada chamada ao WhatsApp em INFO
+    LOG_LEVELS: Dict[str, str] = {"apscheduler": "WARNING", "httpx": "WARNING"}
+    LOG_FORMAT: str = "json"  # "json" ou "text"
+    LOG_FILE: str = ""  # além do stdout, se definido
+    LOG_QUEUE_SIZE: int = 10000  # com a fila cheia o registro é descartado em vez de bloquear o event loop
+    LOG_RATE_LIMIT_WINDOW: float = 60.0  # segundos
+    LOG_RATE_LIMIT_BURST: int = 5  # registros com a mesma rate_limit_key por janela
+
     class Config:
         env_file = ".env"
 
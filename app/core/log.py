@@ -0,0 +1,214 @@
+# app/core/log.py
+#
+# Logs estruturados sem bloquear o event loop. `logging` da biblioteca padrão, com:
+#
+# - QueueHandler na frente: quem loga só formata a mensagem e põe na fila; uma thread
+#   (QueueListener) escreve no stdout/arquivo. Fila cheia descarta o registro e conta
+#   (log_records_dropped_total no /metrics) em vez de travar a requisição.
+# - Uma linha JSON por registro (LOG_FORMAT="json") com o id de correlação da requisição
+#   (X-Request-Id) ou da execução agendada, o trace_id quando há trace e os `extra=`.
+# - Nível por logger (LOG_LEVELS), ex: notification_service em DEBUG e o resto em INFO.
+# - Limite de repetição: registros com `extra={"rate_limit_key": ...}` passam
+#   LOG_RATE_LIMIT_BURST vezes por janela; os demais viram um contador "suppressed" no
+#   próximo que passar. Ex: o WhatsApp fora do ar não gera uma linha por mensagem da fila.
+#
+# Os campos de contexto vêm de provedores registrados (`add_context_field`), como o
+# trace_id do app/services/tracing.py, lidos na thread de quem loga.
+
+import atexit
+import copy
+import functools
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+correlation_id: ContextVar[Optional[str]] = ContextVar("correlation_id", default=None)
+
+_context_fields: List[Tuple[str, Callable[[], Optional[str]]]] = [("correlation_id", correlation_id.get)]
+
+# Atributos que todo LogRecord tem: o que sobrar veio de `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+_INTERNAL_ATTRIBUTES = {"rate_limit_key"}
+_exception_formatter = logging.Formatter()
+
+
+def add_context_field(name: str, provider: Callable[[], Optional[str]]):
+    """Campo acrescentado a todo registro, lido na thread de quem loga (ex: trace_id)."""
+    _context_fields.append((name, provider))
+
+
+def new_correlation_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def _extras(record: logging.LogRecord) -> dict:
+    return {
+        key: value for key, value in vars(record).items()
+        if key not in _RECORD_ATTRIBUTES and key not in _INTERNAL_ATTRIBUTES and value is not None
+    }
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            **_extras(record),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exception"] = record.exc_text
+        return json.dumps(data, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Para desenvolvimento: a linha de sempre, com os campos extras como chave=valor no fim."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        extras = _extras(record)
+        if extras:
+            line += " " + " ".join(f"{key}={value}" for key, value in extras.items())
+        return line
+
+
+class ContextFilter(logging.Filter):
+    """Copia o contexto (ContextVars) para o registro antes de ele ir para a outra thread."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for name, provider in _context_fields:
+            if getattr(record, name, None) is None:
+                value = provider()
+                if value is not None:
+                    setattr(record, name, value)
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    def __init__(self, window: float, burst: int):
+        super().__init__()
+        self.window = window
+        self.burst = burst
+        # chave -> [início da janela, registros na janela, suprimidos]
+        self._keys: Dict[str, list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, "rate_limit_key", None)
+        if key is None:
+            return True
+        now = time.monotonic()
+        state = self._keys.get(key)
+        if state is None or now - state[0] >= self.window:
+            suppressed = state[2] if state else 0
+            state = self._keys[key] = [now, 0, 0]
+            if suppressed:
+                record.suppressed = suppressed
+        if state[1] >= self.burst:
+            state[2] += 1
+            return False
+        state[1] += 1
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler que nunca bloqueia: com a fila cheia o registro é descartado e contado."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # O prepare padrão junta o traceback à mensagem; aqui ele vai em exc_text (campo
+        # "exception" no JSON). Os args e o exc_info são resolvidos antes de mudar de thread.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def build_pipeline(streams, formatter: Optional[logging.Formatter] = None, queue_size: Optional[int] = None):
+    """QueueHandler (com contexto e limite de repetição) + QueueListener escrevendo em `streams`."""
+    formatter = formatter or (TextFormatter() if settings.LOG_FORMAT == "text" else JsonFormatter())
+    writers = []
+    for stream in streams:
+        writer = logging.StreamHandler(stream)
+        writer.setFormatter(formatter)
+        writers.append(writer)
+    handler = DroppingQueueHandler(queue.Queue(queue_size or settings.LOG_QUEUE_SIZE))
+    handler.addFilter(ContextFilter())
+    handler.addFilter(RateLimitFilter(settings.LOG_RATE_LIMIT_WINDOW, settings.LOG_RATE_LIMIT_BURST))
+    listener = logging.handlers.QueueListener(handler.queue, *writers, respect_handler_level=False)
+    return handler, listener
+
+
+_handler: Optional[DroppingQueueHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging():
+    """Configura o logger raiz uma vez por processo (chamado na importação do main)."""
+    global _handler, _listener
+    if _handler is not None:
+        return
+    streams = [sys.stdout]
+    if settings.LOG_FILE:
+        streams.append(open(settings.LOG_FILE, "a", buffering=1))
+    _handler, _listener = build_pipeline(streams)
+
+    root = logging.getLogger()
+    root.handlers = [_handler]
+    root.setLevel(settings.LOG_LEVEL.upper())
+    for name, level in settings.LOG_LEVELS.items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    _listener.start()
+    atexit.register(shutdown)
+
+
+def shutdown():
+    """Escreve o que ainda está na fila e para a thread escritora; daí em diante a escrita é direta."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        logging.getLogger().handlers = list(_listener.handlers)
+        _listener = None
+
+
+def dropped() -> int:
+    return _handler.dropped if _handler is not None else 0
+
+
+def job(func):
+    """Rotina agendada com um id de correlação próprio por execução ("job-<nome>-<id>")."""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        token = correlation_id.set(f"job-{func.__name__}-{new_correlation_id()}")
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            correlation_id.reset(token)
+    return wrapper
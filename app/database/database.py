@@ -1,23 +1,25 @@
 # agenda-risetec-backend/app/database/database.py
 
-from sqlalchemy import create_engine
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from app.core.config import settings
 
-# --- Configuração Assíncrona (para o resto do seu app FastAPI) ---
+# --- Configuração Assíncrona ---
+# O CalDAV também usa esta engine (ver app/routers/caldavRouter.py), por isso não
+# existe mais a engine síncrona com psycopg2.
 engine = create_async_engine(settings.DATABASE_URL, echo=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine, class_=AsyncSession)
 
-# --- Configuração Síncrona (para o CalDAV) ---
-# Substitui o driver assíncrono (+asyncpg) pelo driver síncrono (padrão psycopg2)
-sync_database_url = settings.DATABASE_URL.replace("+asyncpg", "") 
-sync_engine = create_engine(sync_database_url, echo=True)
-SessionLocalSync = sessionmaker(autocommit=False, autoflush=False, bind=sync_engine)
-
 Base = declarative_base()
 
 # --- Sessão Assíncrona para Injeção de Dependência ---
 async def get_db():
     async with SessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+def dialect_insert(db: AsyncSession):
+    """insert() do dialeto da sessão, para usar on_conflict_do_nothing/do_update (Postgres ou SQLite)."""
+    return pg_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
@@ -0,0 +1,113 @@
+# agenda-risetec-backend/app/database/revision.py
+
+import itertools
+import time
+from typing import Dict, Optional, Set
+
+from sqlalchemy import Sequence, event, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import flag_modified
+from app.database.database import Base
+
+# Sequência global usada como número de revisão (ETag / ctag / sync-token).
+# Cada INSERT/UPDATE em um modelo versionado recebe o próximo valor, então
+# "revision > X" identifica tudo o que mudou desde que o cliente viu X.
+sync_revision_seq = Sequence("sync_revision_seq", metadata=Base.metadata)
+
+# Fallback para bancos sem sequência (SQLite em testes/benchmarks locais).
+# Só é monotônico dentro de um processo, o que basta para esses cenários.
+_local_revision = itertools.count(time.time_ns() // 1000)
+
+# A revisão sai da sequência quando a linha é gravada, não quando a transação confirma:
+# uma transação pode segurar a revisão N e confirmar depois que um cliente já recebeu N+1
+# como token, e aí N nunca mais seria enviada. Por isso cada transação que escreve segura,
+# até o commit/rollback, um advisory lock compartilhado cuja chave é o last_value da
+# sequência antes da primeira revisão dela (um limite inferior de todas as que vai usar).
+# `committed_horizon` olha esses locks em pg_locks: abaixo do menor deles, toda revisão já
+# terminou. As chaves de um bigint em pg_advisory_* ficam reservadas para isso neste banco.
+_LOCK_REVISION_FLOOR = text("SELECT pg_advisory_xact_lock_shared(last_value) FROM sync_revision_seq")
+_COMMITTED_HORIZON = text("""
+    SELECT least(
+        (SELECT last_value FROM sync_revision_seq),
+        (SELECT min((classid::bigint << 32) | objid::bigint) - 1 FROM pg_locks
+          WHERE locktype = 'advisory' AND objsubid = 1
+            AND database = (SELECT oid FROM pg_database WHERE datname = current_database()))
+    )
+""")
+_LOCKED_TRANSACTION = "revision_lock"
+
+
+def next_revision(context) -> int:
+    """
+    Default/onupdate de coluna que retorna a próxima revisão global.
+    Deve ser usado como `Column(BigInteger, default=next_revision, onupdate=next_revision)`.
+    """
+    connection = context.connection
+    if connection.dialect.name == "postgresql":
+        transaction = connection.get_transaction()
+        # Um lock por transação basta: as revisões seguintes dela são maiores
+        if connection.info.get(_LOCKED_TRANSACTION) is not transaction:
+            connection.execute(_LOCK_REVISION_FLOOR)
+            connection.info[_LOCKED_TRANSACTION] = transaction
+        return connection.scalar(select(sync_revision_seq.next_value()))
+    return next(_local_revision)
+
+
+async def committed_horizon(db: AsyncSession) -> Optional[int]:
+    """
+    Maior revisão R tal que toda revisão <= R já foi confirmada ou descartada. Tokens de
+    sincronização (ctag, sync-token, /crud/sync) não podem passar disso: o que estiver acima
+    pode ainda aparecer com uma revisão menor. Deve ser lido antes das consultas que o token
+    cobre. None no SQLite, que não tem a sequência (e só um escritor por vez).
+    """
+    if db.bind.dialect.name != "postgresql":
+        return None
+    return (await db.execute(_COMMITTED_HORIZON)).scalar()
+
+
+def cap_token(revision: int, horizon: Optional[int]) -> int:
+    return revision if horizon is None else min(revision, horizon)
+
+
+# Colunas de controle interno de cada modelo (exclude_from_revision)
+_EXCLUDED: Dict[type, Set[str]] = {}
+
+
+def exclude_from_revision(model, *columns: str):
+    """
+    Escritas em `model` que só mudam `columns` (controle interno, ex: last_login, contador de
+    lembretes) não geram revisão nova nem mexem em updated_at, para o /crud/sync e o CalDAV
+    não mandarem de novo uma linha cujo conteúdo não mudou.
+    """
+    ignored = _EXCLUDED.setdefault(model, set())
+    ignored.update(columns)
+
+    @event.listens_for(model, "before_update")
+    def _keep_revision(mapper, connection, target):
+        state = inspect(target)
+        changed = {attr.key for attr in mapper.column_attrs if state.attrs[attr.key].history.has_changes()}
+        if not changed or not changed <= ignored:
+            return
+        # Coluna presente no UPDATE = onupdate não dispara
+        for key in ("revision", "updated_at"):
+            if key in state.dict:
+                flag_modified(target, key)
+            else:
+                setattr(target, key, mapper.columns[key])  # "revision = revision" no próprio UPDATE
+
+    return _keep_revision
+
+
+def only_excluded_changes(instance) -> bool:
+    """
+    Verdadeiro se a escrita pendente de `instance` só mexe nas colunas de exclude_from_revision
+    (ex: para o event_bus não publicar 'updated'). Vale até o fim do flush.
+    """
+    ignored = _EXCLUDED.get(type(instance))
+    if not ignored:
+        return False
+    state = inspect(instance)
+    changed = {attr.key for attr in state.mapper.attrs if state.attrs[attr.key].history.has_changes()}
+    # revision/updated_at marcados pelo próprio _keep_revision não contam
+    changed -= {"revision", "updated_at"}
+    return bool(changed) and changed <= ignored
@@ -0,0 +1,198 @@
+# app/middleware/compression.py
+#
+# Compressão das respostas com zstd, brotli ou gzip, conforme o Accept-Encoding e os
+# pacotes instalados (zstandard e brotli são opcionais; gzip sempre existe).
+#
+# Middleware ASGI puro (não BaseHTTPMiddleware) para não acumular respostas em streaming:
+# cada pedaço é comprimido e enviado na hora, com flush, então o export NDJSON continua
+# chegando aos poucos. Fica de fora o que não ganha nada com compressão: corpos menores
+# que COMPRESSION_MINIMUM_SIZE, tipos já comprimidos (imagens, zip, pdf...), SSE,
+# respostas parciais (206), 304 e arquivos enviados por pathsend (cópia zero pelo servidor).
+
+import asyncio
+import os
+import zlib
+from typing import Callable, Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class GzipEncoder:
+    def __init__(self, level: Optional[int] = None):
+        self._compressor = zlib.compressobj(level or settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class BrotliEncoder:
+    def __init__(self, level: Optional[int] = None):
+        self._compressor = brotli.Compressor(quality=level or settings.COMPRESSION_BROTLI_QUALITY)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        return self._compressor.process(data) + (self._compressor.finish() if final else self._compressor.flush())
+
+
+class ZstdEncoder:
+    def __init__(self, level: Optional[int] = None):
+        self._compressor = zstandard.ZstdCompressor(level=level or settings.COMPRESSION_ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        mode = zstandard.COMPRESSOBJ_FLUSH_FINISH if final else zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        return self._compressor.compress(data) + self._compressor.flush(mode)
+
+
+ENCODERS: Dict[str, Callable] = {"gzip": GzipEncoder}
+if brotli is not None:
+    ENCODERS["br"] = BrotliEncoder
+if zstandard is not None:
+    ENCODERS["zstd"] = ZstdEncoder
+
+# Extensão dos arquivos pré-comprimidos por encoding
+SUFFIXES = {"gzip": ".gz", "br": ".br", "zstd": ".zst"}
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Escolhe, na ordem de COMPRESSION_ENCODINGS, o primeiro encoding disponível que o cliente aceita."""
+    accepted: Dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name] = quality
+
+    for encoding in settings.COMPRESSION_ENCODINGS:
+        if encoding in ENCODERS and accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+def precompress(path: str):
+    """
+    Grava ao lado de `path` as versões comprimidas (.gz, .br, .zst) no nível máximo, para
+    arquivos estáticos servidos muitas vezes: o custo de CPU é pago uma vez, no deploy.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    levels = {"gzip": 9, "br": 11, "zstd": 19}
+    for encoding, encoder in ENCODERS.items():
+        with open(path + SUFFIXES[encoding] + ".tmp", "wb") as f:
+            f.write(encoder(levels[encoding]).compress(data, final=True))
+        os.replace(path + SUFFIXES[encoding] + ".tmp", path + SUFFIXES[encoding])
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not settings.COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        await CompressionResponder(self.app, encoding)(scope, receive, send)
+
+
+def _compressible(message: Message) -> bool:
+    status = message["status"]
+    headers = Headers(raw=message["headers"])
+    if status < 200 or status in (204, 206, 304):
+        return False
+    if "content-encoding" in headers or "content-range" in headers:
+        return False
+    if "no-transform" in headers.get("cache-control", ""):
+        return False
+    content_type = headers.get("content-type", "")
+    return bool(content_type) and not any(content_type.startswith(prefix) for prefix in settings.COMPRESSION_SKIP_CONTENT_TYPES)
+
+
+class CompressionResponder:
+    def __init__(self, app: ASGIApp, encoding: str):
+        self.app = app
+        self.encoding = encoding
+        self.send: Send = None
+        # O início da resposta fica retido até o primeiro pedaço do corpo: só então dá para
+        # saber o tamanho (respostas pequenas passam direto) ou se vem por pathsend
+        self.start: Optional[Message] = None
+        self.buffer = bytearray()
+        self.passthrough = False
+        self.encoder = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message: Message):
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            self.start = message
+            self.passthrough = not _compressible(message)
+            return
+
+        if message_type != "http.response.body" or self.passthrough:
+            await self._flush_start()
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start is not None:
+            # Middlewares como o BaseHTTPMiddleware entregam o corpo em vários pedaços mesmo
+            # quando é pequeno: acumula até passar do mínimo ou a resposta acabar
+            self.buffer += body
+            if len(self.buffer) < settings.COMPRESSION_MINIMUM_SIZE:
+                if more_body:
+                    return
+                self.passthrough = True
+                await self._flush_start()
+                await self.send({"type": "http.response.body", "body": bytes(self.buffer), "more_body": False})
+                return
+            body, self.buffer = bytes(self.buffer), bytearray()
+            headers = MutableHeaders(raw=self.start["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if "content-length" in headers:
+                del headers["Content-Length"]
+            # A representação comprimida não é idêntica byte a byte à original
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = "W/" + etag
+            self.encoder = ENCODERS[self.encoding]()
+            await self._flush_start()
+
+        final = not more_body
+        if len(body) >= settings.COMPRESSION_THREAD_SIZE:
+            data = await asyncio.to_thread(self.encoder.compress, body, final)
+        else:
+            data = self.encoder.compress(body, final)
+        await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    async def _flush_start(self):
+        if self.start is not None:
+            start, self.start = self.start, None
+            await self.send(start)
@@ -1,4 +1,3 @@
-import json
 from starlette.middleware.base import BaseHTTPMiddleware
 from fastapi import Request, HTTPException, status
 import jwt
@@ -63,7 +62,7 @@ class LoggingMiddleware(BaseHTTPMiddleware):
                     "action": action,
                     "user_id": int(user_id) if user_id else int(user_info["id"]),
                     "entity": request.url.path,
-                    "data": json.dumps(request_data)
+                    "data": request_data
                 })
                 
                 await create_log(db, log)
@@ -85,7 +84,7 @@ class LoggingMiddleware(BaseHTTPMiddleware):
                     "action": action,
                     "user_id": int(user_id) if user_id else int(user_info["id"]),
                     "entity": request.url.path,
-                    "data": json.dumps(response_data)
+                    "data": response_data
                 })
                 
                 await create_log(db, log)
@@ -0,0 +1,51 @@
+# app/middleware/metrics.py
+#
+# Latência, contagem e requisições em andamento por rota, mais as consultas ao banco de
+# cada requisição (somadas pelos hooks do SQLAlchemy em app/services/metrics.py).
+#
+# Middleware ASGI puro e o mais externo da pilha, para medir também a compressão e os
+# outros middlewares. A rota é o template ("/crud/event/{event_id}") que o roteador do
+# Starlette grava no scope depois do match; o que não casa com nenhuma rota vira "unmatched".
+
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.services import metrics
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        # Lista mutável: o BaseHTTPMiddleware roda o resto da pilha em outra task (com uma
+        # cópia do contexto), e os incrementos precisam chegar até aqui
+        db_stats = [0, 0.0]
+        token = metrics.request_db_stats.set(db_stats)
+        metrics.http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.http_in_flight.dec()
+            metrics.request_db_stats.reset(token)
+            route = metrics.route_label(scope)
+            method = scope["method"]
+            metrics.http_requests.inc(method, route, str(status))
+            metrics.http_latency.observe(time.perf_counter() - started, method, route)
+            metrics.db_queries_per_request.observe(db_stats[0], route)
+            metrics.db_time_per_request.observe(db_stats[1], route)
@@ -0,0 +1,70 @@
+# app/middleware/profiler.py
+#
+# Perfil de CPU de uma requisição só: quem tem permissão de update em "Profiler" envia
+# `X-Profile: 1` e a resposta volta com X-Profile-Id; o arquivo collapsed fica em
+# GET /crud/profiler/requests/{id}. Sem o cabeçalho, o custo é procurar um nome na lista
+# de cabeçalhos. Cabeçalho de quem não tem permissão é ignorado.
+
+import time
+
+from fastapi import HTTPException
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.controllers.tokenController import verify_token
+from app.core.config import settings
+from app.database.database import SessionLocal
+from app.services.permissions import permission_engine
+from app.services.profiler import profiler, request_profile
+
+
+async def _authorized(headers: Headers) -> bool:
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer":
+        return False
+    try:
+        user_id = verify_token(token)
+    except HTTPException:
+        return False
+    async with SessionLocal() as db:
+        return await permission_engine.allowed(db, int(user_id), "Profiler", "update")
+
+
+class ProfilerMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not settings.PROFILER_ENABLED or not any(
+            name == b"x-profile" for name, _ in scope["headers"]
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        if not await _authorized(headers):
+            await self.app(scope, receive, send)
+            return
+
+        profile = profiler.start_request(f"{scope['method']} {scope['path']}")
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                if profile is not None:
+                    MutableHeaders(scope=message)["X-Profile-Id"] = str(profile.id)
+                else:
+                    # Sem setitimer ou com o loop fora da thread principal
+                    MutableHeaders(scope=message)["X-Profile-Status"] = "unavailable"
+            await send(message)
+
+        if profile is None:
+            await self.app(scope, receive, send_wrapper)
+            return
+
+        token = request_profile.set(profile)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_profile.reset(token)
+            profiler.finish_request(profile, time.perf_counter() - started)
@@ -0,0 +1,68 @@
+# app/middleware/queryInspector.py
+#
+# Abre a inspeção de consultas de cada requisição (app/services/query_inspector.py) quando
+# QUERY_INSPECTOR_ENABLED está ligado. A resposta ganha X-Query-Count (e X-Query-Budget,
+# X-Query-Repeated quando for o caso); estouro de orçamento e N+1 são relatados no log
+# (WARNING) com as consultas agrupadas por origem. Em QUERY_INSPECTOR_MODE="raise" a resposta de
+# uma rota acima do orçamento vira 500 com o relatório no corpo, para o teste falhar.
+#
+# Fica por fora da compressão: o 500 de substituição sai sem Content-Encoding.
+
+import json
+import logging
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.services.metrics import route_label
+from app.services.query_inspector import Inspection, current_inspection
+
+logger = logging.getLogger(__name__)
+
+
+class QueryInspectorMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not settings.QUERY_INSPECTOR_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        inspection = Inspection()
+        token = current_inspection.set(inspection)
+        replaced = False
+
+        async def send_wrapper(message: Message):
+            nonlocal replaced
+            if replaced:
+                return
+            if message["type"] == "http.response.start":
+                # Aqui o endpoint já terminou (fora streaming e tarefas em segundo plano)
+                inspection.route = route_label(scope)
+                if inspection.over_budget() and settings.QUERY_INSPECTOR_MODE == "raise":
+                    replaced = True
+                    body = json.dumps({"detail": "Query budget exceeded", "report": inspection.report()}).encode()
+                    await send({"type": "http.response.start", "status": 500, "headers": [
+                        (b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+                    ]})
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                headers = MutableHeaders(scope=message)
+                headers["X-Query-Count"] = str(inspection.count)
+                if inspection.effective_budget is not None:
+                    headers["X-Query-Budget"] = str(inspection.effective_budget)
+                repeated = inspection.repeated()
+                if repeated:
+                    headers["X-Query-Repeated"] = str(len(repeated))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_inspection.reset(token)
+            inspection.route = route_label(scope)
+            if inspection.over_budget() or inspection.repeated():
+                logger.warning("Consultas acima do orçamento ou repetidas em %s %s", scope["method"], scope["path"],
+                               extra={"query_report": inspection.report()})
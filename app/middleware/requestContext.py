@@ -0,0 +1,40 @@
+# app/middleware/requestContext.py
+#
+# Id de correlação de cada requisição: o X-Request-Id recebido (do nginx ou do frontend)
+# ou um novo. Fica no ContextVar lido pelos logs (app/core/log.py), então todo registro
+# feito durante a requisição sai com o mesmo correlation_id, e volta na resposta.
+
+import re
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.log import correlation_id, new_correlation_id
+
+# Ids recebidos fora disso (tamanho, caracteres) são trocados por um novo: vão parar nos logs
+_VALID_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+
+class RequestIdMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = Headers(scope=scope).get("x-request-id")
+        if not request_id or not _VALID_ID.match(request_id):
+            request_id = new_correlation_id()
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Request-Id"] = request_id
+            await send(message)
+
+        token = correlation_id.set(request_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            correlation_id.reset(token)
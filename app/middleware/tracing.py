@@ -0,0 +1,42 @@
+# app/middleware/tracing.py
+#
+# Span SERVER de cada requisição (app/services/tracing.py), continuando o trace do
+# traceparent recebido. O nome segue a convenção do OpenTelemetry, "GET /crud/event/{event_id}",
+# com o template da rota que o roteador grava no scope. Traces amostrados devolvem o id
+# em X-Trace-Id, para achar o trace a partir de uma resposta lenta.
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.services import tracing
+from app.services.metrics import route_label
+
+
+class TracingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not settings.TRACING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        attributes = {"http.request.method": scope["method"], "url.path": scope["path"], "url.scheme": scope.get("scheme")}
+        traceparent = Headers(scope=scope).get("traceparent")
+        with tracing.span(scope["method"], "server", attributes, traceparent=traceparent) as span:
+            async def send_wrapper(message: Message):
+                if message["type"] == "http.response.start" and span.sampled:
+                    span.set_attribute("http.response.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.status = tracing.STATUS_ERROR
+                    MutableHeaders(scope=message)["X-Trace-Id"] = f"{span.trace_id:032x}"
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                if span.sampled:
+                    route = route_label(scope)
+                    span.set_attribute("http.route", route)
+                    span.name = f"{scope['method']} {route}"
@@ -1,8 +1,11 @@
 # agenda-risetec-backend/app/models/calendarModel.py
 
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Text, BigInteger, DateTime, Index
 from app.database.database import Base
+from app.database.revision import next_revision
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.models.tombstoneModel import track_deletes
 
 class Calendar(Base):
     __tablename__ = "calendars"
@@ -23,10 +26,26 @@ class Calendar(Base):
     notification_repeats = Column(Integer, default=1) # quantidade de vezes
     notification_message = Column(Text, default='Lembrete: {event_title} às {event_time}.') # template da mensagem
 
+    # Revisão global, atualizada a cada escrita. Compõe o ctag do CalDAV e o /crud/sync.
+    revision = Column(BigInteger, nullable=False, default=next_revision, onupdate=next_revision, index=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
     # --- FIM NOVOS CAMPOS ---
 
     # Relacionamento com eventos
     events = relationship("Events", lazy="selectin", back_populates="calendar", cascade="all, delete-orphan")
     
     # NOVO: Relacionamento com o proprietário do calendário
-    owner = relationship("User", foreign_keys=[owner_id])
\ No newline at end of file
+    owner = relationship("User", foreign_keys=[owner_id])
+
+    __table_args__ = (
+        # Predicados de visibilidade (app/services/visibility.py): calendários do dono e públicos
+        Index("ix_calendars_owner_id", "owner_id"),
+        Index("ix_calendars_is_private", "is_private"),
+        # order_by=name e calendar.name nos eventos (app/utils/filter.py, SORTABLE_FIELDS)
+        Index("ix_calendars_name", "name"),
+    )
+
+
+# Calendário privado: só o dono (e os administradores) recebe o tombstone
+track_deletes(Calendar, audience=lambda connection, calendar: {calendar.owner_id} if calendar.is_private else None)
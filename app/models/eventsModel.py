@@ -1,16 +1,23 @@
 # app/models/eventsModel.py
 
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, DateTime, Table, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, DateTime, Table, Text, BigInteger, Index, event, inspect, select
 from app.database.database import Base
+from app.database.revision import exclude_from_revision, next_revision
+from app.models.calendarModel import Calendar
+from app.models.tombstoneModel import track_deletes, write_tombstone
 from datetime import datetime
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import Session, object_session, relationship
+from sqlalchemy.sql import func
+from typing import Set
 import uuid
 
 # Tabela de associação para a relação N-N entre usuários e eventos.
 user_events_association = Table(
     'user_events', Base.metadata,
     Column('user_id', Integer, ForeignKey('users.id', ondelete="CASCADE"), primary_key=True),
-    Column('event_id', Integer, ForeignKey('events.id', ondelete="CASCADE"), primary_key=True)
+    Column('event_id', Integer, ForeignKey('events.id', ondelete="CASCADE"), primary_key=True),
+    # A PK (user_id, event_id) já atende "eventos do usuário"; este atende "participantes do evento"
+    Index("ix_user_events_event_user", "event_id", "user_id"),
 )
 
 
@@ -45,6 +52,10 @@ class Events(Base):
     notification_message = Column(Text, nullable=True)
     notifications_sent_count = Column(Integer, default=0, nullable=False)
 
+    # Revisão global, atualizada a cada escrita. Usada como ETag no CalDAV e no /crud/sync.
+    revision = Column(BigInteger, nullable=False, default=next_revision, onupdate=next_revision, index=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
     # --- FIM NOVOS CAMPOS ---
     calendar = relationship("Calendar", back_populates="events", lazy="selectin")
 
@@ -54,4 +65,85 @@ class Events(Base):
         secondary=user_events_association,
         back_populates="events", # Adicionado back_populates
         lazy="noload" # Alterado para 'selectin' para consistência
-    )
\ No newline at end of file
+    )
+
+    __table_args__ = (
+        # Atende o ctag (max revision) e o sync-collection (revision > token) por calendário.
+        Index("ix_events_calendar_revision", "calendar_id", "revision"),
+        # Visibilidade: eventos criados pelo usuário
+        Index("ix_events_created_by", "created_by"),
+        # Free/busy: eventos que começam antes do fim da janela
+        Index("ix_events_date", "date"),
+        # order_by=title (app/utils/filter.py, SORTABLE_FIELDS)
+        Index("ix_events_title", "title"),
+    )
+
+
+def _audience(connection, event: "Events", calendar_id=None, participants=None):
+    """
+    Quem via o evento no calendário `calendar_id` (padrão: o atual): None se ele é público;
+    senão dono, criador e participantes (padrão: os do evento removido neste flush).
+    """
+    calendar = connection.execute(
+        select(Calendar.is_private, Calendar.owner_id).where(Calendar.id == (calendar_id or event.calendar_id))
+    ).first()
+    if calendar is not None and not calendar.is_private:
+        return None
+    owner_id = calendar.owner_id if calendar is not None else None
+    if participants is None:
+        participants = deleted_participants(object_session(event), event.id)
+    return {owner_id, event.created_by} | participants
+
+
+# Exclusões de eventos viram tombstones para o sync-collection do CalDAV e o /crud/sync.
+track_deletes(Events, lambda event: {"uid": event.uid, "calendar_id": event.calendar_id}, audience=_audience)
+
+
+@event.listens_for(Events, "after_update")
+def _tombstone_previous_calendar(mapper, connection, target):
+    """
+    Evento que mudou de calendário sai do sync-collection do antigo como removido. No
+    /crud/sync o tombstone só conta para quem não vê mais a linha (syncController).
+    """
+    previous = inspect(target).attrs.calendar_id.history.deleted
+    if not previous or previous[0] is None or previous[0] == target.calendar_id:
+        return
+    result = connection.execute(
+        select(user_events_association.c.user_id).where(user_events_association.c.event_id == target.id)
+    )
+    write_tombstone(
+        connection,
+        {"entity": "Events", "entity_id": target.id, "uid": target.uid, "calendar_id": previous[0]},
+        _audience(connection, target, previous[0], set(result.scalars().all())),
+    )
+# O contador de lembretes enviados é controle do agendador, não conteúdo do evento
+exclude_from_revision(Events, "notifications_sent_count")
+
+
+# Participantes dos eventos removidos em cada flush: depois do DELETE as linhas de user_events
+# já se foram (ON DELETE CASCADE), e o cache e o event_bus ainda precisam saber de quem era o evento.
+DELETED_PARTICIPANTS = "events:deleted_participants"
+
+
+@event.listens_for(Session, "before_flush")
+def _remember_deleted_participants(session, flush_context, instances):
+    ids = [instance.id for instance in session.deleted if isinstance(instance, Events) and instance.id is not None]
+    if not ids:
+        return
+    result = session.execute(
+        select(user_events_association.c.event_id, user_events_association.c.user_id)
+        .where(user_events_association.c.event_id.in_(ids))
+    )
+    remembered = session.info.setdefault(DELETED_PARTICIPANTS, {})
+    for event_id, user_id in result.all():
+        remembered.setdefault(event_id, set()).add(user_id)
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _forget_deleted_participants(session, flush_context):
+    session.info.pop(DELETED_PARTICIPANTS, None)
+
+
+def deleted_participants(session: Session, event_id: int) -> Set[int]:
+    """Participantes de um evento removido no flush em andamento (hooks after_flush)."""
+    return session.info.get(DELETED_PARTICIPANTS, {}).get(event_id, set())
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
 from app.database.database import Base
 
 class File(Base):
@@ -8,4 +9,35 @@ class File(Base):
     filename = Column(String, index=True)
     originalname = Column(String, index=True)
     content_type = Column(String)
+    # Caminho do conteúdo (FileStorage.blob_path); vários File podem apontar para o mesmo
     file_path = Column(String)
+    # Calculados durante o upload (app/services/file_storage.py)
+    size = Column(BigInteger, nullable=True)
+    sha256 = Column(String(64), nullable=True, index=True)
+
+    owner_id = Column(Integer, ForeignKey('users.id', ondelete="SET NULL"), nullable=True)
+    # Evento ao qual o arquivo foi anexado no upload (opcional)
+    event_id = Column(Integer, ForeignKey('events.id', ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # Catálogo em ordem decrescente com paginação por (created_at, id), geral e por dono
+        Index("ix_files_created_id", "created_at", "id"),
+        Index("ix_files_owner_created", "owner_id", "created_at", "id"),
+        Index("ix_files_event_id", "event_id"),
+        # pattern_ops: o mesmo índice atende igualdade e prefixo ("image/%") no Postgres
+        Index("ix_files_content_type", "content_type", postgresql_ops={"content_type": "varchar_pattern_ops"}),
+    )
+
+
+class FileBlob(Base):
+    """
+    Conteúdo armazenado, um por SHA-256. `ref_count` é o número de File que apontam
+    para ele: o arquivo em disco só é apagado quando a última referência sai.
+    """
+    __tablename__ = "file_blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
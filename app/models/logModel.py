@@ -1,15 +1,30 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, JSON, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
 from app.database.database import Base
 from sqlalchemy.orm import relationship
 
 
 class Logger(Base):
     __tablename__ = "logger"
+    # No Postgres a tabela é particionada por mês em created_at (migrations/004_logger_partitioning.sql),
+    # com PK (id, created_at). Para a ORM o id continua sendo a identidade da linha.
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     action = Column(String, nullable=False)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=True)
     entity = Column(String, nullable=False)
-    data = Column(String, nullable=False)
-    
-    user = relationship("User", foreign_keys="Logger.user_id", lazy="selectin")
\ No newline at end of file
+    # JSONB no Postgres: filtros podem acessar campos como data.user.email (ver app/utils/filter.py)
+    data = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    user = relationship("User", foreign_keys="Logger.user_id", lazy="selectin")
+
+    __table_args__ = (
+        # Filtros comuns do /crud/logs/: por usuário e por entidade, sempre recortados no tempo
+        Index("ix_logger_user_created", "user_id", "created_at"),
+        Index("ix_logger_entity_created", "entity", "created_at"),
+        Index("ix_logger_created_at", "created_at"),
+        # entity+ieq+... do filtro (app/utils/filter.py); o índice de trigramas está na migration 012
+        Index("ix_logger_entity_lower", func.lower(entity)),
+    )
@@ -1,5 +1,5 @@
 # app/models/notificationLogModel.py
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, Boolean, ForeignKey, Index, JSON
 from sqlalchemy.sql import func
 from app.database.database import Base
 
@@ -9,10 +9,78 @@ class NotificationLog(Base):
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE"), nullable=False)
     event_id = Column(Integer, ForeignKey('events.id', ondelete="CASCADE"), nullable=True)
-    
+
     channel = Column(String(50), nullable=False)  # 'email' ou 'whatsapp'
     status = Column(String(50), default='sent') # 'sent' ou 'failed'
     content = Column(Text, nullable=False)
-    
+
     is_read = Column(Boolean, default=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # Histórico do usuário em ordem decrescente com paginação por (created_at, id)
+        Index("ix_notification_logs_user_created", "user_id", "created_at", "id"),
+        # Parcial: só as não lidas, que são poucas. Atende a contagem e o "marcar como lidas".
+        Index(
+            "ix_notification_logs_user_unread", "user_id", "id",
+            postgresql_where=(is_read == False),
+            sqlite_where=(is_read == False),
+        ),
+    )
+
+
+class NotificationLogArchive(Base):
+    """Notificações antigas movidas pela rotina de retenção (ver notificationController.archive_old_notifications)."""
+    __tablename__ = "notification_logs_archive"
+
+    # Mesmo id da tabela principal; sem FKs para sobreviver à remoção de usuários/eventos
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    user_id = Column(Integer, nullable=False, index=True)
+    event_id = Column(Integer, nullable=True)
+    channel = Column(String(50), nullable=False)
+    status = Column(String(50))
+    content = Column(Text, nullable=False)
+    is_read = Column(Boolean)
+    created_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class NotificationOutbox(Base):
+    """
+    Fila persistente de envios (e-mail/WhatsApp), drenada pelo NotificationService.
+    O NotificationLog do usuário só é gravado quando a mensagem é entregue ou desiste
+    (status 'dead'), então o histórico reflete o que de fato aconteceu.
+    """
+    __tablename__ = "notification_outbox"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # Ex: "reminder:<event>:<user>:<channel>:<envio>"; evita enfileirar o mesmo envio duas vezes
+    idempotency_key = Column(String(200), nullable=False, unique=True)
+    channel = Column(String(50), nullable=False)  # 'email' ou 'whatsapp'
+    recipient = Column(String(255), nullable=False)  # e-mail ou telefone
+    user_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE"), nullable=False)
+    event_id = Column(Integer, ForeignKey('events.id', ondelete="CASCADE"), nullable=True)
+
+    content = Column(Text, nullable=False)  # texto da mensagem / do NotificationLog
+    payload = Column(JSON, nullable=True)  # e-mail: subject, template_name, template_body
+
+    # Menor sai primeiro. Lembretes usam o horário do evento (epoch), então os mais iminentes vão antes
+    priority = Column(BigInteger, nullable=False, default=0)
+    status = Column(String(20), nullable=False, default='pending')  # pending, sending, sent, dead
+    attempts = Column(Integer, nullable=False, default=0)
+    # Próxima tentativa (backoff) ou, em 'sending', até quando vale a reserva do worker
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Só o que ainda precisa sair, na ordem em que o dispatcher busca
+        Index(
+            "ix_notification_outbox_ready", "channel", "priority", "next_attempt_at",
+            postgresql_where=status.in_(['pending', 'sending']),
+            sqlite_where=status.in_(['pending', 'sending']),
+        ),
+        Index("ix_notification_outbox_status", "status"),
+    )
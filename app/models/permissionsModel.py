@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database.database import Base
 
@@ -15,3 +15,8 @@ class Permissions(Base):
     profile_id = Column(Integer, ForeignKey('user_profile.id'), nullable=False)
 
     profile = relationship("UserProfile", back_populates="permissions", lazy="selectin")
+
+    __table_args__ = (
+        # Permissões de um perfil (selectin do UserProfile) e order_by=profile_id
+        Index("ix_permissions_profile_id", "profile_id"),
+    )
@@ -0,0 +1,71 @@
+# app/models/tombstoneModel.py
+
+from sqlalchemy import Column, Integer, String, BigInteger, Boolean, DateTime, ForeignKey, Index, Table, event, false
+from sqlalchemy.sql import func
+from app.database.database import Base
+from app.database.revision import next_revision
+
+
+class Tombstone(Base):
+    """
+    Registro de uma linha removida. Permite que clientes de sincronização
+    (CalDAV sync-collection) descubram exclusões sem baixar tudo de novo.
+    """
+    __tablename__ = "sync_tombstones"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    entity = Column(String(50), nullable=False)  # nome do modelo, ex: 'Events'
+    entity_id = Column(Integer, nullable=False)
+    uid = Column(String(255), nullable=True)
+    calendar_id = Column(Integer, nullable=True)
+    revision = Column(BigInteger, nullable=False, default=next_revision)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now())
+    # A linha era de um calendário privado: só quem a via (sync_tombstone_audience) recebe a exclusão
+    is_private = Column(Boolean, nullable=False, default=False, server_default=false())
+
+    __table_args__ = (
+        Index("ix_sync_tombstones_calendar_revision", "calendar_id", "revision"),
+        Index("ix_sync_tombstones_entity_revision", "entity", "revision"),
+    )
+
+
+# Quem enxergava cada linha privada removida (app/services/visibility.py, visible_tombstones)
+tombstone_audience = Table(
+    "sync_tombstone_audience", Base.metadata,
+    Column("user_id", Integer, primary_key=True),
+    Column("tombstone_id", Integer, ForeignKey("sync_tombstones.id", ondelete="CASCADE"), primary_key=True),
+)
+
+
+def track_deletes(model, extra_fields=None, audience=None):
+    """
+    Registra um listener que grava um Tombstone sempre que uma instância de `model`
+    é removida pela ORM (incluindo remoções em cascata).
+
+    `extra_fields` recebe a instância removida e retorna colunas adicionais
+    do tombstone (ex: uid e calendar_id dos eventos).
+
+    `audience` recebe a conexão e a instância e retorna os ids de quem a enxergava, ou None
+    se todos enxergavam: o tombstone de uma linha privada não revela o id aos outros.
+    """
+    @event.listens_for(model, "after_delete")
+    def _write_tombstone(mapper, connection, target):
+        values = {"entity": model.__name__, "entity_id": target.id}
+        if extra_fields:
+            values.update(extra_fields(target))
+        write_tombstone(connection, values, audience(connection, target) if audience else None)
+
+    return _write_tombstone
+
+
+def write_tombstone(connection, values: dict, user_ids=None):
+    """Grava o tombstone `values`; com `user_ids` (não None) ele é privado e só eles o recebem."""
+    values = {**values, "is_private": user_ids is not None}
+    result = connection.execute(Tombstone.__table__.insert().values(**values))
+    user_ids = {user_id for user_id in user_ids or () if user_id is not None}
+    if user_ids:
+        tombstone_id = result.inserted_primary_key[0]
+        connection.execute(
+            tombstone_audience.insert(),
+            [{"user_id": user_id, "tombstone_id": tombstone_id} for user_id in user_ids],
+        )
@@ -1,8 +1,11 @@
 # agenda-risetec-backend/app/models/userModel.py
 
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, BigInteger, Index
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 from app.database.database import Base
+from app.database.revision import exclude_from_revision, next_revision
+from app.models.tombstoneModel import track_deletes
 from datetime import datetime
 
 # Importamos a tabela de associação para o Python reconhecer a variável
@@ -20,6 +23,10 @@ class User(Base):
     # --- NOVOS CAMPOS ---
     phone_number = Column(String(50), nullable=True)
     last_login = Column(DateTime(timezone=True), nullable=True)
+
+    # Revisão global, atualizada a cada escrita. Usada pelo /crud/sync.
+    revision = Column(BigInteger, nullable=False, default=next_revision, onupdate=next_revision, index=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     # --- FIM NOVOS CAMPOS ---
     
     profile_id = Column(Integer, ForeignKey("user_profile.id"), nullable=True)
@@ -31,4 +38,17 @@ class User(Base):
         secondary=user_events_association,
         back_populates="users", # Garante que o lado Events.users também se atualize
         lazy="noload"
-    )
\ No newline at end of file
+    )
+
+    __table_args__ = (
+        # email+ieq+... do filtro (app/utils/filter.py): login e convites chegam com maiúsculas
+        # variadas. Os índices de trigramas (ct/sw/ew) estão na migration 012
+        Index("ix_users_email_lower", func.lower(email)),
+        # order_by=name (SORTABLE_FIELDS); o de trigramas não serve para ordenar
+        Index("ix_users_name", "name"),
+    )
+
+
+track_deletes(User)
+# Login não é conteúdo: não faz o sync baixar o usuário de novo
+exclude_from_revision(User, "last_login")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database.database import Base
 
@@ -10,3 +10,8 @@ class UserProfile(Base):
     name = Column(String(255), nullable=False)
 
     permissions = relationship("Permissions", back_populates="profile", lazy="selectin", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # order_by=name e profile.name nos usuários (app/utils/filter.py, SORTABLE_FIELDS)
+        Index("ix_user_profile_name", "name"),
+    )
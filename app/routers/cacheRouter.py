@@ -0,0 +1,22 @@
+# app/routers/cacheRouter.py
+
+from fastapi import APIRouter, Depends
+
+from app.controllers.tokenController import verify_token
+from app.services.permissions import require
+from app.services.cache import cache
+
+router = APIRouter(prefix="/crud", tags=["Cache"], dependencies=[Depends(verify_token)])
+
+
+@router.get("/cache/stats", dependencies=[Depends(require("Cache", "view"))])
+async def cache_stats():
+    """Entradas, remoções por LRU e hits/misses/coalesced (single-flight) por entidade."""
+    return cache.stats()
+
+
+@router.post("/cache/clear", dependencies=[Depends(require("Cache", "update"))])
+async def cache_clear():
+    """Esvazia o cache deste worker (e do backend compartilhado, se houver)."""
+    await cache.clear()
+    return {"message": "Cache cleared"}
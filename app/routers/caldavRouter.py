@@ -0,0 +1,585 @@
+# app/routers/caldavRouter.py
+#
+# Servidor CalDAV (RFC 4791 + sync-collection da RFC 6578) sobre os modelos Calendar/Events,
+# usando a mesma engine assíncrona do resto da API.
+#
+# Cada evento tem ETag = revisão global da linha, e cada calendário tem ctag/sync-token =
+# maior revisão entre ele, seus eventos e os tombstones. Assim o cliente compara ETags
+# (PROPFIND Depth 1) ou pede só as mudanças (REPORT sync-collection) e baixa apenas
+# os eventos alterados.
+
+import hashlib
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+from urllib.parse import quote, unquote
+
+from defusedxml.ElementTree import fromstring as parse_xml
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import RedirectResponse
+from fastapi.security import HTTPBasic, HTTPBasicCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.controllers import caldavController
+from app.controllers.eventsController import event_controller
+from app.controllers.userController import user_controller
+from app.database import database
+from app.models.calendarModel import Calendar
+from app.models.eventsModel import Events
+from app.models.tombstoneModel import Tombstone
+from app.schemas.eventsSchema import EventBase, EventUpdate
+from app.services import visibility
+from app.services.cache import cache
+from app.services.permissions import permission_engine, require
+
+DAV = "DAV:"
+CALDAV = "urn:ietf:params:xml:ns:caldav"
+CALSERVER = "http://calendarserver.org/ns/"
+APPLE_ICAL = "http://apple.com/ns/ical/"
+
+ET.register_namespace("d", DAV)
+ET.register_namespace("cal", CALDAV)
+ET.register_namespace("cs", CALSERVER)
+ET.register_namespace("ical", APPLE_ICAL)
+
+BASE_PATH = "/caldav"
+CALENDARS_PATH = f"{BASE_PATH}/calendars/"
+SYNC_TOKEN_PREFIX = "http://risetec.com.br/ns/sync/"
+
+DAV_HEADERS = {
+    "DAV": "1, 3, calendar-access",
+    "Allow": "OPTIONS, GET, HEAD, PUT, DELETE, PROPFIND, REPORT",
+}
+
+router = APIRouter(prefix=BASE_PATH, tags=["CalDAV"])
+# Descoberta automática (RFC 6764): clientes procuram /.well-known/caldav
+well_known_router = APIRouter(tags=["CalDAV"])
+
+security = HTTPBasic(realm="Agenda Risetec")
+
+# Cache de credenciais válidas: clientes CalDAV mandam Basic Auth em toda requisição,
+# e verificar o bcrypt a cada PROPFIND custaria ~100ms de CPU por chamada.
+# Qualquer escrita no usuário (senha, e-mail, exclusão) derruba as entradas dele pela tag
+# "User:{id}" do cache de leituras, como no PermissionEngine.
+CREDENTIALS_TTL_SECONDS = 300
+CREDENTIALS_CACHE_MAX = 1024
+_credentials_cache: Dict[str, tuple] = {}
+# Muda a cada invalidação de usuário: o que foi verificado durante uma não é guardado
+_credentials_generation = 0
+
+
+def _invalidate_credentials(tags: Optional[List[str]]):
+    global _credentials_generation
+    if tags is None:
+        _credentials_generation += 1
+        _credentials_cache.clear()
+        return
+    user_ids = set()
+    for tag in tags:
+        name, _, key = tag.partition(":")
+        if name == "User" and key.isdigit():
+            user_ids.add(int(key))
+    if not user_ids:
+        return
+    _credentials_generation += 1
+    for key, (user_id, _) in list(_credentials_cache.items()):
+        if user_id in user_ids:
+            _credentials_cache.pop(key, None)
+
+
+cache.add_invalidation_listener(_invalidate_credentials)
+
+
+async def get_caldav_user(
+    credentials: HTTPBasicCredentials = Depends(security),
+    db: AsyncSession = Depends(database.get_db),
+) -> int:
+    key = hashlib.sha256(f"{credentials.username}\0{credentials.password}".encode()).hexdigest()
+    cached = _credentials_cache.get(key)
+    if cached and cached[1] > time.monotonic():
+        return cached[0]
+
+    generation = _credentials_generation
+    user = await user_controller.authenticate(db, email=credentials.username, password=credentials.password)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password",
+            headers={"WWW-Authenticate": 'Basic realm="Agenda Risetec"'},
+        )
+
+    if generation == _credentials_generation:
+        if len(_credentials_cache) >= CREDENTIALS_CACHE_MAX:
+            _credentials_cache.clear()
+        _credentials_cache[key] = (user.id, time.monotonic() + CREDENTIALS_TTL_SECONDS)
+    return user.id
+
+
+# --- Helpers de XML ---
+
+def _tag(namespace: str, name: str) -> str:
+    return f"{{{namespace}}}{name}"
+
+
+def _sub(parent: ET.Element, namespace: str, name: str, text: Optional[str] = None) -> ET.Element:
+    element = ET.SubElement(parent, _tag(namespace, name))
+    if text is not None:
+        element.text = text
+    return element
+
+
+def _calendar_href(calendar_id: int) -> str:
+    return f"{CALENDARS_PATH}{calendar_id}/"
+
+
+def _event_href(calendar_id: int, uid: str) -> str:
+    return f"{CALENDARS_PATH}{calendar_id}/{quote(uid)}.ics"
+
+
+def _uid_from_href(href: str) -> str:
+    name = unquote(href.rstrip("/").rsplit("/", 1)[-1])
+    return name[:-4] if name.endswith(".ics") else name
+
+
+def _sync_token(ctag: int) -> str:
+    return f"{SYNC_TOKEN_PREFIX}{ctag}"
+
+
+def _parse_sync_token(token: Optional[str]) -> Optional[int]:
+    """Token vazio = sincronização inicial (0). Token desconhecido = None."""
+    if not token:
+        return 0
+    if not token.startswith(SYNC_TOKEN_PREFIX):
+        return None
+    try:
+        return int(token[len(SYNC_TOKEN_PREFIX):])
+    except ValueError:
+        return None
+
+
+def _requested_props(body: Optional[ET.Element]) -> Optional[List[str]]:
+    """Lista de propriedades pedidas em <prop>, ou None para allprop/corpo vazio."""
+    if body is None:
+        return None
+    prop = body.find(_tag(DAV, "prop"))
+    if prop is None:
+        return None
+    return [child.tag for child in prop]
+
+
+PropBuilder = Callable[[ET.Element], None]
+
+
+def _add_response(
+    multistatus: ET.Element,
+    href: str,
+    available: Dict[str, PropBuilder],
+    requested: Optional[List[str]],
+):
+    """
+    Adiciona um <response> com um propstat 200 para as propriedades conhecidas
+    e um propstat 404 para as pedidas que o recurso não possui.
+    """
+    response = _sub(multistatus, DAV, "response")
+    _sub(response, DAV, "href", href)
+
+    names = requested if requested is not None else list(available.keys())
+    found = [name for name in names if name in available]
+    missing = [name for name in names if name not in available]
+
+    if found:
+        propstat = _sub(response, DAV, "propstat")
+        prop = _sub(propstat, DAV, "prop")
+        for name in found:
+            available[name](ET.SubElement(prop, name))
+        _sub(propstat, DAV, "status", "HTTP/1.1 200 OK")
+    if missing:
+        propstat = _sub(response, DAV, "propstat")
+        prop = _sub(propstat, DAV, "prop")
+        for name in missing:
+            ET.SubElement(prop, name)
+        _sub(propstat, DAV, "status", "HTTP/1.1 404 Not Found")
+
+
+def _add_missing_response(multistatus: ET.Element, href: str):
+    response = _sub(multistatus, DAV, "response")
+    _sub(response, DAV, "href", href)
+    _sub(response, DAV, "status", "HTTP/1.1 404 Not Found")
+
+
+def _text(value: str) -> PropBuilder:
+    def build(element: ET.Element):
+        element.text = value
+    return build
+
+
+def _href_prop(href: str) -> PropBuilder:
+    def build(element: ET.Element):
+        _sub(element, DAV, "href", href)
+    return build
+
+
+def _resourcetype(*types) -> PropBuilder:
+    def build(element: ET.Element):
+        for namespace, name in types:
+            _sub(element, namespace, name)
+    return build
+
+
+def _multistatus_response(multistatus: ET.Element) -> Response:
+    content = ET.tostring(multistatus, encoding="utf-8", xml_declaration=True)
+    return Response(
+        content=content,
+        status_code=207,
+        media_type='application/xml; charset="utf-8"',
+        headers=DAV_HEADERS,
+    )
+
+
+async def _read_body(request: Request) -> Optional[ET.Element]:
+    raw = await request.body()
+    if not raw.strip():
+        return None
+    try:
+        return parse_xml(raw)
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid XML body")
+
+
+def _depth(request: Request) -> int:
+    return 0 if request.headers.get("Depth", "1") == "0" else 1
+
+
+# --- Propriedades dos recursos ---
+
+def _principal_props(user_id: int) -> Dict[str, PropBuilder]:
+    principal = f"{BASE_PATH}/"
+    return {
+        _tag(DAV, "resourcetype"): _resourcetype((DAV, "collection"), (DAV, "principal")),
+        _tag(DAV, "displayname"): _text(f"user-{user_id}"),
+        _tag(DAV, "current-user-principal"): _href_prop(principal),
+        _tag(DAV, "principal-URL"): _href_prop(principal),
+        _tag(CALDAV, "calendar-home-set"): _href_prop(CALENDARS_PATH),
+    }
+
+
+def _home_props(user_id: int) -> Dict[str, PropBuilder]:
+    return {
+        _tag(DAV, "resourcetype"): _resourcetype((DAV, "collection")),
+        _tag(DAV, "current-user-principal"): _href_prop(f"{BASE_PATH}/"),
+    }
+
+
+def _supported_reports(element: ET.Element):
+    for namespace, name in ((CALDAV, "calendar-query"), (CALDAV, "calendar-multiget"), (DAV, "sync-collection")):
+        supported = _sub(element, DAV, "supported-report")
+        report = _sub(supported, DAV, "report")
+        _sub(report, namespace, name)
+
+
+def _supported_components(element: ET.Element):
+    _sub(element, CALDAV, "comp").set("name", "VEVENT")
+
+
+def _calendar_props(calendar, ctag: int) -> Dict[str, PropBuilder]:
+    props = {
+        _tag(DAV, "resourcetype"): _resourcetype((DAV, "collection"), (CALDAV, "calendar")),
+        _tag(DAV, "displayname"): _text(calendar.name or ""),
+        _tag(CALSERVER, "getctag"): _text(str(ctag)),
+        _tag(DAV, "sync-token"): _text(_sync_token(ctag)),
+        _tag(DAV, "supported-report-set"): _supported_reports,
+        _tag(CALDAV, "supported-calendar-component-set"): _supported_components,
+        _tag(DAV, "current-user-principal"): _href_prop(f"{BASE_PATH}/"),
+    }
+    if calendar.color:
+        props[_tag(APPLE_ICAL, "calendar-color")] = _text(calendar.color)
+    if calendar.description:
+        props[_tag(CALDAV, "calendar-description")] = _text(calendar.description)
+    return props
+
+
+def _event_props(revision: int, calendar_data: Optional[bytes] = None) -> Dict[str, PropBuilder]:
+    props = {
+        _tag(DAV, "getetag"): _text(caldavController.make_etag(revision)),
+        _tag(DAV, "getcontenttype"): _text("text/calendar; charset=utf-8; component=vevent"),
+        _tag(DAV, "resourcetype"): _resourcetype(),
+    }
+    if calendar_data is not None:
+        props[_tag(CALDAV, "calendar-data")] = _text(calendar_data.decode("utf-8"))
+    return props
+
+
+async def _get_calendar_or_404(db: AsyncSession, calendar_id: int, user_id: int):
+    """404 também para calendário privado de outro usuário (app/services/visibility.py)."""
+    where = await visibility.predicate(db, Calendar, user_id)
+    calendar = await caldavController.get_calendar(db, calendar_id, visibility=where)
+    if not calendar:
+        raise HTTPException(status_code=404, detail="Calendar not found")
+    return calendar
+
+
+# --- Rotas ---
+
+@well_known_router.api_route("/.well-known/caldav", methods=["GET", "PROPFIND"], include_in_schema=False)
+async def well_known_caldav():
+    return RedirectResponse(url=f"{BASE_PATH}/", status_code=status.HTTP_301_MOVED_PERMANENTLY)
+
+
+@router.options("/{path:path}", include_in_schema=False)
+async def caldav_options(path: str):
+    return Response(status_code=200, headers=DAV_HEADERS)
+
+
+@router.api_route("/", methods=["PROPFIND"], include_in_schema=False)
+async def propfind_principal(request: Request, user_id: int = Depends(get_caldav_user)):
+    body = await _read_body(request)
+    multistatus = ET.Element(_tag(DAV, "multistatus"))
+    _add_response(multistatus, f"{BASE_PATH}/", _principal_props(user_id), _requested_props(body))
+    return _multistatus_response(multistatus)
+
+
+@router.api_route("/calendars/", methods=["PROPFIND"], include_in_schema=False, dependencies=[Depends(require("Events", "view", get_caldav_user))])
+async def propfind_calendar_home(
+    request: Request,
+    db: AsyncSession = Depends(database.get_db),
+    user_id: int = Depends(get_caldav_user),
+):
+    body = await _read_body(request)
+    requested = _requested_props(body)
+    multistatus = ET.Element(_tag(DAV, "multistatus"))
+    _add_response(multistatus, CALENDARS_PATH, _home_props(user_id), requested)
+
+    if _depth(request) > 0:
+        calendars = await caldavController.get_calendars(db, visibility=await visibility.predicate(db, Calendar, user_id))
+        ctags = await caldavController.get_ctags(db, [calendar.id for calendar in calendars])
+        for calendar in calendars:
+            _add_response(
+                multistatus,
+                _calendar_href(calendar.id),
+                _calendar_props(calendar, ctags.get(calendar.id, 0)),
+                requested,
+            )
+    return _multistatus_response(multistatus)
+
+
+@router.api_route("/calendars/{calendar_id}/", methods=["PROPFIND"], include_in_schema=False, dependencies=[Depends(require("Events", "view", get_caldav_user))])
+async def propfind_calendar(
+    calendar_id: int,
+    request: Request,
+    db: AsyncSession = Depends(database.get_db),
+    user_id: int = Depends(get_caldav_user),
+):
+    body = await _read_body(request)
+    requested = _requested_props(body)
+    calendar = await _get_calendar_or_404(db, calendar_id, user_id)
+    ctags = await caldavController.get_ctags(db, [calendar_id])
+
+    multistatus = ET.Element(_tag(DAV, "multistatus"))
+    _add_response(multistatus, _calendar_href(calendar_id), _calendar_props(calendar, ctags.get(calendar_id, 0)), requested)
+
+    if _depth(request) > 0:
+        # Apenas uid + revision: o cliente compara ETags e busca só o que mudou
+        where = await visibility.predicate(db, Events, user_id)
+        for uid, revision in await caldavController.get_event_etags(db, calendar_id, visibility=where):
+            _add_response(multistatus, _event_href(calendar_id, uid), _event_props(revision), requested)
+    return _multistatus_response(multistatus)
+
+
+def _parse_time_range(body: ET.Element):
+    time_range = body.find(f".//{_tag(CALDAV, 'time-range')}")
+    if time_range is None:
+        return None, None
+
+    def parse(value: Optional[str]) -> Optional[datetime]:
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid time-range value '{value}'")
+
+    return parse(time_range.get("start")), parse(time_range.get("end"))
+
+
+@router.api_route("/calendars/{calendar_id}/", methods=["REPORT"], include_in_schema=False, dependencies=[Depends(require("Events", "view", get_caldav_user))])
+async def report_calendar(
+    calendar_id: int,
+    request: Request,
+    db: AsyncSession = Depends(database.get_db),
+    user_id: int = Depends(get_caldav_user),
+):
+    body = await _read_body(request)
+    if body is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="REPORT body is required")
+    await _get_calendar_or_404(db, calendar_id, user_id)
+    where = await visibility.predicate(db, Events, user_id)
+
+    requested = _requested_props(body)
+    # calendar-data só é serializado quando o cliente pede
+    with_data = requested is None or _tag(CALDAV, "calendar-data") in requested
+    multistatus = ET.Element(_tag(DAV, "multistatus"))
+
+    def add_events(events):
+        for event in events:
+            data = caldavController.event_to_ical(event) if with_data else None
+            _add_response(multistatus, _event_href(calendar_id, event.uid), _event_props(event.revision, data), requested)
+
+    if body.tag == _tag(CALDAV, "calendar-query"):
+        start, end = _parse_time_range(body)
+        add_events(await caldavController.get_events(db, calendar_id=calendar_id, start=start, end=end, visibility=where))
+
+    elif body.tag == _tag(CALDAV, "calendar-multiget"):
+        hrefs = [element.text for element in body.findall(_tag(DAV, "href")) if element.text]
+        uids = [_uid_from_href(href) for href in hrefs]
+        events = await caldavController.get_events(db, calendar_id=calendar_id, uids=uids, visibility=where)
+        add_events(events)
+        found = {event.uid for event in events}
+        for uid in uids:
+            if uid not in found:
+                _add_missing_response(multistatus, _event_href(calendar_id, uid))
+
+    elif body.tag == _tag(DAV, "sync-collection"):
+        token_element = body.find(_tag(DAV, "sync-token"))
+        since = _parse_sync_token(token_element.text if token_element is not None else None)
+        if since is None:
+            error = ET.Element(_tag(DAV, "error"))
+            _sub(error, DAV, "valid-sync-token")
+            return Response(
+                content=ET.tostring(error, encoding="utf-8", xml_declaration=True),
+                status_code=status.HTTP_403_FORBIDDEN,
+                media_type='application/xml; charset="utf-8"',
+            )
+
+        # O token é lido antes das mudanças e não passa do horizonte confirmado: uma
+        # transação ainda aberta com revisão menor que a de um evento já visível fica acima
+        # do token e aparece na próxima sincronização (o que já veio pode vir de novo).
+        ctags = await caldavController.get_ctags(db, [calendar_id])
+        add_events(await caldavController.get_events(db, calendar_id=calendar_id, since=since, visibility=where))
+        if since:
+            deleted_where = await visibility.predicate(db, Tombstone, user_id)
+            for uid in await caldavController.get_deleted_uids(
+                db, calendar_id=calendar_id, since=since, visibility=deleted_where
+            ):
+                _add_missing_response(multistatus, _event_href(calendar_id, uid))
+        _sub(multistatus, DAV, "sync-token", _sync_token(ctags.get(calendar_id, 0)))
+
+    else:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="Unsupported REPORT")
+
+    return _multistatus_response(multistatus)
+
+
+@router.api_route("/calendars/{calendar_id}/{resource}.ics", methods=["GET", "HEAD"], include_in_schema=False, dependencies=[Depends(require("Events", "view", get_caldav_user))])
+async def get_event(
+    calendar_id: int,
+    resource: str,
+    request: Request,
+    db: AsyncSession = Depends(database.get_db),
+    user_id: int = Depends(get_caldav_user),
+):
+    await _get_calendar_or_404(db, calendar_id, user_id)
+    events = await caldavController.get_events(
+        db, calendar_id=calendar_id, uids=[unquote(resource)],
+        visibility=await visibility.predicate(db, Events, user_id),
+    )
+    if not events:
+        raise HTTPException(status_code=404, detail="Event not found")
+
+    event = events[0]
+    etag = caldavController.make_etag(event.revision)
+    if request.headers.get("If-None-Match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    return Response(
+        content=caldavController.event_to_ical(event),
+        media_type="text/calendar; charset=utf-8",
+        headers={"ETag": etag},
+    )
+
+
+async def _uid_conflict(db: AsyncSession, event, user_id: int) -> Response:
+    """
+    409 com a precondição no-uid-conflict (RFC 4791, 5.3.2.1): o UID já está em outro
+    calendário. O href do evento só vai para quem o enxerga.
+    """
+    error = ET.Element(_tag(DAV, "error"))
+    conflict = _sub(error, CALDAV, "no-uid-conflict")
+    where = await visibility.predicate(db, Events, user_id)
+    if where is None or await caldavController.get_events(db, uids=[event.uid], visibility=where):
+        _sub(conflict, DAV, "href", _event_href(event.calendar_id, event.uid))
+    return Response(
+        content=ET.tostring(error, encoding="utf-8", xml_declaration=True),
+        status_code=status.HTTP_409_CONFLICT,
+        media_type='application/xml; charset="utf-8"',
+    )
+
+
+@router.put("/calendars/{calendar_id}/{resource}.ics", include_in_schema=False)
+async def put_event(
+    calendar_id: int,
+    resource: str,
+    request: Request,
+    db: AsyncSession = Depends(database.get_db),
+    user_id: int = Depends(get_caldav_user),
+):
+    await _get_calendar_or_404(db, calendar_id, user_id)
+    uid = unquote(resource)
+    try:
+        fields = caldavController.ical_to_event_fields(await request.body())
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    # O UID é único no banco todo, não por calendário
+    existing = await caldavController.get_events(db, uids=[uid])
+    if existing and existing[0].calendar_id != calendar_id:
+        return await _uid_conflict(db, existing[0], user_id)
+    # O mesmo PUT cria ou altera: a permissão exigida depende de o evento já existir
+    await permission_engine.check(db, user_id, "Events", "update" if existing else "create")
+    if_match = request.headers.get("If-Match")
+    if_none_match = request.headers.get("If-None-Match")
+
+    if existing:
+        event = existing[0]
+        if if_none_match == "*" or (if_match and if_match != caldavController.make_etag(event.revision)):
+            raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="ETag mismatch")
+        # Recarrega com participantes para o update do controller
+        db_event = await event_controller.get_event_with_users(db=db, id=event.id)
+        event = await event_controller.update(db=db, db_obj=db_event, obj_in=EventUpdate(**fields))
+        status_code = status.HTTP_204_NO_CONTENT
+    else:
+        if if_match:
+            raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="ETag mismatch")
+        event = await event_controller.create(
+            db=db,
+            obj_in=EventBase(**fields, calendar_id=calendar_id, created_by=user_id),
+            uid=uid,
+        )
+        status_code = status.HTTP_201_CREATED
+
+    return Response(status_code=status_code, headers={"ETag": caldavController.make_etag(event.revision)})
+
+
+@router.delete("/calendars/{calendar_id}/{resource}.ics", include_in_schema=False, dependencies=[Depends(require("Events", "delete", get_caldav_user))])
+async def delete_event(
+    calendar_id: int,
+    resource: str,
+    request: Request,
+    db: AsyncSession = Depends(database.get_db),
+    user_id: int = Depends(get_caldav_user),
+):
+    await _get_calendar_or_404(db, calendar_id, user_id)
+    existing = await caldavController.get_events(
+        db, calendar_id=calendar_id, uids=[unquote(resource)],
+        visibility=await visibility.predicate(db, Events, user_id),
+    )
+    if not existing:
+        raise HTTPException(status_code=404, detail="Event not found")
+
+    event = existing[0]
+    if_match = request.headers.get("If-Match")
+    if if_match and if_match != caldavController.make_etag(event.revision):
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="ETag mismatch")
+
+    await event_controller.remove(db=db, id=event.id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,53 +1,86 @@
 # agenda-risetec-backend/app/routers/calendarRouter.py
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from app.controllers import calendarController
 from app.controllers.tokenController import verify_token
 from app.database import database
+from app.services import visibility
+from app.services.permissions import require
+from app.services.query_inspector import query_budget
 from app.schemas.calendarSchema import Calendar, CalendarBase, CalendarCreate
+from app.services.cache import cache
+from app.utils.aggregate import total_headers
+from app.utils.conditional import Conditional, cache_entry
 
 router = APIRouter(prefix="/crud", tags=["Calendars"], dependencies=[Depends(verify_token)])
 
-@router.post("/calendar/", response_model=Calendar)
+@router.post("/calendar/", response_model=Calendar, dependencies=[Depends(require("Calendar", "create"))])
 async def create_calendar(
     calendar: CalendarBase, 
     db: AsyncSession = Depends(database.get_db), 
 ):
     return await calendarController.calendar_controller.create(db=db, obj_in=calendar)
 
-@router.get("/calendar/", response_model=list[Calendar])
+@router.get("/calendar/", response_model=list[Calendar], dependencies=[Depends(query_budget(7))])
 async def read_calendars(
+    response: Response,
     filters: str = None, 
     skip: int = 0, 
     limit: int = 100, # Aumentei o limite padrão
+    with_count: bool = False,
+    order_by: str = Query(None, description="Ex: name. Só campos indexados; o id desempata"),
     db: AsyncSession = Depends(database.get_db),
-    current_user: int = Depends(verify_token)
+    current_user: int = Depends(require("Calendar", "view")),
+    conditional: Conditional = Depends(),
 ):
     # ATUALIZADO: Chama o método genérico e passa a opção de carregar eventos.
-    return await calendarController.calendar_controller.get_multi_filtered(
-        db=db, 
-        skip=skip, 
-        limit=limit, 
-        filters=filters,
-        load_options=[selectinload(calendarController.calendar_controller.model.events)]
-    )
+    # Calendários privados de outros usuários ficam de fora já no SQL
+    predicate = await visibility.predicate(db, calendarController.calendar_controller.model, current_user)
+    try:
+        calendars = await calendarController.calendar_controller.get_multi_filtered(
+            db=db, 
+            skip=skip, 
+            limit=limit, 
+            filters=filters,
+            load_options=[selectinload(calendarController.calendar_controller.model.events)],
+            visibility=predicate,
+            order_by=order_by,
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    if with_count:
+        response.headers.update(total_headers(*await calendarController.calendar_controller.count_filtered(
+            db=db, filters=filters, visibility=predicate,
+        )))
+    return conditional.respond(calendars, list[Calendar])
 
-@router.get("/calendar/{calendar_id}", response_model=Calendar)
+@router.get("/calendar/{calendar_id}", response_model=Calendar, dependencies=[Depends(query_budget(5))])
 async def read_calendar(
     calendar_id: int, 
     db: AsyncSession = Depends(database.get_db),
+    conditional: Conditional = Depends(),
+    current_user: int = Depends(require("Calendar", "view")),
 ):
-    # ALTERAÇÃO: Usa o método customizado 'get_with_events'.
-    return await calendarController.calendar_controller.get_with_events(db=db, id=calendar_id)
+    # A entrada do cache é a mesma para todos: a visibilidade é conferida antes
+    await visibility.ensure_visible(db, calendarController.calendar_controller.model, calendar_id, current_user)
+    # ALTERAÇÃO: Usa o método customizado 'get_with_events', com cache (invalidado a cada
+    # escrita no calendário ou em um evento dele); a entrada guarda o ETag junto
+    async def load():
+        calendar = await calendarController.calendar_controller.get_with_events(db=db, id=calendar_id)
+        return cache_entry(Calendar.model_validate(calendar).model_dump(mode="json"))
+
+    return conditional.cached(await cache.get_or_load(f"Calendar:{calendar_id}:with_events", load, tags=[f"Calendar:{calendar_id}"]))
 
 @router.put("/calendar/{calendar_id}", response_model=Calendar)
 async def update_calendar(
     calendar_id: int, 
     updated_calendar: CalendarCreate,
     db: AsyncSession = Depends(database.get_db), 
+    current_user: int = Depends(require("Calendar", "update")),
 ):
+    await visibility.ensure_visible(db, calendarController.calendar_controller.model, calendar_id, current_user)
     # ALTERAÇÃO: Busca o objeto antes de atualizar.
     db_calendar = await calendarController.calendar_controller.get(db=db, id=calendar_id)
     if not db_calendar:
@@ -58,7 +91,9 @@ async def update_calendar(
 async def delete_calendar(
     calendar_id: int, 
     db: AsyncSession = Depends(database.get_db),
+    current_user: int = Depends(require("Calendar", "delete")),
 ):
+    await visibility.ensure_visible(db, calendarController.calendar_controller.model, calendar_id, current_user)
     # ALTERAÇÃO: Usa o método 'remove' da classe base.
     deleted_calendar = await calendarController.calendar_controller.remove(db=db, id=calendar_id)
     if not deleted_calendar:
@@ -0,0 +1,30 @@
+# app/routers/docsRouter.py
+
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import FileResponse
+
+from app.controllers.tokenController import verify_token
+from app.core.config import settings
+from app.middleware.compression import SUFFIXES, negotiate
+
+router = APIRouter(prefix="/crud", tags=["Docs"], dependencies=[Depends(verify_token)])
+
+
+@router.get("/openapi.json", include_in_schema=False)
+async def read_openapi(request: Request):
+    """
+    Schema OpenAPI gerado no startup. Serve a versão pré-comprimida (gerada junto) que o
+    cliente aceitar, sem comprimir nada por requisição.
+    """
+    path = settings.OPENAPI_PATH
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="OpenAPI schema not generated")
+
+    headers = {"Vary": "Accept-Encoding"}
+    encoding = negotiate(request.headers.get("accept-encoding", ""))
+    if encoding and os.path.exists(path + SUFFIXES[encoding]):
+        path += SUFFIXES[encoding]
+        headers["Content-Encoding"] = encoding
+    return FileResponse(path, media_type="application/json", headers=headers)
@@ -1,53 +1,142 @@
 # app/routers/eventsRouter.py
 
-from fastapi import APIRouter, Depends, HTTPException
+from types import SimpleNamespace
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.controllers import eventsController
+from app.controllers import eventsController, freebusyController
 from app.controllers.tokenController import verify_token
 from app.database import database
+from app.models.calendarModel import Calendar
+from app.services import visibility
+from app.services.permissions import require
+from app.services.query_inspector import query_budget
 from app.schemas.eventsSchema import Event, EventBase
 from app.schemas.eventsSchema import EventUpdate
+from app.utils.aggregate import total_headers
+from app.utils.conditional import Conditional
 
 router = APIRouter(prefix="/crud", dependencies=[Depends(verify_token)], tags=["Events"])
 
+async def _ensure_no_conflicts(db: AsyncSession, user_ids, event, exclude_event_id=None):
+    conflicts = await freebusyController.find_conflicts(db, user_ids, event, exclude_event_id=exclude_event_id)
+    if conflicts:
+        raise HTTPException(status_code=409, detail={"message": "Participants have conflicting events", "conflicts": jsonable_encoder(conflicts)})
+
 @router.post("/event/", response_model=Event)
-async def create_event(event: EventBase, db: AsyncSession = Depends(database.get_db)):
+async def create_event(
+    event: EventBase, check_conflicts: bool = False, db: AsyncSession = Depends(database.get_db),
+    current_user_id: int = Depends(require("Events", "create")),
+):
+    # Não cria em calendário privado alheio (404, como se não existisse)
+    await visibility.ensure_visible(db, Calendar, event.calendar_id, current_user_id)
+    # Com ?check_conflicts=true, recusa (409) se algum participante já estiver ocupado no horário
+    if check_conflicts:
+        await _ensure_no_conflicts(db, event.user_ids, event)
     return await eventsController.event_controller.create(db=db, obj_in=event)
 
-@router.get("/event/", response_model=list[Event])
+@router.get("/event/", response_model=list[Event], dependencies=[Depends(query_budget(10))])
 async def read_events(
+    response: Response,
     filters: str = None, 
     skip: int = 0, 
     limit: int = 10,
+    with_count: bool = False,
+    order_by: str = Query(None, description="Ex: date+desc,calendar.name. Só campos indexados; o id desempata"),
+    db: AsyncSession = Depends(database.get_db),
+    conditional: Conditional = Depends(),
+    current_user_id: int = Depends(require("Events", "view")),
+):
+    # Só os eventos visíveis ao usuário, filtrados no próprio SQL
+    predicate = await visibility.predicate(db, eventsController.event_controller.model, current_user_id)
+    try:
+        events = await eventsController.event_controller.get_multi_filtered(
+            db=db, 
+            skip=skip, 
+            limit=limit, 
+            filters=filters,
+            load_options=[selectinload(eventsController.event_controller.model.users)],
+            model="Events",
+            visibility=predicate,
+            order_by=order_by,
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    # ?with_count=true: total da lista em X-Total-Count (X-Total-Count-Exact: false quando estimado)
+    if with_count:
+        response.headers.update(total_headers(*await eventsController.event_controller.count_filtered(
+            db=db, filters=filters, visibility=predicate,
+        )))
+    return conditional.respond(events, list[Event])
+
+@router.get("/event/aggregate", dependencies=[Depends(query_budget(5))])
+async def aggregate_events(
+    filters: str = None,
+    group_by: str = Query(None, description="Ex: calendar_id,date:month"),
+    aggregates: str = Query(None, description="Ex: count,min:date,max:endDate (padrão: count)"),
     db: AsyncSession = Depends(database.get_db),
+    current_user_id: int = Depends(require("Events", "view")),
+):
+    """Contagens por grupo dos eventos visíveis ao usuário (sintaxe em app/utils/aggregate.py)."""
+    try:
+        return await eventsController.event_controller.aggregate(
+            db=db, filters=filters, group_by=group_by, aggregates=aggregates,
+            visibility=await visibility.predicate(db, eventsController.event_controller.model, current_user_id),
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+
+@router.get("/event/{event_id}", response_model=Event, dependencies=[Depends(query_budget(9))])
+async def read_event(
+    event_id: int, db: AsyncSession = Depends(database.get_db), conditional: Conditional = Depends(),
+    current_user_id: int = Depends(require("Events", "view")),
 ):
-    return await eventsController.event_controller.get_multi_filtered(
-        db=db, 
-        skip=skip, 
-        limit=limit, 
-        filters=filters,
-        load_options=[selectinload(eventsController.event_controller.model.users)],
-        model="Events"
-    )
-
-@router.get("/event/{event_id}", response_model=Event)
-async def read_event(event_id: int, db: AsyncSession = Depends(database.get_db)):
+    await visibility.ensure_visible(db, eventsController.event_controller.model, event_id, current_user_id)
+    # 304 direto pela versão do evento e dos participantes, sem carregar nada. Sem
+    # Last-Modified: entrar ou sair um participante não muda nenhuma data, só o ETag
+    version = await eventsController.event_controller.get_version(db=db, id=event_id)
+    if version is not None:
+        conditional.check("Event", event_id, *version)
     return await eventsController.event_controller.get_event_with_users(db=db, id=event_id)
 
 @router.put("/event/{event_id}", response_model=Event)
 async def update_event(
     event_id: int, 
     updated_event: EventUpdate,
+    check_conflicts: bool = False,
     db: AsyncSession = Depends(database.get_db), 
+    current_user_id: int = Depends(require("Events", "update")),
 ):
+    await visibility.ensure_visible(db, eventsController.event_controller.model, event_id, current_user_id)
     # CORREÇÃO: Usar o método que já carrega o relacionamento 'users'
     db_event = await eventsController.event_controller.get_event_with_users(db=db, id=event_id)
+    # Nem move para um calendário privado alheio
+    if updated_event.calendar_id is not None and updated_event.calendar_id != db_event.calendar_id:
+        await visibility.ensure_visible(db, Calendar, updated_event.calendar_id, current_user_id)
+    if check_conflicts:
+        # Estado final do evento: o que veio no payload sobre o que já está salvo
+        changes = updated_event.model_dump(exclude_unset=True)
+        merged = SimpleNamespace(**{
+            field: changes.get(field, getattr(db_event, field))
+            for field in ("date", "endDate", "isAllDay", "recurring_rule")
+        })
+        if updated_event.occurrence_date and updated_event.edit_mode in ("this", "future") and db_event.recurring_rule:
+            # Vira um evento novo a partir da ocorrência; em "this", sem recorrência
+            merged.date = updated_event.occurrence_date
+            if updated_event.edit_mode == "this":
+                merged.recurring_rule = None
+        user_ids = updated_event.user_ids if updated_event.user_ids is not None else [user.id for user in db_event.users]
+        await _ensure_no_conflicts(db, user_ids, merged, exclude_event_id=event_id)
     return await eventsController.event_controller.update(db=db, db_obj=db_event, obj_in=updated_event)
 
 @router.delete("/event/{event_id}", response_model=Event)
-async def delete_event(event_id: int, db: AsyncSession = Depends(database.get_db)):
+async def delete_event(
+    event_id: int, db: AsyncSession = Depends(database.get_db),
+    current_user_id: int = Depends(require("Events", "delete")),
+):
+    await visibility.ensure_visible(db, eventsController.event_controller.model, event_id, current_user_id)
     deleted_event = await eventsController.event_controller.remove(db=db, id=event_id)
     if not deleted_event:
         raise HTTPException(status_code=404, detail="Event not found")
@@ -1,70 +1,164 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, Response
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.controllers import fileController as file_controller
 from app.database import database
+from app.services.permissions import require
 from app.controllers.tokenController import verify_token
 from app.schemas import fileSchema
-import shutil, os, time
+from app.services.file_storage import file_storage, iter_upload
+from app.core.config import settings
+from urllib.parse import quote
+import os
 
 router = APIRouter(prefix="/crud", tags=["Files"])
 
+def _server_timing(response: Response, stored: dict):
+    # Duração e vazão da gravação, visíveis no DevTools (aba Timing)
+    response.headers["Server-Timing"] = (
+        f'upload;dur={stored["elapsed"] * 1000:.1f};desc="{stored["throughput"] / 1048576:.1f} MB/s"'
+    )
+
+
+async def _register(db: AsyncSession, stored: dict, originalname: str, content_type: Optional[str],
+                    owner_id: int, event_id: Optional[int]):
+    return await file_controller.store_file(
+        db, stored, originalname=originalname, content_type=content_type or "application/octet-stream",
+        owner_id=owner_id, event_id=event_id,
+    )
+
+
 # Upload de Arquivos
-@router.post("/files/", response_model=fileSchema.FileCreate)
+@router.post("/files/", response_model=fileSchema.FileCreate, dependencies=[Depends(require("File", "create"))])
 async def create_file(
-    file: UploadFile = File(...), db: AsyncSession = Depends(database.get_db), validation: int = Depends(verify_token)
+    response: Response, file: UploadFile = File(...), event_id: Optional[int] = None,
+    db: AsyncSession = Depends(database.get_db), validation: int = Depends(verify_token)
 ):  
-    name, ext = os.path.splitext(file.filename)
-    filename = str(time.time_ns()) + "_" + name + ext
-    file_location = f"./files/{filename}"  # Define o caminho para salvar o arquivo
-
-    if not os.path.exists("./files"):
-        os.mkdir("./files")
-        
-    # Salvar arquivo no sistema de arquivos
-    with open(file_location, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-
-    # Criar um registro no banco de dados
-    db_file = await file_controller.create_file(
-        db=db,
-        file=fileSchema.FileBase(
-            filename=filename,
-            originalname=file.filename,
-            content_type=file.content_type,
-            file_path=os.path.abspath(file_location)
-        ),
-    )
-    return db_file
+    """
+    Upload via multipart; `event_id` anexa o arquivo a um evento. O corpo já chega inteiro no spool do Starlette antes desta
+    função; para arquivos grandes prefira `PUT /crud/files/stream`, que valida o
+    tamanho enquanto recebe.
+    """
+    stored = await file_storage.save(iter_upload(file), file.filename, file.content_type)
+    _server_timing(response, stored)
+    return await _register(db, stored, file.filename, file.content_type, int(validation), event_id)
+
+@router.put("/files/stream", response_model=fileSchema.FileCreate, dependencies=[Depends(require("File", "create"))])
+async def stream_file(
+    request: Request, response: Response, filename: str, event_id: Optional[int] = None,
+    db: AsyncSession = Depends(database.get_db), validation: int = Depends(verify_token)
+):
+    """
+    Upload em streaming: o corpo da requisição é o próprio arquivo (sem multipart),
+    com o tipo em `Content-Type` e o nome em `?filename=`. O limite de tamanho e o
+    tipo são verificados antes e durante o recebimento (413/415).
+    """
+    content_type = request.headers.get("content-type")
+    file_storage.check_content_type(content_type)
+    file_storage.check_length(request.headers.get("content-length"))
 
-@router.get("/files/download/{file_id}", response_class=FileResponse)
-async def download_file(file_id: int, db: AsyncSession = Depends(database.get_db)):
+    stored = await file_storage.save(request.stream(), filename, content_type)
+    _server_timing(response, stored)
+    return await _register(db, stored, filename, content_type, int(validation), event_id)
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Comparação fraca (RFC 9110): ignora o prefixo W/
+    return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+@router.api_route("/files/download/{file_id}", methods=["GET", "HEAD"], response_class=FileResponse, dependencies=[Depends(require("File", "view"))])
+async def download_file(file_id: int, request: Request, db: AsyncSession = Depends(database.get_db)):
+    """
+    Download com cache: o ETag é o SHA-256 do conteúdo, então `If-None-Match` devolve 304
+    e `Range`/`If-Range` permitem retomar downloads. Com FILES_ACCEL_REDIRECT_PREFIX
+    configurado, o envio é delegado ao nginx (X-Accel-Redirect, sendfile).
+    """
     db_file = await file_controller.get_file(db, file_id=file_id)
     if db_file is None:
         raise HTTPException(status_code=404, detail="File not found")
 
+    headers = {"Cache-Control": "private, max-age=86400"}
+    if db_file.sha256:
+        # Um File nunca muda de conteúdo, então o hash é um validador forte
+        headers["ETag"] = f'"{db_file.sha256}"'
+        if _etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+
     # Verificar se o arquivo existe no caminho especificado
     if not os.path.exists(db_file.file_path):
         raise HTTPException(status_code=404, detail="File not found on server")
 
-    # Retornar o arquivo para download
-    return FileResponse(path=db_file.file_path, filename=db_file.filename, media_type=db_file.content_type)
+    relative_path = file_storage.relative_path(db_file.file_path)
+    if settings.FILES_ACCEL_REDIRECT_PREFIX and relative_path:
+        headers["X-Accel-Redirect"] = f"{settings.FILES_ACCEL_REDIRECT_PREFIX.rstrip('/')}/{relative_path}"
+        headers["Content-Disposition"] = f"attachment; filename*=utf-8''{quote(db_file.filename)}"
+        return Response(media_type=db_file.content_type, headers=headers)
+
+    # O FileResponse trata Range/If-Range e usa o 'http.response.pathsend' (envio sem
+    # cópia) quando o servidor ASGI oferece essa extensão
+    return FileResponse(path=db_file.file_path, filename=db_file.filename, media_type=db_file.content_type, headers=headers)
 
 
-@router.get("/files/", response_model=list[fileSchema.FileResponse])
-async def read_files(skip: int = 0, limit: int = 10, db: AsyncSession = Depends(database.get_db), filters: Optional[List[str]] = None, validation: int = Depends(verify_token)):
-    files = await file_controller.get_files(db=db, skip=skip, limit=limit, filters=filters, model="File")
+@router.get("/files/", response_model=list[fileSchema.FileResponse], dependencies=[Depends(require("File", "view"))])
+async def read_files(
+    response: Response, skip: int = 0, limit: int = 10, filters: Optional[str] = None,
+    owner_id: Optional[int] = None, content_type: Optional[str] = None, event_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(database.get_db), validation: int = Depends(verify_token)
+):
+    """
+    Lista os arquivos, mais recentes primeiro. `content_type` aceita um tipo exato ou
+    um prefixo ("image/"). Para a próxima página, envie o cabeçalho `X-Next-Cursor` em `cursor`.
+    """
+    try:
+        files = await file_controller.get_files(
+            db=db, skip=skip, limit=limit, filters=filters, model="File",
+            owner_id=owner_id, content_type=content_type, event_id=event_id, cursor=cursor,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if files and len(files) == limit:
+        response.headers["X-Next-Cursor"] = file_controller.encode_cursor(files[-1])
     return files
 
-@router.get("/files/{file_id}", response_model=fileSchema.FileResponse)
+@router.get("/files/export", dependencies=[Depends(require("File", "view"))])
+async def export_files(
+    filters: Optional[str] = None, owner_id: Optional[int] = None,
+    content_type: Optional[str] = None, event_id: Optional[int] = None,
+    validation: int = Depends(verify_token)
+):
+    """
+    Catálogo completo em NDJSON (um arquivo por linha), enviado conforme é lido do
+    banco: a memória usada não depende da quantidade de arquivos.
+    """
+    async def lines():
+        # Sessão própria: a do Depends(get_db) pode ser fechada antes do fim do streaming
+        async with database.SessionLocal() as db:
+            async for file in file_controller.iter_files(
+                db, filters=filters, model="File", owner_id=owner_id, content_type=content_type, event_id=event_id
+            ):
+                yield fileSchema.FileResponse.model_validate(file).model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@router.get("/files/usage", response_model=list[fileSchema.FileUsage], dependencies=[Depends(require("File", "view"))])
+async def read_files_usage(owner_id: Optional[int] = None, db: AsyncSession = Depends(database.get_db), validation: int = Depends(verify_token)):
+    """Quantidade de arquivos e espaço ocupado por usuário."""
+    return await file_controller.get_usage(db, owner_id=owner_id)
+
+@router.get("/files/{file_id}", response_model=fileSchema.FileResponse, dependencies=[Depends(require("File", "view"))])
 async def read_file(file_id: int, db: AsyncSession = Depends(database.get_db), validation: int = Depends(verify_token)):
     db_file = await file_controller.get_file(db, file_id=file_id)
     if db_file is None:
         raise HTTPException(status_code=404, detail="File not found")
     return db_file
 
-@router.delete("/files/{file_id}", response_model=bool)
+@router.delete("/files/{file_id}", response_model=bool, dependencies=[Depends(require("File", "delete"))])
 async def delete_file(file_id: int, db: AsyncSession = Depends(database.get_db), validation: int = Depends(verify_token)):
     result = await file_controller.delete_file(db=db, file_id=file_id)
     if not result:
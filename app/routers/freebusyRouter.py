@@ -0,0 +1,39 @@
+# app/routers/freebusyRouter.py
+
+from datetime import timedelta
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.controllers import freebusyController
+from app.controllers.tokenController import verify_token
+from app.core.config import settings
+from app.database import database
+from app.schemas.freebusySchema import FreeBusyRequest, FreeBusyResponse, FreeSlotRequest, FreeSlotResponse
+from app.services.permissions import require
+
+router = APIRouter(prefix="/crud", tags=["FreeBusy"], dependencies=[Depends(verify_token)])
+
+
+def _check_window(request: FreeBusyRequest):
+    if request.end - request.start > timedelta(days=settings.FREEBUSY_MAX_WINDOW_DAYS):
+        raise HTTPException(status_code=400, detail=f"Window larger than {settings.FREEBUSY_MAX_WINDOW_DAYS} days")
+
+
+@router.post("/freebusy", response_model=FreeBusyResponse, dependencies=[Depends(require("Events", "view"))])
+async def freebusy(request: FreeBusyRequest, db: AsyncSession = Depends(database.get_db)):
+    """
+    Horários ocupados de cada usuário na janela, já mesclados (recorrências expandidas,
+    eventos cancelados fora). Só os intervalos: título e detalhes não são expostos.
+    """
+    _check_window(request)
+    busy = await freebusyController.get_busy(db, request.user_ids, request.start, request.end)
+    return {"start": request.start, "end": request.end, "busy": freebusyController.to_response(busy)}
+
+
+@router.post("/freebusy/next-slot", response_model=FreeSlotResponse, dependencies=[Depends(require("Events", "view"))])
+async def next_free_slot(request: FreeSlotRequest, db: AsyncSession = Depends(database.get_db)):
+    """Primeiro horário, a partir de `start`, em que todos estão livres por `duration_minutes`."""
+    _check_window(request)
+    busy = await freebusyController.get_busy(db, request.user_ids, request.start, request.end)
+    slot = freebusyController.find_free_slot(busy, request.start, request.end, timedelta(minutes=request.duration_minutes))
+    return {"slot": {"start": slot[0], "end": slot[1]} if slot else None}
@@ -1,14 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.controllers.genericController import GenericController
 from app.database import database
 from app.schemas import genericSchema
 from app.controllers.tokenController import verify_token
+from app.services import visibility
+from app.services.permissions import require_model
+from app.utils.aggregate import total_headers
+from app.utils.conditional import Conditional
 
 router = APIRouter(prefix="/crud", dependencies=[Depends(verify_token)], tags=["Generic"])
 
 
-@router.post("/generic", response_model=genericSchema.GenericCreate)
+@router.post("/generic", response_model=genericSchema.GenericCreate, dependencies=[Depends(require_model("create"))])
 async def generic_create(generic: genericSchema.GenericCreate,
                          db: AsyncSession = Depends(database.get_db), model: str = ""):
 
@@ -25,31 +29,60 @@ async def generic_create(generic: genericSchema.GenericCreate,
 
 
 @router.get("/generic", response_model=list[genericSchema.GenericCreate])
-async def generic_reads(skip: int = 0, limit: int = 10, model: str = "",
-                        db: AsyncSession = Depends(database.get_db), filters: str = None):
+async def generic_reads(response: Response, skip: int = 0, limit: int = 10, model: str = "",
+                        db: AsyncSession = Depends(database.get_db), filters: str = None, with_count: bool = False,
+                        order_by: str = Query(None, description="Ex: created_at+desc. Só campos indexados; o id desempata"),
+                        conditional: Conditional = Depends(), current_user_id: int = Depends(require_model("view"))):
 
 
     generic_controller = GenericController(model=model)
-    result = await generic_controller.catch(skip=skip, limit=limit, db=db, model=model, filters=filters)
+    predicate = await visibility.predicate(db, generic_controller.model, current_user_id)
+    try:
+        result = await generic_controller.catch(skip=skip, limit=limit, db=db, model=model, filters=filters,
+                                                visibility=predicate, order_by=order_by)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    if with_count:
+        response.headers.update(total_headers(*await generic_controller.count(db, filters, model, predicate)))
     if len(result) < 1:
         return []
     keys = [key for key in result[0].__dict__.keys() if not key.startswith('_')]
     getValueFromObj = lambda item: {key: getattr(item, key) if not isinstance(getattr(item, key), database.Base) else generic_controller.serialize_item(getattr(item, key)) for key in keys}
-    return [genericSchema.GenericCreate(**{'values': {**getValueFromObj(item)}, 'model': model}) for item in result]
+    return conditional.respond([genericSchema.GenericCreate(**{'values': {**getValueFromObj(item)}, 'model': model}) for item in result], list[genericSchema.GenericCreate])
+
+
+@router.get("/generic/aggregate")
+async def generic_aggregate(model: str = "", filters: str = None,
+                            group_by: str = Query(None, description="Ex: user_id ou created_at:day"),
+                            aggregates: str = Query(None, description="Ex: count,max:created_at (padrão: count)"),
+                            db: AsyncSession = Depends(database.get_db), current_user_id: int = Depends(require_model("view"))):
+    """Contagens por grupo de qualquer modelo do mapeamento, ex: model=Logger&group_by=user_id (auditoria por usuário)."""
+    generic_controller = GenericController(model=model)
+    if generic_controller.model is None:
+        raise HTTPException(status_code=400, detail="Unknown model")
+    try:
+        return await generic_controller.aggregate(
+            db, filters, model, await visibility.predicate(db, generic_controller.model, current_user_id),
+            group_by=group_by, aggregates=aggregates,
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
 
 
 @router.get("/generic/{generic_id}",
             response_model=genericSchema.GenericCreate)
-async def generic_read(generic_id: int, model: str = "", db: AsyncSession = Depends(database.get_db)):
+async def generic_read(generic_id: int, model: str = "", db: AsyncSession = Depends(database.get_db),
+                       conditional: Conditional = Depends(), current_user_id: int = Depends(require_model("view"))):
 
 
     generic_controller = GenericController(model=model)
+    await visibility.ensure_visible(db, generic_controller.model, generic_id, current_user_id)
     result = await generic_controller.get(id=generic_id, db=db)
     if result is None:
         raise HTTPException(status_code=404, detail="Item not found")
 
     keys = [key for key in result.__dict__.keys() if not key.startswith('_')]
-    return genericSchema.GenericCreate(**{'values': {key: getattr(result, key) if not isinstance(getattr(result, key), database.Base) else generic_controller.serialize_item(getattr(result, key)) for key in keys}, 'model': model})
+    return conditional.respond(genericSchema.GenericCreate(**{'values': {key: getattr(result, key) if not isinstance(getattr(result, key), database.Base) else generic_controller.serialize_item(getattr(result, key)) for key in keys}, 'model': model}), genericSchema.GenericCreate)
 
 
 @router.put("/generic/{generic_id}",
@@ -57,10 +90,12 @@ async def generic_read(generic_id: int, model: str = "", db: AsyncSession = Depe
 async def generic_update(generic_id: int,
                          model: str,
                          updated_generic: genericSchema.GenericCreate,
-                         db: AsyncSession = Depends(database.get_db)):
+                         db: AsyncSession = Depends(database.get_db),
+                         current_user_id: int = Depends(require_model("update"))):
 
 
     generic_controller = GenericController(model=model)
+    await visibility.ensure_visible(db, generic_controller.model, generic_id, current_user_id)
     db_obj = await generic_controller.get(id=generic_id, db=db)
     result = await generic_controller.update(db_obj=db_obj, obj_in=updated_generic, db=db)
     keys = [key for key in result.__dict__.keys() if not key.startswith('_')]
@@ -68,10 +103,12 @@ async def generic_update(generic_id: int,
 
 
 @router.delete("/generic/{generic_id}", response_model=genericSchema.GenericCreate)
-async def generic_delete(generic_id: int, model: str, db: AsyncSession = Depends(database.get_db)):
+async def generic_delete(generic_id: int, model: str, db: AsyncSession = Depends(database.get_db),
+                         current_user_id: int = Depends(require_model("delete"))):
 
 
     generic_controller = GenericController(model=model)
+    await visibility.ensure_visible(db, generic_controller.model, generic_id, current_user_id)
     result = await generic_controller.delete(id=generic_id, db=db)
     if result is None:
         raise HTTPException(status_code=404, detail="Item not found")
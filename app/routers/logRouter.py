@@ -1,18 +1,39 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.controllers import logController as log_controller
 from app.controllers.tokenController import verify_token
 from app.database import database
+from app.services.permissions import require
+from app.services.query_inspector import query_budget
 from app.schemas import logSchema
+from app.utils.aggregate import total_headers
 
 router = APIRouter(prefix="/crud", dependencies=[Depends(verify_token)], tags=["Log"])
 
-@router.post("/log/", response_model=logSchema.LoggerCreate)
+@router.post("/log/", response_model=logSchema.LoggerCreate, dependencies=[Depends(require("Logger", "create"))])
 async def create_log(log: logSchema.LoggerBase, db: AsyncSession = Depends(database.get_db)):
     return await log_controller.create_log(log=log, db=db)
 
-@router.get("/logs/", response_model=list[logSchema.Logger])
-async def read_logs(filters: str = None, skip: int = 0, limit: int = 10,
+@router.get("/logs/", response_model=list[logSchema.Logger], dependencies=[Depends(require("Logger", "view")), Depends(query_budget(8))])
+async def read_logs(response: Response, filters: str = None, skip: int = 0, limit: int = 10, with_count: bool = False,
+                     order_by: str = Query(None, description="Ex: created_at+desc. Só campos indexados; o id desempata"),
                      db: AsyncSession = Depends(database.get_db),):
-    result = await log_controller.get_logs(skip=skip, limit=limit, db=db, filters=filters, model="Logger")
+    try:
+        result = await log_controller.get_logs(skip=skip, limit=limit, db=db, filters=filters, model="Logger",
+                                               order_by=order_by)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    if with_count:
+        response.headers.update(total_headers(*await log_controller.count_logs(db, filters, "Logger")))
     return result
+
+@router.get("/logs/aggregate", dependencies=[Depends(require("Logger", "view")), Depends(query_budget(4))])
+async def aggregate_logs(filters: str = None,
+                         group_by: str = Query(None, description="Ex: user_id,created_at:day"),
+                         aggregates: str = Query(None, description="Ex: count,max:created_at (padrão: count)"),
+                         db: AsyncSession = Depends(database.get_db)):
+    """Registros de auditoria por grupo, ex: por usuário (group_by=user_id) ou por entidade e dia."""
+    try:
+        return await log_controller.aggregate_logs(db, filters, group_by, aggregates)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
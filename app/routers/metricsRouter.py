@@ -0,0 +1,32 @@
+# app/routers/metricsRouter.py
+
+import hmac
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.services.metrics import registry
+
+
+def verify_metrics_token(request: Request):
+    """
+    O scraper do Prometheus não tem o JWT dos usuários: a rota fica aberta, ou exige
+    METRICS_TOKEN como Bearer quando ele está definido.
+    """
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not settings.METRICS_TOKEN:
+        return
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid metrics token", headers={"WWW-Authenticate": "Bearer"})
+
+
+router = APIRouter(tags=["Metrics"], dependencies=[Depends(verify_metrics_token)])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def read_metrics():
+    """Métricas deste worker no formato texto do Prometheus (0.0.4)."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,43 +1,72 @@
 # app/routers/notificationRouter.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from sqlalchemy import update
-from typing import List
+from typing import List, Optional
 from app.database.database import get_db
-from app.models.notificationLogModel import NotificationLog
-from app.schemas.notificationLogSchema import NotificationLog as NotificationLogSchema
+from app.controllers import notificationController
+from app.schemas.notificationLogSchema import NotificationLog as NotificationLogSchema, UnreadCount
 from app.controllers.tokenController import verify_token
+from app.services.permissions import require
 
 router = APIRouter(prefix="/crud/notifications", tags=["Notifications"])
 
 @router.get("/", response_model=List[NotificationLogSchema])
 async def get_user_notifications(
+    response: Response,
     db: AsyncSession = Depends(get_db),
     current_user: str = Depends(verify_token),
     limit: int = 20,
-    unread_only: bool = False
+    unread_only: bool = False,
+    cursor: Optional[str] = None
 ):
-    """Busca o histórico de notificações para o usuário logado."""
-    query = select(NotificationLog).filter(NotificationLog.user_id == int(current_user))
-    if unread_only:
-        query = query.filter(NotificationLog.is_read == False)
-    
-    query = query.order_by(NotificationLog.created_at.desc()).limit(limit)
-    result = await db.execute(query)
-    return result.scalars().all()
+    """
+    Busca o histórico de notificações para o usuário logado.
+    Para a próxima página, envie o valor do cabeçalho `X-Next-Cursor` em `cursor`.
+    """
+    try:
+        notifications = await notificationController.get_user_notifications(
+            db, user_id=int(current_user), limit=limit, unread_only=unread_only, cursor=cursor
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if notifications and len(notifications) == limit:
+        response.headers["X-Next-Cursor"] = notificationController.encode_cursor(notifications[-1])
+    return notifications
+
+@router.get("/unread-count", response_model=UnreadCount)
+async def get_unread_count(
+    db: AsyncSession = Depends(get_db),
+    current_user: str = Depends(verify_token)
+):
+    """Quantidade de notificações não lidas (mantida em cache e atualizada a cada envio/leitura)."""
+    return {"unread": await notificationController.unread_counter.get(db, int(current_user))}
+
+@router.get("/aggregate")
+async def aggregate_notifications(
+    db: AsyncSession = Depends(get_db),
+    admin_user: int = Depends(require("NotificationLog", "view")),
+    filters: Optional[str] = None,
+    group_by: Optional[str] = Query(None, description="Ex: channel,status ou created_at:day"),
+    aggregates: Optional[str] = Query(None, description="Ex: count,max:created_at (padrão: count)"),
+):
+    """Contagens das notificações de todos os usuários por grupo (painel: enviadas x falhas por canal)."""
+    try:
+        return await notificationController.aggregate_notifications(
+            db, filters=filters, group_by=group_by, aggregates=aggregates
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
 
 @router.post("/read")
 async def mark_notifications_as_read(
     db: AsyncSession = Depends(get_db),
-    current_user: str = Depends(verify_token)
+    current_user: str = Depends(verify_token),
+    up_to_id: Optional[int] = None
 ):
-    """Marca todas as notificações do usuário como lidas."""
-    stmt = update(NotificationLog).where(
-        NotificationLog.user_id == int(current_user),
-        NotificationLog.is_read == False
-    ).values(is_read=True)
-    
-    await db.execute(stmt)
-    await db.commit()
-    return {"message": "Notifications marked as read"}
\ No newline at end of file
+    """
+    Marca as notificações do usuário como lidas.
+    Com `up_to_id`, só as de id menor ou igual (o maior id que o cliente exibiu).
+    """
+    updated = await notificationController.mark_as_read(db, user_id=int(current_user), up_to_id=up_to_id)
+    return {"message": "Notifications marked as read", "updated": updated}
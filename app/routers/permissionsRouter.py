@@ -4,19 +4,20 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.controllers import permissonsController
 from app.database import database
+from app.services.permissions import require
 from app.schemas.permissionsSchema import Permissions, PermissionsBase, PermissionsCreate
 from app.controllers.tokenController import verify_token
 
 router = APIRouter(prefix="/crud", tags=["Permission"], dependencies=[Depends(verify_token)])
 
-@router.post("/permissions/", response_model=Permissions)
+@router.post("/permissions/", response_model=Permissions, dependencies=[Depends(require("Permissions", "create"))])
 async def create_permission(
     permissions: PermissionsBase, 
     db: AsyncSession = Depends(database.get_db), 
 ):
     return await permissonsController.permission_controller.create(db=db, obj_in=permissions)
 
-@router.get("/permissions/", response_model=list[Permissions])
+@router.get("/permissions/", response_model=list[Permissions], dependencies=[Depends(require("Permissions", "view"))])
 async def read_permissions(
     skip: int = 0, 
     limit: int = 10, 
@@ -24,7 +25,7 @@ async def read_permissions(
 ):
     return await permissonsController.permission_controller.get_multi_with_profile(db=db, skip=skip, limit=limit)
 
-@router.get("/permissions/{permission_id}", response_model=Permissions)
+@router.get("/permissions/{permission_id}", response_model=Permissions, dependencies=[Depends(require("Permissions", "view"))])
 async def read_permission(
     permission_id: int, 
     db: AsyncSession = Depends(database.get_db), 
@@ -34,7 +35,7 @@ async def read_permission(
         raise HTTPException(status_code=404, detail="Permission not found")
     return permission
 
-@router.put("/permissions/{permission_id}", response_model=Permissions)
+@router.put("/permissions/{permission_id}", response_model=Permissions, dependencies=[Depends(require("Permissions", "update"))])
 async def update_permission(
     permission_id: int, 
     updated_permissions: PermissionsCreate,
@@ -45,7 +46,7 @@ async def update_permission(
         raise HTTPException(status_code=404, detail="Permission not found")
     return await permissonsController.permission_controller.update(db=db, db_obj=db_permission, obj_in=updated_permissions)
 
-@router.delete("/permissions/{permission_id}", response_model=Permissions)
+@router.delete("/permissions/{permission_id}", response_model=Permissions, dependencies=[Depends(require("Permissions", "delete"))])
 async def delete_permission(
     permission_id: int, 
     db: AsyncSession = Depends(database.get_db), 
@@ -0,0 +1,61 @@
+# app/routers/profilerRouter.py
+
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.controllers.tokenController import verify_token
+from app.core.config import settings
+from app.services.permissions import require
+from app.services.profiler import MODES, Profile, profiler
+
+router = APIRouter(prefix="/crud", tags=["Admin - Profiler"], dependencies=[Depends(verify_token)])
+
+
+def _collapsed_response(profile: Profile) -> PlainTextResponse:
+    stamp = datetime.fromtimestamp(profile.started_at, timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return PlainTextResponse(profile.collapsed(), headers={
+        "Content-Disposition": f'attachment; filename="profile-{profile.mode}-{stamp}-{profile.id}.collapsed"',
+        "X-Profile-Samples": str(profile.samples),
+        "Cache-Control": "no-store",
+    })
+
+
+@router.get("/profiler/profile", dependencies=[Depends(require("Profiler", "update"))])
+async def profile_worker(
+    seconds: float = Query(10, gt=0),
+    mode: str = "wall",
+    interval_ms: float = Query(None, ge=1, le=1000),
+):
+    """
+    Amostra este worker por `seconds` e devolve as pilhas no formato collapsed (flamegraph.pl,
+    speedscope). `wall` inclui o tempo parado de todas as threads; `cpu` só a CPU do event loop.
+    Um perfil por vez em cada worker.
+    """
+    if not settings.PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler disabled")
+    if mode not in MODES:
+        raise HTTPException(status_code=422, detail=f"mode must be one of {', '.join(MODES)}")
+    if seconds > settings.PROFILER_MAX_SECONDS:
+        raise HTTPException(status_code=422, detail=f"seconds must be at most {settings.PROFILER_MAX_SECONDS}")
+    if mode == "cpu" and not profiler.cpu_available():
+        raise HTTPException(status_code=400, detail="CPU mode needs setitimer and the event loop on the main thread")
+    if profiler.busy:
+        raise HTTPException(status_code=409, detail="A profile is already running on this worker")
+    profile = await profiler.run(seconds, mode, interval_ms / 1000 if interval_ms else None)
+    return _collapsed_response(profile)
+
+
+@router.get("/profiler/requests", dependencies=[Depends(require("Profiler", "view"))])
+async def list_request_profiles():
+    """Perfis das últimas requisições enviadas com X-Profile (mais recentes primeiro)."""
+    return [profile.summary() for profile in reversed(profiler.recent)]
+
+
+@router.get("/profiler/requests/{profile_id}", dependencies=[Depends(require("Profiler", "view"))])
+async def read_request_profile(profile_id: int):
+    profile = profiler.get_recent(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return _collapsed_response(profile)
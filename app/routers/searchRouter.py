@@ -0,0 +1,69 @@
+# app/routers/searchRouter.py
+
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.controllers.tokenController import verify_token
+from app.database import database
+from app.models.calendarModel import Calendar as CalendarModel
+from app.models.eventsModel import Events
+from app.schemas.calendarSchema import Calendar
+from app.schemas.eventsSchema import Event
+from app.schemas.userSchema import User
+from app.services import search as search_service, visibility
+from app.services.permissions import require
+from app.services.query_inspector import query_budget
+
+router = APIRouter(prefix="/crud", tags=["Search"], dependencies=[Depends(verify_token)])
+
+# X-Search-Match: "fulltext" ou "fuzzy" (nenhum resultado exato; veio da busca por semelhança)
+SEARCH_QUERY = Query(..., min_length=1, max_length=200, description="Palavras buscadas; cada uma vale como prefixo")
+
+
+@router.get("/search/events", response_model=list[Event], dependencies=[Depends(query_budget(6))])
+async def search_events(
+    response: Response,
+    q: str = SEARCH_QUERY,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(database.get_db),
+    current_user_id: int = Depends(require("Events", "view")),
+):
+    """Eventos visíveis ao usuário por título (peso maior), descrição e local, do mais relevante ao menos."""
+    result = await search_service.search(
+        db, "events", q, skip, limit, visibility=await visibility.predicate(db, Events, current_user_id),
+    )
+    response.headers["X-Search-Match"] = result.match
+    return result.items
+
+
+@router.get("/search/users", response_model=list[User], dependencies=[Depends(query_budget(5))])
+async def search_users(
+    response: Response,
+    q: str = SEARCH_QUERY,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(database.get_db),
+    current_user_id: int = Depends(require("User", "view")),
+):
+    """Usuários por nome e e-mail."""
+    result = await search_service.search(db, "users", q, skip, limit)
+    response.headers["X-Search-Match"] = result.match
+    return result.items
+
+
+@router.get("/search/calendars", response_model=list[Calendar], dependencies=[Depends(query_budget(5))])
+async def search_calendars(
+    response: Response,
+    q: str = SEARCH_QUERY,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(database.get_db),
+    current_user_id: int = Depends(require("Calendar", "view")),
+):
+    """Calendários visíveis ao usuário por nome e descrição (sem os eventos de cada um)."""
+    result = await search_service.search(
+        db, "calendars", q, skip, limit, visibility=await visibility.predicate(db, CalendarModel, current_user_id),
+    )
+    response.headers["X-Search-Match"] = result.match
+    return result.items
@@ -0,0 +1,90 @@
+# app/routers/streamRouter.py
+
+import asyncio
+import json
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordBearer
+
+from app.controllers.tokenController import verify_token
+from app.core.config import settings
+from app.services.event_bus import event_bus, Message
+from app.services.permissions import require
+
+router = APIRouter(prefix="/crud", tags=["Stream"])
+
+# O EventSource do navegador não envia cabeçalhos, então o token também é aceito via ?token=
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/crud/token", auto_error=False)
+
+
+def get_stream_user(
+    header_token: Optional[str] = Depends(optional_oauth2_scheme),
+    token: Optional[str] = None,
+) -> int:
+    if not (header_token or token):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return int(verify_token(header_token or token))
+
+
+def _format(message: Message) -> str:
+    return f"id: {message.id}\nevent: {message.kind}\ndata: {json.dumps(message.data, default=str)}\n\n"
+
+
+RESYNC = "event: resync\ndata: {}\n\n"
+
+
+@router.get("/stream")
+async def stream(
+    request: Request,
+    last_event_id: Optional[str] = None,
+    user_id: int = Depends(require("Events", "view", get_stream_user)),
+):
+    """
+    Canal SSE com as notificações do usuário e as mudanças de eventos/calendários.
+
+    Eventos: `notification`, `event`, `calendar`, e `resync` quando o servidor não consegue
+    garantir a entrega (reconexão fora do buffer ou cliente lento demais) — nesse caso o
+    cliente deve recarregar pelo /crud/sync e /crud/notifications.
+    Comentários `: ping` são enviados a cada STREAM_HEARTBEAT_SECONDS.
+    """
+    # O EventSource manda Last-Event-ID sozinho ao reconectar; ?last_event_id= serve para o primeiro acesso
+    resume_from = request.headers.get("Last-Event-ID") or last_event_id
+    subscription, replay, needs_resync = event_bus.subscribe(user_id, resume_from)
+
+    async def events():
+        try:
+            yield f"retry: {settings.STREAM_HEARTBEAT_SECONDS * 1000}\n\n"
+            if needs_resync:
+                yield RESYNC
+            for message in replay:
+                yield _format(message)
+
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=settings.STREAM_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": ping\n\n"
+                    continue
+                if message is None:
+                    # Fila estourou: volta a aceitar mensagens e pede recarga ao cliente
+                    subscription.overflowed = False
+                    yield RESYNC
+                    continue
+                yield _format(message)
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
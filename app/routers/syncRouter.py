@@ -0,0 +1,58 @@
+# app/routers/syncRouter.py
+
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.controllers import syncController
+from app.controllers.tokenController import verify_token
+from app.database import database
+from app.models.tombstoneModel import Tombstone
+from app.schemas.syncSchema import SyncResponse
+from app.services import visibility
+from app.services.permissions import permission_engine
+
+router = APIRouter(prefix="/crud", tags=["Sync"], dependencies=[Depends(verify_token)])
+
+
+@router.get("/sync", response_model=SyncResponse)
+async def sync_changes(
+    since: int = 0,
+    limit: int = 500,
+    entities: Optional[List[str]] = Query(None),
+    db: AsyncSession = Depends(database.get_db),
+    current_user_id: int = Depends(verify_token),
+):
+    """
+    Sincronização incremental: retorna apenas o que mudou (e o que foi removido)
+    desde a revisão `since`. Comece com `since=0` e guarde o `revision` retornado.
+    Enquanto `has_more` for verdadeiro, chame de novo com o novo `revision`.
+    """
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be greater than zero")
+    invalid = [name for name in entities or [] if name not in syncController.SYNC_ENTITIES]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Unknown entities: {', '.join(invalid)}")
+
+    # Pedidas explicitamente exigem permissão de leitura; sem `entities`, só as que o usuário pode ver
+    if entities:
+        for name in entities:
+            await permission_engine.check(db, int(current_user_id), name, "view")
+    else:
+        entities = [
+            name for name in syncController.SYNC_ENTITIES
+            if await permission_engine.allowed(db, int(current_user_id), name, "view")
+        ]
+        if not entities:
+            return {"revision": since, "has_more": False, "changes": {}, "deleted": {}}
+
+    # Linhas de calendários privados (e os tombstones delas) só para quem as enxerga
+    predicates = {
+        name: await visibility.predicate(db, syncController.SYNC_ENTITIES[name][0], int(current_user_id))
+        for name in entities
+    }
+    return await syncController.get_changes_since(
+        db, since=since, limit=limit, entities=entities,
+        visibility=predicates,
+        deleted_visibility=await visibility.predicate(db, Tombstone, int(current_user_id)),
+    )
@@ -8,11 +8,14 @@ from starlette import status
 from app.controllers import userProfileController
 from app.controllers.tokenController import verify_token
 from app.database import database
+from app.services.permissions import require
 from app.schemas.userProfileSchema import UserProfile, UserProfileBase, UserProfileCreate
+from app.services.cache import cache
+from app.utils.conditional import Conditional, cache_entry
 
 router = APIRouter(prefix="/crud", dependencies=[Depends(verify_token)], tags=["Profile"])
 
-@router.post("/user_profile/", response_model=UserProfile)
+@router.post("/user_profile/", response_model=UserProfile, dependencies=[Depends(require("UserProfile", "create"))])
 async def create_user_profile(
     user_profile: UserProfileBase, 
     db: AsyncSession = Depends(database.get_db),
@@ -20,19 +23,27 @@ async def create_user_profile(
 ):
     return await userProfileController.user_profile_controller.create(db=db, obj_in=user_profile)
 
-@router.get("/user_profile/", response_model=list[UserProfile])
+@router.get("/user_profile/", response_model=list[UserProfile], dependencies=[Depends(require("UserProfile", "view"))])
 async def read_user_profiles(
     filters: str = None, 
     skip: int = 0, 
     limit: int = 10, 
     db: AsyncSession = Depends(database.get_db),
-    current_user_id: int = Depends(verify_token)
+    current_user_id: int = Depends(verify_token),
+    conditional: Conditional = Depends(),
 ):
-    return await userProfileController.user_profile_controller.get_multi_with_permissions(
-        db=db, skip=skip, limit=limit, filters=filters, model="UserProfile"
-    )
+    async def load():
+        profiles = await userProfileController.user_profile_controller.get_multi_with_permissions(
+            db=db, skip=skip, limit=limit, filters=filters, model="UserProfile"
+        )
+        return cache_entry([UserProfile.model_validate(profile).model_dump(mode="json") for profile in profiles])
+
+    # Uma entrada por combinação de filtros/página; qualquer escrita em perfis ou permissões invalida todas
+    return conditional.cached(await cache.get_or_load(
+        f"UserProfile:list:{filters}:{skip}:{limit}", load, tags=["UserProfile:*", "Permissions:*"]
+    ))
 
-@router.get("/user_profile/{user_profile_id}", response_model=UserProfile)
+@router.get("/user_profile/{user_profile_id}", response_model=UserProfile, dependencies=[Depends(require("UserProfile", "view"))])
 async def read_user_profile(
     user_profile_id: int, 
     db: AsyncSession = Depends(database.get_db),
@@ -43,7 +54,7 @@ async def read_user_profile(
         raise HTTPException(status_code=404, detail="User profile not found")
     return user_profile
 
-@router.put("/user_profile/{user_profile_id}", response_model=UserProfile)
+@router.put("/user_profile/{user_profile_id}", response_model=UserProfile, dependencies=[Depends(require("UserProfile", "update"))])
 async def update_user_profile(
     user_profile_id: int, 
     updated_user_profile: UserProfileCreate,
@@ -55,7 +66,7 @@ async def update_user_profile(
         raise HTTPException(status_code=404, detail="User profile not found")
     return await userProfileController.user_profile_controller.update(db=db, db_obj=db_user_profile, obj_in=updated_user_profile)
 
-@router.delete("/user_profile/{user_profile_id}", response_model=UserProfile)
+@router.delete("/user_profile/{user_profile_id}", response_model=UserProfile, dependencies=[Depends(require("UserProfile", "delete"))])
 async def delete_user_profile(
     user_profile_id: int, 
     db: AsyncSession = Depends(database.get_db),
@@ -1,55 +1,90 @@
 # agenda-risetec-backend/app/routers/userRouter.py
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.controllers import userController
 from app.database import database
+from app.services.permissions import require
+from app.services.query_inspector import query_budget
 from app.schemas.userSchema import User, UserCreate, UserUpdate
 from app.controllers.tokenController import verify_token
+from app.models.eventsModel import Events
 from app.models.userProfileModel import UserProfile # Importar para selectinload
+from app.services import visibility
+from app.services.cache import cache
+from app.utils.aggregate import total_headers
+from app.utils.conditional import Conditional, cache_entry
 
 router = APIRouter(prefix="/crud", tags=["User"], dependencies=[Depends(verify_token)])
 
 
-@router.post("/user/", response_model=User)
+@router.post("/user/", response_model=User, dependencies=[Depends(require("User", "create"))])
 async def create_user(user: UserCreate, db: AsyncSession = Depends(database.get_db)):
     return await userController.user_controller.create(db=db, obj_in=user)
 
 
-@router.get("/user/", response_model=list[User])
+@router.get("/user/", response_model=list[User], dependencies=[Depends(require("User", "view")), Depends(query_budget(8))])
 async def read_users(
+    response: Response,
     filters: str = None, 
     skip: int = 0, 
     limit: int = 100, # Aumentei o limite padrão
+    with_count: bool = False,
+    order_by: str = Query(None, description="Ex: name,profile.name. Só campos indexados; o id desempata"),
     db: AsyncSession = Depends(database.get_db),
-    current_user_id: int = Depends(verify_token)
+    current_user_id: int = Depends(verify_token),
+    conditional: Conditional = Depends(),
 ):
     # ATUALIZADO: Chama o método genérico e passa as opções de carregar perfil e permissões.
-    return await userController.user_controller.get_multi_filtered(
-        db=db, 
-        skip=skip, 
-        limit=limit, 
-        filters=filters,
-        load_options=[
-            selectinload(userController.user_controller.model.profile)
-            .selectinload(UserProfile.permissions)
-        ]
-    )
-
-
-@router.get("/user/{user_id}", response_model=User)
+    try:
+        users = await userController.user_controller.get_multi_filtered(
+            db=db, 
+            skip=skip, 
+            limit=limit, 
+            filters=filters,
+            load_options=[
+                selectinload(userController.user_controller.model.profile)
+                .selectinload(UserProfile.permissions)
+            ],
+            order_by=order_by,
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    if with_count:
+        response.headers.update(total_headers(*await userController.user_controller.count_filtered(db=db, filters=filters)))
+    return conditional.respond(users, list[User])
+
+
+@router.get("/user/{user_id}", response_model=User, dependencies=[Depends(require("User", "view")), Depends(query_budget(8))])
 async def read_user(
     user_id: int, 
     db: AsyncSession = Depends(database.get_db), 
-    current_user_id: int = Depends(verify_token)
+    current_user_id: int = Depends(verify_token),
+    conditional: Conditional = Depends(),
 ):
-    # ALTERAÇÃO: usa o método customizado do controller para carregar detalhes
-    return await userController.user_controller.get_user_with_details(db=db, user_id=user_id)
+    # ALTERAÇÃO: usa o método customizado do controller para carregar detalhes, com cache
+    # (invalidado por escritas no usuário, no perfil/permissões dele e nos eventos dele)
+    # Só os eventos que quem consulta pode ver: fora os administradores, a entrada é por
+    # usuário e cai também quando um calendário muda (pode ter virado privado)
+    predicate = await visibility.predicate(db, Events, current_user_id)
+
+    async def load():
+        user = await userController.user_controller.get_user_with_details(db=db, user_id=user_id, visibility=predicate)
+        return cache_entry(User.model_validate(user).model_dump(mode="json"))
+
+    def tags(entry):
+        tags = [f"User:{user_id}", f"UserProfile:{entry['content']['profile_id']}"]
+        if predicate is not None:
+            tags += [f"User:{current_user_id}", "Calendar:*"]
+        return tags
+
+    key = f"User:{user_id}:details" if predicate is None else f"User:{user_id}:details:{current_user_id}"
+    return conditional.cached(await cache.get_or_load(key, load, tags=tags))
 
 
-@router.put("/user/{user_id}", response_model=User)
+@router.put("/user/{user_id}", response_model=User, dependencies=[Depends(require("User", "update"))])
 async def update_user(
     user_id: int, 
     updated_user: UserUpdate,
@@ -62,7 +97,7 @@ async def update_user(
     return await userController.user_controller.update(db=db, db_obj=db_user, obj_in=updated_user)
 
 
-@router.delete("/user/{user_id}", response_model=User)
+@router.delete("/user/{user_id}", response_model=User, dependencies=[Depends(require("User", "delete"))])
 async def delete_user(
     user_id: int, 
     db: AsyncSession = Depends(database.get_db),
@@ -3,33 +3,19 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..database import database
 from ..controllers.tokenController import verify_token
-from ..controllers import userController
+from ..controllers import userController, outboxController
+from ..schemas.notificationLogSchema import OutboxMessage
+from typing import List, Optional
 from ..services.whatsapp_client_service import whatsapp_client_service
+from ..services.permissions import require
 
 router = APIRouter(
     prefix="/crud/whatsapp",
     tags=["Admin - WhatsApp"]
 )
 
-async def get_admin_user(
-    current_user_id: int = Depends(verify_token),
-    db: AsyncSession = Depends(database.get_db)
-):
-    """
-    Dependência de segurança que verifica se o usuário logado é um admin.
-    Adapte o `profile.name` para o nome do perfil de admin no seu sistema.
-    """
-    user = await userController.user_controller.get_user_with_details(db, user_id=current_user_id)
-    # IMPORTANTE: Altere "Admin" para o nome exato do seu perfil de administrador
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Acesso negado. Recurso disponível apenas para administradores."
-        )
-    return user
-
 @router.get("/status")
-async def get_whatsapp_status(admin_user: dict = Depends(get_admin_user)):
+async def get_whatsapp_status(admin_user: int = Depends(require("WhatsApp", "view"))):
     """
     Obtém o status atual do serviço de WhatsApp.
     Se o status for 'SCAN_QR', o campo 'qrCode' conterá os dados para gerar a imagem.
@@ -37,7 +23,7 @@ async def get_whatsapp_status(admin_user: dict = Depends(get_admin_user)):
     return await whatsapp_client_service.get_status()
 
 @router.post("/reconnect")
-async def reconnect_whatsapp_service(admin_user: dict = Depends(get_admin_user)):
+async def reconnect_whatsapp_service(admin_user: int = Depends(require("WhatsApp", "update"))):
     """
     Envia um comando para o serviço de WhatsApp tentar se reconectar.
     Útil se o serviço estiver no estado 'DISCONNECTED'.
@@ -45,9 +31,25 @@ async def reconnect_whatsapp_service(admin_user: dict = Depends(get_admin_user))
     return await whatsapp_client_service.reconnect()
 
 @router.post("/logout")
-async def logout_whatsapp_service(admin_user: dict = Depends(get_admin_user)):
+async def logout_whatsapp_service(admin_user: int = Depends(require("WhatsApp", "update"))):
     """
     Desconecta a sessão atual do WhatsApp.
     O serviço entrará no estado 'DISCONNECTED' e será necessário reconectar e escanear um novo QR Code.
     """
-    return await whatsapp_client_service.logout()
\ No newline at end of file
+    return await whatsapp_client_service.logout()
+
+@router.get("/outbox")
+async def get_outbox_stats(admin_user: int = Depends(require("WhatsApp", "view")), db: AsyncSession = Depends(database.get_db)):
+    """Quantidade de mensagens na fila de envio por canal e status (pending, sending, sent, dead)."""
+    return await outboxController.get_stats(db)
+
+@router.get("/outbox/dead", response_model=List[OutboxMessage])
+async def get_dead_letters(limit: int = 50, admin_user: int = Depends(require("WhatsApp", "view")), db: AsyncSession = Depends(database.get_db)):
+    """Mensagens que esgotaram as tentativas, com o último erro."""
+    return await outboxController.get_dead(db, limit=limit)
+
+@router.post("/outbox/retry")
+async def retry_dead_letters(ids: Optional[List[int]] = None, admin_user: int = Depends(require("WhatsApp", "update")), db: AsyncSession = Depends(database.get_db)):
+    """Devolve para a fila as mensagens 'dead' informadas (ou todas, sem `ids`)."""
+    requeued = await outboxController.requeue_dead(db, ids)
+    return {"requeued": requeued}
@@ -2,6 +2,7 @@
 
 from pydantic import BaseModel
 from typing import Optional, List
+from datetime import datetime
 from .eventsSchema import Event
 
 class CalendarBase(BaseModel):
@@ -25,6 +26,9 @@ class CalendarCreate(CalendarBase):
 class Calendar(CalendarBase):
     id: int
     events: List[Optional[Event]] = []
+    # Controle de versão mantido pelo servidor
+    revision: Optional[int] = None
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -74,6 +74,9 @@ class EventUpdate(BaseModel):
 class Event(EventBase):
     id: int
     users: List[Optional["UserInEvent"]] = []
+    # Controle de versão mantido pelo servidor
+    revision: Optional[int] = None
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -1,18 +1,29 @@
 from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
 
 class FileBase(BaseModel):
     filename: str
     originalname: str
     content_type: str
     file_path: str
+    size: Optional[int] = None
+    sha256: Optional[str] = None
 
 class FileCreate(FileBase):
     id: int
 
 class FileResponse(FileBase):
     id: int
+    owner_id: Optional[int] = None
+    event_id: Optional[int] = None
+    created_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
         arbitrary_types_allowed = True
-    
\ No newline at end of file
+
+class FileUsage(BaseModel):
+    owner_id: Optional[int] = None
+    files: int
+    total_size: int
@@ -0,0 +1,43 @@
+# app/schemas/freebusySchema.py
+from pydantic import BaseModel, Field, model_validator
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+class FreeBusyRequest(BaseModel):
+    user_ids: List[int] = Field(min_length=1)
+    start: datetime
+    end: datetime
+
+    @model_validator(mode="after")
+    def check_window(self):
+        if self.end <= self.start:
+            raise ValueError("end must be after start")
+        return self
+
+
+class BusyInterval(BaseModel):
+    start: datetime
+    end: datetime
+
+
+class FreeBusyResponse(BaseModel):
+    start: datetime
+    end: datetime
+    # Intervalos ocupados já mesclados, por usuário (chave = id do usuário)
+    busy: Dict[int, List[BusyInterval]]
+
+
+class FreeSlotRequest(FreeBusyRequest):
+    duration_minutes: int = Field(gt=0)
+
+
+class FreeSlotResponse(BaseModel):
+    slot: Optional[BusyInterval] = None
+
+
+class EventConflict(BaseModel):
+    user_id: int
+    event_id: int
+    start: datetime
+    end: datetime
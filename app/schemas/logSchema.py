@@ -1,20 +1,23 @@
 from pydantic import BaseModel
 import datetime
-from typing import Optional
+from typing import Any, Dict, Optional, Union
 from app.schemas.userSchema import User
 
 class LoggerBase(BaseModel):
     user_id: int
     entity: str
-    data: str = datetime.datetime.now()
+    # Objeto estruturado (armazenado como JSONB); strings continuam aceitas
+    data: Union[Dict[str, Any], str]
     action: str
 
 class LoggerCreate(LoggerBase):
     id: int
+    created_at: Optional[datetime.datetime] = None
 
 
 class Logger(LoggerBase):
     id: int
+    created_at: Optional[datetime.datetime] = None
     user: Optional[User]
         
     class Config:
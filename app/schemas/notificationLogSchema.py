@@ -17,4 +17,22 @@ class NotificationLogBase(BaseModel):
         from_attributes = True
 
 class NotificationLog(NotificationLogBase):
-    pass
\ No newline at end of file
+    pass
+
+class UnreadCount(BaseModel):
+    unread: int
+
+class OutboxMessage(BaseModel):
+    id: int
+    channel: str
+    recipient: str
+    user_id: int
+    event_id: Optional[int] = None
+    content: str
+    status: str
+    attempts: int
+    last_error: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
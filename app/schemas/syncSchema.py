@@ -0,0 +1,48 @@
+# app/schemas/syncSchema.py
+
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional, List, Dict
+from .eventsSchema import Event
+from .calendarSchema import CalendarBase
+from .userSchema import UserBase
+
+
+class EventSync(Event):
+    uid: str
+
+
+class CalendarSync(CalendarBase):
+    # Sem a lista de eventos: eles chegam pela própria entrada "Events"
+    id: int
+    revision: int
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class UserSync(UserBase):
+    id: int
+    last_login: Optional[datetime] = None
+    revision: int
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class SyncChanges(BaseModel):
+    Events: List[EventSync] = []
+    Calendar: List[CalendarSync] = []
+    User: List[UserSync] = []
+
+
+class SyncResponse(BaseModel):
+    # Valor a ser enviado como `since` na próxima chamada
+    revision: int
+    # Verdadeiro quando algum limite foi atingido: chamar de novo com o novo `revision`
+    has_more: bool
+    changes: SyncChanges
+    # IDs removidos por entidade desde `since`
+    deleted: Dict[str, List[int]] = {}
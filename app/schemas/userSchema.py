@@ -33,6 +33,9 @@ class User(UserBase):
     events: List[Optional["EventInUser"]]
     # NOVO CAMPO
     last_login: Optional[datetime] = None
+    # Controle de versão mantido pelo servidor
+    revision: Optional[int] = None
+    updated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
@@ -0,0 +1,166 @@
+# app/services/audit_log_service.py
+#
+# Retenção da tabela de auditoria (logger).
+#
+# No Postgres com a tabela particionada (migrations/004_logger_partitioning.sql) a rotina
+# cria as partições dos próximos meses e, para cada mês já fora de LOG_RETENTION_DAYS,
+# exporta a partição para um .jsonl.gz em LOG_ARCHIVE_DIR e faz DETACH + DROP: remover
+# um mês inteiro custa o mesmo que remover uma tabela, sem DELETE linha a linha nem VACUUM.
+# Sem particionamento (SQLite, ou antes da migração) cai num DELETE em lotes.
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Tuple
+
+from sqlalchemy import delete, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.database.database import SessionLocal
+from app.models.logModel import Logger
+
+logger = logging.getLogger(__name__)
+
+LOG_COLUMNS = ["id", "action", "user_id", "entity", "data", "created_at"]
+
+
+def _add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def _write_archive(path: str, rows: List[dict], append: bool):
+    # gzip aceita append: cada lote vira um membro novo e o arquivo continua legível com zcat
+    with gzip.open(path, "at" if append else "wt", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, default=str) + "\n")
+
+
+class AuditLogService:
+
+    async def run_maintenance(self):
+        """Rotina agendada: mantém as partições e aplica a retenção."""
+        async with SessionLocal() as db:
+            try:
+                cutoff = datetime.now(timezone.utc) - timedelta(days=settings.LOG_RETENTION_DAYS)
+                if await self._is_partitioned(db):
+                    await self.ensure_partitions(db)
+                    archived = await self.archive_partitions(db, cutoff)
+                else:
+                    archived = await self.archive_rows(db, cutoff)
+                logger.info("%d registros de auditoria arquivados", archived, extra={"archived": archived})
+            except Exception:
+                logger.exception("Erro na manutenção da auditoria")
+
+    async def _is_partitioned(self, db: AsyncSession) -> bool:
+        if db.bind.dialect.name != "postgresql":
+            return False
+        result = await db.execute(text(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('logger')"
+        ))
+        return result.scalar() is not None
+
+    async def ensure_partitions(self, db: AsyncSession):
+        """Cria (se faltarem) as partições do mês atual e dos LOG_PARTITIONS_AHEAD seguintes."""
+        month = date.today().replace(day=1)
+        for offset in range(settings.LOG_PARTITIONS_AHEAD + 1):
+            start = _add_months(month, offset)
+            end = _add_months(start, 1)
+            await db.execute(text(
+                f"CREATE TABLE IF NOT EXISTS logger_p{start:%Y%m} PARTITION OF logger "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            ))
+        await db.commit()
+
+    async def _monthly_partitions(self, db: AsyncSession) -> List[Tuple[str, date]]:
+        result = await db.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'logger'::regclass ORDER BY c.relname"
+        ))
+        partitions = []
+        for name in result.scalars().all():
+            # Só as mensais (logger_pYYYYMM); a DEFAULT fica de fora
+            suffix = name.removeprefix("logger_p")
+            if len(suffix) == 6 and suffix.isdigit():
+                partitions.append((name, date(int(suffix[:4]), int(suffix[4:]), 1)))
+        return partitions
+
+    async def archive_partitions(self, db: AsyncSession, cutoff: datetime) -> int:
+        """Exporta e descarta as partições cujo mês inteiro é anterior a `cutoff`."""
+        total = 0
+        for name, start in await self._monthly_partitions(db):
+            if _add_months(start, 1) > cutoff.date():
+                continue
+
+            path = self._archive_path(f"{start:%Y-%m}")
+            total += await self._export(db, path, text(f"SELECT {', '.join(LOG_COLUMNS)} FROM {name} ORDER BY id"))
+
+            await db.execute(text(f"ALTER TABLE logger DETACH PARTITION {name}"))
+            await db.execute(text(f"DROP TABLE {name}"))
+            await db.commit()
+        return total
+
+    async def archive_rows(self, db: AsyncSession, cutoff: datetime) -> int:
+        """Sem particionamento: exporta e apaga em lotes de LOG_ARCHIVE_BATCH, um commit por lote."""
+        path = self._archive_path(f"{cutoff:%Y-%m-%d}")
+        columns = [getattr(Logger, column) for column in LOG_COLUMNS]
+        total = 0
+
+        while True:
+            result = await db.execute(
+                select(*columns)
+                .where(Logger.created_at < cutoff)
+                .order_by(Logger.id)
+                .limit(settings.LOG_ARCHIVE_BATCH)
+            )
+            rows = [dict(row) for row in result.mappings().all()]
+            if not rows:
+                break
+
+            # Grava antes de apagar: se a escrita falhar, nada sai do banco
+            await asyncio.to_thread(_write_archive, path, rows, total > 0)
+            await db.execute(
+                delete(Logger)
+                .where(Logger.id.in_([row["id"] for row in rows]))
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            total += len(rows)
+
+            if len(rows) < settings.LOG_ARCHIVE_BATCH:
+                break
+        return total
+
+    async def _export(self, db: AsyncSession, path: str, query) -> int:
+        """Exporta `query` em streaming para `path` (via arquivo temporário, renomeado no fim)."""
+        tmp_path = path + ".tmp"
+        total = 0
+        result = await db.stream(query.execution_options(yield_per=settings.LOG_ARCHIVE_BATCH))
+        async for partition in result.mappings().partitions():
+            rows = [dict(row) for row in partition]
+            await asyncio.to_thread(_write_archive, tmp_path, rows, total > 0)
+            total += len(rows)
+
+        if total:
+            await asyncio.to_thread(os.replace, tmp_path, path)
+        return total
+
+    def _archive_path(self, label: str) -> str:
+        os.makedirs(settings.LOG_ARCHIVE_DIR, exist_ok=True)
+        path = os.path.join(settings.LOG_ARCHIVE_DIR, f"logger_{label}.jsonl.gz")
+        # Nunca sobrescreve um arquivo já exportado
+        suffix = 1
+        candidate = path
+        while os.path.exists(candidate):
+            candidate = path.replace(".jsonl.gz", f".{suffix}.jsonl.gz")
+            suffix += 1
+        return candidate
+
+
+audit_log_service = AuditLogService()
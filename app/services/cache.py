@@ -0,0 +1,293 @@
+# app/services/cache.py
+#
+# Cache das leituras quentes (detalhe de calendário, detalhe de usuário, perfis).
+#
+# Os valores guardados são o JSON já serializado pelo schema da resposta, nunca objetos
+# da ORM; as rotas devolvem esse JSON direto (JSONResponse), sem validar de novo.
+# Cada entrada tem tags ("User:5", "UserProfile:2", "UserProfile:*"...) e
+# qualquer commit que toque essas entidades invalida as entradas correspondentes —
+# seja pelo CRUDBase, pelos controllers de eventos/usuários/calendários, pelo genérico
+# ou pelo CalDAV, porque a coleta é feita nos hooks da sessão e não em cada controller.
+#
+# Camadas: um LRU/TTL em memória (sempre) e, opcionalmente, um backend compartilhado
+# (CACHE_SHARED_BACKEND, ver SharedCacheBackend). Com EVENT_BUS_BACKEND='postgres' as
+# invalidações também chegam aos outros workers pelo event_bus.
+
+import asyncio
+import importlib
+import time
+from collections import OrderedDict
+from itertools import chain
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.calendarModel import Calendar
+from app.models.eventsModel import Events, deleted_participants, user_events_association
+from app.models.permissionsModel import Permissions
+from app.models.userModel import User
+from app.models.userProfileModel import UserProfile
+from app.services.event_bus import event_bus, Message
+
+Tags = Union[Iterable[str], Callable[[Any], Iterable[str]]]
+
+
+class MemoryCacheBackend:
+    """LRU com TTL por entrada e índice de tags para invalidação."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any, Set[str]]]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self.evictions = 0
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        if entry[0] < time.monotonic():
+            self._remove(key)
+            return False, None
+        self._entries.move_to_end(key)
+        return True, entry[1]
+
+    def set(self, key: str, value: Any, ttl: float, tags: Set[str]):
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, value, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        keys = set(chain.from_iterable(self._tags.get(tag, ()) for tag in tags))
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def clear(self):
+        self._entries.clear()
+        self._tags.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key: str):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class SharedCacheBackend:
+    """
+    Interface de um cache compartilhado entre workers (ex: Redis). Implemente os métodos
+    e aponte CACHE_SHARED_BACKEND para a instância ("modulo:atributo"). Os valores são
+    JSON; `get` retorna None quando a chave não existe.
+    """
+
+    async def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Any, ttl: float, tags: Set[str]):
+        raise NotImplementedError
+
+    async def invalidate(self, tags: Iterable[str]):
+        raise NotImplementedError
+
+    async def clear(self):
+        raise NotImplementedError
+
+
+def _load_shared_backend(path: str) -> Optional[SharedCacheBackend]:
+    if not path:
+        return None
+    module, _, attribute = path.partition(":")
+    return getattr(importlib.import_module(module), attribute)
+
+
+class Cache:
+    def __init__(self):
+        self.local = MemoryCacheBackend(settings.CACHE_MAX_ENTRIES)
+        self.shared = _load_shared_backend(settings.CACHE_SHARED_BACKEND)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Incrementado a cada invalidação: um valor carregado enquanto houve invalidação
+        # pode já estar velho, então não é guardado
+        self._generation = 0
+        self._metrics: Dict[str, Dict[str, int]] = {}
+        # Outros caches em memória que dependem das mesmas tags (ex: permissões)
+        self._listeners: List[Callable[[Optional[List[str]]], None]] = []
+
+    def add_invalidation_listener(self, listener: Callable[[Optional[List[str]]], None]):
+        """`listener` recebe as tags de cada invalidação (local ou de outro worker), ou None no clear."""
+        self._listeners.append(listener)
+
+    def _count(self, key: str, metric: str):
+        namespace = key.split(":", 1)[0]
+        metrics = self._metrics.setdefault(namespace, {"hits": 0, "misses": 0, "coalesced": 0})
+        metrics[metric] += 1
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        *,
+        tags: Tags,
+        ttl: Optional[float] = None,
+    ) -> Any:
+        """
+        Retorna o valor de `key` ou executa `loader` (uma única vez, mesmo com várias
+        requisições simultâneas pela mesma chave) e guarda o resultado com `tags`.
+        `tags` pode ser uma função do valor carregado. Exceções do loader (ex: 404)
+        são repassadas a todos que esperavam e nada é guardado.
+        """
+        if not settings.CACHE_ENABLED:
+            return await loader()
+
+        found, value = self.local.get(key)
+        if found:
+            self._count(key, "hits")
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self._count(key, "coalesced")
+            return await asyncio.shield(inflight)
+
+        self._count(key, "misses")
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generation = self._generation
+        ttl = ttl or settings.CACHE_DEFAULT_TTL
+        try:
+            value = await self.shared.get(key) if self.shared else None
+            from_shared = value is not None
+            if not from_shared:
+                value = await loader()
+
+            if generation == self._generation:
+                entry_tags = set(tags(value) if callable(tags) else tags)
+                self.local.set(key, value, ttl, entry_tags)
+                if self.shared and not from_shared:
+                    await self.shared.set(key, value, ttl, entry_tags)
+        except BaseException as e:
+            future.set_exception(e)
+            # Evita o aviso de exceção não lida quando ninguém estava esperando
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+        finally:
+            self._inflight.pop(key, None)
+        return value
+
+    def invalidate(self, tags: Iterable[str], broadcast: bool = True) -> int:
+        tags = list(tags)
+        if not tags:
+            return 0
+        self._generation += 1
+        removed = self.local.invalidate(tags)
+        for listener in self._listeners:
+            listener(tags)
+        if self.shared:
+            asyncio.get_running_loop().create_task(self.shared.invalidate(tags))
+        if broadcast and settings.EVENT_BUS_BACKEND == "postgres":
+            event_bus.publish("cache_invalidate", {"tags": tags, "origin": event_bus.epoch}, user_ids=[])
+        return removed
+
+    def _on_remote_invalidate(self, message: Message):
+        if message.data.get("origin") != event_bus.epoch:
+            self.invalidate(message.data["tags"], broadcast=False)
+
+    async def clear(self):
+        self._generation += 1
+        self.local.clear()
+        for listener in self._listeners:
+            listener(None)
+        if self.shared:
+            await self.shared.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.local),
+            "evictions": self.local.evictions,
+            "inflight": len(self._inflight),
+            "namespaces": self._metrics,
+        }
+
+
+cache = Cache()
+event_bus.add_listener("cache_invalidate", cache._on_remote_invalidate)
+
+
+# --- Invalidação a partir dos commits ---
+
+def _ids(state, attribute: str) -> Set[int]:
+    """Valores atuais e anteriores (alterados nesta transação) de um atributo."""
+    history = state.attrs[attribute].history
+    return {value for value in chain(history.added or (), history.unchanged or (), history.deleted or ()) if value is not None}
+
+
+def _related_ids(state, relationship: str) -> Set[int]:
+    history = state.attrs[relationship].history
+    return {
+        inspect(obj).dict.get("id")
+        for obj in chain(history.added or (), history.unchanged or (), history.deleted or ())
+    } - {None}
+
+
+def _tags_for(session: Session, instance, deleted: bool) -> Set[str]:
+    name = type(instance).__name__
+    state = inspect(instance)
+    instance_id = state.dict.get("id")
+    tags = {f"{name}:{instance_id}", f"{name}:*"}
+
+    if isinstance(instance, Events):
+        tags |= {f"Calendar:{calendar_id}" for calendar_id in _ids(state, "calendar_id")}
+        # O detalhe do usuário lista os eventos dele
+        user_ids = _related_ids(state, "users")
+        if deleted:
+            # As associações já foram removidas: os participantes foram lidos antes do flush
+            user_ids |= deleted_participants(session, instance_id)
+        else:
+            result = session.execute(
+                select(user_events_association.c.user_id).where(user_events_association.c.event_id == instance_id)
+            )
+            user_ids |= set(result.scalars().all())
+        tags |= {f"User:{user_id}" for user_id in user_ids}
+    elif isinstance(instance, User):
+        tags |= {f"UserProfile:{profile_id}" for profile_id in _ids(state, "profile_id")}
+    elif isinstance(instance, Permissions):
+        tags |= {f"UserProfile:{profile_id}" for profile_id in _ids(state, "profile_id")}
+    return tags
+
+
+CACHED_MODELS = (Calendar, Events, Permissions, User, UserProfile)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_cache_tags(session, flush_context):
+    tags = session.info.setdefault("cache:tags", set())
+    for deleted, instances in ((False, session.new), (False, session.dirty), (True, session.deleted)):
+        for instance in instances:
+            if isinstance(instance, CACHED_MODELS):
+                tags |= _tags_for(session, instance, deleted)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_cache(session):
+    tags = session.info.pop("cache:tags", None)
+    if tags:
+        cache.invalidate(tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_cache_tags(session):
+    session.info.pop("cache:tags", None)
@@ -2,6 +2,7 @@ from fastapi_mail import ConnectionConfig, FastMail, MessageSchema
 from pydantic import EmailStr
 from typing import List
 from app.core.config import settings
+from app.services import tracing
 from pathlib import Path
 
 class EmailService:
@@ -18,6 +19,7 @@ class EmailService:
             TEMPLATE_FOLDER=Path(__file__).parent.parent / 'templates'
         )
 
+    @tracing.traced("smtp send", kind="client", attributes={"server.address": settings.MAIL_SERVER, "server.port": settings.MAIL_PORT})
     async def send_email(self, subject: str, recipients: List[EmailStr], template_name: str, template_body: dict):
         """
         Envia um e-mail usando um template.
@@ -28,6 +30,8 @@ class EmailService:
             template_name: O nome do arquivo de template (ex: 'welcome.html').
             template_body: Um dicionário com as variáveis para o template.
         """
+        tracing.set_attribute("email.template", template_name)
+        tracing.set_attribute("email.recipients", len(recipients))
         message = MessageSchema(
             subject=subject,
             recipients=recipients,
@@ -0,0 +1,249 @@
+# app/services/event_bus.py
+#
+# Pub/sub em processo que alimenta o /crud/stream (SSE).
+#
+# Cada mensagem recebe um id "<epoch>-<seq>", onde epoch identifica este worker.
+# O cliente reconecta mandando Last-Event-ID: se o id for deste worker e ainda estiver
+# no buffer de replay, as mensagens perdidas são reenviadas; senão o cliente recebe
+# um evento 'resync' e deve recarregar pelo /crud/sync e /crud/notifications.
+
+import asyncio
+import json
+import logging
+import uuid
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Set
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database.revision import only_excluded_changes
+from app.models.notificationLogModel import NotificationLog
+
+NOTIFY_CHANNEL = "agenda_events"
+# Limite de payload do NOTIFY no Postgres é 8000 bytes
+NOTIFY_MAX_PAYLOAD = 7900
+# O que sobra de uma mensagem cortada: ids que os ouvintes e os clientes usam para buscar o resto
+REFERENCE_FIELDS = ("id", "user_id", "event_id", "calendar_id", "revision", "action")
+
+logger = logging.getLogger(__name__)
+
+
+class Message:
+    __slots__ = ("id", "seq", "kind", "data", "user_ids")
+
+    def __init__(self, seq: int, epoch: str, kind: str, data: dict, user_ids: Optional[List[int]]):
+        self.seq = seq
+        self.id = f"{epoch}-{seq}"
+        self.kind = kind
+        self.data = data
+        self.user_ids = user_ids
+
+    def is_for(self, user_id: int) -> bool:
+        return self.user_ids is None or user_id in self.user_ids
+
+
+class Subscription:
+    """Conexão de um usuário. A fila é limitada: se o cliente não acompanhar, recebe 'resync'."""
+
+    def __init__(self, user_id: int, maxsize: int):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def push(self, message: Message):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Descarta o que está pendente e deixa só o marcador (None) de 'resync':
+            # o cliente vai recarregar tudo de qualquer forma
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class EventBus:
+    def __init__(self):
+        self.epoch = uuid.uuid4().hex[:8]
+        self._seq = 0
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._replay: Deque[Message] = deque(maxlen=settings.STREAM_REPLAY_SIZE)
+        self._backend = settings.EVENT_BUS_BACKEND
+        self._conn = None
+        self._conn_lock = asyncio.Lock()
+        # NOTIFYs em andamento: o loop só guarda referência fraca das tasks
+        self._pending: Set[asyncio.Task] = set()
+        # Ouvintes internos (ex: contadores em cache), chamados para toda mensagem do tipo
+        self._listeners: Dict[str, List[Callable[[Message], None]]] = {}
+
+    # --- Ciclo de vida (chamado no lifespan do app) ---
+
+    async def start(self):
+        if self._backend != "postgres":
+            return
+        import asyncpg
+        dsn = settings.DATABASE_URL.replace("+asyncpg", "")
+        self._conn = await asyncpg.connect(dsn)
+        await self._conn.add_listener(NOTIFY_CHANNEL, self._on_notify)
+
+    async def stop(self):
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    # --- Assinaturas ---
+
+    def subscribe(self, user_id: int, last_event_id: Optional[str] = None):
+        """
+        Registra uma conexão e retorna (assinatura, mensagens para replay, precisa_resync).
+        """
+        subscription = Subscription(user_id, settings.STREAM_BUFFER_SIZE)
+        self._subscribers.setdefault(user_id, set()).add(subscription)
+
+        if not last_event_id:
+            return subscription, [], False
+
+        epoch, _, seq = last_event_id.partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return subscription, [], True
+
+        seq = int(seq)
+        oldest = self._replay[0].seq if self._replay else self._seq + 1
+        if seq + 1 < oldest:
+            # Parte do que o cliente perdeu já saiu do buffer
+            return subscription, [], True
+
+        replay = [m for m in self._replay if m.seq > seq and m.is_for(user_id)]
+        return subscription, replay, False
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._subscribers.get(subscription.user_id)
+        if subscribers:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.user_id]
+
+    def add_listener(self, kind: str, callback: Callable[[Message], None]):
+        """
+        Registra um ouvinte interno para mensagens de `kind`. Com o backend 'postgres'
+        ele também recebe as mensagens publicadas pelos outros workers.
+        """
+        self._listeners.setdefault(kind, []).append(callback)
+
+    # --- Publicação ---
+
+    def publish(self, kind: str, data: dict, user_ids: Optional[List[int]] = None):
+        """
+        Publica uma mensagem. `user_ids=None` entrega para todos os usuários conectados.
+        Deve ser chamado de dentro do event loop (rotas, serviços ou hooks da sessão).
+        """
+        if self._backend == "postgres":
+            payload = json.dumps({"kind": kind, "data": data, "user_ids": user_ids}, default=str)
+            if len(payload) > NOTIFY_MAX_PAYLOAD:
+                # Mensagem grande demais: envia só as referências e o cliente busca o resto
+                reference = {key: data[key] for key in REFERENCE_FIELDS if key in data}
+                payload = json.dumps({"kind": kind, "data": reference, "user_ids": user_ids}, default=str)
+            task = asyncio.get_running_loop().create_task(self._notify(payload))
+            self._pending.add(task)
+            task.add_done_callback(self._notified)
+        else:
+            self._dispatch(kind, data, user_ids)
+
+    async def _notify(self, payload: str):
+        if self._conn is None:
+            return
+        async with self._conn_lock:
+            await self._conn.execute("SELECT pg_notify($1, $2)", NOTIFY_CHANNEL, payload)
+
+    def _notified(self, task: asyncio.Task):
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Falha no NOTIFY do event_bus", exc_info=task.exception(), extra={"rate_limit_key": "event_bus_notify_failed"})
+
+    def _on_notify(self, connection, pid, channel, payload):
+        message = json.loads(payload)
+        self._dispatch(message["kind"], message["data"], message.get("user_ids"))
+
+    def _dispatch(self, kind: str, data: dict, user_ids: Optional[List[int]]):
+        self._seq += 1
+        message = Message(self._seq, self.epoch, kind, data, user_ids)
+        if user_ids != []:
+            # Sem destinatários (só para ouvintes internos, ex: invalidação de cache) não entra no replay
+            self._replay.append(message)
+
+        for callback in self._listeners.get(kind, ()):
+            callback(message)
+
+        if user_ids is None:
+            targets = [s for subscribers in self._subscribers.values() for s in subscribers]
+        else:
+            targets = [s for user_id in user_ids for s in self._subscribers.get(user_id, ())]
+        for subscription in targets:
+            subscription.push(message)
+
+
+event_bus = EventBus()
+
+
+def publish_on_commit(
+    model,
+    kind: str,
+    fields: List[str],
+    actions: tuple = ("created", "updated", "deleted"),
+    recipients: Optional[Callable[[Session, object], Optional[List[int]]]] = None,
+):
+    """
+    Publica `kind` quando instâncias de `model` forem criadas, alteradas ou removidas
+    (filtrado por `actions`) e a transação for confirmada. O payload leva só `fields`
+    e a ação. `recipients` recebe a sessão (síncrona, ainda no flush) e a instância e retorna
+    os usuários de destino, ou None para todos os conectados; sem ele a mensagem vai para todos.
+    """
+    key = f"event_bus:{kind}"
+
+    @event.listens_for(Session, "after_flush")
+    def _collect(session, flush_context):
+        pending = session.info.setdefault(key, {})
+        for action, instances in (("created", session.new), ("updated", session.dirty), ("deleted", session.deleted)):
+            if action not in actions:
+                continue
+            for instance in instances:
+                # Só controle interno (ex: contador de lembretes enviados) não é mudança para o cliente
+                if isinstance(instance, model) and not (action == "updated" and only_excluded_changes(instance)):
+                    # Lê só o que já está carregado: nada de lazy load dentro do flush
+                    loaded = inspect(instance).dict
+                    data = {name: loaded.get(name) for name in fields}
+                    previous = pending.get(data.get("id"))
+                    # Criado e alterado na mesma transação continua sendo 'created'
+                    if previous and previous[0]["action"] == "created" and action == "updated":
+                        action = "created"
+                    user_ids = recipients(session, instance) if recipients else None
+                    pending[data.get("id")] = ({**data, "action": action}, user_ids)
+
+    @event.listens_for(Session, "after_commit")
+    def _publish(session):
+        pending = session.info.pop(key, None)
+        for data, user_ids in (pending or {}).values():
+            event_bus.publish(kind, data, user_ids)
+
+    @event.listens_for(Session, "after_rollback")
+    def _discard(session):
+        session.info.pop(key, None)
+
+
+# Mudanças de eventos e calendários: registradas em app/services/visibility.py, que sabe
+# quem enxerga cada calendário privado.
+
+# Notificações novas vão só para o destinatário, já com o conteúdo para exibir
+publish_on_commit(
+    NotificationLog,
+    "notification",
+    ["id", "user_id", "event_id", "channel", "status", "content"],
+    actions=("created",),
+    recipients=lambda session, notification: [notification.user_id],
+)
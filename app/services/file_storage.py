@@ -0,0 +1,145 @@
+# app/services/file_storage.py
+#
+# Armazenamento dos uploads, endereçado pelo conteúdo: cada arquivo fica em
+# UPLOAD_DIR/<ab>/<cd>/<sha256> (dois níveis de subpastas para nenhuma pasta ficar
+# enorme), então o mesmo PDF anexado em vários eventos ocupa o disco uma vez só.
+# As referências são contadas em FileBlob (app/models/fileModel.py).
+#
+# A gravação não bloqueia o event loop: os pedaços recebidos são agrupados em blocos
+# de UPLOAD_CHUNK_BYTES e cada bloco é escrito (e somado ao hash) numa thread. O
+# tamanho e o Content-Type são validados enquanto o arquivo chega, então um upload
+# grande demais é interrompido sem ser gravado por inteiro.
+
+import asyncio
+import hashlib
+import os
+import time
+import uuid
+from typing import AsyncIterator, Optional
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+
+def _write(f, digest, block: bytes):
+    # hashlib e write liberam o GIL em blocos grandes: tudo isso roda fora do loop
+    digest.update(block)
+    f.write(block)
+
+
+def _remove(path: str):
+    if os.path.exists(path):
+        os.unlink(path)
+
+
+def _discard(f, path: str):
+    f.close()
+    _remove(path)
+
+
+class FileStorage:
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.tmp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def blob_path(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256)
+
+    def relative_path(self, path: str) -> Optional[str]:
+        """Caminho relativo a UPLOAD_DIR, ou None se o arquivo estiver fora dele."""
+        path = os.path.abspath(path)
+        if not path.startswith(self.root + os.sep):
+            return None
+        return os.path.relpath(path, self.root).replace(os.sep, "/")
+
+    def check_content_type(self, content_type: Optional[str]):
+        allowed = settings.UPLOAD_ALLOWED_CONTENT_TYPES
+        if "*" in allowed:
+            return
+        if not content_type or not any(content_type.startswith(prefix) for prefix in allowed):
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail=f"Content type not allowed: {content_type}",
+            )
+
+    def check_length(self, content_length: Optional[str]):
+        """Recusa logo de cara quando o cliente já declara um corpo maior que o limite."""
+        if content_length and content_length.isdigit() and int(content_length) > settings.UPLOAD_MAX_BYTES:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="File too large")
+
+    async def save(self, chunks: AsyncIterator[bytes], original_name: str, content_type: Optional[str]) -> dict:
+        """
+        Grava `chunks` num arquivo temporário e retorna filename, tmp_path, size, sha256
+        e throughput (bytes/s). O temporário depois vai para o lugar definitivo com
+        `place` (ou é descartado, se o conteúdo já existir); um upload interrompido ou
+        recusado é apagado aqui mesmo.
+        """
+        self.check_content_type(content_type)
+
+        name, ext = os.path.splitext(os.path.basename(original_name or "file"))
+        tmp_path = os.path.join(self.tmp_dir, f"{uuid.uuid4().hex}.part")
+
+        digest = hashlib.sha256()
+        size = 0
+        buffer = bytearray()
+        started = time.perf_counter()
+
+        f = await asyncio.to_thread(open, tmp_path, "wb")
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > settings.UPLOAD_MAX_BYTES:
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="File too large")
+                buffer += chunk
+                if len(buffer) >= settings.UPLOAD_CHUNK_BYTES:
+                    await asyncio.to_thread(_write, f, digest, bytes(buffer))
+                    buffer.clear()
+            if buffer:
+                await asyncio.to_thread(_write, f, digest, bytes(buffer))
+            await asyncio.to_thread(f.close)
+        except BaseException:
+            await asyncio.to_thread(_discard, f, tmp_path)
+            raise
+
+        elapsed = max(time.perf_counter() - started, 1e-6)
+        return {
+            # Nome de exibição/download; o arquivo em disco é identificado pelo hash
+            "filename": f"{time.time_ns()}_{name}{ext}",
+            "tmp_path": tmp_path,
+            "size": size,
+            "sha256": digest.hexdigest(),
+            "elapsed": elapsed,
+            "throughput": size / elapsed,
+        }
+
+    def _place(self, tmp_path: str, sha256: str) -> str:
+        path = self.blob_path(sha256)
+        if os.path.exists(path):
+            # Conteúdo já armazenado: o upload novo é só mais uma referência
+            os.unlink(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+        return path
+
+    async def place(self, tmp_path: str, sha256: str) -> str:
+        """Move o temporário para o caminho do conteúdo e retorna esse caminho."""
+        return await asyncio.to_thread(self._place, tmp_path, sha256)
+
+    async def discard(self, path: str):
+        await asyncio.to_thread(_remove, path)
+
+
+async def iter_upload(upload, chunk_size: Optional[int] = None) -> AsyncIterator[bytes]:
+    """Lê um UploadFile em pedaços (o Starlette já faz a leitura do spool numa thread)."""
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_BYTES
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+file_storage = FileStorage(settings.UPLOAD_DIR)
@@ -0,0 +1,251 @@
+# app/services/metrics.py
+#
+# Métricas no formato texto do Prometheus, servidas por GET /metrics (app/routers/metricsRouter.py).
+#
+# Implementação própria e mínima, sem prometheus_client: contadores, gauges e histogramas
+# guardados em dicts por tupla de labels. Tudo é atualizado na thread do event loop (os
+# hooks do SQLAlchemy assíncrono também rodam nela, dentro do greenlet), então não há
+# lock — uma atualização é um acesso a dict e uma soma. O que já tem contador próprio
+# (cache, permissões, pool de conexões) entra por callback, lido só na hora do scrape.
+#
+# As consultas de cada requisição são somadas num ContextVar que o MetricsMiddleware
+# (app/middleware/metrics.py) abre e fecha; fora de requisição (rotinas agendadas) só os
+# totais por operação são contados.
+
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+from app.core import log
+from app.core.config import settings
+from app.database.database import engine
+from app.services.cache import cache
+from app.services.permissions import permission_engine
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 callback: Optional[Callable[[], Dict[LabelValues, float]]] = None):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        # Valores lidos no scrape, de quem já mantém o próprio contador
+        self.callback = callback
+        self._values: Dict[LabelValues, float] = {}
+
+    def samples(self) -> Dict[LabelValues, float]:
+        return self.callback() if self.callback else self._values
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, value in self.samples().items():
+            lines.append(f"{self.name}{_format_labels(self.labels, values)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, value: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + value
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str):
+        self._values[labels] = value
+
+    def inc(self, *labels: str, value: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + value
+
+    def dec(self, *labels: str, value: float = 1):
+        self._values[labels] = self._values.get(labels, 0) - value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Optional[Sequence[float]] = None):
+        super().__init__(name, help, labels)
+        self.buckets = sorted(buckets or settings.METRICS_LATENCY_BUCKETS)
+        # labels -> [contagem por bucket (não cumulativa, última posição é +Inf), soma, total]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + [float("inf")], counts):
+                cumulative += bucket
+                labels = _format_labels(self.labels, values, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Métrica duplicada: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = (), callback=None) -> Counter:
+        return self.register(Counter(name, help, labels, callback))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = (), callback=None) -> Gauge:
+        return self.register(Gauge(name, help, labels, callback))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets=None) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+QUERY_COUNT_BUCKETS = [1, 2, 5, 10, 20, 50, 100, 200, 500]
+
+# --- HTTP (preenchidas pelo MetricsMiddleware) ---
+http_requests = registry.counter("http_requests_total", "Requisições por rota (template), método e status.", ("method", "route", "status"))
+http_latency = registry.histogram("http_request_duration_seconds", "Latência das requisições por rota.", ("method", "route"))
+http_in_flight = registry.gauge("http_requests_in_flight", "Requisições em andamento neste worker.")
+
+# --- Banco ---
+db_queries = registry.counter("db_queries_total", "Consultas executadas por tipo de comando.", ("operation",))
+db_latency = registry.histogram("db_query_duration_seconds", "Latência de cada consulta por tipo de comando.", ("operation",))
+db_queries_per_request = registry.histogram(
+    "db_queries_per_request", "Consultas feitas por uma requisição.", ("route",), buckets=QUERY_COUNT_BUCKETS,
+)
+db_time_per_request = registry.histogram("db_time_per_request_seconds", "Tempo somado no banco por requisição.", ("route",))
+
+# --- Rotinas de notificação ---
+reminder_tick_duration = registry.histogram("reminder_tick_duration_seconds", "Duração de cada verificação de lembretes.")
+notifications_total = registry.counter("notifications_total", "Envios da fila por canal e resultado (sent/failed).", ("channel", "status"))
+outbound_latency = registry.histogram(
+    "outbound_request_duration_seconds", "Latência das chamadas ao SMTP e ao serviço de WhatsApp.", ("service", "outcome"),
+)
+
+
+# --- Callbacks: lidos só no scrape ---
+def _pool_stats() -> Dict[LabelValues, float]:
+    pool = engine.pool
+    stats = {}
+    for name in ("size", "checkedout", "checkedin", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[(name,)] = method()
+    return stats
+
+
+def _cache_requests() -> Dict[LabelValues, float]:
+    return {
+        (namespace, result): value
+        for namespace, counters in cache.stats()["namespaces"].items()
+        for result, value in counters.items()
+    }
+
+
+registry.gauge("db_pool_connections", "Conexões do pool por estado.", ("state",), callback=_pool_stats)
+registry.gauge("cache_entries", "Entradas no cache de leituras.", callback=lambda: {(): cache.stats()["entries"]})
+registry.counter("cache_evictions_total", "Remoções por LRU no cache de leituras.", callback=lambda: {(): cache.stats()["evictions"]})
+registry.counter("cache_requests_total", "Leituras do cache por namespace e resultado (hits/misses/coalesced).",
+                 ("namespace", "result"), callback=_cache_requests)
+registry.gauge("permission_cache_entries", "Perfis compilados e usuários em memória no motor de permissões.", ("kind",),
+               callback=lambda: {(kind,): value for kind, value in permission_engine.stats().items()})
+registry.counter("log_records_dropped_total", "Registros de log descartados com a fila de escrita cheia.",
+                 callback=lambda: {(): log.dropped()})
+
+
+# --- Consultas: hooks do SQLAlchemy ---
+
+# [consultas, segundos] da requisição atual; None fora de requisição
+request_db_stats: ContextVar[Optional[list]] = ContextVar("request_db_stats", default=None)
+
+_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+
+def _operation(statement: str) -> str:
+    word = statement.lstrip()[:6].upper()
+    return word if word in _OPERATIONS else "OTHER"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["metrics_started"].pop()
+    elapsed = time.perf_counter() - started
+    operation = _operation(statement)
+    db_queries.inc(operation)
+    db_latency.observe(elapsed, operation)
+    stats = request_db_stats.get()
+    if stats is not None:
+        stats[0] += 1
+        stats[1] += elapsed
+
+
+def _handle_error(exception_context):
+    # Sem o after_cursor_execute, o início da consulta que falhou ficaria na pilha
+    started = exception_context.connection.info.get("metrics_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def instrument(target_engine):
+    event.listen(target_engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(target_engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(target_engine.sync_engine, "handle_error", _handle_error)
+
+
+if settings.METRICS_ENABLED:
+    instrument(engine)
+
+
+def route_label(scope) -> str:
+    """Template da rota ("/crud/event/{event_id}"), nunca o caminho real: a cardinalidade fica limitada."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
@@ -9,16 +9,62 @@ from app.models.notificationLogModel import NotificationLog
 from app.services.email_services import email_service
 from app.services.whatsapp_client_service import whatsapp_client_service
 from app.database.database import SessionLocal
-from datetime import datetime, timedelta
+from app.controllers.notificationController import archive_old_notifications
+from app.controllers import outboxController
+from app.core.config import settings
+from app.services import metrics
+from datetime import datetime, timedelta, timezone
 import asyncio
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Limite de taxa por canal: `rate` envios por segundo, acumulando até `capacity`
+    para absorver pequenos picos. É por processo, então com N workers o limite
+    efetivo é N vezes maior.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def available(self) -> float:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return self.tokens
+
+    def consume(self):
+        self.available()
+        self.tokens -= 1
+
+
+def _json_safe(body: dict) -> dict:
+    # O template_body vai para uma coluna JSON: datas viram texto, como o Jinja já exibiria
+    return json.loads(json.dumps(body, default=str))
+
 
 class NotificationService:
     # O intervalo fixo entre as repetições
     REPEAT_INTERVAL_MINUTES = 5
 
+    def __init__(self):
+        self.buckets = {
+            'whatsapp': TokenBucket(settings.OUTBOX_WHATSAPP_RATE_PER_MINUTE / 60, settings.OUTBOX_WHATSAPP_BURST),
+            'email': TokenBucket(settings.OUTBOX_EMAIL_RATE_PER_MINUTE / 60, settings.OUTBOX_EMAIL_BURST),
+        }
+
     async def send_reminders(self):
         """Verifica e envia lembretes de eventos."""
-        print(f"[{datetime.now()}] Verificando lembretes de eventos...")
+        logger.debug("Verificando lembretes de eventos")
+        started = time.perf_counter()
         async with SessionLocal() as db:
             try:
                 now = datetime.now(datetime.utcnow().astimezone().tzinfo)
@@ -35,23 +81,92 @@ class NotificationService:
                 )
                 upcoming_events = result.scalars().unique().all()
 
-                # CORREÇÃO 2: Passamos a sessão 'db' para a função de processamento
-                tasks = [self.process_event_reminder(db, event, now) for event in upcoming_events]
-                if tasks:
-                    await asyncio.gather(*tasks)
+                # Um evento por vez: a sessão é compartilhada (AsyncSession não aceita uso
+                # concorrente) e o commit de cada evento deve levar só a fila e o contador dele
+                sent = 0
+                for event in upcoming_events:
+                    sent += await self.process_event_reminder(db, event, now)
+                # Um registro por execução; o detalhe de cada evento fica no DEBUG
+                if sent:
+                    logger.info("%d lembretes enfileirados", sent, extra={"reminders": sent, "checked": len(upcoming_events)})
 
             except Exception as e:
-                print(f"Erro ao processar lembretes: {e}")
+                logger.exception("Erro ao processar lembretes")
+        metrics.reminder_tick_duration.observe(time.perf_counter() - started)
 
     async def send_reminders_late(self):
         async with SessionLocal() as db:
             await self.send_overdue_reminders(db)
             await db.commit()
 
-    async def process_event_reminder(self, db: AsyncSession, event: Events, now: datetime):
+    async def drain_outbox(self):
+        """
+        Rotina agendada: envia o que está pronto na notification_outbox, respeitando o
+        token bucket de cada canal. O que não couber no limite fica para a próxima execução.
+        """
+        await asyncio.gather(*(self._drain_channel(channel) for channel in self.buckets))
+
+    async def _drain_channel(self, channel: str):
+        bucket = self.buckets[channel]
+        async with SessionLocal() as db:
+            try:
+                while True:
+                    limit = min(int(bucket.available()), settings.OUTBOX_BATCH_SIZE)
+                    if limit < 1:
+                        break
+                    messages = await outboxController.claim_batch(db, channel, limit)
+                    if not messages:
+                        break
+                    for message in messages:
+                        bucket.consume()
+                        started = time.perf_counter()
+                        try:
+                            await self._deliver(message)
+                        except Exception as e:
+                            metrics.outbound_latency.observe(time.perf_counter() - started, channel, "error")
+                            metrics.notifications_total.inc(channel, "failed")
+                            # Com o serviço fora do ar todas as mensagens da fila falham: a chave
+                            # limita as linhas por canal e o próximo registro traz quantas foram omitidas
+                            logger.warning(
+                                "Falha ao enviar %s", channel,
+                                extra={"channel": channel, "recipient": message.recipient, "attempt": message.attempts + 1,
+                                       "error": str(e), "rate_limit_key": f"send_failed:{channel}"},
+                            )
+                            await outboxController.mark_failed(db, message, str(e))
+                        else:
+                            metrics.outbound_latency.observe(time.perf_counter() - started, channel, "ok")
+                            metrics.notifications_total.inc(channel, "sent")
+                            await outboxController.mark_sent(db, message)
+            except Exception as e:
+                logger.exception("Erro ao drenar a fila de %s", channel, extra={"channel": channel})
+
+    async def _deliver(self, message):
+        if message.channel == 'email':
+            await email_service.send_email(
+                subject=message.payload["subject"],
+                recipients=[message.recipient],
+                template_name=message.payload["template_name"],
+                template_body=message.payload["template_body"],
+            )
+        elif message.channel == 'whatsapp':
+            # O cliente não lança exceção: devolve success=False com o motivo
+            result = await whatsapp_client_service.send_message(phone_number=message.recipient, message=message.content)
+            if not result.get("success"):
+                raise RuntimeError(result.get("details"))
+        else:
+            raise ValueError(f"Canal desconhecido: {message.channel}")
+
+    async def archive_notifications(self):
+        """Rotina de retenção: move notificações antigas para a tabela de arquivo."""
+        async with SessionLocal() as db:
+            moved = await archive_old_notifications(db)
+            logger.info("%d notificações arquivadas", moved, extra={"archived": moved})
+
+    async def process_event_reminder(self, db: AsyncSession, event: Events, now: datetime) -> bool:
         """
         Processa um único evento para determinar se um lembrete deve ser enviado.
         Esta função agora recebe a sessão do banco de dados para evitar erros.
+        Retorna se o lembrete foi enfileirado.
         """
         # --- Lógica de herança (sem alterações) ---
         total_repeats = event.notification_repeats if event.notification_repeats is not None else event.calendar.notification_repeats
@@ -60,87 +175,84 @@ class NotificationService:
         message_template = event.notification_message or event.calendar.notification_message
 
         if notify_type == 'none' or time_before_minutes is None or total_repeats is None or event.notifications_sent_count >= total_repeats:
-            return
+            return False
 
         # --- Lógica de cálculo de tempo ---
         initial_reminder_timedelta = timedelta(minutes=time_before_minutes)
         repeat_interval_delta = timedelta(minutes=self.REPEAT_INTERVAL_MINUTES)
-        initial_reminder_time = event.date - initial_reminder_timedelta
+        # `now` tem fuso; data sem fuso (SQLite) é UTC, como no resto da API
+        event_date = event.date if event.date.tzinfo else event.date.replace(tzinfo=timezone.utc)
+        initial_reminder_time = event_date - initial_reminder_timedelta
         
         # Calcula o horário do PRÓXIMO lembrete
         next_reminder_time = initial_reminder_time + (event.notifications_sent_count * repeat_interval_delta)
 
         # CORREÇÃO 3: Adiciona a janela de 1 minuto para evitar reenvios
         if now >= next_reminder_time:
-            print(f"Enviando lembrete (Envio Nº {event.notifications_sent_count + 1}/{total_repeats}) para o evento: '{event.title}'")
+            logger.debug(
+                "Enviando lembrete do evento '%s'", event.title,
+                extra={"event_id": event.id, "attempt": event.notifications_sent_count + 1, "repeats": total_repeats},
+            )
 
             event_time_str = event.startTime or event.date.strftime('%H:%M')
             message = message_template.format(event_title=event.title, event_time=event_time_str)
             
-            # Envia a notificação e os logs
-            await self.send_notification_to_users(db, event, notify_type, message)
+            # Enfileira os envios; o commit abaixo grava a fila e o contador juntos
+            await self.enqueue_notification_to_users(db, event, notify_type, message)
             
             # Incrementa o contador
             event.notifications_sent_count += 1
             
             # CORREÇÃO 4: O commit é feito aqui, uma vez por evento processado.
             await db.commit()
-            print(f" - Contador do evento '{event.title}' atualizado para {event.notifications_sent_count}.")
+            logger.debug("Contador do evento atualizado", extra={"event_id": event.id, "sent": event.notifications_sent_count})
+            return True
+        return False
 
-    async def send_notification_to_users(self, db: AsyncSession, event: Events, notify_type: str, message: str):
-        """Função auxiliar para enviar notificações e registrar o log."""
+    async def enqueue_notification_to_users(self, db: AsyncSession, event: Events, notify_type: str, message: str):
+        """Coloca na notification_outbox os lembretes do envio atual para cada participante."""
         calendar_result = await db.execute(select(Calendar).filter(Calendar.id == event.calendar_id))
         calendar = calendar_result.scalars().first()
         participant_names = [user.name for user in event.users if user.name]
+        # Uma chave por (evento, usuário, canal, número do envio): rodar de novo não duplica
+        attempt = event.notifications_sent_count + 1
+        # Evento mais próximo sai primeiro
+        priority = int(event.date.timestamp())
 
         for user in event.users:
             if user.email and notify_type in ['email', 'both']:
-                log_entry_email = NotificationLog(
-                    user_id=user.id, event_id=event.id, channel='email', content=message
+                await outboxController.enqueue(
+                    db,
+                    idempotency_key=f"reminder:{event.id}:{user.id}:email:{attempt}",
+                    channel='email', recipient=user.email, user_id=user.id, event_id=event.id,
+                    content=message, priority=priority,
+                    payload={
+                        "subject": f"Lembrete: {event.title}",
+                        "template_name": "reminder.html",
+                        "template_body": _json_safe({"event_title": event.title,
+                                                     "event_date_start": (event.startTime or event.date),
+                                                     "event_date_final": (event.endTime or event.endDate),
+                                                     "event_place": event.location,
+                                                     "event_status": event.status,
+                                                     "event_calendar": calendar.name,
+                                                     "event_desc": event.description,
+                                                     "users": participant_names}),
+                    },
                 )
-                try:
-                    await email_service.send_email(
-                        subject=f"Lembrete: {event.title}",
-                        recipients=[user.email],
-                        template_name="reminder.html",
-                        template_body={"event_title": event.title, 
-                                       "event_date_start": (event.startTime or event.date), 
-                                       "event_date_final": (event.endTime or event.endDate),
-                                       "event_place": event.location,
-                                       "event_status": event.status,
-                                       "event_calendar": calendar.name,
-                                       "event_desc": event.description,
-                                       "users": participant_names}
-                    )
-                    log_entry_email.status = 'sent'
-                    print(f" - E-mail de lembrete enviado para {user.email}")
-                except Exception as e:
-                    log_entry_email.status = 'failed'
-                    print(f" - Falha ao enviar e-mail para {user.email}: {e}")
-                db.add(log_entry_email)
-
-            # ... (lógica de envio de whatsapp e criação do log_entry_number) ...
+
             if user.phone_number and notify_type in ['whatsapp', 'both']:
-                log_entry_number = NotificationLog(
-                    user_id=user.id, event_id=event.id, channel='whatsapp', content=message
+                await outboxController.enqueue(
+                    db,
+                    idempotency_key=f"reminder:{event.id}:{user.id}:whatsapp:{attempt}",
+                    channel='whatsapp', recipient=user.phone_number, user_id=user.id, event_id=event.id,
+                    content=message, priority=priority,
                 )
-                try:
-                    await whatsapp_client_service.send_message(
-                        phone_number=user.phone_number,
-                        message=message
-                    )
-                    log_entry_number.status = 'sent'
-                    print(f" - WhatsApp de lembrete enviado para {user.phone_number}")
-                except Exception as e:
-                    log_entry_number.status = 'failed'
-                    print(f" - Falha ao enviar WhatsApp para {user.phone_number}: {e}")
-                db.add(log_entry_number)
         
     # NOVA FUNÇÃO
     async def send_overdue_reminders(self, db: AsyncSession):
         """
         Busca eventos que já passaram da data final e cujo status não é 'confirmed',
-        e envia um lembrete para todos os participantes.
+        e enfileira um lembrete para todos os participantes (um por dia, pela chave de idempotência).
         """
         now = datetime.now()
         
@@ -160,7 +272,7 @@ class NotificationService:
         result = await db.execute(query)
         overdue_events = result.scalars().unique().all()
         
-        print(f"Encontrados {len(overdue_events)} eventos atrasados para notificar.")
+        logger.info("Encontrados %d eventos atrasados para notificar", len(overdue_events))
 
         for event in overdue_events:
             if not event.users:
@@ -174,46 +286,34 @@ class NotificationService:
                 "event_status": event.status,
                 "event_calendar": event.calendar.name if event.calendar else "N/A",
                 "event_desc": event.description or "Nenhuma descrição.",
-                "event_participants": event.users
+                "event_participants": [{"name": user.name, "email": user.email} for user in event.users]
             }
             
+            message = event.notification_message or event.calendar.notification_message
+            # Pendências vão depois dos lembretes de eventos do próximo dia
+            priority = int(now.timestamp()) + 86400
+
             for user in event.users:
                 if user.email:
-                    log_entry_email = NotificationLog(
-                        user_id=user.id, event_id=event.id, channel='email', content=event.notification_message or event.calendar.notification_message
+                    await outboxController.enqueue(
+                        db,
+                        idempotency_key=f"overdue:{event.id}:{user.id}:email:{now:%Y-%m-%d}",
+                        channel='email', recipient=user.email, user_id=user.id, event_id=event.id,
+                        content=message, priority=priority,
+                        payload={
+                            "subject": f"Lembrete de Pendência: {event.title}",
+                            "template_name": "late.html",
+                            "template_body": _json_safe(template_body),
+                        },
                     )
-                    
-                    try:
-                        await email_service.send_email(
-                            subject=f"Lembrete de Pendência: {event.title}",
-                            recipients=[user.email],
-                            template_name="late.html",
-                            template_body=template_body
-                        )
-                        log_entry_email.status = 'sent'
-                        print(f"E-mail de lembrete enviado para o evento ID: {event.id}")
-                    except Exception as e:
-                        log_entry_email.status = 'failed'
-                        print(f"Falha ao enviar e-mail para o evento ID {event.id}: {e}")
-                    
-                    db.add(log_entry_email)
                 
                 if user.phone_number:
-                    log_entry_number = NotificationLog(
-                        user_id=user.id, event_id=event.id, channel='whatsapp', content=event.notification_message or event.calendar.notification_message
+                    await outboxController.enqueue(
+                        db,
+                        idempotency_key=f"overdue:{event.id}:{user.id}:whatsapp:{now:%Y-%m-%d}",
+                        channel='whatsapp', recipient=user.phone_number, user_id=user.id, event_id=event.id,
+                        content=message, priority=priority,
                     )
-                    try:
-                        await whatsapp_client_service.send_message(
-                            phone_number=user.phone_number,
-                            message=event.notification_message or event.calendar.notification_message
-                        )
-                        log_entry_number.status = 'sent'
-                        print(f" - WhatsApp de lembrete enviado para {user.phone_number}")
-                    except Exception as e:
-                        log_entry_number.status = 'failed'
-                        print(f" - Falha ao enviar WhatsApp para {user.phone_number}: {e}")
-                    
-                    db.add(log_entry_number)
     
         # CORREÇÃO 5: O commit foi removido daqui para ser centralizado na função principal.
 
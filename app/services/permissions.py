@@ -0,0 +1,206 @@
+# app/services/permissions.py
+#
+# Autorização pelas linhas de Permissions de cada perfil.
+#
+# As permissões de um perfil são compiladas uma vez num dict entidade -> bitmap
+# (VIEW | CREATE | UPDATE | DELETE) e o perfil de cada usuário também fica em memória,
+# então a verificação por requisição é só duas consultas a dict e um AND de bits, sem
+# ir ao banco. Uma linha com entity_name "*" vale para todas as entidades (administrador).
+#
+# A invalidação vem das mesmas tags do cache de leituras (app/services/cache.py): qualquer
+# commit em Permissions, UserProfile ou no profile_id de um User — pelos routers, pelo
+# genérico ou por outro worker via event_bus — descarta o que foi compilado.
+#
+# A própria rota de permissões exige permissão, então o primeiro administrador vem de
+# `install_admin_profile`, chamado na inicialização (ver PERMISSIONS_ADMIN_PROFILE).
+
+import logging
+from typing import Callable, Dict, List, Optional
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import func, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.controllers.tokenController import verify_token
+from app.core.config import settings
+from app.database import database
+from app.models.permissionsModel import Permissions
+from app.models.userModel import User
+from app.models.userProfileModel import UserProfile
+from app.services.cache import cache
+
+logger = logging.getLogger(__name__)
+
+VIEW = 1
+CREATE = 2
+UPDATE = 4
+DELETE = 8
+
+ACTIONS = {"view": VIEW, "create": CREATE, "update": UPDATE, "delete": DELETE}
+ALL = VIEW | CREATE | UPDATE | DELETE
+
+
+def compile_permissions(rows) -> Dict[str, int]:
+    """Linhas de Permissions de um perfil -> {entidade em minúsculas: bitmap}."""
+    compiled: Dict[str, int] = {}
+    for row in rows:
+        mask = (
+            (VIEW if row.can_view else 0)
+            | (CREATE if row.can_create else 0)
+            | (UPDATE if row.can_update else 0)
+            | (DELETE if row.can_delete else 0)
+        )
+        entity = row.entity_name.strip().lower()
+        compiled[entity] = compiled.get(entity, 0) | mask
+    return compiled
+
+
+class PermissionEngine:
+
+    def __init__(self):
+        self._profiles: Dict[int, Dict[str, int]] = {}
+        self._users: Dict[int, Optional[int]] = {}
+        # Mesmo esquema do cache: o que foi carregado durante uma invalidação não é guardado
+        self._generation = 0
+
+    async def _profile_of(self, db: AsyncSession, user_id: int) -> Optional[int]:
+        if user_id in self._users:
+            return self._users[user_id]
+        generation = self._generation
+        result = await db.execute(select(User.profile_id).where(User.id == user_id))
+        profile_id = result.scalar()
+        if generation == self._generation:
+            self._users[user_id] = profile_id
+        return profile_id
+
+    async def _compiled(self, db: AsyncSession, profile_id: int) -> Dict[str, int]:
+        compiled = self._profiles.get(profile_id)
+        if compiled is not None:
+            return compiled
+        generation = self._generation
+        result = await db.execute(
+            select(Permissions.entity_name, Permissions.can_view, Permissions.can_create,
+                   Permissions.can_update, Permissions.can_delete)
+            .where(Permissions.profile_id == profile_id)
+        )
+        compiled = compile_permissions(result.all())
+        if generation == self._generation:
+            self._profiles[profile_id] = compiled
+        return compiled
+
+    async def mask(self, db: AsyncSession, user_id: int, entity: str) -> int:
+        """Bitmap das ações que o usuário pode fazer na entidade (0 sem perfil)."""
+        profile_id = await self._profile_of(db, user_id)
+        if profile_id is None:
+            return 0
+        compiled = await self._compiled(db, profile_id)
+        return compiled.get(entity.lower(), 0) | compiled.get("*", 0)
+
+    async def is_admin(self, db: AsyncSession, user_id: int) -> bool:
+        """Perfil com entity_name "*" e leitura: enxerga tudo, inclusive calendários privados."""
+        profile_id = await self._profile_of(db, user_id)
+        if profile_id is None:
+            return False
+        return bool((await self._compiled(db, profile_id)).get("*", 0) & VIEW)
+
+    async def allowed(self, db: AsyncSession, user_id: int, entity: str, action: str) -> bool:
+        if not settings.PERMISSIONS_ENFORCED:
+            return True
+        bit = ACTIONS[action]
+        return bool(await self.mask(db, user_id, entity) & bit)
+
+    async def check(self, db: AsyncSession, user_id: int, entity: str, action: str):
+        if not await self.allowed(db, user_id, entity, action):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Permission denied: {action} {entity}",
+            )
+
+    def invalidate(self, tags: Optional[List[str]]):
+        self._generation += 1
+        if tags is None:
+            self._profiles.clear()
+            self._users.clear()
+            return
+        for tag in tags:
+            name, _, key = tag.partition(":")
+            if name == "UserProfile":
+                if key == "*":
+                    self._profiles.clear()
+                elif key.isdigit():
+                    self._profiles.pop(int(key), None)
+            elif name == "User" and key.isdigit():
+                self._users.pop(int(key), None)
+
+    def stats(self) -> dict:
+        return {"profiles": len(self._profiles), "users": len(self._users)}
+
+
+permission_engine = PermissionEngine()
+cache.add_invalidation_listener(permission_engine.invalidate)
+
+
+def install_admin_profile(connection):
+    """
+    Garante um administrador: sem nenhuma linha "*" com leitura, o perfil
+    PERMISSIONS_ADMIN_PROFILE (criado se não existir) recebe "*" com todas as ações. Os usuários
+    de PERMISSIONS_ADMIN_EMAILS vão para esse perfil. Recebe a conexão síncrona (run_sync).
+    """
+    name = settings.PERMISSIONS_ADMIN_PROFILE
+    if not name:
+        return
+    profile_id = connection.execute(
+        select(UserProfile.id).where(func.lower(UserProfile.name) == name.lower()).order_by(UserProfile.id).limit(1)
+    ).scalar()
+    has_admin = connection.execute(
+        select(Permissions.id).where(func.trim(Permissions.entity_name) == "*", Permissions.can_view.is_(True)).limit(1)
+    ).scalar()
+
+    if has_admin is None:
+        if profile_id is None:
+            profile_id = connection.execute(insert(UserProfile).values(name=name).returning(UserProfile.id)).scalar()
+        connection.execute(insert(Permissions).values(
+            entity_name="*", can_view=True, can_create=True, can_update=True, can_delete=True, profile_id=profile_id,
+        ))
+        logger.warning(
+            "Nenhum perfil com permissão \"*\": concedida ao perfil '%s' (id %s). Coloque nele o usuário "
+            "administrador (PERMISSIONS_ADMIN_EMAILS ou users.profile_id)", name, profile_id,
+            extra={"profile_id": profile_id},
+        )
+
+    if profile_id is not None and settings.PERMISSIONS_ADMIN_EMAILS:
+        connection.execute(
+            update(User)
+            .where(func.lower(User.email).in_([email.lower() for email in settings.PERMISSIONS_ADMIN_EMAILS]),
+                   User.profile_id.is_distinct_from(profile_id))
+            .values(profile_id=profile_id)
+        )
+
+
+def require(entity: str, action: str, user: Callable = verify_token):
+    """
+    Dependência que exige a permissão `action` ("view", "create", "update", "delete") em
+    `entity`, ex: `dependencies=[Depends(require("Events", "update"))]`. Retorna o id do
+    usuário. `user` troca a forma de autenticar (ex: Basic Auth no CalDAV).
+    """
+    if action not in ACTIONS:
+        raise ValueError(f"Unknown action: {action}")
+
+    async def dependency(user_id: int = Depends(user), db: AsyncSession = Depends(database.get_db)) -> int:
+        await permission_engine.check(db, int(user_id), entity, action)
+        return int(user_id)
+
+    return dependency
+
+
+def require_model(action: str):
+    """Como `require`, mas a entidade vem do parâmetro `model` da rota genérica."""
+    if action not in ACTIONS:
+        raise ValueError(f"Unknown action: {action}")
+
+    async def dependency(model: str = "", user_id: int = Depends(verify_token), db: AsyncSession = Depends(database.get_db)) -> int:
+        await permission_engine.check(db, int(user_id), model, action)
+        return int(user_id)
+
+    return dependency
@@ -0,0 +1,186 @@
+# app/services/profiler.py
+#
+# Profiler estatístico do próprio worker, sem ferramenta externa. O resultado é o formato
+# "collapsed stacks" (uma pilha por linha, frames separados por ";" e a contagem no fim),
+# aceito pelo flamegraph.pl, speedscope e pelo import do Pyroscope.
+#
+# Modos:
+# - wall: uma thread lê sys._current_frames() a cada intervalo, de todas as threads (a
+#   primeira camada da pilha é o nome da thread). Mostra também o tempo parado, ex: o loop
+#   esperando no select.
+# - cpu: SIGPROF pelo setitimer(ITIMER_PROF), que só avança com CPU consumida. O handler
+#   roda na thread principal (a do event loop no uvicorn) e amostra o frame interrompido;
+#   só Unix, e só quando o loop está na thread principal. O timer conta a CPU do processo
+#   inteiro: a de outras threads (driver do banco, threadpool) aparece como o loop no select.
+#
+# O perfil de uma requisição (cabeçalho X-Profile, app/middleware/profiler.py) usa o mesmo
+# SIGPROF: o handler roda no contexto da task interrompida, então o ContextVar
+# `request_profile` diz a que requisição a amostra pertence, mesmo com outras rodando ao
+# mesmo tempo no loop.
+#
+# Parado, não custa nada: nenhuma thread, nenhum timer, nenhum handler instalado.
+
+import asyncio
+import itertools
+import os
+import re
+import signal
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from app.core.config import settings
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_LIBRARY_PREFIX = re.compile(r".*[/\\](site-packages|dist-packages|lib[/\\]python\d+\.\d+)[/\\]")
+MODES = ("wall", "cpu")
+
+_ids = itertools.count(1)
+_labels: Dict[object, str] = {}
+
+
+def _label(code) -> str:
+    label = _labels.get(code)
+    if label is None:
+        filename = code.co_filename
+        if filename.startswith(PROJECT_DIR):
+            filename = os.path.relpath(filename, PROJECT_DIR)
+        else:
+            filename = _LIBRARY_PREFIX.sub("", filename)
+        # ";" separa frames no formato; espaço antes da contagem também confundiria os parsers
+        label = _labels[code] = f"{filename}:{getattr(code, 'co_qualname', code.co_name)}".replace(";", ":").replace(" ", "_")
+    return label
+
+
+class Profile:
+    def __init__(self, mode: str, interval: float, label: str = ""):
+        self.id = next(_ids)
+        self.mode = mode
+        self.interval = interval
+        self.label = label
+        self.started_at = time.time()
+        self.duration = 0.0
+        self.samples = 0
+        self.stacks: Counter = Counter()
+
+    def add(self, frame, root: Optional[str] = None):
+        names = []
+        while frame is not None and len(names) < settings.PROFILER_MAX_DEPTH:
+            names.append(_label(frame.f_code))
+            frame = frame.f_back
+        if root:
+            names.append(root.replace(";", ":").replace(" ", "_"))
+        names.reverse()
+        self.stacks[";".join(names)] += 1
+        self.samples += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id, "mode": self.mode, "label": self.label, "interval_ms": self.interval * 1000,
+            "started_at": self.started_at, "duration_ms": round(self.duration * 1000, 3), "samples": self.samples,
+        }
+
+
+# Perfil da requisição atual (cabeçalho X-Profile); None fora dela
+request_profile: ContextVar[Optional[Profile]] = ContextVar("request_profile", default=None)
+
+
+def _sample_threads(profile: Profile, stop: threading.Event):
+    own = threading.get_ident()
+    while not stop.wait(profile.interval):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident != own:
+                profile.add(frame, root=names.get(ident, str(ident)))
+
+
+class Profiler:
+    def __init__(self):
+        # Perfil do endpoint em andamento (um por worker)
+        self.session: Optional[Profile] = None
+        self.recent: deque = deque(maxlen=settings.PROFILER_KEEP_REQUESTS)
+        self._timer_users = 0
+        self._previous_handler = None
+
+    @property
+    def busy(self) -> bool:
+        return self.session is not None
+
+    def cpu_available(self) -> bool:
+        return hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+
+    # --- SIGPROF, compartilhado pelo modo cpu e pelos perfis de requisição ---
+
+    def _on_signal(self, signum, frame):
+        session = self.session
+        if session is not None and session.mode == "cpu":
+            session.add(frame)
+        profile = request_profile.get()
+        if profile is not None:
+            profile.add(frame)
+
+    def _arm(self, interval: float):
+        if self._timer_users == 0:
+            self._previous_handler = signal.signal(signal.SIGPROF, self._on_signal)
+            signal.setitimer(signal.ITIMER_PROF, interval, interval)
+        self._timer_users += 1
+
+    def _disarm(self):
+        self._timer_users -= 1
+        if self._timer_users == 0:
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+
+    # --- Perfil do worker por um tempo fixo ---
+
+    async def run(self, seconds: float, mode: str = "wall", interval: Optional[float] = None) -> Profile:
+        """Amostra por `seconds` e devolve o perfil. Quem chama confere `busy` e `cpu_available()` antes."""
+        profile = Profile(mode, interval or settings.PROFILER_DEFAULT_INTERVAL_MS / 1000, f"{mode} {seconds:g}s")
+        self.session = profile
+        started = time.perf_counter()
+        try:
+            if mode == "cpu":
+                self._arm(profile.interval)
+                try:
+                    await asyncio.sleep(seconds)
+                finally:
+                    self._disarm()
+            else:
+                stop = threading.Event()
+                thread = threading.Thread(target=_sample_threads, args=(profile, stop), name="profiler", daemon=True)
+                thread.start()
+                try:
+                    await asyncio.sleep(seconds)
+                finally:
+                    stop.set()
+                    await asyncio.to_thread(thread.join)
+        finally:
+            profile.duration = time.perf_counter() - started
+            self.session = None
+        return profile
+
+    # --- Perfil de uma requisição ---
+
+    def start_request(self, label: str) -> Optional[Profile]:
+        if not self.cpu_available():
+            return None
+        profile = Profile("cpu", settings.PROFILER_REQUEST_INTERVAL_MS / 1000, label)
+        self._arm(profile.interval)
+        return profile
+
+    def finish_request(self, profile: Profile, duration: float):
+        self._disarm()
+        profile.duration = duration
+        self.recent.append(profile)
+
+    def get_recent(self, profile_id: int) -> Optional[Profile]:
+        return next((profile for profile in self.recent if profile.id == profile_id), None)
+
+
+profiler = Profiler()
@@ -0,0 +1,212 @@
+# app/services/query_inspector.py
+#
+# Modo de desenvolvimento/testes (QUERY_INSPECTOR_ENABLED): registra cada consulta da
+# requisição com o ponto do código da aplicação que a disparou, aponta consultas idênticas
+# repetidas (N+1: um selectin esquecido, um loop que carrega relacionamento por item) e
+# aplica o orçamento de consultas que a rota declara com `query_budget(n)`.
+#
+# O ponto de origem é o primeiro frame dentro de app/ (fora de app/database/). No
+# SQLAlchemy assíncrono os hooks rodam num greenlet filho, cuja pilha termina no
+# greenlet_spawn; a pilha da rota continua no frame suspenso do greenlet pai.
+#
+# Caro de propósito (percorre a pilha a cada consulta): não é para produção, lá as
+# contagens agregadas ficam em /metrics.
+
+import os
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.database.database import engine
+
+try:
+    import greenlet
+except ImportError:
+    greenlet = None
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_DIR = os.path.dirname(APP_DIR)
+_IGNORED_DIRS = (os.path.join(APP_DIR, "database") + os.sep,)
+_IGNORED_FILES = {os.path.abspath(__file__)}
+
+# Listas de parâmetros (IN do selectin, executemany) viram uma só: "IN (?, ?, ?)" == "IN (?)"
+_PARAMETER_LIST = re.compile(r"\(\s*(\?|%s|\$\d+|:\w+)(\s*,\s*(\?|%s|\$\d+|:\w+))+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+STATEMENT_PREVIEW = 300
+SITE_DEPTH = 3
+
+
+class QueryBudgetExceeded(Exception):
+    def __init__(self, report: dict):
+        super().__init__(f"{report['route']}: {report['queries']} consultas, orçamento de {report['budget']}")
+        self.report = report
+
+
+@dataclass
+class Inspection:
+    route: str = ""
+    budget: Optional[int] = None
+    # (consulta normalizada, origem, segundos)
+    statements: List[Tuple[str, str, float]] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def effective_budget(self) -> Optional[int]:
+        if self.budget is not None:
+            return self.budget
+        return settings.QUERY_INSPECTOR_DEFAULT_BUDGET or None
+
+    def over_budget(self) -> bool:
+        budget = self.effective_budget
+        return budget is not None and self.count > budget
+
+    def repeated(self) -> List[dict]:
+        """Consultas idênticas executadas QUERY_INSPECTOR_REPEAT_THRESHOLD vezes ou mais."""
+        counts = Counter(statement for statement, _, _ in self.statements)
+        sites = defaultdict(set)
+        for statement, site, _ in self.statements:
+            sites[statement].add(site)
+        return [
+            {"statement": statement[:STATEMENT_PREVIEW], "count": count, "sites": sorted(sites[statement])}
+            for statement, count in counts.most_common()
+            if count >= settings.QUERY_INSPECTOR_REPEAT_THRESHOLD
+        ]
+
+    def report(self) -> dict:
+        """Consultas agrupadas pelo ponto de origem, da origem mais cara para a mais barata."""
+        by_site = defaultdict(lambda: {"queries": 0, "seconds": 0.0, "statements": Counter()})
+        for statement, site, elapsed in self.statements:
+            group = by_site[site]
+            group["queries"] += 1
+            group["seconds"] += elapsed
+            group["statements"][statement] += 1
+        sites = [
+            {
+                "site": site,
+                "queries": group["queries"],
+                "time_ms": round(group["seconds"] * 1000, 3),
+                "statements": [
+                    {"statement": statement[:STATEMENT_PREVIEW], "count": count}
+                    for statement, count in group["statements"].most_common()
+                ],
+            }
+            for site, group in sorted(by_site.items(), key=lambda item: -item[1]["queries"])
+        ]
+        return {
+            "route": self.route,
+            "queries": self.count,
+            "time_ms": round(sum(elapsed for _, _, elapsed in self.statements) * 1000, 3),
+            "budget": self.effective_budget,
+            "n_plus_one": self.repeated(),
+            "sites": sites,
+        }
+
+
+current_inspection: ContextVar[Optional[Inspection]] = ContextVar("current_inspection", default=None)
+
+
+def normalize(statement: str) -> str:
+    return _PARAMETER_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+def _frames():
+    frame = sys._getframe()
+    while frame is not None:
+        yield frame
+        frame = frame.f_back
+    if greenlet is not None:
+        parent = greenlet.getcurrent().parent
+        frame = parent.gr_frame if parent is not None else None
+        while frame is not None:
+            yield frame
+            frame = frame.f_back
+
+
+def call_site() -> str:
+    """
+    Os SITE_DEPTH primeiros frames da aplicação na pilha, do mais interno para o de fora,
+    ex: "app/controllers/base.py:26 (get) <- app/routers/userRouter.py:58 (load)". Só o
+    primeiro seria quase sempre o CRUD genérico.
+    """
+    sites = []
+    for frame in _frames():
+        filename = frame.f_code.co_filename
+        if filename.startswith(APP_DIR) and not filename.startswith(_IGNORED_DIRS) and filename not in _IGNORED_FILES:
+            sites.append(f"{os.path.relpath(filename, PROJECT_DIR)}:{frame.f_lineno} ({frame.f_code.co_name})")
+            if len(sites) == SITE_DEPTH:
+                break
+    return " <- ".join(sites) or "<fora da aplicação>"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_inspection.get() is not None:
+        conn.info.setdefault("inspector_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    inspection = current_inspection.get()
+    started = conn.info.get("inspector_started")
+    if inspection is None or not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    inspection.statements.append((normalize(statement), call_site(), elapsed))
+
+
+def _handle_error(exception_context):
+    started = exception_context.connection.info.get("inspector_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+if settings.QUERY_INSPECTOR_ENABLED:
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine.sync_engine, "handle_error", _handle_error)
+
+
+def query_budget(limit: int):
+    """
+    Dependência que declara quantas consultas a rota pode fazer, ex:
+    `@router.get("/event/", dependencies=[Depends(query_budget(8))])`. Só tem efeito com
+    QUERY_INSPECTOR_ENABLED; passar do limite é relatado ou vira 500 (QUERY_INSPECTOR_MODE).
+    """
+    async def dependency():
+        inspection = current_inspection.get()
+        if inspection is not None:
+            inspection.budget = limit
+
+    return dependency
+
+
+@contextmanager
+def inspect_queries(budget: Optional[int] = None, route: str = "<manual>"):
+    """
+    Inspeção fora de uma requisição (scripts, rotinas agendadas, testes):
+
+        with inspect_queries(budget=3) as inspection:
+            await crud.get(db, id)
+        print(inspection.report())
+
+    Levanta QueryBudgetExceeded no fim do bloco se `budget` estourou. Só enxerga as
+    consultas com os hooks registrados (QUERY_INSPECTOR_ENABLED).
+    """
+    inspection = Inspection(route=route, budget=budget)
+    token = current_inspection.set(inspection)
+    try:
+        yield inspection
+    finally:
+        current_inspection.reset(token)
+    if budget is not None and inspection.over_budget():
+        raise QueryBudgetExceeded(inspection.report())
@@ -0,0 +1,192 @@
+# app/services/search.py
+#
+# Busca textual em eventos, usuários e calendários (GET /crud/search/*), no lugar do
+# operador `ct` do DSL de filtros, que vira coluna ILIKE '%termo%': sem ranking nem radicais, e
+# lê a tabela inteira onde não há índice de trigramas (migration 012).
+#
+# - Postgres (migrations/011_full_text_search.sql): coluna search_vector mantida por trigger,
+#   índice GIN e a configuração pt_unaccent (portuguese + unaccent). Cada termo vira prefixo
+#   ("reuni" encontra "reunião"), todos obrigatórios, ordenados por ts_rank_cd com os pesos
+#   do tsvector (título/nome acima de descrição/e-mail).
+# - SQLite (testes e benchmarks locais): tabelas FTS5 de conteúdo externo mantidas por
+#   trigger, criadas na inicialização (`install`), com bm25 pelos mesmos pesos.
+#
+# Ranquear custa por linha que casa: um termo presente em metade da tabela obriga a pontuar
+# centenas de milhares de linhas para devolver 20. O ranking fica restrito às
+# SEARCH_RANK_WINDOW ocorrências mais recentes (maior id), achadas pelo próprio índice; com
+# menos ocorrências que isso, é o ranking exato.
+#
+# Sem nenhum resultado, a busca tenta de novo por semelhança (SEARCH_FUZZY_FALLBACK): no
+# Postgres por trigramas (word_similarity, índice gin_trgm_ops), que perdoa erros de
+# digitação; no SQLite só com LIKE. A resposta diz qual dos dois respondeu.
+
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, column, func, literal, literal_column, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import noload, selectinload
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.core.config import settings
+from app.models.calendarModel import Calendar
+from app.models.eventsModel import Events
+from app.models.userModel import User
+
+MATCH_FULLTEXT = "fulltext"
+MATCH_FUZZY = "fuzzy"
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass(frozen=True)
+class SearchTarget:
+    model: type
+    columns: Tuple[str, ...]  # em ordem de peso
+    weights: Tuple[float, ...]  # bm25 no SQLite; no Postgres os pesos estão no tsvector
+    fuzzy_column: str
+    # Opções de carga montadas na hora da consulta (na importação os mappers ainda não estão prontos)
+    load_options: Callable[[], tuple] = lambda: ()
+
+    @property
+    def table(self) -> str:
+        return self.model.__tablename__
+
+    @property
+    def fts_table(self) -> str:
+        return f"{self.table}_fts"
+
+
+TARGETS: Dict[str, SearchTarget] = {
+    "events": SearchTarget(Events, ("title", "description", "location"), (10.0, 4.0, 1.0), "title",
+                           lambda: (selectinload(Events.users),)),
+    "users": SearchTarget(User, ("name", "email"), (10.0, 4.0), "name"),
+    # Os eventos do calendário não entram no resultado da busca
+    "calendars": SearchTarget(Calendar, ("name", "description"), (10.0, 4.0), "name", lambda: (noload(Calendar.events),)),
+}
+
+
+@dataclass
+class SearchResult:
+    items: list
+    match: str
+
+
+def terms(q: str) -> List[str]:
+    """Palavras da busca, sem pontuação nem operadores (nada do texto chega cru ao tsquery/MATCH)."""
+    return _TERM.findall(q.lower())[:settings.SEARCH_MAX_TERMS]
+
+
+# --- Postgres ---
+
+_PG_CONFIG = literal_column("'pt_unaccent'::regconfig")
+
+
+def _window(key, match):
+    """`key` >= o menor id entre as SEARCH_RANK_WINDOW ocorrências mais recentes."""
+    newest = select(key.label("key")).where(match).order_by(key.desc()).limit(settings.SEARCH_RANK_WINDOW).subquery()
+    return key >= select(func.min(newest.c.key)).scalar_subquery()
+
+
+def _pg_fulltext(target: SearchTarget, words: Sequence[str]):
+    query = func.to_tsquery(_PG_CONFIG, " & ".join(f"{word}:*" for word in words))
+    vector = literal_column(f"{target.table}.search_vector")
+    match = vector.op("@@")(query)
+    if settings.SEARCH_RANK_WINDOW:
+        match = and_(match, _window(target.model.id, match))
+    return match, func.ts_rank_cd(vector, query).desc()
+
+
+def _pg_fuzzy(target: SearchTarget, words: Sequence[str]):
+    # Mesma expressão dos índices ix_*_trgm, para o planejador usá-los
+    indexed = func.f_unaccent(func.lower(getattr(target.model, target.fuzzy_column)))
+    phrase = func.f_unaccent(literal(" ".join(words)))
+    return phrase.op("<%")(indexed), func.word_similarity(phrase, indexed).desc()
+
+
+# --- SQLite ---
+
+def _sqlite_fulltext(target: SearchTarget, words: Sequence[str]):
+    fts = table(target.fts_table, column("rowid"))
+    match = literal_column(target.fts_table).match(" ".join(f'"{word}"*' for word in words))
+    rank = func.bm25(literal_column(target.fts_table), *target.weights)
+    condition = and_(fts.c.rowid == target.model.id, match)
+    if settings.SEARCH_RANK_WINDOW:
+        # Sobre o rowid do FTS5, que o índice resolve sem tocar na tabela de eventos
+        condition = and_(condition, _window(fts.c.rowid, match))
+    return fts, condition, rank
+
+
+def _sqlite_fuzzy(target: SearchTarget, words: Sequence[str]):
+    indexed = func.lower(getattr(target.model, target.fuzzy_column))
+    return and_(*(indexed.like(f"%{word}%") for word in words)), target.model.id
+
+
+async def search(
+    db: AsyncSession, kind: str, q: str, skip: int = 0, limit: int = 20,
+    visibility: Optional[ColumnElement] = None,
+) -> SearchResult:
+    target = TARGETS[kind]
+    words = terms(q)
+    if not words:
+        return SearchResult([], MATCH_FULLTEXT)
+
+    base = select(target.model).options(*target.load_options())
+    if visibility is not None:
+        base = base.where(visibility)
+    postgres = db.bind.dialect.name == "postgresql"
+
+    if postgres:
+        condition, order = _pg_fulltext(target, words)
+        query = base.where(condition)
+    else:
+        fts, condition, order = _sqlite_fulltext(target, words)
+        query = base.join(fts, condition)
+    result = await db.execute(query.order_by(order, target.model.id).offset(skip).limit(limit))
+    items = result.scalars().unique().all()
+    # Só na primeira página: numa página seguinte vazia a busca exata já respondeu antes
+    if items or skip or not settings.SEARCH_FUZZY_FALLBACK:
+        return SearchResult(items, MATCH_FULLTEXT)
+
+    condition, order = (_pg_fuzzy if postgres else _sqlite_fuzzy)(target, words)
+    result = await db.execute(base.where(condition).order_by(order, target.model.id).limit(limit))
+    return SearchResult(result.scalars().unique().all(), MATCH_FUZZY)
+
+
+# --- Índices FTS5 do SQLite ---
+
+def _sqlite_ddl(target: SearchTarget) -> List[str]:
+    name, fts = target.table, target.fts_table
+    columns = ", ".join(target.columns)
+    new_values = ", ".join(f"new.{c}" for c in target.columns)
+    old_values = ", ".join(f"old.{c}" for c in target.columns)
+    insert = f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values});"
+    delete = f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({columns}, content='{name}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {name} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {name} BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {columns} ON {name} BEGIN {delete} {insert} END",
+    ]
+
+
+def install(connection):
+    """
+    SQLite: cria as tabelas FTS5 e os triggers que as mantêm. Sem os triggers (banco novo,
+    ou a tabela foi recriada), o índice é reconstruído a partir das linhas existentes. No
+    Postgres o equivalente é a migration 011. Recebe a conexão síncrona (run_sync).
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    for target in TARGETS.values():
+        existing = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = :name"),
+            {"name": f"{target.fts_table}_ai"},
+        ).scalar()
+        if existing:
+            continue
+        for statement in _sqlite_ddl(target):
+            connection.exec_driver_sql(statement)
+        connection.exec_driver_sql(f"INSERT INTO {target.fts_table}({target.fts_table}) VALUES ('rebuild')")
@@ -0,0 +1,324 @@
+# app/services/tracing.py
+#
+# Tracing compatível com o OpenTelemetry sem depender do SDK: ids e propagação no formato
+# W3C Trace Context (cabeçalho traceparent, recebido nas rotas e enviado ao serviço de
+# WhatsApp) e exportação em OTLP/JSON — o arquivo é lido pelo receiver `otlpjsonfile` do
+# OpenTelemetry Collector, ou serve direto para análise offline. O exportador "console"
+# imprime um span por linha, para desenvolvimento.
+#
+# O span atual fica num ContextVar, então segue sozinho para asyncio.create_task,
+# asyncio.to_thread, run_in_threadpool e as BackgroundTasks do Starlette (todos copiam o
+# contexto). As rotinas agendadas começam sem contexto e abrem o próprio trace (`job`).
+#
+# Amostragem na raiz: TRACING_SAMPLE_RATIO das requisições (ou o flag do traceparent
+# recebido) e TRACING_JOB_SAMPLE_RATIO das execuções agendadas. Num trace não amostrado o
+# custo é um ContextVar lido por span; desligado (TRACING_ENABLED=False), nem isso.
+
+import functools
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+
+from app.core import log
+from app.core.config import settings
+from app.database.database import engine
+
+logger = logging.getLogger(__name__)
+
+# Códigos do OTLP
+KINDS = {"internal": 1, "server": 2, "client": 3}
+STATUS_OK, STATUS_ERROR = 1, 2
+
+
+class Span:
+    __slots__ = ("name", "kind", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes",
+                 "status", "status_message", "events", "local_root")
+
+    sampled = True
+
+    def __init__(self, name: str, kind: str, trace_id: int, parent_id: Optional[int], attributes: Optional[dict] = None):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = random.getrandbits(64)
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = 0
+        self.status_message = ""
+        self.events: List[dict] = []
+        # Raiz neste processo (mesmo continuando um trace de fora): o fim dela grava o lote
+        self.local_root = False
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def record_exception(self, error: BaseException):
+        self.status, self.status_message = STATUS_ERROR, f"{type(error).__name__}: {error}"
+        self.events.append({"name": "exception", "time_ns": time.time_ns(), "attributes": {
+            "exception.type": type(error).__name__, "exception.message": str(error),
+        }})
+
+    def end(self):
+        self.end_ns = time.time_ns()
+        exporter.add(self)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id:032x}-{self.span_id:016x}-01"
+
+
+class _NonRecordingSpan:
+    """Marca um trace não amostrado: os spans filhos também não são gravados."""
+    sampled = False
+    traceparent = None
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def record_exception(self, error: BaseException):
+        pass
+
+
+NON_RECORDING = _NonRecordingSpan()
+
+current_span: ContextVar[Optional[Any]] = ContextVar("current_span", default=None)
+
+
+def _current_trace_id() -> Optional[str]:
+    current = current_span.get()
+    return f"{current.trace_id:032x}" if current is not None and current.sampled else None
+
+
+# Logs feitos dentro de um trace amostrado saem com o trace_id
+log.add_context_field("trace_id", _current_trace_id)
+
+
+def _value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _attributes(attributes: dict) -> List[dict]:
+    return [{"key": key, "value": _value(value)} for key, value in attributes.items() if value is not None]
+
+
+def to_otlp(span: Span) -> dict:
+    data = {
+        "traceId": f"{span.trace_id:032x}",
+        "spanId": f"{span.span_id:016x}",
+        "name": span.name,
+        "kind": KINDS[span.kind],
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": _attributes(span.attributes),
+        "status": {"code": span.status, "message": span.status_message} if span.status else {},
+    }
+    if span.parent_id:
+        data["parentSpanId"] = f"{span.parent_id:016x}"
+    if span.events:
+        data["events"] = [
+            {"name": item["name"], "timeUnixNano": str(item["time_ns"]), "attributes": _attributes(item["attributes"])}
+            for item in span.events
+        ]
+    return data
+
+
+class Exporter:
+    """Acumula os spans terminados e grava em lote: a cada TRACING_BATCH_SIZE e no fim de cada trace."""
+
+    def __init__(self):
+        self.buffer: List[Span] = []
+
+    def add(self, span: Span):
+        self.buffer.append(span)
+        if span.local_root or len(self.buffer) >= settings.TRACING_BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        spans, self.buffer = self.buffer, []
+        try:
+            if settings.TRACING_EXPORTER == "console":
+                for span in spans:
+                    print(f"[trace {span.trace_id:032x}] {span.name} {(span.end_ns - span.start_ns) / 1e6:.3f}ms"
+                          f"{' ERRO ' + span.status_message if span.status == STATUS_ERROR else ''} {span.attributes}")
+                return
+            batch = {"resourceSpans": [{
+                "resource": {"attributes": _attributes({"service.name": settings.TRACING_SERVICE_NAME})},
+                "scopeSpans": [{"scope": {"name": "app.services.tracing"}, "spans": [to_otlp(span) for span in spans]}],
+            }]}
+            # Uma linha curta por trace: o append custa menos que mandar para outra thread
+            with open(settings.TRACING_FILE, "a") as f:
+                f.write(json.dumps(batch, separators=(",", ":")) + "\n")
+        except Exception:
+            logger.exception("Erro ao exportar spans", extra={"rate_limit_key": "trace_export_failed"})
+
+
+exporter = Exporter()
+
+
+def parse_traceparent(header: Optional[str]):
+    """(trace_id, span_id pai, amostrado) de um traceparent válido, senão None."""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) < 4 or len(parts[0]) != 2 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        trace_id, parent_id, flags = int(parts[1], 16), int(parts[2], 16), int(parts[3][:2], 16)
+    except ValueError:
+        return None
+    if not trace_id or not parent_id:
+        return None
+    return trace_id, parent_id, bool(flags & 1)
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", attributes: Optional[dict] = None, traceparent: Optional[str] = None,
+         sample_ratio: Optional[float] = None):
+    """
+    Abre um span filho do atual (ou a raiz de um trace, sorteada por `sample_ratio`).
+    `traceparent` continua um trace de outro serviço, respeitando o flag de amostragem dele.
+    Exceções que atravessam o bloco marcam o span como erro.
+    """
+    if not settings.TRACING_ENABLED:
+        yield NON_RECORDING
+        return
+    parent = current_span.get()
+    if parent is not None and not parent.sampled:
+        yield parent
+        return
+
+    if parent is not None:
+        new = Span(name, kind, parent.trace_id, parent.span_id, attributes)
+    else:
+        remote = parse_traceparent(traceparent)
+        if remote is not None:
+            sampled = remote[2]
+        else:
+            sampled = random.random() < (settings.TRACING_SAMPLE_RATIO if sample_ratio is None else sample_ratio)
+        if not sampled:
+            token = current_span.set(NON_RECORDING)
+            try:
+                yield NON_RECORDING
+            finally:
+                current_span.reset(token)
+            return
+        trace_id, parent_id = (remote[0], remote[1]) if remote else (random.getrandbits(128), None)
+        new = Span(name, kind, trace_id, parent_id, attributes)
+        new.local_root = True
+
+    token = current_span.set(new)
+    try:
+        yield new
+    except BaseException as error:
+        new.record_exception(error)
+        raise
+    finally:
+        current_span.reset(token)
+        new.end()
+
+
+def traced(name: Optional[str] = None, kind: str = "internal", attributes: Optional[dict] = None):
+    """Decorador de corrotinas: `@traced("smtp send", kind="client")`."""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(span_name, kind, attributes):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def job(func):
+    """Rotina agendada como raiz de um trace próprio (o APScheduler não tem contexto de requisição)."""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        with span(f"job {func.__qualname__}", sample_ratio=settings.TRACING_JOB_SAMPLE_RATIO):
+            return await func(*args, **kwargs)
+    return wrapper
+
+
+def inject(headers: Optional[dict] = None) -> dict:
+    """Acrescenta o traceparent do span atual aos cabeçalhos de uma chamada de saída."""
+    headers = dict(headers or {})
+    current = current_span.get()
+    if current is not None and current.sampled:
+        headers["traceparent"] = current.traceparent
+    return headers
+
+
+def set_attribute(key: str, value: Any):
+    """Atributo no span atual, se houver um gravando."""
+    current = current_span.get()
+    if current is not None:
+        current.set_attribute(key, value)
+
+
+def set_error(message: str):
+    """Marca o span atual como erro quando a falha não vira exceção (ex: cliente que devolve success=False)."""
+    current = current_span.get()
+    if current is not None and current.sampled:
+        current.status, current.status_message = STATUS_ERROR, message
+
+
+def shutdown():
+    exporter.flush()
+
+
+# --- Consultas: um span por statement, filho do span atual ---
+
+_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    parent = current_span.get()
+    if parent is None or not parent.sampled:
+        return
+    operation = statement.lstrip()[:6].upper()
+    operation = operation if operation in _OPERATIONS else "OTHER"
+    db_span = Span(operation, "client", parent.trace_id, parent.span_id, {
+        "db.system": conn.dialect.name,
+        "db.operation.name": operation,
+        "db.query.text": statement[:settings.TRACING_STATEMENT_MAX_LENGTH],
+    })
+    conn.info.setdefault("tracing_spans", []).append(db_span)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get("tracing_spans")
+    if spans:
+        db_span = spans.pop()
+        if cursor is not None and cursor.rowcount is not None and cursor.rowcount >= 0:
+            db_span.set_attribute("db.response.returned_rows", cursor.rowcount)
+        db_span.end()
+
+
+def _handle_error(exception_context):
+    spans = exception_context.connection.info.get("tracing_spans") if exception_context.connection else None
+    if spans:
+        db_span = spans.pop()
+        db_span.record_exception(exception_context.original_exception)
+        db_span.end()
+
+
+if settings.TRACING_ENABLED:
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine.sync_engine, "handle_error", _handle_error)
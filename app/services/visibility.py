@@ -0,0 +1,146 @@
+# app/services/visibility.py
+#
+# Visibilidade por linha dos calendários privados, aplicada no próprio SQL.
+#
+# Regras:
+#   - calendário: visível se não é privado ou se o usuário é o dono;
+#   - evento: visível se o calendário dele é visível, se o usuário o criou ou se é
+#     participante (user_events).
+# Perfis com entity_name "*" (administradores, ver app/services/permissions.py) veem tudo.
+#
+# Os predicados são subconsultas IN (semi-join) sobre colunas indexadas
+# (migrations/009_visibility_indexes.sql), então a visão de um usuário sai numa única
+# consulta, com filtros e paginação aplicados pelo banco e não depois de carregar.
+#
+# Valem também para os tombstones (exclusão de linha privada só para quem a via) e para o
+# /crud/stream: as mudanças de eventos e calendários privados vão só para quem os enxerga.
+
+from typing import Callable, Dict, List, Optional, Set
+
+from fastapi import HTTPException, status
+from sqlalchemy import event, func, inspect, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.models.calendarModel import Calendar
+from app.models.eventsModel import Events, deleted_participants, user_events_association
+from app.models.permissionsModel import Permissions
+from app.models.tombstoneModel import Tombstone, tombstone_audience
+from app.models.userModel import User
+from app.services.event_bus import publish_on_commit
+from app.services.permissions import permission_engine
+
+
+def visible_calendars(user_id: int) -> ColumnElement:
+    return or_(Calendar.is_private.is_(False), Calendar.is_private.is_(None), Calendar.owner_id == user_id)
+
+
+def visible_events(user_id: int) -> ColumnElement:
+    return or_(
+        Events.calendar_id.in_(select(Calendar.id).where(visible_calendars(user_id))),
+        Events.created_by == user_id,
+        Events.id.in_(
+            select(user_events_association.c.event_id).where(user_events_association.c.user_id == user_id)
+        ),
+    )
+
+
+def visible_tombstones(user_id: int) -> ColumnElement:
+    return or_(
+        Tombstone.is_private.is_(False),
+        Tombstone.id.in_(select(tombstone_audience.c.tombstone_id).where(tombstone_audience.c.user_id == user_id)),
+    )
+
+
+POLICIES: Dict[type, Callable[[int], ColumnElement]] = {
+    Calendar: visible_calendars,
+    Events: visible_events,
+    Tombstone: visible_tombstones,
+}
+
+
+async def predicate(db: AsyncSession, model: type, user_id: int) -> Optional[ColumnElement]:
+    """
+    Predicado de visibilidade de `model` para o usuário, para compor no WHERE das consultas.
+    None quando não há restrição (modelo sem política ou administrador).
+    """
+    policy = POLICIES.get(model)
+    if policy is None or await permission_engine.is_admin(db, user_id):
+        return None
+    return policy(user_id)
+
+
+async def ensure_visible(db: AsyncSession, model: type, id: int, user_id: int):
+    """404 (e não 403, para não revelar que existe) se a linha não é visível ao usuário."""
+    where = await predicate(db, model, user_id)
+    if where is None:
+        return
+    result = await db.execute(select(model.id).where(model.id == id, where))
+    if result.scalar() is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"{model.__name__} not found")
+
+
+
+# --- Destinatários do /crud/stream ---
+# Calculados no flush (depois do commit a sessão não consulta mais), com a sessão síncrona.
+
+_ADMINS = "visibility:admins"
+
+
+def _admins(session: Session) -> Set[int]:
+    """Usuários de perfis com "*" e leitura (os mesmos de permission_engine.is_admin), uma consulta por flush."""
+    if _ADMINS not in session.info:
+        result = session.execute(
+            select(User.id)
+            .join(Permissions, Permissions.profile_id == User.profile_id)
+            .where(func.trim(Permissions.entity_name) == "*", Permissions.can_view.is_(True))
+        )
+        session.info[_ADMINS] = set(result.scalars().all())
+    return session.info[_ADMINS]
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _forget_admins(session, flush_context):
+    session.info.pop(_ADMINS, None)
+
+
+def _audience(session: Session, user_ids: Set[int]) -> List[int]:
+    return sorted((user_ids | _admins(session)) - {None})
+
+
+def calendar_recipients(session: Session, calendar: Calendar) -> Optional[List[int]]:
+    """Todos se o calendário é público; senão o dono e os administradores."""
+    values = inspect(calendar).dict
+    if not values.get("is_private"):
+        return None
+    return _audience(session, {values.get("owner_id")})
+
+
+def event_recipients(session: Session, event: Events) -> Optional[List[int]]:
+    """Todos se o calendário do evento é público; senão dono do calendário, criador, participantes e administradores."""
+    values = inspect(event).dict
+    calendar = session.execute(
+        select(Calendar.is_private, Calendar.owner_id).where(Calendar.id == values.get("calendar_id"))
+    ).first()
+    if calendar is None:
+        # Calendário removido no mesmo flush: vale o que estava carregado
+        calendar = values.get("calendar")
+    if calendar is not None and not calendar.is_private:
+        return None
+
+    event_id = values.get("id")
+    if event in session.deleted:
+        participants = deleted_participants(session, event_id)
+    else:
+        result = session.execute(
+            select(user_events_association.c.user_id).where(user_events_association.c.event_id == event_id)
+        )
+        participants = set(result.scalars().all())
+    owner_id = calendar.owner_id if calendar is not None else None
+    return _audience(session, {owner_id, values.get("created_by")} | participants)
+
+
+# O payload leva só ids/revisão; o cliente busca o resto pelas rotas, que aplicam os mesmos predicados
+publish_on_commit(Events, "event", ["id", "uid", "calendar_id", "revision"], recipients=event_recipients)
+publish_on_commit(Calendar, "calendar", ["id", "revision"], recipients=calendar_recipients)
@@ -1,2 +1,3 @@
 from app.utils.string import gen_random_string
 from app.utils.filter import apply_filters_dynamic
+from app.utils.cursor import encode_cursor, decode_cursor
@@ -0,0 +1,147 @@
+# app/utils/aggregate.py
+#
+# Agregações sobre o DSL de filtros: a mesma consulta filtrada de uma lista, mas com
+# GROUP BY e COUNT/MIN/MAX no próprio SQL, para os painéis não baixarem tudo e contarem
+# no cliente. Ex: eventos por calendário por mês
+#
+#   GET /crud/event/aggregate?group_by=calendar_id,date:month&aggregates=count,max:date
+#   -> [{"calendar_id": 1, "date:month": "2026-01-01", "count": 12, "max:date": "..."}, ...]
+#
+# - group_by: colunas do modelo separadas por vírgula; datas aceitam um recorte
+#   (`coluna:day|week|month|year`), devolvido como a data do início do período (semana começa
+#   na segunda). O recorte é em UTC no SQLite e no fuso da sessão no Postgres.
+# - aggregates: `count` (linhas), `count:coluna` (não nulos), `min:coluna`, `max:coluna`.
+#   Sem nenhum, é só `count`. As chaves da resposta são os próprios termos pedidos.
+#
+# E o total das listas (X-Total-Count): exato até TOTAL_COUNT_EXACT_LIMIT linhas, contadas
+# num SELECT com LIMIT; passando disso, no Postgres vale a estimativa do planejador.
+
+import json
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Date, DateTime, cast, func, inspect, literal_column, select
+from sqlalchemy.sql.selectable import Join
+
+from app.core.config import settings
+
+BUCKETS = ("day", "week", "month", "year")
+AGGREGATES = ("count", "min", "max")
+# Nunca agregados nem agrupados (min/max devolveriam o valor)
+PRIVATE_COLUMNS = {"password"}
+
+
+def _column(model, name: str):
+    column = inspect(model).columns.get(name)
+    if column is None or name in PRIVATE_COLUMNS:
+        raise ValueError(f"Invalid field '{name}' for {model.__name__}")
+    return getattr(model, name)
+
+
+def _bucket(column, unit: str, dialect: str):
+    if dialect == "postgresql":
+        # Unidade literal (vem de BUCKETS): com parâmetro, o SELECT e o GROUP BY teriam
+        # expressões diferentes ($1 e $2) e o Postgres recusa a consulta
+        return cast(func.date_trunc(literal_column(f"'{unit}'"), column), Date)
+    # SQLite: datas gravadas como texto ISO
+    if unit == "day":
+        return func.date(column)
+    if unit == "week":
+        return func.date(column, "weekday 0", "-6 days")
+    return func.strftime("%Y-%m-01" if unit == "month" else "%Y-01-01", column)
+
+
+def parse_group_by(model, group_by: Optional[str], dialect: str) -> List[Tuple[str, object]]:
+    """(chave da resposta, expressão) para cada termo de `group_by`."""
+    terms = []
+    for term in filter(None, (part.strip() for part in (group_by or "").split(","))):
+        name, _, unit = term.partition(":")
+        column = _column(model, name)
+        if unit:
+            if unit not in BUCKETS:
+                raise ValueError(f"Invalid bucket '{unit}' (use {', '.join(BUCKETS)})")
+            if not isinstance(column.type, (Date, DateTime)):
+                raise ValueError(f"Field '{name}' is not a date")
+            column = _bucket(column, unit, dialect)
+        terms.append((term, column.label(f"g{len(terms)}")))
+    return terms
+
+
+def parse_aggregates(model, aggregates: Optional[str]) -> List[Tuple[str, object]]:
+    """(chave da resposta, expressão) para cada termo de `aggregates`; `count` se vazio."""
+    terms = []
+    for term in filter(None, (part.strip() for part in (aggregates or "count").split(","))):
+        function, _, name = term.partition(":")
+        if function not in AGGREGATES:
+            raise ValueError(f"Invalid aggregate '{function}' (use {', '.join(AGGREGATES)})")
+        if function == "count" and not name:
+            expression = func.count()
+        elif not name:
+            raise ValueError(f"Aggregate '{function}' needs a field, ex: {function}:date")
+        else:
+            expression = getattr(func, function)(_column(model, name))
+        terms.append((term, expression.label(f"a{len(terms)}")))
+    return terms
+
+
+def _without_duplicates(query, model):
+    """
+    Filtro por relacionamento (ex: users.name+ct+...) faz join e repete a linha por
+    participante; aí a consulta vira `id IN (ids filtrados)` para contar cada linha uma vez.
+    """
+    if not any(isinstance(source, Join) for source in query.get_final_froms()):
+        return query
+    return select(model).where(model.id.in_(query.with_only_columns(model.id).order_by(None)))
+
+
+async def aggregate(db, query, model, group_by: Optional[str] = None, aggregates: Optional[str] = None,
+                    limit: Optional[int] = None) -> List[Dict]:
+    """
+    Agrega a consulta filtrada `query` (select(model) com WHERE/joins), um dicionário por grupo,
+    ordenados pelos grupos. ValueError para termos inválidos.
+    """
+    groups = parse_group_by(model, group_by, db.bind.dialect.name)
+    values = parse_aggregates(model, aggregates)
+    group_columns = [column for _, column in groups]
+    statement = (
+        # maintain_column_froms: um `count` sozinho não tem FROM próprio, fica o da tabela do modelo
+        _without_duplicates(query, model)
+        .with_only_columns(*group_columns, *(column for _, column in values), maintain_column_froms=True)
+        .group_by(*group_columns)
+        .order_by(*group_columns)
+        .limit(min(limit or settings.AGGREGATE_MAX_GROUPS, settings.AGGREGATE_MAX_GROUPS))
+    )
+    keys = [key for key, _ in groups] + [key for key, _ in values]
+    result = await db.execute(statement)
+    return [dict(zip(keys, row)) for row in result.all()]
+
+
+def total_headers(total: int, exact: bool) -> Dict[str, str]:
+    return {"X-Total-Count": str(total), "X-Total-Count-Exact": "true" if exact else "false"}
+
+
+async def _planner_estimate(db, query) -> Optional[int]:
+    try:
+        sql = query.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True})
+    except Exception:
+        return None  # tipo sem forma literal: fica o limite exato
+    # Direto no driver: o texto dos filtros já está no SQL e não pode virar parâmetro (":x")
+    connection = await db.connection()
+    plan = (await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def total_count(db, query, model) -> Tuple[int, bool]:
+    """(total de linhas da consulta filtrada, se é exato)."""
+    ids = _without_duplicates(query, model).with_only_columns(model.id).order_by(None)
+    exact_limit = settings.TOTAL_COUNT_EXACT_LIMIT
+    if not exact_limit or db.bind.dialect.name != "postgresql":
+        return (await db.execute(select(func.count()).select_from(ids.subquery()))).scalar(), True
+
+    counted = (await db.execute(select(func.count()).select_from(ids.limit(exact_limit + 1).subquery()))).scalar()
+    if counted <= exact_limit:
+        return counted, True
+    estimate = await _planner_estimate(db, ids)
+    # Sabidamente passa do limite, mesmo que o planejador ache menos
+    return max(estimate or 0, exact_limit + 1), False
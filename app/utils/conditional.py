@@ -0,0 +1,122 @@
+# app/utils/conditional.py
+#
+# Requisições condicionais (ETag / Last-Modified / 304) para as rotas de leitura.
+#
+# Três formas de validar, da mais barata para a mais cara:
+#   - check(): a rota informa a versão da linha (revision, updated_at...) e o 304 sai
+#     antes de carregar ou serializar qualquer coisa;
+#   - cached(): entradas do cache (app/services/cache.py) guardadas com `cache_entry`
+#     já trazem o ETag, então o 304 sai sem renderizar o JSON;
+#   - respond(): listas sem versão barata — serializa pelo schema e usa o hash do corpo.
+#     Não economiza CPU, mas o cliente que faz polling recebe 304 sem corpo.
+# Os ETags são fracos (W/"..."): dizem que o conteúdo é equivalente, não idêntico byte a
+# byte, o que deixa a compressão livre para mudar a representação.
+
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from functools import lru_cache
+from typing import Any, Optional
+
+from fastapi import HTTPException, Request, Response, status
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+
+
+def weak_etag(*version: Any) -> str:
+    """ETag fraco a partir das partes que identificam a versão (ids, revisions, contagens)."""
+    return f'W/"{hashlib.blake2b(repr(version).encode(), digest_size=16).hexdigest()}"'
+
+
+def payload_etag(body: bytes) -> str:
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def cache_entry(content: Any) -> dict:
+    """Valor para o cache: o conteúdo (JSON) junto com o ETag, calculado uma vez só."""
+    body = json.dumps(content, separators=(",", ":"), sort_keys=True).encode()
+    return {"etag": payload_etag(body), "content": content}
+
+
+@lru_cache(maxsize=None)
+def _adapter(model) -> TypeAdapter:
+    return TypeAdapter(model)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # Comparação fraca (RFC 9110 §13.1.2): ignora o prefixo W/
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def _not_modified_since(if_modified_since: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    # O cabeçalho tem resolução de segundos
+    return last_modified.replace(microsecond=0) <= since
+
+
+class Conditional:
+    """
+    Dependência das rotas de leitura: `conditional: Conditional = Depends()`.
+    Os cabeçalhos de validação também vão para a resposta normal (200), seja ela
+    montada pelo FastAPI a partir do retorno da rota ou pelos métodos abaixo.
+    """
+
+    def __init__(self, request: Request, response: Response):
+        self.request = request
+        self.response = response
+
+    def _headers(self, etag: str, last_modified: Optional[datetime] = None) -> dict:
+        # Cabeçalhos que a rota já anotou (ex: X-Total-Count) seguem também no Response montado aqui
+        headers = {**self.response.headers, "ETag": etag, "Cache-Control": settings.HTTP_CACHE_CONTROL}
+        if last_modified is not None:
+            if last_modified.tzinfo is None:
+                last_modified = last_modified.replace(tzinfo=timezone.utc)
+            headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+        return headers
+
+    def _is_fresh(self, etag: str, last_modified: Optional[datetime] = None) -> bool:
+        if_none_match = self.request.headers.get("if-none-match")
+        if if_none_match is not None:
+            # Com If-None-Match presente, If-Modified-Since é ignorado
+            return _etag_matches(if_none_match, etag)
+        if_modified_since = self.request.headers.get("if-modified-since")
+        return bool(if_modified_since and last_modified and _not_modified_since(if_modified_since, last_modified))
+
+    def check(self, *version: Any, last_modified: Optional[datetime] = None):
+        """
+        Interrompe com 304 se o cliente já tem esta versão; senão só anota ETag e
+        Last-Modified na resposta e a rota segue normalmente.
+        """
+        etag = weak_etag(*version)
+        headers = self._headers(etag, last_modified)
+        if self._is_fresh(etag, last_modified):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        self.response.headers.update(headers)
+
+    def cached(self, entry: dict) -> Response:
+        """Responde uma entrada criada por `cache_entry`."""
+        headers = self._headers(entry["etag"])
+        if self._is_fresh(entry["etag"]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        body = json.dumps(entry["content"], separators=(",", ":")).encode()
+        return Response(body, media_type="application/json", headers=headers)
+
+    def respond(self, content: Any, model: Any) -> Response:
+        """Serializa `content` com o schema `model` (ex: list[Event]) e usa o hash do corpo como ETag."""
+        adapter = _adapter(model)
+        body = adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+        etag = payload_etag(body)
+        headers = self._headers(etag)
+        if self._is_fresh(etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(body, media_type="application/json", headers=headers)
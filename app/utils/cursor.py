@@ -0,0 +1,17 @@
+import base64
+from datetime import datetime
+from typing import Tuple
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    """Cursor de paginação por chave (created_at, id)."""
+    # base64 para o '+' do fuso horário não virar espaço na query string
+    raw = f"{created_at.isoformat()}_{id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Lança ValueError se o cursor não for um '<created_at>_<id>' válido."""
+    raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+    created_at, _, id = raw.rpartition("_")
+    return datetime.fromisoformat(created_at), int(id)
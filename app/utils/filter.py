@@ -1,13 +1,71 @@
 # app/utils/filter.py
 
 from app.Mapping import models_mapping
-from sqlalchemy.types import Integer, String, Float, Boolean, Date, DateTime
+from sqlalchemy.types import Integer, String, Float, Boolean, Date, DateTime, JSON
 from sqlalchemy import and_, or_, func, Column
 from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
 from sqlalchemy.orm import aliased, contains_eager
 from app.models.eventsModel import user_events_association
 from app.models.userModel import User
 
+# Operadores de texto e os índices que os atendem. O DSL só gera duas formas, e os índices
+# de texto (migrations/012_filter_text_indexes.sql, e os lower() também nos modelos) são
+# criados exatamente sobre elas; outra expressão (ex: lower(coluna) LIKE) o planejador não casa:
+# - ct/sw/ew: coluna ILIKE '%valor%' -> gin (coluna gin_trgm_ops) no Postgres. Com menos de 3
+#   letras o trigrama não filtra quase nada e a leitura volta a ser da tabela toda.
+# - ieq (igual sem diferenciar maiúsculas): lower(coluna) = lower(valor) -> btree (lower(coluna)).
+# `eq` continua exato e usa o índice comum da coluna (ex: o unique de users.email).
+TRIGRAM = "trigram"
+LOWER = "lower"
+TEXT_INDEXES = {
+    ("Events", "title"): {TRIGRAM: "ix_events_title_ilike"},
+    ("User", "name"): {TRIGRAM: "ix_users_name_ilike"},
+    ("User", "email"): {TRIGRAM: "ix_users_email_ilike", LOWER: "ix_users_email_lower"},
+    ("Logger", "entity"): {TRIGRAM: "ix_logger_entity_ilike", LOWER: "ix_logger_entity_lower"},
+}
+
+# Campos aceitos em order_by, por modelo: só colunas com índice que comece por elas (btree,
+# migrations/013_sort_indexes.sql e os modelos), para ORDER BY ... LIMIT ler o índice em ordem
+# em vez de ordenar a tabela. "relação.campo" só para relações N:1 (uma linha do outro lado).
+# O desempate é sempre o id (ver apply_ordering).
+# File.content_type fica de fora: o índice dele é varchar_pattern_ops, que não serve para ordenar.
+SORTABLE_FIELDS = {
+    "Events": ("id", "date", "title", "revision", "calendar_id", "created_by", "calendar.name"),
+    "Calendar": ("id", "name", "revision", "owner_id"),
+    "User": ("id", "name", "email", "revision", "profile.name"),
+    "UserProfile": ("id", "name"),
+    "Permissions": ("id", "profile_id"),
+    "File": ("id", "created_at", "filename", "originalname"),
+    "Logger": ("id", "created_at", "user_id", "entity", "user.name"),
+    "NotificationLog": ("id", "user_id"),
+}
+
+_LIKE_ESCAPE = "\\"
+
+
+def _like_literal(value) -> str:
+    """Valor do usuário dentro de um LIKE: % e _ são texto, não curingas."""
+    return str(value).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def text_condition(column, operator: str, value):
+    """Condição dos operadores de texto (ct, sw, ew, ieq) na forma que os índices de TEXT_INDEXES atendem."""
+    if operator == "ieq":
+        return func.lower(column) == func.lower(str(value))
+    pattern = _like_literal(value)
+    if operator == "ct":
+        pattern = f"%{pattern}%"
+    elif operator == "sw":
+        pattern = f"{pattern}%"
+    elif operator == "ew":
+        pattern = f"%{pattern}"
+    else:
+        raise ValueError(f"Operador de texto desconhecido: {operator}")
+    # ILIKE no Postgres; nos outros bancos o SQLAlchemy gera lower(coluna) LIKE lower(padrão)
+    return column.ilike(pattern, escape=_LIKE_ESCAPE)
+
+
 def convert_to_column_type(column, value):
     column_type = column.type
 
@@ -31,6 +89,14 @@ def convert_to_column_type(column, value):
         raise ValueError(f"Invalid value '{value}' for column type {column_type}")
 
 
+def _json_column(db_model, name: str):
+    """Retorna a coluna se `name` for uma coluna JSON/JSONB do modelo, senão None."""
+    column = getattr(db_model, name, None)
+    if column is not None and isinstance(getattr(column, "type", None), JSON):
+        return column
+    return None
+
+
 def apply_filters_dynamic(query, filters: str, model_name: str):
     db_model = models_mapping.get(model_name)
     if not db_model:
@@ -62,8 +128,13 @@ def apply_filters_dynamic(query, filters: str, model_name: str):
             current_model_alias = joined_models[model_name]
             current_model_class = db_model
             
+            json_column = _json_column(db_model, field_path.split('.')[0])
+
+            if json_column is not None and '.' in field_path:
+                # Campo dentro de uma coluna JSON: "data.user.email" -> data['user']['email'] como texto
+                column = json_column[tuple(field_path.split('.')[1:])].as_string()
             # Navega pelos relacionamentos
-            if '.' in field_path:
+            elif '.' in field_path:
                 relations = field_path.split('.')
                 field_name = relations.pop() # O último é o campo
                 
@@ -117,12 +188,8 @@ def apply_filters_dynamic(query, filters: str, model_name: str):
                 group_conditions.append(column > converted_value)
             elif operator == "ge":
                 group_conditions.append(column >= converted_value)
-            elif operator == "ct": # contains (case-insensitive)
-                group_conditions.append(func.lower(column).like(f"%{str(converted_value).lower()}%"))
-            elif operator == "sw": # starts with (case-insensitive)
-                group_conditions.append(func.lower(column).like(f"{str(converted_value).lower()}%"))
-            elif operator == "ew": # ends with (case-insensitive)
-                group_conditions.append(func.lower(column).like(f"%{str(converted_value).lower()}"))
+            elif operator in ("ct", "sw", "ew", "ieq"): # contém, começa, termina, igual (sem diferenciar maiúsculas)
+                group_conditions.append(text_condition(column, operator, converted_value))
             elif operator == "in":
                 values_list = [convert_to_column_type(column, v) for v in str(converted_value).split(',')]
                 group_conditions.append(column.in_(values_list))
@@ -130,4 +197,56 @@ def apply_filters_dynamic(query, filters: str, model_name: str):
         if group_conditions:
             query = query.where(group_operator(*group_conditions))
 
-    return query
\ No newline at end of file
+    return query
+
+
+def parse_order_by(order_by: Optional[str], model_name: str) -> List[Tuple[str, bool]]:
+    """
+    "date+desc,title" -> [("date", True), ("title", False)]. Campos fora de SORTABLE_FIELDS
+    dão ValueError (diferente dos filtros, que ignoram a regra inválida): uma ordem ignorada
+    em silêncio pagina errado sem ninguém perceber.
+    """
+    allowed = SORTABLE_FIELDS.get(model_name, ("id",))
+    terms = []
+    for term in filter(None, (part.strip() for part in (order_by or "").split(","))):
+        # "+" que chegou sem codificar na URL vira espaço
+        field, _, direction = term.replace(" ", "+").partition("+")
+        direction = direction or "asc"
+        if field not in allowed:
+            raise ValueError(f"Cannot order {model_name} by '{field}' (allowed: {', '.join(allowed)})")
+        if direction not in ("asc", "desc"):
+            raise ValueError(f"Invalid direction '{direction}' (use asc or desc)")
+        terms.append((field, direction == "desc"))
+    return terms
+
+
+def apply_ordering(query, order_by: Optional[str], model_name: str, db_model=None):
+    """
+    ORDER BY dos campos pedidos e, no fim, o id como desempate, sempre: sem uma ordem total
+    a paginação por offset repete ou pula linhas entre páginas. O id segue a direção do
+    último campo, para o índice (campo) — que no SQLite já termina no rowid — ser lido
+    inteiro num sentido só. Sem order_by, a ordem é só o id.
+    """
+    db_model = db_model or models_mapping.get(model_name)
+    if db_model is None:
+        return query
+    terms = parse_order_by(order_by, model_name)
+    columns = []
+    joined = {}
+    descending = False
+    for field, descending in terms:
+        if "." in field:
+            relation_name, field_name = field.split(".", 1)
+            alias = joined.get(relation_name)
+            if alias is None:
+                relation = getattr(db_model, relation_name)
+                alias = joined[relation_name] = aliased(relation.property.mapper.class_)
+                # outer join: a linha sem o outro lado (ex: usuário sem perfil) continua na lista
+                query = query.outerjoin(alias, relation.of_type(alias))
+            column = getattr(alias, field_name)
+        else:
+            column = getattr(db_model, field)
+        columns.append(column.desc() if descending else column.asc())
+    if not any(field == "id" for field, _ in terms):
+        columns.append(db_model.id.desc() if descending else db_model.id.asc())
+    return query.order_by(*columns)
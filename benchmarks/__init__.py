@@ -0,0 +1,6 @@
+# benchmarks/__init__.py
+#
+# Suíte de benchmarks ponta a ponta: gera uma base sintética determinística
+# (benchmarks/dataset.py), roda os cenários (benchmarks/scenarios/) contra a aplicação
+# real em processo, sem rede, e grava os resultados em JSON para comparar com uma linha
+# de base (benchmarks/compare.py). Uso: `python -m benchmarks --help`.
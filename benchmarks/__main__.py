@@ -0,0 +1,217 @@
+# benchmarks/__main__.py
+#
+#   python -m benchmarks run --scale tiny                      # SQLite em .benchmarks/
+#   python -m benchmarks run --db postgresql+asyncpg://... --force
+#   python -m benchmarks run --only routes freebusy --output atual.json
+#   python -m benchmarks compare base.json atual.json --threshold 0.15
+#   python -m benchmarks list
+#
+# Tudo roda em processo, sem rede: a aplicação é chamada pelo transporte ASGI do httpx.
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import warnings
+from datetime import datetime, timezone
+
+from benchmarks import compare as comparison
+from benchmarks.config import SCALES, prepare_environment, sqlite_url
+from benchmarks.harness import SCENARIOS, Context, run_scenario, select_scenarios
+
+DEFAULT_WORKDIR = ".benchmarks"
+
+
+def _log(message: str):
+    print(message, file=sys.stderr, flush=True)
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _database_url(args) -> str:
+    if args.db == "sqlite":
+        return sqlite_url(args.workdir)
+    return args.db
+
+
+async def _prepare_dataset(args, engine) -> dict:
+    """Gera a base, ou reaproveita a da execução anterior com --reuse-dataset (mesma escala e semente)."""
+    from benchmarks.dataset import DatasetInfo, generate, is_empty
+
+    marker = os.path.join(args.workdir, "dataset.json")
+    info = DatasetInfo.load(marker)
+    if args.reuse_dataset and info and (info.scale, info.seed) == (args.scale, args.seed):
+        _log(f"Reaproveitando a base {info.scale}/{info.seed}")
+        return info.__dict__
+
+    if engine.dialect.name != "sqlite" and not args.force and not await is_empty(engine):
+        raise SystemExit("A base não está vazia e será recriada; use um banco dedicado e passe --force.")
+    if os.path.exists(marker):
+        os.remove(marker)
+    _log(f"Gerando a base {args.scale} (semente {args.seed})...")
+    info = await generate(engine, args.scale, SCALES[args.scale], args.seed, progress=lambda message: _log(f"  {message}"))
+    info.save(marker)
+    return info.__dict__
+
+
+async def _run_one(item, context, args) -> dict:
+    if item.destructive:
+        # A base deixa de ser a gerada: a próxima execução precisa gerar de novo
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(os.path.join(args.workdir, "dataset.json"))
+    started = time.perf_counter()
+    try:
+        result = await run_scenario(item, context, args.repeat)
+    except Exception as error:
+        result = {"group": item.group, "error": f"{type(error).__name__}: {error}"}
+        _log(f"{item.name:<40} ERRO {result['error']}")
+        return result
+    _log(f"{item.name:<40} p50 {result['p50_ms']:>10.3f} ms  p95 {result['p95_ms']:>10.3f} ms"
+         f"  ({time.perf_counter() - started:.1f}s)")
+    return result
+
+
+async def _run(args) -> dict:
+    import httpx
+
+    import main
+    from app.database import database
+    import benchmarks.scenarios  # noqa: F401
+
+    database.engine.echo = False
+    selected = select_scenarios(args.only)
+    if not selected:
+        raise SystemExit("Nenhum cenário corresponde a --only.")
+
+    dataset = await _prepare_dataset(args, database.engine)
+    results = {}
+    # Os prints da aplicação (lembretes, fila, encerramento) não poluem o relatório
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        async with main.app.router.lifespan_context(main.app):
+            # As rotinas agendadas rodariam no meio das medições; o tick de lembretes é um cenário
+            main.scheduler.pause()
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+                context = Context(client=client, scale=SCALES[args.scale], workdir=args.workdir,
+                                  options={"upload_mb": args.upload_mb, "concurrency": args.concurrency})
+                for item in selected:
+                    results[item.name] = await _run_one(item, context, args)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "dialect": database.engine.dialect.name,
+            "scale": args.scale,
+            "scale_detail": SCALES[args.scale].as_dict(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "options": {"upload_mb": args.upload_mb, "concurrency": args.concurrency, "query_budgets": args.query_budgets},
+            "dataset": dataset,
+        },
+        "scenarios": results,
+    }
+
+
+def command_run(args) -> int:
+    # Avisos repetidos a cada requisição (datetime.utcnow() no JWT, operation id duplicado
+    # do HEAD no OpenAPI) atrapalham a leitura do relatório
+    warnings.filterwarnings("ignore", category=DeprecationWarning)
+    warnings.filterwarnings("ignore", module="fastapi.openapi")
+    args.workdir = os.path.abspath(args.workdir)
+    prepare_environment(_database_url(args), args.workdir)
+    if args.query_budgets:
+        # Rota acima do query_budget() responde 500 e o cenário falha; os tempos medidos
+        # incluem o custo da inspeção, então não servem de linha de base
+        os.environ["QUERY_INSPECTOR_ENABLED"] = "true"
+        os.environ["QUERY_INSPECTOR_MODE"] = "raise"
+    report = asyncio.run(_run(args))
+    output = args.output or os.path.join(args.workdir, f"results-{args.scale}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    _log(f"Resultados em {output}")
+
+    if args.baseline:
+        return command_compare(argparse.Namespace(
+            baseline=args.baseline, current=output, metric=args.metric, threshold=args.threshold, min_delta_ms=args.min_delta_ms,
+        ))
+    return 1 if any("error" in result for result in report["scenarios"].values()) else 0
+
+
+def command_compare(args) -> int:
+    baseline, current = comparison.load(args.baseline), comparison.load(args.current)
+    for problem in comparison.mismatches(baseline, current):
+        _log(f"Aviso: execuções não comparáveis ({problem})")
+    rows = comparison.compare(baseline, current, args.metric, args.threshold, args.min_delta_ms)
+    print(comparison.format_table(rows, args.metric))
+    regressions = [row["scenario"] for row in rows if row["status"] == "regression"]
+    if regressions:
+        _log(f"{len(regressions)} regressão(ões): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+def command_list(args) -> int:
+    prepare_environment(sqlite_url(os.path.abspath(DEFAULT_WORKDIR)), os.path.abspath(DEFAULT_WORKDIR))
+    import benchmarks.scenarios  # noqa: F401
+
+    for item in SCENARIOS.values():
+        print(f"{item.name:<40} {item.group:<12} {item.description.splitlines()[0] if item.description else ''}")
+    return 0
+
+
+def _add_compare_options(parser):
+    parser.add_argument("--metric", default="p50_ms", help="Campo comparado (p50_ms, p95_ms, mean_ms...)")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Piora relativa que conta como regressão (0.10 = 10%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.0, help="Piora absoluta mínima para contar como regressão")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks da API com base sintética.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Gera a base (ou reaproveita) e roda os cenários")
+    run.add_argument("--db", default="sqlite", help='"sqlite" (arquivo no workdir) ou uma URL async do SQLAlchemy')
+    run.add_argument("--scale", choices=list(SCALES), default="tiny")
+    run.add_argument("--seed", type=int, default=42)
+    run.add_argument("--repeat", type=int, default=30, help="Iterações medidas por cenário (alguns fixam o próprio)")
+    run.add_argument("--only", nargs="*", default=[], help="Prefixos de nome ou grupos (routes, files, services, compression, maintenance)")
+    run.add_argument("--workdir", default=DEFAULT_WORKDIR)
+    run.add_argument("--output", help="Arquivo JSON de saída (padrão: <workdir>/results-<escala>.json)")
+    run.add_argument("--reuse-dataset", action="store_true", help="Não recria a base se a anterior tem a mesma escala e semente")
+    run.add_argument("--force", action="store_true", help="Permite recriar as tabelas de um banco que não é o SQLite do workdir")
+    run.add_argument("--upload-mb", type=float, default=8, help="Tamanho de cada upload/download")
+    run.add_argument("--concurrency", type=int, default=4, help="Uploads simultâneos")
+    run.add_argument("--query-budgets", action="store_true",
+                     help="Liga o inspetor de consultas e falha os cenários cujas rotas passam do query_budget()")
+    run.add_argument("--baseline", help="Compara com este resultado ao terminar")
+    _add_compare_options(run)
+    run.set_defaults(handler=command_run)
+
+    compare = commands.add_parser("compare", help="Compara dois resultados e sai com 1 se houver regressão")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    _add_compare_options(compare)
+    compare.set_defaults(handler=command_compare)
+
+    listing = commands.add_parser("list", help="Lista os cenários")
+    listing.set_defaults(handler=command_list)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
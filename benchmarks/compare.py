@@ -0,0 +1,58 @@
+# benchmarks/compare.py
+#
+# Comparação de um resultado com uma linha de base. Um cenário regrediu quando a
+# métrica (p50 por padrão) piorou mais que `threshold` e mais que `min_delta_ms` em valor
+# absoluto — o segundo limite evita alarmes por ruído em cenários de microssegundos.
+
+import json
+from typing import List
+
+# Metadados que precisam bater para a comparação fazer sentido
+COMPARABLE_META = ("scale", "seed", "dialect")
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def mismatches(baseline: dict, current: dict) -> List[str]:
+    return [
+        f"{key}: {baseline['meta'].get(key)} != {current['meta'].get(key)}"
+        for key in COMPARABLE_META
+        if baseline["meta"].get(key) != current["meta"].get(key)
+    ]
+
+
+def compare(baseline: dict, current: dict, metric: str = "p50_ms", threshold: float = 0.10,
+            min_delta_ms: float = 0.0) -> List[dict]:
+    rows = []
+    names = list(baseline["scenarios"]) + [name for name in current["scenarios"] if name not in baseline["scenarios"]]
+    for name in names:
+        before = baseline["scenarios"].get(name, {}).get(metric)
+        after = current["scenarios"].get(name, {}).get(metric)
+        if before is None or after is None:
+            rows.append({"scenario": name, "baseline": before, "current": after, "change": None,
+                         "status": "new" if before is None else "missing"})
+            continue
+        change = (after - before) / before if before else 0.0
+        if change > threshold and after - before > min_delta_ms:
+            status = "regression"
+        elif change < -threshold and before - after > min_delta_ms:
+            status = "improvement"
+        else:
+            status = "ok"
+        rows.append({"scenario": name, "baseline": before, "current": after, "change": round(change, 4), "status": status})
+    return rows
+
+
+def format_table(rows: List[dict], metric: str) -> str:
+    width = max([len(row["scenario"]) for row in rows] + [8])
+    lines = [f"{'scenario':<{width}}  {'baseline':>12}  {'current':>12}  {'change':>8}  status ({metric})"]
+    for row in rows:
+        before = "-" if row["baseline"] is None else f"{row['baseline']:.4f}"
+        after = "-" if row["current"] is None else f"{row['current']:.4f}"
+        change = "-" if row["change"] is None else f"{row['change']:+.1%}"
+        marker = "  <<<" if row["status"] == "regression" else ""
+        lines.append(f"{row['scenario']:<{width}}  {before:>12}  {after:>12}  {change:>8}  {row['status']}{marker}")
+    return "\n".join(lines)
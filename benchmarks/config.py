@@ -0,0 +1,80 @@
+# benchmarks/config.py
+#
+# Escalas da base sintética e o ambiente mínimo para importar a aplicação fora do
+# servidor. Tudo aqui precisa acontecer antes do primeiro `import app...`, porque o
+# Settings é lido na importação.
+
+import os
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+
+
+@dataclass(frozen=True)
+class Scale:
+    users: int
+    calendars: int
+    events: int
+    participants_per_event: int  # máximo; cada evento sorteia de 1 até isso
+    notifications: int
+    audit_logs: int
+    files: int
+    outbox: int  # mensagens na fila para o cenário de drenagem
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+SCALES = {
+    # Para rodar em segundos (CI, verificação rápida depois de uma mudança)
+    "tiny": Scale(users=50, calendars=10, events=2_000, participants_per_event=3,
+                  notifications=10_000, audit_logs=10_000, files=1_000, outbox=500),
+    "small": Scale(users=1_000, calendars=50, events=20_000, participants_per_event=4,
+                   notifications=200_000, audit_logs=100_000, files=20_000, outbox=2_000),
+    # 10k usuários / 100k eventos: a carga de referência da visibilidade por linha
+    "medium": Scale(users=10_000, calendars=500, events=100_000, participants_per_event=4,
+                    notifications=1_000_000, audit_logs=1_000_000, files=100_000, outbox=10_000),
+    # Volume de produção pesado: 10M notificações, 1M arquivos
+    "large": Scale(users=10_000, calendars=500, events=100_000, participants_per_event=4,
+                   notifications=10_000_000, audit_logs=5_000_000, files=1_000_000, outbox=10_000),
+    # 1M eventos: busca textual e listas de eventos em volume de vários anos de uso
+    "events-1m": Scale(users=10_000, calendars=500, events=1_000_000, participants_per_event=3,
+                       notifications=100_000, audit_logs=100_000, files=10_000, outbox=2_000),
+}
+
+# Data de referência da base: fixa, para que a mesma semente gere exatamente as mesmas linhas
+ANCHOR = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+BENCH_PASSWORD = "bench"
+ADMIN_EMAIL = "admin@example.com"
+
+
+def sqlite_url(workdir: str) -> str:
+    return f"sqlite+aiosqlite:///{os.path.abspath(os.path.join(workdir, 'bench.sqlite'))}"
+
+
+def prepare_environment(database_url: str, workdir: str):
+    """
+    Variáveis exigidas pelo Settings. As credenciais são fictícias: nada sai da máquina
+    (e-mail e WhatsApp não são chamados, a drenagem da fila usa um stub local).
+    """
+    os.makedirs(workdir, exist_ok=True)
+    os.environ["DATABASE_URL"] = database_url
+    defaults = {
+        "SECRET_KEY": "benchmark-secret-key-com-32-bytes-ou-mais",
+        "ALGORITHM": "HS256",
+        "ACCESS_TOKEN_EXPIRE_MINUTES": "600",
+        "WHATSAPP_SERVICE_URL": "http://127.0.0.1:9",
+        "MAIL_USERNAME": "bench",
+        "MAIL_PASSWORD": "bench",
+        "MAIL_FROM": "benchmark@example.com",
+        "MAIL_PORT": "25",
+        "MAIL_SERVER": "127.0.0.1",
+        "MAIL_FROM_NAME": "Benchmark",
+    }
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+    # Arquivos gerados pela aplicação ficam no diretório de trabalho, não no repositório
+    os.environ["UPLOAD_DIR"] = os.path.join(workdir, "files")
+    os.environ["OPENAPI_PATH"] = os.path.join(workdir, "openapi.json")
+    os.environ["LOG_ARCHIVE_DIR"] = os.path.join(workdir, "archive")
+    os.environ["EVENT_BUS_BACKEND"] = "memory"
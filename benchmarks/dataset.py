@@ -0,0 +1,283 @@
+# benchmarks/dataset.py
+#
+# Gerador da base sintética. Tudo sai de um random.Random(seed) e de uma data de
+# referência fixa (config.ANCHOR), então a mesma escala e a mesma semente produzem
+# exatamente as mesmas linhas — os resultados de duas execuções são comparáveis.
+#
+# As linhas são inseridas em lote pelo Core (executemany), com ids e revisões explícitos;
+# no Postgres as sequências são ajustadas no fim. Os ids fixos abaixo são usados pelos
+# cenários sem precisar consultar a base.
+
+import itertools
+import json
+import os
+import random
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable, Iterator, List
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from benchmarks.config import ADMIN_EMAIL, ANCHOR, BENCH_PASSWORD, Scale
+
+ADMIN_USER_ID = 1
+MEMBER_USER_ID = 2  # perfil sem "*": passa pelos predicados de visibilidade
+ADMIN_PROFILE_ID, MEMBER_PROFILE_ID, VIEWER_PROFILE_ID = 1, 2, 3
+
+BATCH_SIZE = 5000
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+
+WORDS = [
+    "reunião", "cliente", "sprint", "revisão", "planejamento", "visita", "suporte", "treinamento",
+    "entrega", "financeiro", "comercial", "diretoria", "implantação", "alinhamento", "retrospectiva",
+]
+RULES = [
+    "FREQ=WEEKLY;COUNT=10",
+    "FREQ=DAILY;COUNT=5",
+    "FREQ=WEEKLY;BYDAY=MO,WE;COUNT=12",
+    "FREQ=MONTHLY;COUNT=6",
+]
+CONTENT_TYPES = ["image/png", "image/jpeg", "application/pdf", "text/plain", "application/zip"]
+ENTITIES = ["Events", "Calendar", "User", "File", "UserProfile"]
+
+
+@dataclass
+class DatasetInfo:
+    scale: str
+    seed: int
+    counts: dict
+    seconds: float
+
+    def save(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.__dict__, f, indent=2)
+
+    @classmethod
+    def load(cls, path: str):
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return cls(**json.load(f))
+
+
+def _batches(rows: Iterator[dict], size: int = BATCH_SIZE) -> Iterator[List[dict]]:
+    iterator = iter(rows)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Generator:
+    def __init__(self, scale: Scale, seed: int):
+        self.scale = scale
+        self.rng = random.Random(seed)
+        self._revision = itertools.count(1)
+
+    def _sentence(self, words: int) -> str:
+        return " ".join(self.rng.choice(WORDS) for _ in range(words)).capitalize()
+
+    def _hex(self, bits: int) -> str:
+        return f"{self.rng.getrandbits(bits):0{bits // 4}x}"
+
+    def profiles(self) -> Iterator[dict]:
+        yield {"id": ADMIN_PROFILE_ID, "name": "Administrador"}
+        yield {"id": MEMBER_PROFILE_ID, "name": "Colaborador"}
+        yield {"id": VIEWER_PROFILE_ID, "name": "Leitura"}
+
+    def permissions(self) -> Iterator[dict]:
+        grants = [
+            (ADMIN_PROFILE_ID, "*", (True, True, True, True)),
+            (MEMBER_PROFILE_ID, "Events", (True, True, True, False)),
+            (MEMBER_PROFILE_ID, "Calendar", (True, True, True, False)),
+            (MEMBER_PROFILE_ID, "User", (True, False, False, False)),
+            (MEMBER_PROFILE_ID, "File", (True, True, False, False)),
+            (MEMBER_PROFILE_ID, "Logger", (True, False, False, False)),
+            (VIEWER_PROFILE_ID, "Events", (True, False, False, False)),
+            (VIEWER_PROFILE_ID, "Calendar", (True, False, False, False)),
+            (VIEWER_PROFILE_ID, "User", (True, False, False, False)),
+        ]
+        for id, (profile_id, entity, (view, create, update, delete)) in enumerate(grants, start=1):
+            yield {"id": id, "profile_id": profile_id, "entity_name": entity, "can_view": view,
+                   "can_create": create, "can_update": update, "can_delete": delete}
+
+    def users(self, password_hash: str) -> Iterator[dict]:
+        for id in range(1, self.scale.users + 1):
+            if id == ADMIN_USER_ID:
+                profile_id, email = ADMIN_PROFILE_ID, ADMIN_EMAIL
+            elif id == MEMBER_USER_ID:
+                profile_id, email = MEMBER_PROFILE_ID, "member@example.com"
+            else:
+                profile_id = self.rng.choices(
+                    [ADMIN_PROFILE_ID, MEMBER_PROFILE_ID, VIEWER_PROFILE_ID], weights=[5, 70, 25]
+                )[0]
+                email = f"user{id}@example.com"
+            yield {"id": id, "name": f"Usuário {id}", "email": email, "password": password_hash,
+                   "phone_number": f"55119{id:08d}", "profile_id": profile_id, "revision": next(self._revision)}
+
+    def calendars(self) -> Iterator[dict]:
+        for id in range(1, self.scale.calendars + 1):
+            yield {
+                "id": id, "name": f"Agenda {id}", "color": f"#{self._hex(24)}", "visible": True,
+                "is_private": self.rng.random() < 0.3, "owner_id": self.rng.randint(1, self.scale.users),
+                "notification_type": self.rng.choice(["email", "whatsapp", "both", "none"]),
+                "notification_time_before": self.rng.choice([10, 15, 30, 60]),
+                "notification_repeats": self.rng.choice([1, 2]),
+                "revision": next(self._revision),
+            }
+
+    def events(self, participants: List[dict]) -> Iterator[dict]:
+        """Eventos num ano centrado em ANCHOR; preenche `participants` com as linhas de user_events."""
+        first_day = ANCHOR - timedelta(days=180)
+        for id in range(1, self.scale.events + 1):
+            day = first_day + timedelta(days=self.rng.randrange(360))
+            all_day = self.rng.random() < 0.05
+            if all_day:
+                start, end = day, None
+            else:
+                start = day + timedelta(hours=self.rng.randint(8, 17), minutes=15 * self.rng.randrange(4))
+                end = start + timedelta(minutes=self.rng.choice([30, 45, 60, 90, 120]))
+            status = self.rng.choices(["confirmed", "tentative", "cancelled"], weights=[95, 3, 2])[0]
+            yield {
+                "id": id, "uid": f"bench-{id}", "title": self._sentence(3), "description": self._sentence(8),
+                "date": start, "endDate": end, "isAllDay": all_day,
+                "startTime": None if all_day else f"{start:%H:%M}", "endTime": None if all_day else f"{end:%H:%M}",
+                "color": f"#{self._hex(24)}", "calendar_id": self.rng.randint(1, self.scale.calendars),
+                "status": status, "recurring_rule": self.rng.choice(RULES) if self.rng.random() < 0.1 else None,
+                "created_by": self.rng.randint(1, self.scale.users),
+                "notification_repeats": self.rng.randint(1, 2) if self.rng.random() < 0.2 else None,
+                "notifications_sent_count": 0, "revision": next(self._revision),
+            }
+            count = self.rng.randint(1, self.scale.participants_per_event)
+            for user_id in self.rng.sample(range(1, self.scale.users + 1), min(count, self.scale.users)):
+                participants.append({"user_id": user_id, "event_id": id})
+
+    def notifications(self) -> Iterator[dict]:
+        for id in range(1, self.scale.notifications + 1):
+            # Um quinto vai para o administrador, que é quem os cenários HTTP usam: caixa cheia
+            user_id = ADMIN_USER_ID if self.rng.random() < 0.2 else self.rng.randint(1, self.scale.users)
+            yield {
+                "id": id, "user_id": user_id, "event_id": self.rng.randint(1, self.scale.events),
+                "channel": self.rng.choice(["email", "whatsapp"]), "status": "sent",
+                "content": f"Lembrete: {self._sentence(3)}", "is_read": self.rng.random() < 0.7,
+                "created_at": ANCHOR - timedelta(seconds=self.rng.randrange(365 * 86400)),
+            }
+
+    def audit_logs(self) -> Iterator[dict]:
+        for id in range(1, self.scale.audit_logs + 1):
+            user_id = self.rng.randint(1, self.scale.users)
+            yield {
+                "id": id, "action": self.rng.choice(["create", "update", "delete"]), "user_id": user_id,
+                "entity": self.rng.choice(ENTITIES),
+                "data": {"id": self.rng.randint(1, self.scale.events), "user": {"email": f"user{user_id}@example.com"}},
+                "created_at": ANCHOR - timedelta(seconds=self.rng.randrange(120 * 86400)),
+            }
+
+    def files(self) -> Iterator[dict]:
+        for id in range(1, self.scale.files + 1):
+            sha256 = self._hex(256)
+            content_type = self.rng.choice(CONTENT_TYPES)
+            name = f"arquivo-{id}.{content_type.rsplit('/', 1)[1]}"
+            yield {
+                "id": id, "filename": name, "originalname": name, "content_type": content_type,
+                "file_path": f"/nonexistent/{sha256}", "size": self.rng.randint(1_000, 5_000_000), "sha256": sha256,
+                "owner_id": self.rng.randint(1, self.scale.users),
+                "event_id": self.rng.randint(1, self.scale.events) if self.rng.random() < 0.3 else None,
+                "created_at": ANCHOR - timedelta(seconds=self.rng.randrange(365 * 86400)),
+            }
+
+
+async def _insert(engine: AsyncEngine, table, rows: Iterator[dict]) -> int:
+    total = 0
+    for batch in _batches(rows):
+        async with engine.begin() as conn:
+            await conn.execute(table.insert(), batch)
+        total += len(batch)
+    return total
+
+
+async def _sync_sequences(engine: AsyncEngine, tables):
+    """Postgres: ids e revisões foram dados explicitamente, então as sequências ficam para trás."""
+    async with engine.begin() as conn:
+        for table in tables:
+            await conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                f"COALESCE((SELECT max(id) FROM {table.name}), 0) + 1, false)"
+            ))
+        await conn.execute(text("SELECT setval('sync_revision_seq', 1000000000)"))
+
+
+async def _apply_migration(engine: AsyncEngine, name: str):
+    """Postgres: o create_all não cria o que só existe nas migrations (ex: search_vector da busca)."""
+    with open(os.path.join(MIGRATIONS_DIR, name)) as f:
+        script = f.read()
+    async with engine.begin() as conn:
+        raw = await conn.get_raw_connection()
+        # O asyncpg executa o script inteiro (funções com $$ incluídas) sem parâmetros
+        await raw.driver_connection.execute(script)
+
+
+async def is_empty(engine: AsyncEngine) -> bool:
+    from app.models.userModel import User
+    async with engine.connect() as conn:
+        try:
+            return (await conn.execute(select(func.count()).select_from(User))).scalar() == 0
+        except Exception:
+            return True  # tabelas ainda não existem
+
+
+async def generate(engine: AsyncEngine, scale_name: str, scale: Scale, seed: int,
+                   progress: Callable[[str], None] = lambda message: None) -> DatasetInfo:
+    """Recria o schema e popula a base. Apaga tudo o que existir nas tabelas da aplicação."""
+    # Importar os routers registra todos os modelos no metadata, como no main.py
+    import main  # noqa: F401
+    from app.core.security import get_password_hash
+    from app.database.database import Base
+    from app.models.calendarModel import Calendar
+    from app.models.eventsModel import Events, user_events_association
+    from app.models.fileModel import File
+    from app.models.logModel import Logger
+    from app.models.notificationLogModel import NotificationLog
+    from app.models.permissionsModel import Permissions
+    from app.models.userModel import User
+    from app.models.userProfileModel import UserProfile
+
+    started = time.perf_counter()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    generator = Generator(scale, seed)
+    # bcrypt é caro de propósito: um hash só, compartilhado por todos os usuários
+    password_hash = get_password_hash(BENCH_PASSWORD)
+    participants: List[dict] = []
+    counts = {}
+    steps = [
+        ("user_profile", UserProfile.__table__, generator.profiles()),
+        ("permissions", Permissions.__table__, generator.permissions()),
+        ("users", User.__table__, generator.users(password_hash)),
+        ("calendars", Calendar.__table__, generator.calendars()),
+        ("events", Events.__table__, generator.events(participants)),
+        ("user_events", user_events_association, iter(participants)),
+        ("notification_logs", NotificationLog.__table__, generator.notifications()),
+        ("logger", Logger.__table__, generator.audit_logs()),
+        ("files", File.__table__, generator.files()),
+    ]
+    for name, table, rows in steps:
+        step_started = time.perf_counter()
+        counts[name] = await _insert(engine, table, rows)
+        progress(f"{name}: {counts[name]} linhas em {time.perf_counter() - step_started:.1f}s")
+
+    if engine.dialect.name == "postgresql":
+        await _sync_sequences(engine, [UserProfile.__table__, Permissions.__table__, User.__table__,
+                                       Calendar.__table__, Events.__table__, NotificationLog.__table__,
+                                       Logger.__table__, File.__table__])
+        await _apply_migration(engine, "011_full_text_search.sql")
+        await _apply_migration(engine, "012_filter_text_indexes.sql")
+        async with engine.begin() as conn:
+            await conn.execute(text("ANALYZE"))
+
+    return DatasetInfo(scale=scale_name, seed=seed, counts=counts, seconds=round(time.perf_counter() - started, 2))
@@ -0,0 +1,145 @@
+# benchmarks/harness.py
+#
+# Registro e execução dos cenários.
+#
+# Um cenário é uma função assíncrona que recebe o Context, faz o preparo que não deve
+# entrar na medição e devolve a operação a ser medida (outra função assíncrona sem
+# argumentos). A operação pode devolver um dict de números (bytes economizados, linhas
+# movidas...), que entra no resultado pela média das iterações. `inner` é para
+# microbenchmarks: a operação executa N chamadas e os tempos são divididos por N.
+# Se precisar desfazer o preparo, a fábrica devolve (operação, teardown).
+
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+import httpx
+
+from benchmarks.config import Scale
+
+Operation = Callable[[], Awaitable[Optional[dict]]]
+Factory = Callable[["Context"], Awaitable[Union[Operation, Tuple[Operation, Callable[[], Awaitable[None]]]]]]
+
+
+@dataclass
+class Scenario:
+    name: str
+    group: str
+    factory: Factory
+    repeat: Optional[int] = None  # None usa o --repeat da linha de comando
+    warmup: int = 2
+    inner: int = 1
+    # Altera a base de forma que outra execução não repetiria (ex: arquivamento)
+    destructive: bool = False
+    description: str = ""
+
+
+SCENARIOS: Dict[str, Scenario] = {}
+
+
+def scenario(name: str, group: str, repeat: Optional[int] = None, warmup: int = 2, inner: int = 1,
+             destructive: bool = False):
+    """Registra um cenário: `@scenario("calendar.month_view", "routes")`."""
+    def decorator(factory):
+        if name in SCENARIOS:
+            raise ValueError(f"Cenário duplicado: {name}")
+        SCENARIOS[name] = Scenario(name, group, factory, repeat, warmup, inner, destructive,
+                                   (factory.__doc__ or "").strip())
+        return factory
+    return decorator
+
+
+@dataclass
+class Context:
+    client: httpx.AsyncClient
+    scale: Scale
+    workdir: str
+    options: dict = field(default_factory=dict)
+    _tokens: Dict[int, dict] = field(default_factory=dict)
+
+    def auth(self, user_id: int) -> dict:
+        """Cabeçalho Authorization de um usuário da base (o login em si é um cenário à parte)."""
+        if user_id not in self._tokens:
+            from app.core.security import create_access_token
+            token = create_access_token({"id": user_id, "email": f"user{user_id}@example.com"})
+            self._tokens[user_id] = {"Authorization": f"Bearer {token}"}
+        return self._tokens[user_id]
+
+
+def expect(response: httpx.Response, status: int = 200) -> httpx.Response:
+    """Falha o cenário se a resposta não tiver o status esperado (medir erro rápido não vale)."""
+    if response.status_code != status:
+        raise RuntimeError(
+            f"{response.request.method} {response.request.url} -> {response.status_code}: {response.text[:200]}"
+        )
+    return response
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    if len(ordered) == 1:
+        return ordered[0]
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(samples_ms: List[float]) -> dict:
+    ordered = sorted(samples_ms)
+    mean = statistics.fmean(ordered)
+    return {
+        "iterations": len(ordered),
+        "mean_ms": round(mean, 4),
+        "stdev_ms": round(statistics.stdev(ordered), 4) if len(ordered) > 1 else 0.0,
+        "min_ms": round(ordered[0], 4),
+        "p50_ms": round(_percentile(ordered, 0.50), 4),
+        "p95_ms": round(_percentile(ordered, 0.95), 4),
+        "p99_ms": round(_percentile(ordered, 0.99), 4),
+        "max_ms": round(ordered[-1], 4),
+        "ops_per_sec": round(1000 / mean, 2) if mean > 0 else None,
+    }
+
+
+async def run_scenario(item: Scenario, context: Context, repeat: int) -> dict:
+    operation = await item.factory(context)
+    teardown = None
+    if isinstance(operation, tuple):
+        operation, teardown = operation
+
+    samples: List[float] = []
+    metrics: Dict[str, List[float]] = {}
+    try:
+        for _ in range(item.warmup):
+            await operation()
+        for _ in range(item.repeat or repeat):
+            started = time.perf_counter()
+            extra = await operation()
+            samples.append((time.perf_counter() - started) * 1000 / item.inner)
+            for key, value in (extra or {}).items():
+                metrics.setdefault(key, []).append(value)
+    finally:
+        if teardown is not None:
+            await teardown()
+
+    result = {"group": item.group, **summarize(samples)}
+    if item.inner > 1:
+        result["inner"] = item.inner
+    for key, values in metrics.items():
+        result[key] = round(statistics.fmean(values), 4)
+    # Operações que informam quantos bytes processaram ganham a vazão
+    if "bytes" in result and result["mean_ms"] > 0:
+        result["mb_per_sec"] = round(result["bytes"] / (1024 * 1024) / (result["mean_ms"] / 1000), 2)
+    if "rows" in result and result["mean_ms"] > 0:
+        result["rows_per_sec"] = round(result["rows"] / (result["mean_ms"] / 1000), 1)
+    return result
+
+
+def select_scenarios(patterns: List[str]) -> List[Scenario]:
+    """Cenários cujo nome ou grupo começa por algum dos padrões (todos, se vazio)."""
+    if not patterns:
+        return list(SCENARIOS.values())
+    return [
+        item for item in SCENARIOS.values()
+        if any(item.name.startswith(pattern) or item.group == pattern for pattern in patterns)
+    ]
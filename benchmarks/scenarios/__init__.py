@@ -0,0 +1,6 @@
+# benchmarks/scenarios/__init__.py
+#
+# Importar os módulos registra os cenários; a ordem aqui é a ordem de execução
+# (a manutenção, que esvazia tabelas, fica por último em services).
+
+from benchmarks.scenarios import routes, files, plans, services  # noqa: F401
@@ -0,0 +1,139 @@
+# benchmarks/scenarios/files.py
+#
+# Upload em streaming, download (inteiro e revalidado) e o catálogo de arquivos.
+# O tamanho e a concorrência dos uploads vêm de --upload-mb e --concurrency: o padrão é
+# leve; `--upload-mb 200 --concurrency 4` reproduz a carga de uploads grandes simultâneos.
+
+import asyncio
+import itertools
+
+from benchmarks.dataset import ADMIN_USER_ID
+from benchmarks.harness import Context, expect, scenario
+
+CHUNK = 1024 * 1024
+
+
+def _body(size: int, tag: str):
+    """Corpo gerado sob demanda; o prefixo muda a cada upload para o SHA-256 não repetir."""
+    block = bytes(range(256)) * (CHUNK // 256)
+
+    async def chunks():
+        head = tag.encode().ljust(64, b".")
+        sent = 0
+        while sent < size:
+            data = block[:min(CHUNK, size - sent)]
+            if sent == 0:
+                data = head + data[len(head):]
+            sent += len(data)
+            yield data
+    return chunks()
+
+
+async def _upload(context: Context, size: int, tag: str) -> int:
+    response = expect(await context.client.put(
+        "/crud/files/stream", params={"filename": f"{tag}.bin"}, content=_body(size, tag),
+        headers={**context.auth(ADMIN_USER_ID), "Content-Type": "application/octet-stream", "Content-Length": str(size)},
+    ))
+    return response.json()["id"]
+
+
+async def _delete(context: Context, ids):
+    for id in ids:
+        await context.client.delete(f"/crud/files/{id}", headers=context.auth(ADMIN_USER_ID))
+
+
+@scenario("files.upload_stream", "files", repeat=3, warmup=0)
+async def upload_stream(context: Context):
+    """`--concurrency` uploads simultâneos de `--upload-mb` MB pelo PUT /crud/files/stream."""
+    size = int(context.options["upload_mb"] * 1024 * 1024)
+    concurrency = context.options["concurrency"]
+    counter = itertools.count()
+    uploaded = []
+
+    async def operation():
+        batch = next(counter)
+        ids = await asyncio.gather(*(_upload(context, size, f"upload-{batch}-{i}") for i in range(concurrency)))
+        uploaded.extend(ids)
+        return {"bytes": size * concurrency}
+
+    async def teardown():
+        await _delete(context, uploaded)
+    return operation, teardown
+
+
+@scenario("files.download", "files", repeat=5)
+async def download(context: Context):
+    """Download completo do mesmo arquivo, repetidas vezes."""
+    size = int(context.options["upload_mb"] * 1024 * 1024)
+    id = await _upload(context, size, "download")
+
+    async def operation():
+        response = expect(await context.client.get(f"/crud/files/download/{id}"))
+        return {"bytes": len(response.content)}
+
+    async def teardown():
+        await _delete(context, [id])
+    return operation, teardown
+
+
+@scenario("files.download_not_modified", "files")
+async def download_not_modified(context: Context):
+    """Download revalidado pelo ETag (SHA-256): 304 sem ler o disco."""
+    size = int(context.options["upload_mb"] * 1024 * 1024)
+    id = await _upload(context, size, "download-304")
+    etag = expect(await context.client.head(f"/crud/files/download/{id}")).headers["etag"]
+
+    async def operation():
+        expect(await context.client.get(f"/crud/files/download/{id}", headers={"If-None-Match": etag}), 304)
+        return {"bytes_saved": size}
+
+    async def teardown():
+        await _delete(context, [id])
+    return operation, teardown
+
+
+@scenario("files.catalog_first_page", "files")
+async def catalog_first_page(context: Context):
+    """Primeira página do catálogo, mais recentes primeiro."""
+    headers = context.auth(ADMIN_USER_ID)
+
+    async def operation():
+        expect(await context.client.get("/crud/files/", params={"limit": 50}, headers=headers))
+    return operation
+
+
+@scenario("files.catalog_deep_page", "files")
+async def catalog_deep_page(context: Context):
+    """Página 20 pelo cursor (X-Next-Cursor): o custo não deve crescer com a profundidade."""
+    headers = context.auth(ADMIN_USER_ID)
+    cursor = None
+    for _ in range(19):
+        response = expect(await context.client.get("/crud/files/", params={"limit": 50, **({"cursor": cursor} if cursor else {})}, headers=headers))
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+    params = {"limit": 50, **({"cursor": cursor} if cursor else {})}
+
+    async def operation():
+        expect(await context.client.get("/crud/files/", params=params, headers=headers))
+    return operation
+
+
+@scenario("files.catalog_by_type", "files")
+async def catalog_by_type(context: Context):
+    """Catálogo filtrado por prefixo de Content-Type ("image/")."""
+    headers = context.auth(ADMIN_USER_ID)
+
+    async def operation():
+        expect(await context.client.get("/crud/files/", params={"limit": 50, "content_type": "image/"}, headers=headers))
+    return operation
+
+
+@scenario("files.usage", "files")
+async def usage(context: Context):
+    """Arquivos e bytes por dono, agregados sobre o catálogo inteiro."""
+    headers = context.auth(ADMIN_USER_ID)
+
+    async def operation():
+        expect(await context.client.get("/crud/files/usage", headers=headers))
+    return operation
@@ -0,0 +1,101 @@
+# benchmarks/scenarios/plans.py
+#
+# Planos de execução, não tempos: cada cenário monta as consultas do filtro
+# (apply_filters_dynamic, apply_ordering), pede o EXPLAIN e falha se o índice declarado para
+# elas não aparece no plano. Pega a regressão em que a expressão gerada deixa de casar com o
+# índice (ex: lower(coluna) LIKE sobre um índice gin (coluna gin_trgm_ops)) ou em que um campo
+# de SORTABLE_FIELDS perde o índice e o ORDER BY volta a ordenar a tabela inteira.
+#
+# No Postgres o EXPLAIN roda com enable_seqscan desligado: numa base pequena a leitura
+# sequencial ganha de qualquer índice, e o que se verifica aqui é se o índice pode ser usado.
+# Os índices de trigramas só existem no Postgres; no SQLite entram só os de lower().
+
+from sqlalchemy import select, text
+
+from app.Mapping import models_mapping
+from app.database.database import SessionLocal
+from app.models.calendarModel import Calendar
+from app.utils.filter import LOWER, SORTABLE_FIELDS, TEXT_INDEXES, TRIGRAM, apply_filters_dynamic, apply_ordering
+from benchmarks.harness import Context, scenario
+
+# Operador do filtro que cada tipo de índice atende
+INDEX_OPERATORS = {TRIGRAM: "ct", LOWER: "ieq"}
+SAMPLE_VALUE = "Cliente"
+# Calendar não está no mapeamento do CRUD genérico, mas tem order_by na própria rota
+MODELS = {**models_mapping, "Calendar": Calendar}
+PAGE_SIZE = 50
+
+
+async def explain(db, query) -> str:
+    """Plano da consulta em texto (EXPLAIN no Postgres, EXPLAIN QUERY PLAN no SQLite)."""
+    dialect = db.bind.dialect
+    sql = str(query.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    if dialect.name == "postgresql":
+        await db.execute(text("SET LOCAL enable_seqscan = off"))
+        rows = await db.execute(text(f"EXPLAIN {sql}"))
+        return "\n".join(row[0] for row in rows)
+    rows = await db.execute(text(f"EXPLAIN QUERY PLAN {sql}"))
+    return "\n".join(row[-1] for row in rows)
+
+
+def text_index_checks(dialect_name: str):
+    """(modelo, filtro, índice esperado) para cada índice de TEXT_INDEXES que existe no banco."""
+    for (model_name, field), indexes in TEXT_INDEXES.items():
+        for kind, index_name in indexes.items():
+            if kind == TRIGRAM and dialect_name != "postgresql":
+                continue
+            yield model_name, f"{field}+{INDEX_OPERATORS[kind]}+{SAMPLE_VALUE}", index_name
+
+
+@scenario("plans.text_filters", "plans", repeat=1, warmup=0)
+async def text_filters(context: Context):
+    """ct/ieq de cada coluna de TEXT_INDEXES usam o índice declarado (falha listando os que não usam)."""
+    async def operation():
+        missing = []
+        checked = 0
+        async with SessionLocal() as db:
+            for model_name, filters, index_name in text_index_checks(db.bind.dialect.name):
+                query = apply_filters_dynamic(select(models_mapping[model_name]), filters, model_name)
+                plan = await explain(db, query)
+                checked += 1
+                if index_name not in plan:
+                    missing.append(f"{model_name} {filters}: sem {index_name}\n{plan}")
+            await db.rollback()
+        if missing:
+            raise RuntimeError("Índice não usado:\n" + "\n".join(missing))
+        return {"checked": checked}
+    return operation
+
+
+def _sorts_whole_table(plan: str) -> bool:
+    """Ordenação completa no plano (o Incremental Sort do Postgres e o "RIGHT PART" do SQLite só ordenam empates)."""
+    for line in plan.splitlines():
+        step = line.strip().removeprefix("->").strip()
+        if step.startswith("Sort ") or step.startswith("USE TEMP B-TREE FOR ORDER BY"):
+            return True
+    return False
+
+
+@scenario("plans.sort_orders", "plans", repeat=1, warmup=0)
+async def sort_orders(context: Context):
+    """ORDER BY de cada campo direto de SORTABLE_FIELDS (+ id) com LIMIT lê um índice em ordem, nos dois sentidos."""
+    async def operation():
+        failed = []
+        checked = 0
+        async with SessionLocal() as db:
+            for model_name, fields in SORTABLE_FIELDS.items():
+                model = MODELS[model_name]
+                for field in fields:
+                    if "." in field:
+                        continue  # relação: depende do tamanho da outra tabela (ver search/sort nos cenários de rotas)
+                    for direction in ("asc", "desc"):
+                        query = apply_ordering(select(model), f"{field}+{direction}", model_name, model).limit(PAGE_SIZE)
+                        plan = await explain(db, query)
+                        checked += 1
+                        if _sorts_whole_table(plan):
+                            failed.append(f"{model_name} order_by={field}+{direction}\n{plan}")
+            await db.rollback()
+        if failed:
+            raise RuntimeError("Ordenação sem índice:\n" + "\n".join(failed))
+        return {"checked": checked}
+    return operation
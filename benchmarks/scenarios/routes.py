@@ -0,0 +1,358 @@
+# benchmarks/scenarios/routes.py
+#
+# Rotas principais pela pilha HTTP completa (middlewares, dependências, serialização),
+# com o cliente httpx ligado direto na aplicação ASGI — sem rede nem servidor.
+
+import itertools
+import os
+from datetime import timedelta
+
+from app.core.config import settings
+from app.services.cache import cache
+from benchmarks.config import ADMIN_EMAIL, ANCHOR, BENCH_PASSWORD
+from benchmarks.dataset import ADMIN_USER_ID, MEMBER_USER_ID
+from benchmarks.harness import Context, expect, scenario
+
+
+def _iso(value) -> str:
+    # Sem "+00:00": o "+" é o separador do DSL de filtros (app/utils/filter.py)
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+@scenario("login.password", "routes", warmup=1)
+async def login(context: Context):
+    """POST /crud/token/ com senha (dominado pelo bcrypt)."""
+    async def operation():
+        expect(await context.client.post("/crud/token/", data={"username": ADMIN_EMAIL, "password": BENCH_PASSWORD}))
+    return operation
+
+
+@scenario("calendar.month_view", "routes")
+async def calendar_month_view(context: Context):
+    """Eventos de um calendário em um mês (o que a tela de agenda pede)."""
+    filters = f"calendar_id+eq+1$date+ge+{_iso(ANCHOR)}$date+lt+{_iso(ANCHOR + timedelta(days=31))}"
+    headers = context.auth(ADMIN_USER_ID)
+
+    async def operation():
+        response = expect(await context.client.get("/crud/event/", params={"filters": filters, "limit": 0}, headers=headers))
+        return {"items": len(response.json())}
+    return operation
+
+
+@scenario("calendar.list", "routes")
+async def calendar_list(context: Context):
+    """GET /crud/calendar/ com os eventos de cada calendário (selectin)."""
+    headers = context.auth(MEMBER_USER_ID)
+
+    async def operation():
+        expect(await context.client.get("/crud/calendar/", params={"limit": 20}, headers=headers))
+    return operation
+
+
+@scenario("events.list_filtered", "routes")
+async def events_list_filtered(context: Context):
+    """Lista de eventos com filtro de texto e de status, como administrador."""
+    params = {"filters": "title+ct+cliente$status+eq+confirmed", "limit": 50}
+    headers = context.auth(ADMIN_USER_ID)
+
+    async def operation():
+        expect(await context.client.get("/crud/event/", params=params, headers=headers))
+    return operation
+
+
+@scenario("events.list_with_count", "routes")
+async def events_list_with_count(context: Context):
+    """A mesma lista com ?with_count=true: a contagem (limitada, ou estimada no Postgres) por cima."""
+    params = {"filters": "title+ct+cliente$status+eq+confirmed", "limit": 50, "with_count": "true"}
+    headers = context.auth(ADMIN_USER_ID)
+
+    async def operation():
+        response = expect(await context.client.get("/crud/event/", params=params, headers=headers))
+        return {"total": int(response.headers["X-Total-Count"])}
+    return operation
+
+
+@scenario("events.aggregate_month", "routes")
+async def events_aggregate_month(context: Context):
+    """Eventos por calendário por mês (painel), agregados no SQL em vez de baixar a tabela."""
+    params = {"group_by": "calendar_id,date:month", "aggregates": "count,max:date"}
+    headers = context.auth(ADMIN_USER_ID)
+
+    async def operation():
+        response = expect(await context.client.get("/crud/event/aggregate", params=params, headers=headers))
+        return {"groups": len(response.json())}
+    return operation
+
+
+@scenario("events.list_member_visibility", "routes")
+async def events_list_member(context: Context):
+    """A mesma lista para um perfil sem "*": passa pelos predicados de calendários privados."""
+    params = {"filters": "title+ct+cliente$status+eq+confirmed", "limit": 50}
+    headers = context.auth(MEMBER_USER_ID)
+
+    async def operation():
+        expect(await context.client.get("/crud/event/", params=params, headers=headers))
+    return operation
+
+
+@scenario("events.list_not_modified", "routes")
+async def events_list_not_modified(context: Context):
+    """Revalidação com If-None-Match: bytes que deixam de trafegar a cada polling."""
+    headers = context.auth(ADMIN_USER_ID)
+    params = {"limit": 100}
+    full = expect(await context.client.get("/crud/event/", params=params, headers=headers))
+    conditional = {**headers, "If-None-Match": full.headers["etag"]}
+
+    async def operation():
+        response = expect(await context.client.get("/crud/event/", params=params, headers=conditional), 304)
+        return {"bytes_saved": full.num_bytes_downloaded - response.num_bytes_downloaded}
+    return operation
+
+
+@scenario("events.detail", "routes")
+async def events_detail(context: Context):
+    """GET /crud/event/{id} com os participantes."""
+    headers = context.auth(ADMIN_USER_ID)
+
+    async def operation():
+        expect(await context.client.get("/crud/event/10", headers=headers))
+    return operation
+
+
+@scenario("users.detail_cached", "routes")
+async def users_detail_cached(context: Context):
+    """GET /crud/user/{id} servido pelo cache de leituras."""
+    headers = context.auth(ADMIN_USER_ID)
+
+    async def operation():
+        expect(await context.client.get(f"/crud/user/{MEMBER_USER_ID}", headers=headers))
+    return operation
+
+
+@scenario("users.detail_uncached", "routes")
+async def users_detail_uncached(context: Context):
+    """O mesmo GET com o cache (e as permissões compiladas) limpos antes de cada chamada."""
+    headers = context.auth(ADMIN_USER_ID)
+
+    async def operation():
+        await cache.clear()
+        expect(await context.client.get(f"/crud/user/{MEMBER_USER_ID}", headers=headers))
+    return operation
+
+
+@scenario("generic.crud_cycle", "routes")
+async def generic_crud_cycle(context: Context):
+    """Criar, achar pelo filtro, ler, alterar e apagar um perfil pela rota genérica."""
+    headers = context.auth(ADMIN_USER_ID)
+    params = {"model": "UserProfile"}
+    counter = itertools.count()
+
+    async def operation():
+        name = f"Benchmark {next(counter)}"
+        expect(await context.client.post(
+            "/crud/generic", params=params, headers=headers, json={"model": "UserProfile", "values": {"name": name}},
+        ))
+        # A resposta do create traz só os campos mapeados, sem o id
+        found = expect(await context.client.get(
+            "/crud/generic", params={**params, "filters": f"name+eq+{name}"}, headers=headers,
+        )).json()
+        id = found[0]["values"]["id"]
+        expect(await context.client.get(f"/crud/generic/{id}", params=params, headers=headers))
+        expect(await context.client.put(
+            f"/crud/generic/{id}", params=params, headers=headers,
+            json={"model": "UserProfile", "values": {"name": f"{name} alterado"}},
+        ))
+        expect(await context.client.delete(f"/crud/generic/{id}", params=params, headers=headers))
+    return operation
+
+
+@scenario("generic.list_events", "routes")
+async def generic_list_events(context: Context):
+    """GET /crud/generic?model=Events com filtro."""
+    params = {"model": "Events", "filters": "status+eq+tentative", "limit": 50}
+    headers = context.auth(ADMIN_USER_ID)
+
+    async def operation():
+        expect(await context.client.get("/crud/generic", params=params, headers=headers))
+    return operation
+
+
+@scenario("logs.list_filtered", "routes")
+async def logs_list_filtered(context: Context):
+    """Auditoria recortada por entidade e período."""
+    params = {"filters": f"entity+eq+Events$created_at+ge+{_iso(ANCHOR - timedelta(days=30))}", "limit": 50}
+    headers = context.auth(ADMIN_USER_ID)
+
+    async def operation():
+        expect(await context.client.get("/crud/logs/", params=params, headers=headers))
+    return operation
+
+
+@scenario("logs.aggregate_by_user", "routes")
+async def logs_aggregate_by_user(context: Context):
+    """Auditoria por usuário nos últimos 30 dias (GROUP BY user_id)."""
+    params = {"filters": f"created_at+ge+{_iso(ANCHOR - timedelta(days=30))}", "group_by": "user_id"}
+    headers = context.auth(ADMIN_USER_ID)
+
+    async def operation():
+        response = expect(await context.client.get("/crud/logs/aggregate", params=params, headers=headers))
+        return {"groups": len(response.json())}
+    return operation
+
+
+@scenario("notifications.inbox", "routes")
+async def notifications_inbox(context: Context):
+    """Primeira página da caixa do usuário com mais notificações."""
+    headers = context.auth(ADMIN_USER_ID)
+
+    async def operation():
+        expect(await context.client.get("/crud/notifications/", params={"limit": 20}, headers=headers))
+    return operation
+
+
+@scenario("notifications.unread_count", "routes")
+async def notifications_unread_count(context: Context):
+    """Contador de não lidas (mantido em cache)."""
+    headers = context.auth(ADMIN_USER_ID)
+
+    async def operation():
+        expect(await context.client.get("/crud/notifications/unread-count", headers=headers))
+    return operation
+
+
+@scenario("freebusy.50_users_month", "routes")
+async def freebusy_month(context: Context):
+    """Ocupação mesclada de 50 participantes em um mês, com recorrências expandidas."""
+    headers = context.auth(ADMIN_USER_ID)
+    body = {
+        "user_ids": list(range(1, min(50, context.scale.users) + 1)),
+        "start": _iso(ANCHOR), "end": _iso(ANCHOR + timedelta(days=30)),
+    }
+
+    async def operation():
+        response = expect(await context.client.post("/crud/freebusy", json=body, headers=headers))
+        return {"intervals": sum(len(items) for items in response.json()["busy"].values())}
+    return operation
+
+
+@scenario("freebusy.next_slot", "routes")
+async def freebusy_next_slot(context: Context):
+    """Próximo horário livre comum de 2 h para 10 participantes."""
+    headers = context.auth(ADMIN_USER_ID)
+    body = {
+        "user_ids": list(range(1, min(10, context.scale.users) + 1)),
+        "start": _iso(ANCHOR + timedelta(hours=9)), "end": _iso(ANCHOR + timedelta(days=30)),
+        "duration_minutes": 120,
+    }
+
+    async def operation():
+        expect(await context.client.post("/crud/freebusy/next-slot", json=body, headers=headers))
+    return operation
+
+
+def _search_scenario(name: str, q: str, user_id: int, doc: str):
+    async def search(context: Context):
+        headers = context.auth(user_id)
+        params = {"q": q, "limit": 20}
+
+        async def operation():
+            response = expect(await context.client.get("/crud/search/events", params=params, headers=headers))
+            return {"items": len(response.json()), "fuzzy": int(response.headers["x-search-match"] == "fuzzy")}
+        return operation
+
+    search.__doc__ = doc
+    scenario(name, "search")(search)
+
+
+# As palavras dos títulos vêm de benchmarks/dataset.py:WORDS (cada uma em ~20% dos eventos)
+_search_scenario("search.events_common", "retrospectiva", ADMIN_USER_ID,
+                 "Termo presente em muitos eventos: o custo é ranquear todos os que casam.")
+_search_scenario("search.events_two_terms", "reuniao cliente", ADMIN_USER_ID,
+                 "Dois termos, sem acento, casando com \"reunião\" e \"cliente\".")
+_search_scenario("search.events_prefix", "implan", ADMIN_USER_ID, "Prefixo, como a busca enquanto se digita.")
+_search_scenario("search.events_member", "retrospectiva", MEMBER_USER_ID,
+                 "A mesma busca para um perfil sem \"*\", com os predicados de visibilidade.")
+_search_scenario("search.events_fuzzy", "retrospectva", ADMIN_USER_ID,
+                 "Erro de digitação: nada na busca exata, responde o fallback (trigramas no Postgres).")
+
+
+@scenario("search.events_miss", "search")
+async def search_events_miss(context: Context):
+    """Termo que não existe, sem o fallback: só o índice responde (o caso do LIKE mais caro)."""
+    previous = settings.SEARCH_FUZZY_FALLBACK
+    settings.SEARCH_FUZZY_FALLBACK = False
+    headers = context.auth(ADMIN_USER_ID)
+    params = {"q": "orcamento", "limit": 20}
+
+    async def operation():
+        expect(await context.client.get("/crud/search/events", params=params, headers=headers))
+
+    async def teardown():
+        settings.SEARCH_FUZZY_FALLBACK = previous
+    return operation, teardown
+
+
+@scenario("search.events_like_baseline", "search")
+async def search_events_like_baseline(context: Context):
+    """Referência: a mesma busca pelo operador ct do DSL (title ILIKE '%termo%')."""
+    headers = context.auth(ADMIN_USER_ID)
+    params = {"filters": "title+ct+retrospectiva", "limit": 20}
+
+    async def operation():
+        expect(await context.client.get("/crud/event/", params=params, headers=headers))
+    return operation
+
+
+@scenario("search.events_like_miss_baseline", "search")
+async def search_events_like_miss_baseline(context: Context):
+    """Referência do termo inexistente pelo ct: lê a tabela inteira sem achar nada."""
+    headers = context.auth(ADMIN_USER_ID)
+    params = {"filters": "title+ct+orcamento", "limit": 20}
+
+    async def operation():
+        expect(await context.client.get("/crud/event/", params=params, headers=headers))
+    return operation
+
+
+def _sort_scenario(name: str, order_by: str, user_id: int, description: str, depth: float = 0.0, filters: str = ""):
+    """Página de 50 eventos em `order_by`; `depth` é a fração da tabela pulada com skip."""
+    async def factory(context: Context):
+        headers = context.auth(user_id)
+        params = {"order_by": order_by, "skip": int(context.scale.events * depth), "limit": 50}
+        if filters:
+            params["filters"] = filters
+
+        async def operation():
+            response = expect(await context.client.get("/crud/event/", params=params, headers=headers))
+            return {"items": len(response.json())}
+        return operation
+    factory.__doc__ = description
+    scenario(name, "sort")(factory)
+
+
+_sort_scenario("sort.events_date_first_page", "date+desc", ADMIN_USER_ID,
+               "Mais recentes primeiro: o índice de date lido de trás para frente, para na 50ª linha.")
+_sort_scenario("sort.events_date_deep_page", "date+desc", ADMIN_USER_ID,
+               "A mesma ordem com skip de 1% da tabela: o custo do OFFSET, que percorre as linhas puladas.",
+               depth=0.01)
+_sort_scenario("sort.events_title_first_page", "title,date+desc", ADMIN_USER_ID,
+               "Título e data: índice de title, empates ordenados só dentro de cada título.")
+_sort_scenario("sort.events_calendar_name", "calendar.name,date+desc", ADMIN_USER_ID,
+               "Campo de relação (join com calendars): sem índice único que cubra a ordem, ordena os eventos.")
+_sort_scenario("sort.events_member_date", "date+desc", MEMBER_USER_ID,
+               "Mais recentes visíveis a um perfil sem \"*\": o índice em ordem, filtrado pelos predicados.")
+_sort_scenario("sort.events_filtered_date", "date+desc", ADMIN_USER_ID,
+               "Filtro por status com ordem por data: o planejador escolhe entre o índice da ordem e o do filtro.",
+               filters="status+eq+tentative")
+
+
+@scenario("openapi.precompressed", "routes")
+async def openapi_precompressed(context: Context):
+    """Schema servido a partir da versão pré-comprimida: bytes economizados contra o JSON puro."""
+    headers = context.auth(ADMIN_USER_ID)
+    original = os.path.getsize(settings.OPENAPI_PATH)
+
+    async def operation():
+        response = expect(await context.client.get("/crud/openapi.json", headers=headers))
+        return {"bytes_saved": original - response.num_bytes_downloaded}
+    return operation
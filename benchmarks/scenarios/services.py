@@ -0,0 +1,385 @@
+# benchmarks/scenarios/services.py
+#
+# Rotinas de fundo e peças internas medidas direto, sem HTTP: o tick de lembretes, a
+# drenagem da fila de envio, a verificação de permissões, o custo das métricas e dos logs
+# e os codificadores de compressão.
+# Por último, a manutenção (arquivamento), que esvazia tabelas e por isso roda no fim.
+
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from sqlalchemy import delete, distinct, func, select, update
+
+from app.controllers.notificationController import archive_old_notifications
+from app.core import log
+from app.core.config import settings
+from app.database.database import SessionLocal
+from app.middleware.compression import ENCODERS
+from app.middleware.metrics import MetricsMiddleware
+from app.models.eventsModel import Events, user_events_association
+from app.models.notificationLogModel import NotificationLog, NotificationOutbox
+from app.services import metrics, tracing
+from app.services.audit_log_service import audit_log_service
+from app.services.notification_service import TokenBucket, notification_service
+from app.services.permissions import permission_engine
+from benchmarks.dataset import ADMIN_USER_ID, MEMBER_USER_ID
+from benchmarks.harness import Context, scenario
+
+REMINDER_EVENTS = 100
+# Orçamento das métricas: acima disso o cenário falha (e o `run` sai com 1)
+METRICS_REQUEST_BUDGET_US = 50  # MetricsMiddleware, por requisição
+METRICS_QUERY_BUDGET_US = 10  # hooks do SQLAlchemy, por consulta
+LOG_TASKS = 10  # tasks logando ao mesmo tempo, 100 registros cada
+COMPRESSION_SIZES = {"1kb": 1024, "16kb": 16 * 1024, "256kb": 256 * 1024, "1mb": 1024 * 1024}
+
+
+@scenario("reminders.tick", "services")
+async def reminders_tick(context: Context):
+    """Uma execução do send_reminders com REMINDER_EVENTS eventos no horário do lembrete."""
+    start = datetime.now(timezone.utc) + timedelta(minutes=10)
+    async with SessionLocal() as db:
+        events = [
+            Events(title=f"Lembrete {i}", date=start, endDate=start + timedelta(hours=1), calendar_id=1,
+                   notification_type="both", notification_time_before=30, notification_repeats=1)
+            for i in range(REMINDER_EVENTS)
+        ]
+        db.add_all(events)
+        await db.flush()
+        ids = [event.id for event in events]
+        await db.execute(user_events_association.insert(), [
+            {"user_id": user_id, "event_id": id} for id in ids for user_id in (ADMIN_USER_ID, MEMBER_USER_ID)
+        ])
+        await db.commit()
+
+    async def operation():
+        # Volta o contador e a fila para o tick ter trabalho de novo (entra na medição)
+        async with SessionLocal() as db:
+            await db.execute(update(Events).where(Events.id.in_(ids)).values(notifications_sent_count=0))
+            await db.execute(delete(NotificationOutbox).where(NotificationOutbox.event_id.in_(ids)))
+            await db.commit()
+        await notification_service.send_reminders()
+        # Um tick que falha por evento também é rápido: confere que todos entraram na fila
+        async with SessionLocal() as db:
+            enqueued = (await db.execute(
+                select(func.count(distinct(NotificationOutbox.event_id))).where(NotificationOutbox.event_id.in_(ids))
+            )).scalar()
+        if enqueued != REMINDER_EVENTS:
+            raise RuntimeError(f"reminders.tick enfileirou lembretes de {enqueued} de {REMINDER_EVENTS} eventos")
+
+    async def teardown():
+        async with SessionLocal() as db:
+            await db.execute(delete(NotificationOutbox).where(NotificationOutbox.event_id.in_(ids)))
+            await db.execute(delete(user_events_association).where(user_events_association.c.event_id.in_(ids)))
+            await db.execute(delete(Events).where(Events.id.in_(ids)))
+            await db.commit()
+    return operation, teardown
+
+
+@scenario("outbox.drain", "services", repeat=1, warmup=0)
+async def outbox_drain(context: Context):
+    """
+    Drenagem de `scale.outbox` mensagens com a entrega trocada por um stub local: mede a
+    fila (claim, mark_sent, NotificationLog), não o SMTP nem o serviço de WhatsApp.
+    """
+    total = context.scale.outbox
+    ready = datetime.now(timezone.utc) - timedelta(minutes=1)
+    async with SessionLocal() as db:
+        last_log = (await db.execute(select(func.max(NotificationLog.id)))).scalar() or 0
+        rows = []
+        for i in range(total):
+            channel = "email" if i % 2 else "whatsapp"
+            rows.append({
+                "idempotency_key": f"benchmark:{i}", "channel": channel,
+                "recipient": f"user{i}@example.com" if channel == "email" else f"55119{i:08d}",
+                "user_id": i % context.scale.users + 1, "content": f"Mensagem {i}",
+                "payload": {"subject": "Benchmark", "template_name": "reminder.html", "template_body": {}},
+                "priority": i, "status": "pending", "attempts": 0, "next_attempt_at": ready,
+            })
+        await db.execute(NotificationOutbox.__table__.insert(), rows)
+        await db.commit()
+
+    async def deliver(message):
+        await asyncio.sleep(0)
+
+    buckets = notification_service.buckets
+    notification_service._deliver = deliver
+    notification_service.buckets = {channel: TokenBucket(1e9, total) for channel in buckets}
+
+    async def operation():
+        await notification_service.drain_outbox()
+        async with SessionLocal() as db:
+            sent = (await db.execute(
+                select(func.count()).where(NotificationOutbox.idempotency_key.like("benchmark:%"), NotificationOutbox.status == "sent")
+            )).scalar()
+        if sent != total:
+            raise RuntimeError(f"Fila drenada pela metade: {sent}/{total}")
+        return {"rows": total}
+
+    async def teardown():
+        del notification_service._deliver
+        notification_service.buckets = buckets
+        async with SessionLocal() as db:
+            await db.execute(delete(NotificationOutbox).where(NotificationOutbox.idempotency_key.like("benchmark:%")))
+            await db.execute(delete(NotificationLog).where(NotificationLog.id > last_log))
+            await db.commit()
+    return operation, teardown
+
+
+@scenario("permissions.check", "services", inner=1000)
+async def permissions_check(context: Context):
+    """Custo de uma verificação com as permissões já compiladas em memória."""
+    db = SessionLocal()
+    await permission_engine.allowed(db, MEMBER_USER_ID, "Events", "view")
+
+    async def operation():
+        for _ in range(1000):
+            await permission_engine.allowed(db, MEMBER_USER_ID, "Events", "view")
+
+    async def teardown():
+        await db.close()
+    return operation, teardown
+
+
+@scenario("permissions.check_cold", "services")
+async def permissions_check_cold(context: Context):
+    """A mesma verificação logo depois de uma invalidação (perfil e permissões vêm do banco)."""
+    db = SessionLocal()
+
+    async def operation():
+        permission_engine.invalidate(None)
+        await permission_engine.allowed(db, MEMBER_USER_ID, "Events", "view")
+
+    async def teardown():
+        await db.close()
+    return operation, teardown
+
+
+def _within_budget(name: str, overheads: list, budget_us: float):
+    # Mediana das iterações: uma pausa do GC numa delas não reprova o cenário
+    overhead = statistics.median(overheads)
+    if overhead > budget_us:
+        raise RuntimeError(f"{name}: {overhead:.1f} µs acima do orçamento de {budget_us} µs")
+
+
+@scenario("metrics.middleware_overhead", "services", inner=1000)
+async def metrics_middleware_overhead(context: Context):
+    """
+    Custo do MetricsMiddleware por requisição: a mesma aplicação ASGI mínima com e sem ele.
+    Falha se a diferença passar de METRICS_REQUEST_BUDGET_US.
+    """
+    route = SimpleNamespace(path="/benchmark/{item_id}")
+
+    async def bare(scope, receive, send):
+        scope["route"] = route
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    wrapped = MetricsMiddleware(bare)
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    async def timed(app) -> float:
+        started = time.perf_counter()
+        for _ in range(1000):
+            await app({"type": "http", "method": "GET", "path": "/benchmark/1"}, receive, send)
+        return (time.perf_counter() - started) * 1000
+
+    overheads = []
+
+    async def operation():
+        base = await timed(bare)
+        # 1000 requisições: a diferença em ms é o custo por requisição em µs
+        overhead_us = await timed(wrapped) - base
+        overheads.append(overhead_us)
+        return {"overhead_us": overhead_us, "budget_us": METRICS_REQUEST_BUDGET_US}
+
+    async def teardown():
+        _within_budget("metrics.middleware_overhead", overheads, METRICS_REQUEST_BUDGET_US)
+    return operation, teardown
+
+
+@scenario("metrics.query_hooks", "services", inner=1000)
+async def metrics_query_hooks(context: Context):
+    """
+    Custo dos hooks before/after_cursor_execute por consulta, dentro de uma requisição
+    (com o ContextVar aberto). Falha se passar de METRICS_QUERY_BUDGET_US.
+    """
+    connection = SimpleNamespace(info={})
+    statement = "SELECT events.id FROM events WHERE events.id = ?"
+    token = metrics.request_db_stats.set([0, 0.0])
+    overheads = []
+
+    async def operation():
+        started = time.perf_counter()
+        for _ in range(1000):
+            metrics._before_cursor_execute(connection, None, statement, (), None, False)
+            metrics._after_cursor_execute(connection, None, statement, (), None, False)
+        # 1000 pares: o total em ms é o custo por consulta em µs
+        overhead_us = (time.perf_counter() - started) * 1000
+        overheads.append(overhead_us)
+        return {"overhead_us": overhead_us, "budget_us": METRICS_QUERY_BUDGET_US}
+
+    async def teardown():
+        metrics.request_db_stats.reset(token)
+        _within_budget("metrics.query_hooks", overheads, METRICS_QUERY_BUDGET_US)
+    return operation, teardown
+
+
+@scenario("tracing.unsampled_request", "services", inner=1000)
+async def tracing_unsampled_request(context: Context):
+    """
+    O que o tracing custa a uma requisição não amostrada (o caso comum em produção): a raiz
+    sorteada e descartada mais dez spans filhos, como consultas e chamadas de saída.
+    """
+    previous = settings.TRACING_ENABLED, settings.TRACING_SAMPLE_RATIO
+    settings.TRACING_ENABLED, settings.TRACING_SAMPLE_RATIO = True, 0.0
+
+    async def operation():
+        for _ in range(1000):
+            with tracing.span("GET", "server"):
+                for _ in range(10):
+                    with tracing.span("SELECT", "client"):
+                        pass
+
+    async def teardown():
+        settings.TRACING_ENABLED, settings.TRACING_SAMPLE_RATIO = previous
+    return operation, teardown
+
+
+def _log_burst(logger: logging.Logger, extra: dict):
+    """1000 registros de LOG_TASKS tasks concorrentes, cada uma com o próprio id de correlação."""
+    async def task(number: int):
+        log.correlation_id.set(f"benchmark-{number}")
+        for attempt in range(1000 // LOG_TASKS):
+            logger.warning("Falha ao enviar %s", "whatsapp", extra={**extra, "attempt": attempt})
+            if attempt % 10 == 0:
+                await asyncio.sleep(0)
+
+    return asyncio.gather(*(task(number) for number in range(LOG_TASKS)))
+
+
+def _benchmark_logger(name: str, handler: logging.Handler) -> logging.Logger:
+    logger = logging.getLogger(f"benchmarks.{name}")
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+@scenario("logging.queue_handler", "services", inner=1000)
+async def logging_queue_handler(context: Context):
+    """
+    Custo por registro para quem loga, com a configuração do app: QueueHandler com contexto e
+    limite de repetição, JSON escrito por outra thread (em os.devnull). `backlog` é o que ficou
+    na fila ao fim da rajada e `dropped` o que a fila cheia descartou.
+    """
+    devnull = open(os.devnull, "w")
+    handler, listener = log.build_pipeline([devnull])
+    logger = _benchmark_logger("logging.queue_handler", handler)
+    listener.start()
+
+    async def operation():
+        dropped = handler.dropped
+        await _log_burst(logger, {"channel": "whatsapp", "recipient": "5511999999999"})
+        return {"backlog": handler.queue.qsize(), "dropped": handler.dropped - dropped}
+
+    async def teardown():
+        await asyncio.to_thread(listener.stop)
+        devnull.close()
+    return operation, teardown
+
+
+@scenario("logging.sync_handler", "services", inner=1000)
+async def logging_sync_handler(context: Context):
+    """Referência: o mesmo JSON escrito na própria thread do event loop (o que o QueueHandler evita)."""
+    devnull = open(os.devnull, "w")
+    handler = logging.StreamHandler(devnull)
+    handler.setFormatter(log.JsonFormatter())
+    handler.addFilter(log.ContextFilter())
+    logger = _benchmark_logger("logging.sync_handler", handler)
+
+    async def operation():
+        await _log_burst(logger, {"channel": "whatsapp", "recipient": "5511999999999"})
+
+    async def teardown():
+        devnull.close()
+    return operation, teardown
+
+
+@scenario("logging.rate_limited", "services", inner=1000)
+async def logging_rate_limited(context: Context):
+    """Falhas repetidas com a mesma rate_limit_key: quase todas descartadas pelo filtro, antes da fila."""
+    devnull = open(os.devnull, "w")
+    handler, listener = log.build_pipeline([devnull])
+    logger = _benchmark_logger("logging.rate_limited", handler)
+    listener.start()
+
+    async def operation():
+        await _log_burst(logger, {"channel": "whatsapp", "rate_limit_key": "send_failed:whatsapp"})
+
+    async def teardown():
+        await asyncio.to_thread(listener.stop)
+        devnull.close()
+    return operation, teardown
+
+
+def _json_payload(size: int) -> bytes:
+    """JSON parecido com uma lista de eventos, com o tamanho pedido (determinístico)."""
+    rng = random.Random(size)
+    items, length = [], 0
+    while length < size:
+        item = {
+            "id": len(items) + 1, "title": f"Reunião {rng.randint(1, 999)}", "calendar_id": rng.randint(1, 50),
+            "date": f"2026-01-{rng.randint(1, 28):02d}T{rng.randint(8, 18):02d}:00:00Z", "status": "confirmed",
+            "description": "Alinhamento semanal com o cliente", "users": [{"id": rng.randint(1, 500)}],
+        }
+        items.append(item)
+        length += len(json.dumps(item)) + 1
+    return json.dumps(items).encode()[:size]
+
+
+def _register_compression(encoding: str, label: str, size: int):
+    async def compress(context: Context):
+        payload = _json_payload(size)
+
+        async def operation():
+            compressed = ENCODERS[encoding]().compress(payload, final=True)
+            return {"bytes": len(payload), "ratio": len(compressed) / len(payload)}
+        return operation
+    compress.__doc__ = f"CPU e razão de compressão de {label} de JSON com {encoding} no nível configurado."
+    scenario(f"compression.{encoding}.{label}", "compression")(compress)
+
+
+for _encoding in ENCODERS:
+    for _label, _size in COMPRESSION_SIZES.items():
+        _register_compression(_encoding, _label, _size)
+
+
+@scenario("notifications.archive", "maintenance", repeat=1, warmup=0, destructive=True)
+async def notifications_archive(context: Context):
+    """Retenção da caixa de notificações: move para o arquivo tudo o que passou de NOTIFICATION_RETENTION_DAYS."""
+    async def operation():
+        async with SessionLocal() as db:
+            return {"rows": await archive_old_notifications(db)}
+    return operation
+
+
+@scenario("logs.archive", "maintenance", repeat=1, warmup=0, destructive=True)
+async def logs_archive(context: Context):
+    """Retenção da auditoria sem particionamento: exporta em JSONL compactado e apaga em lotes."""
+    async def operation():
+        cutoff = datetime.now(timezone.utc) - timedelta(days=settings.LOG_RETENTION_DAYS)
+        async with SessionLocal() as db:
+            return {"rows": await audit_log_service.archive_rows(db, cutoff)}
+    return operation
@@ -1,6 +1,7 @@
 # agenda-risetec-backend/main.py
 
 import json
+import logging
 import os
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
@@ -8,14 +9,26 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.database import database
 from app.middleware.loggerMiddleware import LoggingMiddleware
 from app.middleware.securityHeaders import SecurityHeadersMiddleware
+from app.middleware.compression import CompressionMiddleware, precompress
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.queryInspector import QueryInspectorMiddleware
+from app.middleware.tracing import TracingMiddleware
+from app.middleware.profiler import ProfilerMiddleware
+from app.core.config import settings
+from app.core import log
+from app.middleware.requestContext import RequestIdMiddleware
 from apscheduler.schedulers.asyncio import AsyncIOScheduler # NOVO
 from app.services.notification_service import notification_service # NOVO
+from app.services.event_bus import event_bus
+from app.services.audit_log_service import audit_log_service
+from app.services import permissions, search, tracing
 
 # NOVO: Lista centralizada de roteadores para inclusão automática
 from app.routers import (
     userRouter, userProfileRouter, permissionsRouter, tokenRouter,
     fileRouter, logRouter, genericRouter, eventsRouter, calendarRouter,
-    whatsappRouter, notificationRouter
+    whatsappRouter, notificationRouter, caldavRouter, syncRouter, streamRouter,
+    cacheRouter, docsRouter, freebusyRouter, metricsRouter, profilerRouter, searchRouter
 )
 
 # NOVO: Agrupa todos os roteadores em uma lista para facilitar o registro
@@ -30,16 +43,36 @@ all_routers = [
     eventsRouter.router,
     calendarRouter.router,
     whatsappRouter.router,
-    notificationRouter.router
+    notificationRouter.router,
+    caldavRouter.router,
+    caldavRouter.well_known_router,
+    syncRouter.router,
+    streamRouter.router,
+    cacheRouter.router,
+    docsRouter.router,
+    freebusyRouter.router,
+    metricsRouter.router,
+    profilerRouter.router,
+    searchRouter.router
 ]
 
+# Antes de qualquer log: troca o handler padrão pela fila com escrita em outra thread
+log.setup_logging()
+logger = logging.getLogger(__name__)
+
 scheduler = AsyncIOScheduler()
 
 @asynccontextmanager
 async def lifespan_startup(app: FastAPI):
-    scheduler.add_job(notification_service.send_reminders, 'interval', minutes=1)
-    scheduler.add_job(notification_service.send_reminders_late, 'cron', hour=8)
+    # Cada execução agendada abre o próprio trace (amostrado por TRACING_JOB_SAMPLE_RATIO)
+    # e tem um id de correlação próprio nos logs
+    scheduler.add_job(log.job(tracing.job(notification_service.send_reminders)), 'interval', minutes=1)
+    scheduler.add_job(log.job(tracing.job(notification_service.send_reminders_late)), 'cron', hour=8)
+    scheduler.add_job(log.job(tracing.job(notification_service.drain_outbox)), 'interval', seconds=5, max_instances=1, coalesce=True)
+    scheduler.add_job(log.job(tracing.job(notification_service.archive_notifications)), 'cron', hour=3)
+    scheduler.add_job(log.job(tracing.job(audit_log_service.run_maintenance)), 'cron', hour=4)
     scheduler.start()
+    await event_bus.start()
     
     # NOVO: Itera sobre a lista de roteadores e os inclui na aplicação
     for router in all_routers:
@@ -48,16 +81,25 @@ async def lifespan_startup(app: FastAPI):
     generate_doc()
     async with database.engine.begin() as conn:
         await conn.run_sync(database.Base.metadata.create_all)
+        # SQLite: índices FTS5 da busca (no Postgres, migrations/011_full_text_search.sql)
+        await conn.run_sync(search.install)
+        # Primeiro administrador (ninguém cria permissões sem já ter uma)
+        await conn.run_sync(permissions.install_admin_profile)
     
     yield
     
     scheduler.shutdown()
-    print("Agendador de notificações encerrado.")
+    await event_bus.stop()
+    tracing.shutdown()
+    logger.info("Agendador de notificações encerrado")
+    log.shutdown()
 
 def generate_doc():
     # Esta função pode ser movida para um script de build/deploy em um ambiente de produção
-    with open("openapi.json", "w") as f:
+    with open(settings.OPENAPI_PATH, "w") as f:
         json.dump(app.openapi(), f, indent=4)
+    # Versões .gz/.br/.zst servidas pelo /crud/openapi.json
+    precompress(settings.OPENAPI_PATH)
 
 
 app = FastAPI(lifespan=lifespan_startup,
@@ -95,7 +137,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cabeçalhos de resposta que o JavaScript do frontend precisa ler (?with_count=true nas
+    # listas e o cursor da próxima página de /crud/files/ e /crud/notifications)
+    expose_headers=["X-Total-Count", "X-Total-Count-Exact", "X-Next-Cursor"],
 )
 
 app.add_middleware(SecurityHeadersMiddleware)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(QueryInspectorMiddleware)
+app.add_middleware(ProfilerMiddleware)
+app.add_middleware(TracingMiddleware)
+app.add_middleware(RequestIdMiddleware)
+# Por último = mais externo: a latência medida inclui os outros middlewares
+app.add_middleware(MetricsMiddleware)
 # app.add_middleware(LoggingMiddleware)
\ No newline at end of file
@@ -0,0 +1,25 @@
+-- Revisões globais e tombstones usados pelo CalDAV (ETag / ctag / sync-token).
+-- O create_all do startup só cria tabelas novas; colunas em tabelas existentes
+-- precisam deste script em bancos já em produção.
+
+CREATE SEQUENCE IF NOT EXISTS sync_revision_seq;
+
+ALTER TABLE events ADD COLUMN IF NOT EXISTS revision BIGINT NOT NULL DEFAULT nextval('sync_revision_seq');
+ALTER TABLE events ALTER COLUMN revision DROP DEFAULT;
+CREATE INDEX IF NOT EXISTS ix_events_calendar_revision ON events (calendar_id, revision);
+
+ALTER TABLE calendars ADD COLUMN IF NOT EXISTS revision BIGINT NOT NULL DEFAULT nextval('sync_revision_seq');
+ALTER TABLE calendars ALTER COLUMN revision DROP DEFAULT;
+
+CREATE TABLE IF NOT EXISTS sync_tombstones (
+    id SERIAL PRIMARY KEY,
+    entity VARCHAR(50) NOT NULL,
+    entity_id INTEGER NOT NULL,
+    uid VARCHAR(255),
+    calendar_id INTEGER,
+    revision BIGINT NOT NULL,
+    deleted_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS ix_sync_tombstones_id ON sync_tombstones (id);
+CREATE INDEX IF NOT EXISTS ix_sync_tombstones_calendar_revision ON sync_tombstones (calendar_id, revision);
+CREATE INDEX IF NOT EXISTS ix_sync_tombstones_entity_revision ON sync_tombstones (entity, revision);
@@ -0,0 +1,12 @@
+-- Colunas de controle de versão para o /crud/sync (incremental) dos clientes.
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS revision BIGINT NOT NULL DEFAULT nextval('sync_revision_seq');
+ALTER TABLE users ALTER COLUMN revision DROP DEFAULT;
+
+ALTER TABLE events ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT now();
+ALTER TABLE calendars ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT now();
+ALTER TABLE users ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT now();
+
+CREATE INDEX IF NOT EXISTS ix_events_revision ON events (revision);
+CREATE INDEX IF NOT EXISTS ix_calendars_revision ON calendars (revision);
+CREATE INDEX IF NOT EXISTS ix_users_revision ON users (revision);
@@ -0,0 +1,17 @@
+-- Índices da caixa de notificações e tabela de arquivo da rotina de retenção.
+
+CREATE INDEX IF NOT EXISTS ix_notification_logs_user_created ON notification_logs (user_id, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_notification_logs_user_unread ON notification_logs (user_id, id) WHERE is_read = false;
+
+CREATE TABLE IF NOT EXISTS notification_logs_archive (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    event_id INTEGER,
+    channel VARCHAR(50) NOT NULL,
+    status VARCHAR(50),
+    content TEXT NOT NULL,
+    is_read BOOLEAN,
+    created_at TIMESTAMP WITH TIME ZONE,
+    archived_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS ix_notification_logs_archive_user_id ON notification_logs_archive (user_id);
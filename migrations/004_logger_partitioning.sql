@@ -0,0 +1,71 @@
+-- Tabela de auditoria (logger) particionada por mês em created_at, com data em JSONB.
+-- A tabela antiga não tinha created_at: a data vem do campo "date" que o middleware grava
+-- em data, ou now() quando ausente. Rodar em janela de manutenção (reescreve a tabela).
+-- Depois disso o AuditLogService cria as partições futuras e arquiva as antigas.
+-- data era texto livre (POST /crud/log/ aceitava qualquer coisa): o que não é JSON vira
+-- uma string JSON e uma "date" que não converte conta como ausente, em vez de abortar a cópia.
+
+BEGIN;
+
+-- Conversões tolerantes, só desta sessão (pg_temp)
+CREATE FUNCTION pg_temp.logger_data(value TEXT) RETURNS JSONB LANGUAGE plpgsql IMMUTABLE AS $$
+BEGIN
+    RETURN value::jsonb;
+EXCEPTION WHEN others THEN
+    RETURN to_jsonb(value);
+END $$;
+
+CREATE FUNCTION pg_temp.logger_date(data JSONB) RETURNS TIMESTAMPTZ LANGUAGE plpgsql IMMUTABLE AS $$
+BEGIN
+    RETURN (data ->> 'date')::timestamptz;
+EXCEPTION WHEN others THEN
+    RETURN NULL;
+END $$;
+
+ALTER TABLE logger RENAME TO logger_legacy;
+ALTER SEQUENCE logger_id_seq OWNED BY NONE;
+
+CREATE TABLE logger (
+    id INTEGER NOT NULL DEFAULT nextval('logger_id_seq'),
+    action VARCHAR NOT NULL,
+    user_id INTEGER REFERENCES users (id),
+    entity VARCHAR NOT NULL,
+    data JSONB NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+-- Partições mensais do registro mais antigo até dois meses à frente
+DO $$
+DECLARE
+    month DATE;
+    last_month DATE := date_trunc('month', now() + interval '2 months');
+BEGIN
+    SELECT date_trunc('month', COALESCE(min(pg_temp.logger_date(pg_temp.logger_data(data))), now()))
+      INTO month FROM logger_legacy;
+    WHILE month <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF logger FOR VALUES FROM (%L) TO (%L)',
+            'logger_p' || to_char(month, 'YYYYMM'), month, month + interval '1 month'
+        );
+        month := month + interval '1 month';
+    END LOOP;
+END $$;
+
+-- Rede de segurança para datas fora das partições criadas
+CREATE TABLE logger_default PARTITION OF logger DEFAULT;
+
+INSERT INTO logger (id, action, user_id, entity, data, created_at)
+SELECT id, action, user_id, entity, pg_temp.logger_data(data),
+       COALESCE(pg_temp.logger_date(pg_temp.logger_data(data)), now())
+FROM logger_legacy;
+
+DROP TABLE logger_legacy;
+ALTER SEQUENCE logger_id_seq OWNED BY logger.id;
+
+CREATE INDEX ix_logger_id ON logger (id);
+CREATE INDEX ix_logger_user_created ON logger (user_id, created_at);
+CREATE INDEX ix_logger_entity_created ON logger (entity, created_at);
+CREATE INDEX ix_logger_created_at ON logger (created_at);
+
+COMMIT;
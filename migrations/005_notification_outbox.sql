@@ -0,0 +1,22 @@
+-- Fila persistente de envios (e-mail/WhatsApp) drenada pelo NotificationService.
+
+CREATE TABLE IF NOT EXISTS notification_outbox (
+    id SERIAL PRIMARY KEY,
+    idempotency_key VARCHAR(200) NOT NULL UNIQUE,
+    channel VARCHAR(50) NOT NULL,
+    recipient VARCHAR(255) NOT NULL,
+    user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    event_id INTEGER REFERENCES events (id) ON DELETE CASCADE,
+    content TEXT NOT NULL,
+    payload JSON,
+    priority BIGINT NOT NULL DEFAULT 0,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+    last_error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+    sent_at TIMESTAMP WITH TIME ZONE
+);
+CREATE INDEX IF NOT EXISTS ix_notification_outbox_ready ON notification_outbox (channel, priority, next_attempt_at)
+    WHERE status IN ('pending', 'sending');
+CREATE INDEX IF NOT EXISTS ix_notification_outbox_status ON notification_outbox (status);
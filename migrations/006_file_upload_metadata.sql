@@ -0,0 +1,5 @@
+-- Tamanho e hash SHA-256 calculados durante o upload.
+
+ALTER TABLE files ADD COLUMN IF NOT EXISTS size BIGINT;
+ALTER TABLE files ADD COLUMN IF NOT EXISTS sha256 VARCHAR(64);
+CREATE INDEX IF NOT EXISTS ix_files_sha256 ON files (sha256);
@@ -0,0 +1,10 @@
+-- Armazenamento por conteúdo: um file_blobs por SHA-256, com a contagem de referências.
+-- Uploads antigos (sem sha256 ou fora de UPLOAD_DIR/<ab>/<cd>/) continuam onde estão e
+-- são apagados junto com o registro, como antes.
+
+CREATE TABLE IF NOT EXISTS file_blobs (
+    sha256 VARCHAR(64) PRIMARY KEY,
+    size BIGINT NOT NULL,
+    ref_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+);
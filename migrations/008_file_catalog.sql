@@ -0,0 +1,10 @@
+-- Catálogo de arquivos: dono, anexo a evento, data de criação e índices da listagem.
+
+ALTER TABLE files ADD COLUMN IF NOT EXISTS owner_id INTEGER REFERENCES users (id) ON DELETE SET NULL;
+ALTER TABLE files ADD COLUMN IF NOT EXISTS event_id INTEGER REFERENCES events (id) ON DELETE SET NULL;
+ALTER TABLE files ADD COLUMN IF NOT EXISTS created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now();
+
+CREATE INDEX IF NOT EXISTS ix_files_created_id ON files (created_at, id);
+CREATE INDEX IF NOT EXISTS ix_files_owner_created ON files (owner_id, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_files_event_id ON files (event_id);
+CREATE INDEX IF NOT EXISTS ix_files_content_type ON files (content_type varchar_pattern_ops);
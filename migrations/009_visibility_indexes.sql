@@ -0,0 +1,14 @@
+-- Índices dos predicados de visibilidade (app/services/visibility.py): calendários públicos
+-- ou do dono, eventos criados pelo usuário e participantes (user_events) nos dois sentidos.
+-- CONCURRENTLY não trava as escritas; por isso fora de transação.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_calendars_owner_id ON calendars (owner_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_calendars_is_private ON calendars (is_private);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_events_created_by ON events (created_by);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_user_events_event_user ON user_events (event_id, user_id);
+
+-- Conferir o plano com um usuário comum, ex:
+-- EXPLAIN ANALYZE SELECT * FROM events WHERE calendar_id IN (
+--     SELECT id FROM calendars WHERE is_private IS NOT TRUE OR owner_id = 42)
+--   OR created_by = 42 OR id IN (SELECT event_id FROM user_events WHERE user_id = 42)
+-- LIMIT 100;
@@ -0,0 +1,4 @@
+-- Free/busy (POST /crud/freebusy): a consulta parte de user_events pela PK (user_id, event_id)
+-- e filtra events por date < fim da janela.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_events_date ON events (date);
@@ -0,0 +1,98 @@
+-- Busca textual (GET /crud/search/*, app/services/search.py) em eventos, usuários e calendários.
+--
+-- Cada tabela ganha uma coluna search_vector (tsvector com pesos: título/nome A, descrição/e-mail B,
+-- local C) mantida por trigger e indexada com GIN. A configuração pt_unaccent é a portuguese com
+-- unaccent antes do stemmer: "reuniao" encontra "reunião". O fallback por trigramas (erros de
+-- digitação) usa f_unaccent(lower(...)) com índice gin_trgm_ops.
+
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'pt_unaccent') THEN
+        CREATE TEXT SEARCH CONFIGURATION pt_unaccent (COPY = portuguese);
+        ALTER TEXT SEARCH CONFIGURATION pt_unaccent
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+    END IF;
+END
+$$;
+
+-- unaccent() é STABLE (depende do search_path); índices de expressão exigem IMMUTABLE
+CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;
+
+-- Eventos
+ALTER TABLE events ADD COLUMN IF NOT EXISTS search_vector tsvector;
+
+CREATE OR REPLACE FUNCTION events_search_vector() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('pt_unaccent', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('pt_unaccent', coalesce(NEW.description, '')), 'B') ||
+        setweight(to_tsvector('pt_unaccent', coalesce(NEW.location, '')), 'C');
+    RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS events_search_vector ON events;
+CREATE TRIGGER events_search_vector BEFORE INSERT OR UPDATE OF title, description, location ON events
+    FOR EACH ROW EXECUTE FUNCTION events_search_vector();
+
+UPDATE events SET search_vector =
+    setweight(to_tsvector('pt_unaccent', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('pt_unaccent', coalesce(description, '')), 'B') ||
+    setweight(to_tsvector('pt_unaccent', coalesce(location, '')), 'C')
+WHERE search_vector IS NULL;
+
+CREATE INDEX IF NOT EXISTS ix_events_search_vector ON events USING gin (search_vector);
+CREATE INDEX IF NOT EXISTS ix_events_title_trgm ON events USING gin (f_unaccent(lower(title)) gin_trgm_ops);
+
+-- Usuários
+ALTER TABLE users ADD COLUMN IF NOT EXISTS search_vector tsvector;
+
+CREATE OR REPLACE FUNCTION users_search_vector() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('pt_unaccent', coalesce(NEW.name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(NEW.email, '')), 'B');
+    RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS users_search_vector ON users;
+CREATE TRIGGER users_search_vector BEFORE INSERT OR UPDATE OF name, email ON users
+    FOR EACH ROW EXECUTE FUNCTION users_search_vector();
+
+UPDATE users SET search_vector =
+    setweight(to_tsvector('pt_unaccent', coalesce(name, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(email, '')), 'B')
+WHERE search_vector IS NULL;
+
+CREATE INDEX IF NOT EXISTS ix_users_search_vector ON users USING gin (search_vector);
+CREATE INDEX IF NOT EXISTS ix_users_name_unaccent_trgm ON users USING gin (f_unaccent(lower(name)) gin_trgm_ops);
+
+-- Calendários
+ALTER TABLE calendars ADD COLUMN IF NOT EXISTS search_vector tsvector;
+
+CREATE OR REPLACE FUNCTION calendars_search_vector() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('pt_unaccent', coalesce(NEW.name, '')), 'A') ||
+        setweight(to_tsvector('pt_unaccent', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS calendars_search_vector ON calendars;
+CREATE TRIGGER calendars_search_vector BEFORE INSERT OR UPDATE OF name, description ON calendars
+    FOR EACH ROW EXECUTE FUNCTION calendars_search_vector();
+
+UPDATE calendars SET search_vector =
+    setweight(to_tsvector('pt_unaccent', coalesce(name, '')), 'A') ||
+    setweight(to_tsvector('pt_unaccent', coalesce(description, '')), 'B')
+WHERE search_vector IS NULL;
+
+CREATE INDEX IF NOT EXISTS ix_calendars_search_vector ON calendars USING gin (search_vector);
+CREATE INDEX IF NOT EXISTS ix_calendars_name_trgm ON calendars USING gin (f_unaccent(lower(name)) gin_trgm_ops);
@@ -0,0 +1,23 @@
+-- Índices dos operadores de texto do filtro (app/utils/filter.py, TEXT_INDEXES):
+-- ct/sw/ew viram coluna ILIKE '%valor%', atendido por gin (coluna gin_trgm_ops);
+-- ieq vira lower(coluna) = lower(valor), atendido por btree (lower(coluna)).
+-- Os de lower() também estão nos modelos (bancos novos recebem pelo create_all).
+--
+-- Sem CONCURRENTLY: a logger é particionada (o índice é criado em cada partição) e o
+-- CONCURRENTLY não vale para tabela particionada. Em events/users, numa base grande, dá para
+-- rodar cada CREATE INDEX da parte de cima com CONCURRENTLY, fora de transação.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS ix_events_title_ilike ON events USING gin (title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_users_name_ilike ON users USING gin (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_users_email_ilike ON users USING gin (email gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_users_email_lower ON users (lower(email));
+
+CREATE INDEX IF NOT EXISTS ix_logger_entity_ilike ON logger USING gin (entity gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_logger_entity_lower ON logger (lower(entity));
+
+-- Conferir o plano, ex:
+-- EXPLAIN SELECT * FROM events WHERE title ILIKE '%reuni%' LIMIT 50;
+-- EXPLAIN SELECT * FROM users WHERE lower(email) = lower('Fulano@Example.com');
+-- (python -m benchmarks run --only plans faz o mesmo para todos os índices de TEXT_INDEXES)
@@ -0,0 +1,15 @@
+-- Índices btree das colunas de ordenação (order_by do DSL, SORTABLE_FIELDS em
+-- app/utils/filter.py) que ainda não tinham índice; os mesmos estão nos modelos.
+-- Com o id como desempate, ORDER BY title, id LIMIT 50 lê o índice e para na 50ª linha
+-- (o empate em title fica com o Incremental Sort, só dentro do grupo).
+-- CONCURRENTLY não trava as escritas; por isso fora de transação.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_events_title ON events (title);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_name ON users (name);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_calendars_name ON calendars (name);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_user_profile_name ON user_profile (name);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_permissions_profile_id ON permissions (profile_id);
+
+-- Conferir o plano, ex:
+-- EXPLAIN SELECT * FROM events ORDER BY title DESC, id DESC LIMIT 50 OFFSET 1000;
+-- (python -m benchmarks run --only plans faz o mesmo para todos os campos de SORTABLE_FIELDS)
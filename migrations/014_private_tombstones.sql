@@ -0,0 +1,12 @@
+-- Tombstones de linhas privadas (app/models/tombstoneModel.py): a exclusão de um calendário
+-- privado, ou de um evento dele, só vai para quem via a linha no /crud/sync e no CalDAV
+-- (app/services/visibility.py, visible_tombstones). Os tombstones gravados antes desta
+-- migration ficam públicos.
+
+ALTER TABLE sync_tombstones ADD COLUMN IF NOT EXISTS is_private BOOLEAN NOT NULL DEFAULT false;
+
+CREATE TABLE IF NOT EXISTS sync_tombstone_audience (
+    user_id INTEGER NOT NULL,
+    tombstone_id INTEGER NOT NULL REFERENCES sync_tombstones (id) ON DELETE CASCADE,
+    PRIMARY KEY (user_id, tombstone_id)
+);